@@ -28,11 +28,11 @@ from transformers import (
     DPTImageProcessor, DPTForDepthEstimation,
     YolosImageProcessor, YolosForObjectDetection
 )
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Request
 import uvicorn
 import asyncio
 import aiohttp
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import whisper
 import speech_recognition as sr
 import pyttsx3
@@ -45,6 +45,10 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import joblib
 
+from config import settings
+from ai.inference_batching import InferenceBatcher, BatchingConfig
+from ai.inference_cache import InferenceResultCache, ModelRegistry, normalize_text
+
 logger = logging.getLogger(__name__)
 
 class AIModel(Enum):
@@ -108,10 +112,15 @@ class AudioAnalysis:
     timestamp: datetime
     metadata: Dict[str, Any]
 
+class ModelVersionUpdate(BaseModel):
+    """New deployed version of a cached model"""
+    version: str = Field(..., min_length=1, max_length=128, pattern=r"^\S+$")
+
 class AdvancedAIService:
     """Advanced AI service with multiple models"""
     
-    def __init__(self, redis_client: redis.Redis, openai_api_key: str):
+    def __init__(self, redis_client: redis.Redis, openai_api_key: str,
+                 batching_config: Optional[BatchingConfig] = None):
         self.redis = redis_client
         self.openai_client = openai.OpenAI(api_key=openai_api_key)
         
@@ -126,6 +135,12 @@ class AdvancedAIService:
         
         # Initialize audio models
         self._initialize_audio_models()
+        
+        # Initialize batched inference
+        self._initialize_batching(batching_config)
+        
+        # Initialize inference result cache
+        self._initialize_result_cache()
     
     def _initialize_models(self):
         """Initialize AI models"""
@@ -207,6 +222,52 @@ class AdvancedAIService:
         except Exception as e:
             logger.error(f"Failed to initialize audio models: {e}")
     
+    def _initialize_batching(self, batching_config: Optional[BatchingConfig] = None):
+        """Register batched forward passes for the vision and text models"""
+        config = batching_config or BatchingConfig(
+            max_batch_size=settings.AI_BATCH_MAX_SIZE,
+            max_wait_ms=settings.AI_BATCH_MAX_WAIT_MS,
+            max_queue_size=settings.AI_BATCH_MAX_QUEUE,
+            torch_threads=settings.AI_INFERENCE_THREADS or None
+        )
+        self.inference_batcher = InferenceBatcher(config)
+        self.inference_batcher.register_model("clip", self._clip_batch)
+        self.inference_batcher.register_model("yolo", self._yolo_batch)
+        
+        # spaCy and TextBlob do not run on torch, so skip inference mode for them
+        self.inference_batcher.register_model(
+            "sentiment",
+            self._sentiment_batch,
+            BatchingConfig(
+                max_batch_size=config.max_batch_size,
+                max_wait_ms=config.max_wait_ms,
+                max_queue_size=config.max_queue_size,
+                inference_mode=False
+            )
+        )
+    
+    def _initialize_result_cache(self):
+        """Register cached models and their versions"""
+        self.model_registry = ModelRegistry(self.redis)
+        self.model_registry.register("vision_clip", "openai/clip-vit-base-patch32")
+        self.model_registry.register("vision_blip", "Salesforce/blip-image-captioning-base")
+        self.model_registry.register("vision_yolo", "hustvl/yolos-tiny")
+        self.model_registry.register("vision_dpt", "Intel/dpt-large")
+        self.model_registry.register("vision_mediapipe", mp.__version__)
+        self.model_registry.register("vision_custom", "1.0.0")
+        self.model_registry.register("translation", "googletrans")
+        self.model_registry.register("sentiment", "textblob+spacy:en_core_web_sm")
+        self.model_registry.register("tts", f"gtts:{gtts.__version__}")
+        
+        self.result_cache = InferenceResultCache(
+            self.redis,
+            self.model_registry,
+            cache_dir=settings.AI_CACHE_DIR,
+            ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+            max_redis_bytes=settings.AI_CACHE_MAX_REDIS_BYTES,
+            max_disk_bytes=settings.AI_CACHE_MAX_DISK_BYTES
+        )
+    
     async def generate_text(self, prompt: str, model: AIModel = AIModel.GPT4, 
                            max_tokens: int = 1000, temperature: float = 0.7) -> AIResponse:
         """Generate text using AI models"""
@@ -362,21 +423,15 @@ class AdvancedAIService:
         try:
             # Decode base64 image
             image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
-            image_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
             
-            if model == VisionModel.CLIP:
-                analysis = await self._analyze_with_clip(image)
-            elif model == VisionModel.BLIP:
-                analysis = await self._analyze_with_blip(image)
-            elif model == VisionModel.YOLO:
-                analysis = await self._analyze_with_yolo(image)
-            elif model == VisionModel.DPT:
-                analysis = await self._analyze_with_dpt(image)
-            elif model == VisionModel.MEDIAPIPE:
-                analysis = await self._analyze_with_mediapipe(image_cv)
-            else:
-                analysis = await self._analyze_with_custom(image)
+            # Failed analyses carry an error and must not be cached; an image with
+            # nothing detected is a valid zero-confidence result and is
+            analysis = await self.result_cache.get_or_compute(
+                f"vision_{model.value}",
+                image_bytes,
+                lambda: self._run_vision_model(image_bytes, model),
+                cacheable=lambda result: "error" not in result
+            )
             
             vision_analysis = VisionAnalysis(
                 analysis_id=f"va_{uuid.uuid4().hex[:16]}",
@@ -415,36 +470,56 @@ class AdvancedAIService:
             logger.error(f"Failed to analyze image: {e}")
             raise
     
+    async def _run_vision_model(self, image_bytes: bytes, model: VisionModel) -> Dict[str, Any]:
+        """Decode image bytes and dispatch to the selected vision model"""
+        image = Image.open(io.BytesIO(image_bytes))
+        
+        if model == VisionModel.CLIP:
+            return await self._analyze_with_clip(image)
+        elif model == VisionModel.BLIP:
+            return await self._analyze_with_blip(image)
+        elif model == VisionModel.YOLO:
+            return await self._analyze_with_yolo(image)
+        elif model == VisionModel.DPT:
+            return await self._analyze_with_dpt(image)
+        elif model == VisionModel.MEDIAPIPE:
+            image_cv = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            return await self._analyze_with_mediapipe(image_cv)
+        else:
+            return await self._analyze_with_custom(image)
+    
     async def _analyze_with_clip(self, image: Image.Image) -> Dict[str, Any]:
         """Analyze image using CLIP"""
         try:
-            # CLIP analysis
-            inputs = self.clip_processor(text=["a photo of a person", "a photo of an object", "a photo of a scene"], 
-                                       images=image, return_tensors="pt", padding=True)
-            
-            outputs = self.clip_model(**inputs)
-            logits_per_image = outputs.logits_per_image
-            probs = logits_per_image.softmax(dim=1)
-            
-            # Get top predictions
-            top_predictions = []
-            for i, prob in enumerate(probs[0]):
-                top_predictions.append({
-                    "label": ["person", "object", "scene"][i],
-                    "confidence": float(prob)
-                })
-            
-            return {
-                "objects": top_predictions,
-                "text": [],
-                "emotions": [],
-                "confidence": float(torch.max(probs)),
-                "metadata": {"model": "clip"}
-            }
+            return await self.inference_batcher.submit("clip", image)
             
         except Exception as e:
             logger.error(f"Failed to analyze with CLIP: {e}")
-            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0}
+            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0, "error": str(e)}
+    
+    def _clip_batch(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """Run CLIP zero-shot classification over a batch of images"""
+        labels = ["person", "object", "scene"]
+        inputs = self.clip_processor(text=["a photo of a person", "a photo of an object", "a photo of a scene"], 
+                                   images=images, return_tensors="pt", padding=True)
+        
+        outputs = self.clip_model(**inputs)
+        probs = outputs.logits_per_image.softmax(dim=1)
+        
+        results = []
+        for image_probs in probs:
+            results.append({
+                "objects": [
+                    {"label": labels[i], "confidence": float(prob)}
+                    for i, prob in enumerate(image_probs)
+                ],
+                "text": [],
+                "emotions": [],
+                "confidence": float(torch.max(image_probs)),
+                "metadata": {"model": "clip", "batch_size": len(images)}
+            })
+        
+        return results
     
     async def _analyze_with_blip(self, image: Image.Image) -> Dict[str, Any]:
         """Analyze image using BLIP"""
@@ -464,38 +539,45 @@ class AdvancedAIService:
             
         except Exception as e:
             logger.error(f"Failed to analyze with BLIP: {e}")
-            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0}
+            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0, "error": str(e)}
     
     async def _analyze_with_yolo(self, image: Image.Image) -> Dict[str, Any]:
         """Analyze image using YOLO"""
         try:
-            # YOLO analysis
-            inputs = self.yolo_processor(images=image, return_tensors="pt")
-            outputs = self.yolo_model(**inputs)
-            
-            # Process outputs
-            target_sizes = torch.tensor([image.size[::-1]])
-            results = self.yolo_processor.post_process_object_detection(outputs, target_sizes=target_sizes)[0]
+            return await self.inference_batcher.submit("yolo", image)
             
+        except Exception as e:
+            logger.error(f"Failed to analyze with YOLO: {e}")
+            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0, "error": str(e)}
+    
+    def _yolo_batch(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        """Run YOLOS object detection over a batch of images"""
+        inputs = self.yolo_processor(images=images, return_tensors="pt")
+        outputs = self.yolo_model(**inputs)
+        
+        # Process outputs
+        target_sizes = torch.tensor([image.size[::-1] for image in images])
+        batch_results = self.yolo_processor.post_process_object_detection(outputs, target_sizes=target_sizes)
+        
+        results = []
+        for detections in batch_results:
             objects = []
-            for score, label, box in zip(results["scores"], results["labels"], results["boxes"]):
+            for score, label, box in zip(detections["scores"], detections["labels"], detections["boxes"]):
                 objects.append({
                     "label": self.yolo_model.config.id2label[label.item()],
                     "confidence": float(score),
                     "bbox": box.tolist()
                 })
             
-            return {
+            results.append({
                 "objects": objects,
                 "text": [],
                 "emotions": [],
-                "confidence": float(torch.max(results["scores"])),
-                "metadata": {"model": "yolo"}
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to analyze with YOLO: {e}")
-            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0}
+                "confidence": float(torch.max(detections["scores"])) if len(detections["scores"]) else 0.0,
+                "metadata": {"model": "yolo", "batch_size": len(images)}
+            })
+        
+        return results
     
     async def _analyze_with_dpt(self, image: Image.Image) -> Dict[str, Any]:
         """Analyze image using DPT for depth estimation"""
@@ -528,7 +610,7 @@ class AdvancedAIService:
             
         except Exception as e:
             logger.error(f"Failed to analyze with DPT: {e}")
-            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0}
+            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0, "error": str(e)}
     
     async def _analyze_with_mediapipe(self, image_cv: np.ndarray) -> Dict[str, Any]:
         """Analyze image using MediaPipe"""
@@ -576,7 +658,7 @@ class AdvancedAIService:
             
         except Exception as e:
             logger.error(f"Failed to analyze with MediaPipe: {e}")
-            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0}
+            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0, "error": str(e)}
     
     async def _analyze_with_custom(self, image: Image.Image) -> Dict[str, Any]:
         """Analyze image using custom model"""
@@ -592,7 +674,7 @@ class AdvancedAIService:
             
         except Exception as e:
             logger.error(f"Failed to analyze with custom model: {e}")
-            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0}
+            return {"objects": [], "text": [], "emotions": [], "confidence": 0.0, "error": str(e)}
     
     async def analyze_audio(self, audio_data: str, model: AudioModel = AudioModel.WHISPER) -> AudioAnalysis:
         """Analyze audio using AI models"""
@@ -720,6 +802,17 @@ class AdvancedAIService:
     
     async def translate_text(self, text: str, target_language: str = "en") -> Dict[str, Any]:
         """Translate text using AI models"""
+        result = await self.result_cache.get_or_compute(
+            "translation",
+            normalize_text(text),
+            lambda: self._translate_text(text, target_language),
+            params={"target_language": target_language},
+            cacheable=lambda result: "error" not in result
+        )
+        return {**result, "timestamp": datetime.now().isoformat()}
+    
+    async def _translate_text(self, text: str, target_language: str) -> Dict[str, Any]:
+        """Run the translator without caching"""
         try:
             # Detect source language
             source_language = self.translator.detect(text).lang
@@ -732,8 +825,7 @@ class AdvancedAIService:
                 "translated_text": translation.text,
                 "source_language": source_language,
                 "target_language": target_language,
-                "confidence": 0.9,
-                "timestamp": datetime.now().isoformat()
+                "confidence": 0.9
             }
             
         except Exception as e:
@@ -743,12 +835,30 @@ class AdvancedAIService:
     async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """Analyze text sentiment using AI models"""
         try:
-            # Use TextBlob for sentiment analysis
-            blob = TextBlob(text)
-            sentiment = blob.sentiment
+            result = await self.result_cache.get_or_compute(
+                "sentiment",
+                normalize_text(text),
+                lambda: self._analyze_sentiment(text)
+            )
+            return {**result, "timestamp": datetime.now().isoformat()}
             
-            # Use spaCy for additional analysis
-            doc = self.nlp(text)
+        except Exception as e:
+            logger.error(f"Failed to analyze sentiment: {e}")
+            return {"error": str(e)}
+    
+    async def _analyze_sentiment(self, text: str) -> Dict[str, Any]:
+        """Run batched sentiment analysis, leaving out the per-call timestamp so the result can be cached"""
+        result = await self.inference_batcher.submit("sentiment", text)
+        return {key: value for key, value in result.items() if key != "timestamp"}
+    
+    def _sentiment_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Run TextBlob sentiment and a single spaCy pipe over a batch of texts"""
+        docs = self.nlp.pipe(texts, batch_size=len(texts))
+        
+        results = []
+        for text, doc in zip(texts, docs):
+            # Use TextBlob for sentiment analysis
+            sentiment = TextBlob(text).sentiment
             
             # Extract entities
             entities = [(ent.text, ent.label_) for ent in doc.ents]
@@ -756,7 +866,7 @@ class AdvancedAIService:
             # Extract keywords
             keywords = [token.text for token in doc if token.pos_ in ["NOUN", "ADJ", "VERB"]]
             
-            return {
+            results.append({
                 "text": text,
                 "sentiment": {
                     "polarity": sentiment.polarity,
@@ -767,35 +877,47 @@ class AdvancedAIService:
                 "keywords": keywords,
                 "confidence": abs(sentiment.polarity),
                 "timestamp": datetime.now().isoformat()
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to analyze sentiment: {e}")
-            return {"error": str(e)}
+            })
+        
+        return results
     
     async def generate_speech(self, text: str, language: str = "en", voice: str = "default") -> str:
         """Generate speech from text using TTS"""
         try:
-            # Generate speech using gTTS
-            tts = self.gtts_engine(text=text, lang=language, slow=False)
+            # Audio is large, so it is cached as raw bytes in the on-disk tier
+            audio_data = await self.result_cache.get_or_compute(
+                "tts",
+                normalize_text(text),
+                lambda: self._synthesize_speech(text, language),
+                params={"language": language, "voice": voice},
+                binary=True,
+                cacheable=lambda audio: bool(audio)
+            )
             
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
-                tts.save(tmp_file.name)
-                
-                # Read file and convert to base64
-                with open(tmp_file.name, "rb") as f:
-                    audio_data = f.read()
-                
-                # Clean up
-                os.unlink(tmp_file.name)
-                
-                return base64.b64encode(audio_data).decode()
+            return base64.b64encode(audio_data).decode()
                 
         except Exception as e:
             logger.error(f"Failed to generate speech: {e}")
             return ""
     
+    async def _synthesize_speech(self, text: str, language: str) -> bytes:
+        """Synthesize speech with gTTS and return the raw MP3 bytes"""
+        # Generate speech using gTTS
+        tts = self.gtts_engine(text=text, lang=language, slow=False)
+        
+        # Save to temporary file
+        with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
+            tts.save(tmp_file.name)
+            
+            # Read file
+            with open(tmp_file.name, "rb") as f:
+                audio_data = f.read()
+            
+            # Clean up
+            os.unlink(tmp_file.name)
+            
+            return audio_data
+    
     async def get_ai_analytics(self) -> Dict[str, Any]:
         """Get AI analytics"""
         try:
@@ -817,6 +939,8 @@ class AdvancedAIService:
                     "total": len(audio_analyses),
                     "active": len([a for a in audio_analyses if await self.redis.ttl(a) > 0])
                 },
+                "batching": self.inference_batcher.get_stats(),
+                "result_cache": self.result_cache.get_stats(),
                 "models": {
                     "text_generation": ["gpt-4", "gpt-3.5-turbo", "claude-3", "bard"],
                     "computer_vision": ["clip", "blip", "yolo", "dpt", "mediapipe"],
@@ -903,6 +1027,15 @@ class AdvancedAIAPI:
         @self.app.get("/analytics")
         async def get_analytics():
             return await self.ai_service.get_ai_analytics()
+        
+        @self.app.get("/cache/stats")
+        async def get_cache_stats():
+            return self.ai_service.result_cache.get_stats()
+        
+        @self.app.post("/models/{model_id}/version")
+        async def set_model_version(model_id: str, update: ModelVersionUpdate):
+            await self.ai_service.model_registry.set_version(model_id, update.version)
+            return {"model_id": model_id, "version": update.version}
     
     def get_app(self) -> FastAPI:
         """Get FastAPI app"""
@@ -418,6 +418,45 @@ class AdvancedMLService:
                 'error': str(e)
             }
             
+    async def detect_fraud_batch(self, 
+                                transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Detect fraud in many transactions with one scaler and model call"""
+        try:
+            model_id = 'fraud_detection_v1'
+            
+            if model_id not in self.trained_models:
+                return [{'is_fraud': False, 'confidence': 0.0, 'error': 'Model not trained'}
+                        for _ in transactions]
+            if not transactions:
+                return []
+                
+            model = self.trained_models[model_id]
+            scaler = self.scalers[model_id]
+            
+            # Build one feature matrix in the model's column order
+            feature_names = self.models[model_id].features
+            rows = [self._prepare_fraud_features(t) for t in transactions]
+            features_scaled = scaler.transform(
+                np.array([[row[name] for name in feature_names] for row in rows], dtype=np.float64)
+            )
+            
+            predictions = model.predict(features_scaled)
+            confidences = model.predict_proba(features_scaled).max(axis=1)
+            
+            return [
+                {
+                    'is_fraud': bool(prediction),
+                    'confidence': float(confidence),
+                    'features_used': feature_names,
+                    'model_id': model_id
+                }
+                for prediction, confidence in zip(predictions, confidences)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Batch fraud detection failed: {str(e)}")
+            return [{'is_fraud': False, 'confidence': 0.0, 'error': str(e)} for _ in transactions]
+            
     async def predict_price(self, 
                            nft_data: Dict[str, Any]) -> Dict[str, Any]:
         """Predict NFT price"""
@@ -30,6 +30,9 @@ import cv2
 from PIL import Image
 import requests
 
+from config import settings
+from ai.inference_batching import InferenceBatcher, BatchingConfig
+
 logger = logging.getLogger(__name__)
 
 class ModelArchitecture(Enum):
@@ -88,6 +91,15 @@ class AdvancedDeepLearningService:
         # Initialize pre-trained models
         self._initialize_pretrained_models()
         
+        # Batch BERT forward passes across concurrent requests
+        self.inference_batcher = InferenceBatcher(BatchingConfig(
+            max_batch_size=settings.AI_BATCH_MAX_SIZE,
+            max_wait_ms=settings.AI_BATCH_MAX_WAIT_MS,
+            max_queue_size=settings.AI_BATCH_MAX_QUEUE,
+            torch_threads=settings.AI_INFERENCE_THREADS or None
+        ))
+        self.inference_batcher.register_model('bert_sentiment', self._bert_sentiment_batch)
+        
     def _initialize_pretrained_models(self):
         """Initialize pre-trained models"""
         try:
@@ -458,49 +470,55 @@ class AdvancedDeepLearningService:
                               context: str = "nft_marketplace") -> List[Dict[str, Any]]:
         """Analyze sentiment of text data"""
         try:
-            sentiments = []
-            
-            for text in text_data:
-                # Use BERT for sentiment analysis
-                if 'bert' in self.trained_models:
-                    # Tokenize text
-                    inputs = self.tokenizers['bert'](text, return_tensors='pt', truncation=True, padding=True)
-                    
-                    # Get model output
-                    with torch.no_grad():
-                        outputs = self.trained_models['bert'](**inputs)
-                        # Simple sentiment analysis (would need fine-tuning for better results)
-                        sentiment_score = float(torch.mean(outputs.last_hidden_state).item())
-                        
-                    # Classify sentiment
-                    if sentiment_score > 0.1:
-                        sentiment = 'positive'
-                    elif sentiment_score < -0.1:
-                        sentiment = 'negative'
-                    else:
-                        sentiment = 'neutral'
-                        
-                    sentiments.append({
-                        'text': text,
-                        'sentiment': sentiment,
-                        'score': sentiment_score,
-                        'confidence': abs(sentiment_score)
-                    })
-                else:
-                    # Fallback to mock sentiment
-                    sentiments.append({
-                        'text': text,
-                        'sentiment': 'neutral',
-                        'score': 0.0,
-                        'confidence': 0.5
-                    })
-                    
-            return sentiments
+            # Use BERT for sentiment analysis
+            if 'bert' in self.trained_models:
+                return await self.inference_batcher.submit_many('bert_sentiment', text_data)
+                
+            # Fallback to mock sentiment
+            return [
+                {
+                    'text': text,
+                    'sentiment': 'neutral',
+                    'score': 0.0,
+                    'confidence': 0.5
+                }
+                for text in text_data
+            ]
             
         except Exception as e:
             logger.error(f"Failed to analyze sentiment: {str(e)}")
             return []
             
+    def _bert_sentiment_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Score a padded batch of texts with a single BERT forward pass"""
+        inputs = self.tokenizers['bert'](texts, return_tensors='pt', truncation=True, padding=True)
+        outputs = self.trained_models['bert'](**inputs)
+        
+        # Mean over real tokens only so padding does not skew shorter texts
+        # (would need fine-tuning for better results)
+        mask = inputs['attention_mask'].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+        token_counts = mask.sum(dim=(1, 2)) * outputs.last_hidden_state.shape[-1]
+        scores = (outputs.last_hidden_state * mask).sum(dim=(1, 2)) / token_counts
+        
+        sentiments = []
+        for text, score in zip(texts, scores.tolist()):
+            # Classify sentiment
+            if score > 0.1:
+                sentiment = 'positive'
+            elif score < -0.1:
+                sentiment = 'negative'
+            else:
+                sentiment = 'neutral'
+                
+            sentiments.append({
+                'text': text,
+                'sentiment': sentiment,
+                'score': float(score),
+                'confidence': abs(float(score))
+            })
+            
+        return sentiments
+        
     def _build_transformer_model(self, 
                                user_dim: int, 
                                nft_dim: int, 
@@ -15,6 +15,7 @@ from sklearn.metrics import classification_report, confusion_matrix
 import joblib
 import json
 import asyncio
+import uuid
 from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey, Boolean, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -23,6 +24,16 @@ from pydantic import BaseModel, Field
 import redis
 import logging
 
+from config import settings
+from database import get_db
+
+from ai.fraud_feature_store import (
+    BEHAVIOR_HISTORY_LIMIT, BehaviorHistory, FraudFeatureStore, FeatureEvent, fraud_feature_store,
+    backfill_from_fraud_events
+)
+from ai.fraud_rule_engine import FraudRuleEngine, CompiledRuleSet, fraud_rule_engine
+from ai.fraud_batch_scoring import BatchModel, BatchScore, score_batch
+
 Base = declarative_base()
 
 class FraudRule(Base):
@@ -184,10 +195,17 @@ class FraudModelTrainingRequest(BaseModel):
     training_data: List[Dict[str, Any]] = Field(..., min_items=10)
     parameters: Dict[str, Any] = Field(default_factory=dict)
 
+class FraudBatchScoreRequest(BaseModel):
+    events: List[FraudDetectionRequest] = Field(..., min_items=1, max_items=100000)
+    persist: bool = False
+
 class FraudDetection:
-    def __init__(self, db_session, redis_client):
+    def __init__(self, db_session, redis_client, feature_store: Optional[FraudFeatureStore] = None,
+                 rule_engine: Optional[FraudRuleEngine] = None):
         self.db = db_session
         self.redis = redis_client
+        self.feature_store = feature_store or fraud_feature_store
+        self.rule_engine = rule_engine or fraud_rule_engine
         self.models = {}
         self.scalers = {}
         self.encoders = {}
@@ -250,6 +268,16 @@ class FraudDetection:
         self.db.add(fraud_event)
         self.db.commit()
         
+        # Update rolling features so the next score sees this event
+        if request.user_id:
+            self.feature_store.ingest(FeatureEvent.from_event_data(
+                user_id=request.user_id,
+                tenant_id=tenant_id,
+                event_type=request.event_type,
+                event_data=request.event_data,
+                is_fraud=is_fraud
+            ))
+        
         return FraudDetectionResponse(
             event_id=event_id,
             fraud_score=fraud_score,
@@ -260,6 +288,88 @@ class FraudDetection:
             recommendations=recommendations
         )
     
+    async def detect_fraud_batch(self, requests: List[FraudDetectionRequest],
+                                tenant_id: Optional[str] = None,
+                                persist: bool = False,
+                                index_offset: int = 0) -> List[BatchScore]:
+        """Score many events at once, returning results in input order
+        
+        Features are extracted into one matrix per model so each model is called
+        once per batch, and rules are evaluated column-wise. With ``persist`` the
+        events are stored in a single commit and fed to the feature store.
+        """
+        if not requests:
+            return []
+        
+        memo: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        feature_rows = [
+            await self._extract_features(request.event_data, request.user_id, tenant_id, memo)
+            for request in requests
+        ]
+        rule_results = self._get_rule_set(tenant_id).evaluate_batch(
+            [(request.event_data, features) for request, features in zip(requests, feature_rows)]
+        )
+        results = score_batch(feature_rows, rule_results, await self._get_batch_models(tenant_id), index_offset)
+        
+        if persist:
+            self._persist_batch(requests, feature_rows, results, tenant_id)
+        
+        return results
+    
+    def _persist_batch(self, requests: List[FraudDetectionRequest], feature_rows: List[Dict[str, Any]],
+                       results: List[BatchScore], tenant_id: Optional[str]):
+        """Store batch-scored events and update rolling features"""
+        self.db.bulk_save_objects([
+            FraudEvent(
+                event_id=str(uuid.uuid4()),
+                tenant_id=tenant_id,
+                user_id=request.user_id,
+                event_type=request.event_type,
+                fraud_score=result.fraud_score,
+                risk_level=result.risk_level,
+                event_data=request.event_data,
+                features=features,
+                context=request.context,
+                triggered_rules=result.triggered_rules,
+                detection_method='ml_rule_combined_batch',
+                confidence_score=result.confidence_score
+            )
+            for request, features, result in zip(requests, feature_rows, results)
+        ])
+        self.db.commit()
+        
+        for request, result in zip(requests, results):
+            if request.user_id:
+                self.feature_store.ingest(FeatureEvent.from_event_data(
+                    user_id=request.user_id,
+                    tenant_id=tenant_id,
+                    event_type=request.event_type,
+                    event_data=request.event_data,
+                    is_fraud=result.is_fraud
+                ))
+    
+    async def _get_batch_models(self, tenant_id: Optional[str]) -> List[BatchModel]:
+        """Active models for a tenant with their fitted estimators"""
+        models = self.db.query(FraudModel).filter(
+            FraudModel.tenant_id == tenant_id,
+            FraudModel.is_active == True
+        ).all()
+        
+        batch_models = []
+        for model in models:
+            try:
+                if model.model_id not in self.models:
+                    await self._load_model(model.model_id)
+                batch_models.append(BatchModel(
+                    model_id=model.model_id,
+                    algorithm=model.algorithm,
+                    estimator=self.models[model.model_id],
+                    feature_names=list((model.model_data or {}).get('features', []))
+                ))
+            except Exception as e:
+                self.logger.error(f"Error loading model {model.model_id} for batch scoring: {e}")
+        return batch_models
+    
     async def create_fraud_rule(self, request: FraudRuleCreate, 
                                tenant_id: Optional[str] = None) -> str:
         """Create fraud detection rule"""
@@ -279,6 +389,10 @@ class FraudDetection:
         self.db.add(rule)
         self.db.commit()
         
+        # Recompile this tenant's rules on the next detection, here and on other workers
+        self.rule_engine.invalidate(tenant_id)
+        self._bump_rules_version(tenant_id)
+        
         return rule_id
     
     async def train_fraud_model(self, request: FraudModelTrainingRequest, 
@@ -344,10 +458,21 @@ class FraudDetection:
             raise e
     
     async def _extract_features(self, event_data: Dict[str, Any], 
-                              user_id: Optional[int], tenant_id: Optional[str]) -> Dict[str, Any]:
-        """Extract features from event data for fraud detection"""
+                              user_id: Optional[int], tenant_id: Optional[str],
+                              memo: Optional[Dict[Tuple[str, Any], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Extract features from event data for fraud detection
+        
+        ``memo`` shares per-user, per-IP and per-device lookups across a batch.
+        """
         features = {}
         
+        async def lookup(kind: str, key: Any, compute):
+            if memo is None:
+                return await compute()
+            if (kind, key) not in memo:
+                memo[(kind, key)] = await compute()
+            return memo[(kind, key)]
+        
         # Basic event features
         features['event_type'] = event_data.get('event_type', 'unknown')
         features['timestamp'] = datetime.utcnow().timestamp()
@@ -356,7 +481,7 @@ class FraudDetection:
         if user_id:
             features['user_id'] = user_id
             # Get user behavior features
-            user_features = await self._get_user_behavior_features(user_id, tenant_id)
+            user_features = await lookup('behavior', user_id, lambda: self._get_user_behavior_features(user_id, tenant_id))
             features.update(user_features)
         
         # Transaction features
@@ -368,13 +493,13 @@ class FraudDetection:
         if 'ip_address' in event_data:
             features['ip_address'] = event_data['ip_address']
             # Get geographic features
-            geo_features = await self._get_geographic_features(event_data['ip_address'])
+            geo_features = await lookup('geo', event_data['ip_address'], lambda: self._get_geographic_features(event_data['ip_address']))
             features.update(geo_features)
         
         # Device features
         if 'user_agent' in event_data:
             features['user_agent'] = event_data['user_agent']
-            device_features = await self._extract_device_features(event_data['user_agent'])
+            device_features = await lookup('device', event_data['user_agent'], lambda: self._extract_device_features(event_data['user_agent']))
             features.update(device_features)
         
         # Time features
@@ -385,48 +510,33 @@ class FraudDetection:
         
         # Velocity features
         if user_id:
-            velocity_features = await self._calculate_velocity_features(user_id, tenant_id)
+            velocity_features = await lookup('velocity', user_id, lambda: self._calculate_velocity_features(user_id, tenant_id))
             features.update(velocity_features)
         
         return features
     
     async def _get_user_behavior_features(self, user_id: int, tenant_id: Optional[str]) -> Dict[str, Any]:
         """Get user behavior features"""
-        features = {}
-        
-        # Get user's transaction history
-        transactions = self.db.query(FraudEvent).filter(
+        return self.feature_store.get_behavior_features(
+            user_id, tenant_id, lambda: self._load_behavior_history(user_id, tenant_id)
+        )
+    
+    def _load_behavior_history(self, user_id: int, tenant_id: Optional[str]) -> BehaviorHistory:
+        """Amounts of the user's last transactions, newest first, and their fraud event count"""
+        transactions = self.db.query(FraudEvent.event_data).filter(
             FraudEvent.user_id == user_id,
             FraudEvent.tenant_id == tenant_id,
             FraudEvent.event_type == 'transaction'
-        ).order_by(FraudEvent.created_at.desc()).limit(100).all()
-        
-        if transactions:
-            # Calculate statistics
-            amounts = [t.event_data.get('amount', 0) for t in transactions if 'amount' in t.event_data]
-            if amounts:
-                features['avg_transaction_amount'] = np.mean(amounts)
-                features['max_transaction_amount'] = np.max(amounts)
-                features['transaction_frequency'] = len(transactions) / 30  # per day
-            else:
-                features['avg_transaction_amount'] = 0
-                features['max_transaction_amount'] = 0
-                features['transaction_frequency'] = 0
-        else:
-            features['avg_transaction_amount'] = 0
-            features['max_transaction_amount'] = 0
-            features['transaction_frequency'] = 0
+        ).order_by(FraudEvent.created_at.desc()).limit(BEHAVIOR_HISTORY_LIMIT).all()
+        amounts = [(event_data or {}).get('amount') for event_data, in transactions]
         
-        # Get fraud history
         fraud_events = self.db.query(FraudEvent).filter(
             FraudEvent.user_id == user_id,
             FraudEvent.tenant_id == tenant_id,
-            FraudEvent.is_fraud == True
+            FraudEvent.fraud_score > 0.7
         ).count()
         
-        features['fraud_history_count'] = fraud_events
-        
-        return features
+        return [float(amount) if amount is not None else None for amount in amounts], fraud_events
     
     async def _get_geographic_features(self, ip_address: str) -> Dict[str, Any]:
         """Get geographic features from IP address"""
@@ -484,34 +594,13 @@ class FraudDetection:
     
     async def _calculate_velocity_features(self, user_id: int, tenant_id: Optional[str]) -> Dict[str, Any]:
         """Calculate velocity features for user"""
-        features = {}
-        
-        # Get recent events
-        recent_events = self.db.query(FraudEvent).filter(
-            FraudEvent.user_id == user_id,
-            FraudEvent.tenant_id == tenant_id,
-            FraudEvent.created_at >= datetime.utcnow() - timedelta(hours=1)
-        ).all()
-        
-        features['events_last_hour'] = len(recent_events)
-        
-        # Get events in last 24 hours
-        daily_events = self.db.query(FraudEvent).filter(
-            FraudEvent.user_id == user_id,
-            FraudEvent.tenant_id == tenant_id,
-            FraudEvent.created_at >= datetime.utcnow() - timedelta(days=1)
-        ).all()
-        
-        features['events_last_24h'] = len(daily_events)
-        
-        # Calculate velocity
-        if len(daily_events) > 0:
-            time_span = (datetime.utcnow() - daily_events[-1].created_at).total_seconds() / 3600
-            features['event_velocity'] = len(daily_events) / max(time_span, 1)
-        else:
-            features['event_velocity'] = 0
-        
-        return features
+        return self.feature_store.get_velocity_features(user_id, tenant_id)
+    
+    async def rebuild_feature_store(self, lookback_hours: int = 24) -> int:
+        """Rebuild rolling features from FraudEvent history"""
+        return backfill_from_fraud_events(
+            self.feature_store, self.db, FraudEvent, lookback=timedelta(hours=lookback_hours)
+        )
     
     async def _calculate_ml_fraud_score(self, features: Dict[str, Any], 
                                       tenant_id: Optional[str] = None) -> float:
@@ -562,56 +651,76 @@ class FraudDetection:
                                features: Dict[str, Any], 
                                tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Check fraud detection rules"""
-        rules = self.db.query(FraudRule).filter(
-            FraudRule.tenant_id == tenant_id,
-            FraudRule.is_active == True
-        ).all()
-        
-        results = []
-        for rule in rules:
-            triggered = await self._evaluate_rule(rule, event_data, features)
-            results.append({
-                'rule_id': rule.rule_id,
-                'rule_name': rule.rule_name,
-                'triggered': triggered,
-                'severity': rule.severity
-            })
-        
-        return results
+        return self._get_rule_set(tenant_id).evaluate(event_data, features)
     
-    async def _evaluate_rule(self, rule: FraudRule, event_data: Dict[str, Any], 
-                           features: Dict[str, Any]) -> bool:
-        """Evaluate a fraud rule"""
-        conditions = rule.conditions
+    def _get_rule_set(self, tenant_id: Optional[str]) -> CompiledRuleSet:
+        """Get the compiled rule set for a tenant"""
+        def load_rules():
+            return self.db.query(FraudRule).filter(
+                FraudRule.tenant_id == tenant_id,
+                FraudRule.is_active == True
+            ).all()
         
-        # Check each condition
-        for condition in conditions:
-            field = condition.get('field')
-            operator = condition.get('operator')
-            value = condition.get('value')
-            
-            if field in event_data:
-                event_value = event_data[field]
-            elif field in features:
-                event_value = features[field]
-            else:
-                continue
-            
-            # Evaluate condition
-            if operator == 'equals' and event_value != value:
-                return False
-            elif operator == 'not_equals' and event_value == value:
-                return False
-            elif operator == 'greater_than' and event_value <= value:
-                return False
-            elif operator == 'less_than' and event_value >= value:
-                return False
-            elif operator == 'contains' and value not in str(event_value):
-                return False
-            elif operator == 'not_contains' and value in str(event_value):
-                return False
-        
-        return True
+        return self.rule_engine.get_rule_set(tenant_id, load_rules, self._get_rules_version(tenant_id))
+    
+    def _rules_version_key(self, tenant_id: Optional[str]) -> str:
+        return f"fraud_rules_version:{tenant_id or 'default'}"
+    
+    def _get_rules_version(self, tenant_id: Optional[str]) -> Any:
+        """Read the shared rule-set version, if Redis is available"""
+        if self.redis is None:
+            return None
+        try:
+            return self.redis.get(self._rules_version_key(tenant_id))
+        except Exception as e:
+            self.logger.warning(f"Failed to read fraud rules version: {e}")
+            return None
+    
+    def _bump_rules_version(self, tenant_id: Optional[str]):
+        """Signal other workers that a tenant's rules changed"""
+        if self.redis is None:
+            return
+        try:
+            self.redis.incr(self._rules_version_key(tenant_id))
+        except Exception as e:
+            self.logger.warning(f"Failed to bump fraud rules version: {e}")
+    
+    async def replay_fraud_rules(self, tenant_id: Optional[str] = None,
+                                 since: Optional[datetime] = None,
+                                 batch_size: int = 5000) -> Dict[str, Any]:
+        """Re-evaluate the current rules against historical fraud events"""
+        rule_set = self._get_rule_set(tenant_id)
+        query = self.db.query(FraudEvent.event_data, FraudEvent.features).filter(
+            FraudEvent.tenant_id == tenant_id
+        )
+        if since is not None:
+            query = query.filter(FraudEvent.created_at >= since)
+        
+        trigger_counts = {rule.rule_id: 0 for rule in rule_set.rules}
+        events_replayed = 0
+        batch = []
+        
+        def flush():
+            for results in rule_set.evaluate_batch(batch):
+                for result in results:
+                    if result['triggered']:
+                        trigger_counts[result['rule_id']] += 1
+        
+        for row in query.yield_per(batch_size):
+            batch.append((row.event_data or {}, row.features or {}))
+            if len(batch) >= batch_size:
+                flush()
+                events_replayed += len(batch)
+                batch = []
+        if batch:
+            flush()
+            events_replayed += len(batch)
+        
+        return {
+            'events_replayed': events_replayed,
+            'rules_evaluated': len(rule_set.rules),
+            'trigger_counts': trigger_counts
+        }
     
     async def _combine_fraud_scores(self, ml_score: float, 
                                   rule_results: List[Dict[str, Any]]) -> float:
@@ -771,6 +880,15 @@ class FraudDetection:
             raise HTTPException(status_code=404, detail="Model not found in memory")
 
 # Dependency injection
+_redis_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """Get the shared Redis client for fraud detection"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
 def get_fraud_detection(db_session = Depends(get_db), redis_client = Depends(get_redis)) -> FraudDetection:
     """Get fraud detection service"""
     return FraudDetection(db_session, redis_client)
@@ -0,0 +1,492 @@
+"""
+Streaming feature store for Soladia fraud detection
+Maintains rolling per-user velocity and behavior counters updated on event ingest
+"""
+
+import logging
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """Sliding window definition split into fixed-size buckets"""
+    name: str
+    length_seconds: int
+    bucket_seconds: int
+
+    @property
+    def bucket_count(self) -> int:
+        return self.length_seconds // self.bucket_seconds
+
+
+DEFAULT_WINDOWS = (
+    WindowSpec("1m", 60, 5),
+    WindowSpec("1h", 3600, 60),
+    WindowSpec("24h", 86400, 900),
+)
+
+# Behavior features cover the user's last 100 transactions, as the database scan they replace did
+BEHAVIOR_HISTORY_LIMIT = 100
+
+# Newest-first transaction amounts (None where a transaction had none) and the fraud event count
+BehaviorHistory = Tuple[List[Optional[float]], int]
+
+
+@dataclass
+class FeatureEvent:
+    """Event fields the feature store aggregates"""
+    user_id: int
+    tenant_id: Optional[str]
+    timestamp: float
+    event_type: str = "unknown"
+    amount: Optional[float] = None
+    ip_address: Optional[str] = None
+    device: Optional[str] = None
+    is_fraud: bool = False
+
+    @classmethod
+    def from_event_data(cls, user_id: int, tenant_id: Optional[str], event_type: str,
+                        event_data: Dict[str, Any], timestamp: Optional[float] = None,
+                        is_fraud: bool = False) -> "FeatureEvent":
+        """Build a feature event from a raw fraud detection payload"""
+        amount = event_data.get("amount")
+        return cls(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            timestamp=timestamp if timestamp is not None else time.time(),
+            event_type=event_type,
+            amount=float(amount) if amount is not None else None,
+            ip_address=event_data.get("ip_address"),
+            device=event_data.get("device_fingerprint") or event_data.get("user_agent"),
+            is_fraud=is_fraud,
+        )
+
+
+@dataclass
+class _Bucket:
+    """Aggregates for one time bucket"""
+    start: int
+    count: int = 0
+    amount_sum: float = 0.0
+    gap_sum: float = 0.0
+    gap_count: int = 0
+    ips: Counter = field(default_factory=Counter)
+    devices: Counter = field(default_factory=Counter)
+
+
+class SlidingWindowCounter:
+    """Bucketed sliding window with running totals for O(1) reads"""
+
+    def __init__(self, spec: WindowSpec):
+        self.spec = spec
+        self.buckets: Deque[_Bucket] = deque()
+        self.count = 0
+        self.amount_sum = 0.0
+        self.gap_sum = 0.0
+        self.gap_count = 0
+        self.ips: Counter = Counter()
+        self.devices: Counter = Counter()
+
+    def _bucket_start(self, timestamp: float) -> int:
+        return int(timestamp // self.spec.bucket_seconds) * self.spec.bucket_seconds
+
+    def _expire(self, now: float):
+        """Drop buckets that slid out of the window and subtract their totals"""
+        horizon = self._bucket_start(now) - self.spec.length_seconds
+        while self.buckets and self.buckets[0].start <= horizon:
+            bucket = self.buckets.popleft()
+            self.count -= bucket.count
+            self.amount_sum -= bucket.amount_sum
+            self.gap_sum -= bucket.gap_sum
+            self.gap_count -= bucket.gap_count
+            self._subtract(self.ips, bucket.ips)
+            self._subtract(self.devices, bucket.devices)
+
+    @staticmethod
+    def _subtract(totals: Counter, expired: Counter):
+        for key, value in expired.items():
+            remaining = totals[key] - value
+            if remaining > 0:
+                totals[key] = remaining
+            else:
+                del totals[key]
+
+    def add(self, event: FeatureEvent, gap: Optional[float]):
+        """Fold an event into its bucket"""
+        self._expire(event.timestamp)
+        start = self._bucket_start(event.timestamp)
+        if self.buckets and self.buckets[-1].start == start:
+            bucket = self.buckets[-1]
+        elif self.buckets and self.buckets[-1].start > start:
+            # Late events land in the closest bucket still inside the window
+            bucket = next((b for b in reversed(self.buckets) if b.start <= start), self.buckets[0])
+        else:
+            bucket = _Bucket(start=start)
+            self.buckets.append(bucket)
+
+        bucket.count += 1
+        self.count += 1
+        if event.amount is not None:
+            bucket.amount_sum += event.amount
+            self.amount_sum += event.amount
+        if gap is not None:
+            bucket.gap_sum += gap
+            bucket.gap_count += 1
+            self.gap_sum += gap
+            self.gap_count += 1
+        if event.ip_address:
+            bucket.ips[event.ip_address] += 1
+            self.ips[event.ip_address] += 1
+        if event.device:
+            bucket.devices[event.device] += 1
+            self.devices[event.device] += 1
+
+    def snapshot(self, now: float) -> Dict[str, float]:
+        """Read the window aggregates"""
+        self._expire(now)
+        oldest = self.buckets[0].start if self.buckets else now
+        return {
+            "count": self.count,
+            "amount_sum": self.amount_sum,
+            "distinct_ips": len(self.ips),
+            "distinct_devices": len(self.devices),
+            "mean_inter_event_seconds": self.gap_sum / self.gap_count if self.gap_count else 0.0,
+            "span_seconds": max(now - oldest, 0.0),
+        }
+
+
+def _recent(amounts: Iterable[Optional[float]] = ()) -> Deque[Optional[float]]:
+    return deque(list(amounts)[:BEHAVIOR_HISTORY_LIMIT], maxlen=BEHAVIOR_HISTORY_LIMIT)
+
+
+@dataclass
+class _UserProfile:
+    """Behavior history for one user
+
+    ``seeded`` is set once the history was loaded from the event log;
+    until then it only holds events ingested since the user was last seen.
+    """
+    last_timestamp: Optional[float] = None
+    recent_amounts: Deque[Optional[float]] = field(default_factory=_recent)
+    fraud_count: int = 0
+    seeded: bool = False
+
+
+class InMemoryFeatureBackend:
+    """Per-process sliding-window sketches keyed by (tenant, user)"""
+
+    def __init__(self, windows: Tuple[WindowSpec, ...] = DEFAULT_WINDOWS, max_users: int = 100000):
+        self.windows = windows
+        self.max_users = max_users
+        self._windows: Dict[Tuple[Optional[str], int], List[SlidingWindowCounter]] = {}
+        self._profiles: "OrderedDict[Tuple[Optional[str], int], _UserProfile]" = OrderedDict()
+
+    def _entry(self, key: Tuple[Optional[str], int]) -> _UserProfile:
+        if key not in self._windows:
+            if len(self._windows) >= self.max_users:
+                self._evict_oldest()
+            self._windows[key] = [SlidingWindowCounter(spec) for spec in self.windows]
+            self._profiles[key] = _UserProfile()
+        self._profiles.move_to_end(key)
+        return self._profiles[key]
+
+    def ingest(self, event: FeatureEvent):
+        key = (event.tenant_id, event.user_id)
+        profile = self._entry(key)
+        gap = None
+        if profile.last_timestamp is not None and event.timestamp >= profile.last_timestamp:
+            gap = event.timestamp - profile.last_timestamp
+        profile.last_timestamp = max(profile.last_timestamp or event.timestamp, event.timestamp)
+
+        for window in self._windows[key]:
+            window.add(event, gap)
+
+        if event.event_type == "transaction":
+            profile.recent_amounts.appendleft(event.amount)
+        if event.is_fraud:
+            profile.fraud_count += 1
+
+    def seed(self, tenant_id: Optional[str], user_id: int, history: BehaviorHistory):
+        """Replace a user's behavior history with the one loaded from the event log"""
+        profile = self._entry((tenant_id, user_id))
+        amounts, fraud_count = history
+        profile.recent_amounts = _recent(amounts)
+        profile.fraud_count = fraud_count
+        profile.seeded = True
+
+    def _evict_oldest(self):
+        """Evict the least recently active user"""
+        key, _ = self._profiles.popitem(last=False)
+        self._windows.pop(key, None)
+
+    def read(self, tenant_id: Optional[str], user_id: int,
+             now: float) -> Tuple[Dict[str, Dict[str, float]], _UserProfile]:
+        key = (tenant_id, user_id)
+        windows = self._windows.get(key)
+        if windows is None:
+            return {}, _UserProfile()
+        return {w.spec.name: w.snapshot(now) for w in windows}, self._profiles[key]
+
+    def reset(self):
+        self._windows.clear()
+        self._profiles.clear()
+
+
+class RedisFeatureBackend:
+    """Bucketed counters and HyperLogLogs in Redis shared by every worker"""
+
+    def __init__(self, redis_client, windows: Tuple[WindowSpec, ...] = DEFAULT_WINDOWS,
+                 prefix: str = "fraud_fs"):
+        self.redis = redis_client
+        self.windows = windows
+        self.prefix = prefix
+
+    def _user_key(self, tenant_id: Optional[str], user_id: int) -> str:
+        return f"{self.prefix}:{tenant_id or 'default'}:{user_id}"
+
+    def _bucket_key(self, user_key: str, spec: WindowSpec, start: int) -> str:
+        return f"{user_key}:{spec.name}:{start}"
+
+    def ingest(self, event: FeatureEvent):
+        user_key = self._user_key(event.tenant_id, event.user_id)
+        profile_key = f"{user_key}:profile"
+
+        previous = self.redis.hget(profile_key, "last_timestamp")
+        previous = float(previous) if previous is not None else None
+        gap = event.timestamp - previous if previous is not None and event.timestamp >= previous else None
+
+        pipe = self.redis.pipeline(transaction=False)
+        for spec in self.windows:
+            start = int(event.timestamp // spec.bucket_seconds) * spec.bucket_seconds
+            bucket_key = self._bucket_key(user_key, spec, start)
+            ttl = spec.length_seconds + spec.bucket_seconds
+            pipe.hincrby(bucket_key, "count", 1)
+            if event.amount is not None:
+                pipe.hincrbyfloat(bucket_key, "amount_sum", event.amount)
+            if gap is not None:
+                pipe.hincrbyfloat(bucket_key, "gap_sum", gap)
+                pipe.hincrby(bucket_key, "gap_count", 1)
+            pipe.expire(bucket_key, ttl)
+            if event.ip_address:
+                pipe.pfadd(f"{bucket_key}:ips", event.ip_address)
+                pipe.expire(f"{bucket_key}:ips", ttl)
+            if event.device:
+                pipe.pfadd(f"{bucket_key}:devices", event.device)
+                pipe.expire(f"{bucket_key}:devices", ttl)
+
+        if previous is None or event.timestamp > previous:
+            pipe.hset(profile_key, "last_timestamp", event.timestamp)
+        if event.event_type == "transaction":
+            pipe.lpush(f"{profile_key}:recent", "" if event.amount is None else event.amount)
+            pipe.ltrim(f"{profile_key}:recent", 0, BEHAVIOR_HISTORY_LIMIT - 1)
+        if event.is_fraud:
+            pipe.hincrby(profile_key, "fraud_count", 1)
+        pipe.execute()
+
+    def seed(self, tenant_id: Optional[str], user_id: int, history: BehaviorHistory):
+        """Replace a user's behavior history with the one loaded from the event log"""
+        profile_key = f"{self._user_key(tenant_id, user_id)}:profile"
+        amounts, fraud_count = history
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(f"{profile_key}:recent")
+        if amounts:
+            pipe.rpush(f"{profile_key}:recent",
+                       *["" if amount is None else amount for amount in amounts[:BEHAVIOR_HISTORY_LIMIT]])
+        pipe.hset(profile_key, mapping={"fraud_count": fraud_count, "seeded": 1})
+        pipe.execute()
+
+    def read(self, tenant_id: Optional[str], user_id: int,
+             now: float) -> Tuple[Dict[str, Dict[str, float]], _UserProfile]:
+        user_key = self._user_key(tenant_id, user_id)
+        profile_key = f"{user_key}:profile"
+
+        # One pipelined round trip over a fixed number of buckets per window
+        pipe = self.redis.pipeline(transaction=False)
+        layout = []
+        for spec in self.windows:
+            newest = int(now // spec.bucket_seconds) * spec.bucket_seconds
+            starts = [newest - i * spec.bucket_seconds for i in range(spec.bucket_count)]
+            keys = [self._bucket_key(user_key, spec, start) for start in starts]
+            for key in keys:
+                pipe.hgetall(key)
+            pipe.pfcount(*[f"{key}:ips" for key in keys])
+            pipe.pfcount(*[f"{key}:devices" for key in keys])
+            layout.append((spec, starts))
+        pipe.hgetall(profile_key)
+        pipe.lrange(f"{profile_key}:recent", 0, -1)
+        replies = pipe.execute()
+
+        windows = {}
+        offset = 0
+        for spec, starts in layout:
+            buckets = replies[offset:offset + len(starts)]
+            distinct_ips, distinct_devices = replies[offset + len(starts):offset + len(starts) + 2]
+            offset += len(starts) + 2
+
+            count = 0
+            amount_sum = gap_sum = 0.0
+            gap_count = 0
+            oldest = now
+            for start, bucket in zip(starts, buckets):
+                if not bucket:
+                    continue
+                bucket = {k.decode() if isinstance(k, bytes) else k: float(v) for k, v in bucket.items()}
+                count += int(bucket.get("count", 0))
+                amount_sum += bucket.get("amount_sum", 0.0)
+                gap_sum += bucket.get("gap_sum", 0.0)
+                gap_count += int(bucket.get("gap_count", 0))
+                oldest = min(oldest, start)
+
+            windows[spec.name] = {
+                "count": count,
+                "amount_sum": amount_sum,
+                "distinct_ips": distinct_ips,
+                "distinct_devices": distinct_devices,
+                "mean_inter_event_seconds": gap_sum / gap_count if gap_count else 0.0,
+                "span_seconds": max(now - oldest, 0.0),
+            }
+
+        raw_profile, recent = replies[offset], replies[offset + 1]
+        raw_profile = {k.decode() if isinstance(k, bytes) else k: float(v) for k, v in (raw_profile or {}).items()}
+        profile = _UserProfile(
+            last_timestamp=raw_profile.get("last_timestamp"),
+            recent_amounts=_recent(float(amount) if amount not in (b"", "") else None for amount in recent or []),
+            fraud_count=int(raw_profile.get("fraud_count", 0)),
+            seeded=bool(raw_profile.get("seeded")),
+        )
+        return windows, profile
+
+    def reset(self):
+        for key in self.redis.scan_iter(match=f"{self.prefix}:*", count=1000):
+            self.redis.delete(key)
+
+
+class FraudFeatureStore:
+    """Rolling per-user fraud features read in constant time during scoring"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or InMemoryFeatureBackend()
+
+    def ingest(self, event: FeatureEvent):
+        """Update counters for a new event"""
+        try:
+            self.backend.ingest(event)
+        except Exception as e:
+            logger.error(f"Failed to ingest fraud feature event for user {event.user_id}: {e}")
+
+    def get_velocity_features(self, user_id: int, tenant_id: Optional[str],
+                              now: Optional[float] = None) -> Dict[str, Any]:
+        """Velocity, amount, distinct-entity and inter-event features per window"""
+        now = now if now is not None else time.time()
+        windows, profile = self.backend.read(tenant_id, user_id, now)
+
+        features: Dict[str, Any] = {}
+        for spec in self.backend.windows:
+            window = windows.get(spec.name, {})
+            features[f"events_last_{spec.name}"] = window.get("count", 0)
+            features[f"amount_sum_{spec.name}"] = window.get("amount_sum", 0.0)
+            features[f"distinct_ips_{spec.name}"] = window.get("distinct_ips", 0)
+            features[f"distinct_devices_{spec.name}"] = window.get("distinct_devices", 0)
+            features[f"mean_inter_event_seconds_{spec.name}"] = window.get("mean_inter_event_seconds", 0.0)
+
+        # Names the ML models were trained on
+        features["events_last_hour"] = features.get("events_last_1h", 0)
+        daily = windows.get("24h", {})
+        if daily.get("count"):
+            hours = daily["span_seconds"] / 3600
+            features["event_velocity"] = daily["count"] / max(hours, 1)
+        else:
+            features["event_velocity"] = 0
+
+        features["seconds_since_last_event"] = (
+            now - profile.last_timestamp if profile.last_timestamp is not None else -1.0
+        )
+        return features
+
+    def get_behavior_features(self, user_id: int, tenant_id: Optional[str],
+                              history: Optional[Callable[[], BehaviorHistory]] = None) -> Dict[str, Any]:
+        """Transaction and fraud history features
+
+        Amounts cover the last ``BEHAVIOR_HISTORY_LIMIT`` transactions and the
+        fraud count covers every event, whatever the sliding windows hold.
+        A user not seeded since the store started, evicted them or was
+        backfilled is loaded once from ``history``; later events are folded
+        in on ingest.
+        """
+        _, profile = self.backend.read(tenant_id, user_id, time.time())
+        if not profile.seeded and history is not None:
+            loaded = history()
+            self.backend.seed(tenant_id, user_id, loaded)
+            profile = _UserProfile(recent_amounts=_recent(loaded[0]), fraud_count=loaded[1], seeded=True)
+
+        amounts = [amount for amount in profile.recent_amounts if amount is not None]
+        return {
+            "avg_transaction_amount": sum(amounts) / len(amounts) if amounts else 0,
+            "max_transaction_amount": max(amounts) if amounts else 0,
+            "transaction_frequency": len(profile.recent_amounts) / 30 if amounts else 0,  # per day
+            "fraud_history_count": profile.fraud_count,
+        }
+
+    def backfill(self, events: Iterable[FeatureEvent], reset: bool = True) -> int:
+        """Rebuild the store by replaying historical events in time order"""
+        if reset:
+            self.backend.reset()
+        replayed = 0
+        for event in events:
+            self.backend.ingest(event)
+            replayed += 1
+        logger.info(f"Backfilled fraud feature store with {replayed} events")
+        return replayed
+
+
+def backfill_from_fraud_events(store: FraudFeatureStore, db_session, event_model,
+                               lookback: timedelta = timedelta(days=1),
+                               batch_size: int = 5000) -> int:
+    """Stream FraudEvent history into the feature store with a server-side cursor"""
+    since = datetime.utcnow() - lookback
+    query = (
+        db_session.query(
+            event_model.user_id,
+            event_model.tenant_id,
+            event_model.event_type,
+            event_model.event_data,
+            event_model.fraud_score,
+            event_model.created_at,
+        )
+        .filter(event_model.user_id.isnot(None), event_model.created_at >= since)
+        .order_by(event_model.created_at)
+        .yield_per(batch_size)
+    )
+
+    def _events():
+        for row in query:
+            yield FeatureEvent.from_event_data(
+                user_id=row.user_id,
+                tenant_id=row.tenant_id,
+                event_type=row.event_type,
+                event_data=row.event_data or {},
+                timestamp=row.created_at.replace(tzinfo=timezone.utc).timestamp(),
+                is_fraud=row.fraud_score > 0.7,
+            )
+
+    return store.backfill(_events())
+
+
+# Shared store; FraudDetection instances are created per request
+fraud_feature_store = FraudFeatureStore()
+
+
+def configure_fraud_feature_store(backend: str = "memory", redis_url: Optional[str] = None) -> FraudFeatureStore:
+    """Pick the backend of the shared store: per-process memory or Redis shared by every worker"""
+    if backend == "redis" and redis_url:
+        import redis
+        fraud_feature_store.backend = RedisFeatureBackend(redis.from_url(redis_url))
+    else:
+        fraud_feature_store.backend = InMemoryFeatureBackend()
+    return fraud_feature_store
@@ -0,0 +1,248 @@
+"""
+Compiled fraud rule engine for Soladia fraud detection
+Compiles JSON rule conditions once, indexes them by field and evaluates events in bulk
+"""
+
+import logging
+import operator as op
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+Predicate = Callable[[Any], bool]
+
+
+def _contains(value: Any) -> Predicate:
+    return lambda event_value: value in str(event_value)
+
+
+def _not_contains(value: Any) -> Predicate:
+    return lambda event_value: value not in str(event_value)
+
+
+# Same operator set and semantics as the original interpreted evaluator
+_OPERATORS: Dict[str, Callable[[Any], Predicate]] = {
+    "equals": lambda value: lambda event_value: event_value == value,
+    "not_equals": lambda value: lambda event_value: event_value != value,
+    "greater_than": lambda value: lambda event_value: event_value > value,
+    "less_than": lambda value: lambda event_value: event_value < value,
+    "contains": _contains,
+    "not_contains": _not_contains,
+}
+
+_VECTOR_OPERATORS = {
+    "equals": op.eq,
+    "not_equals": op.ne,
+    "greater_than": op.gt,
+    "less_than": op.lt,
+}
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """Single compiled field check"""
+    field: str
+    operator: str
+    value: Any
+    predicate: Predicate
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Fraud rule with its conditions compiled to closures"""
+    rule_id: str
+    rule_name: str
+    severity: str
+    conditions: Tuple[CompiledCondition, ...]
+
+    @property
+    def fields(self) -> frozenset:
+        return frozenset(condition.field for condition in self.conditions)
+
+    def matches(self, lookup: Callable[[str], Any]) -> bool:
+        """Return True when every present field satisfies its condition"""
+        for condition in self.conditions:
+            event_value = lookup(condition.field)
+            if event_value is _MISSING:
+                continue
+            try:
+                if not condition.predicate(event_value):
+                    return False
+            except TypeError:
+                # Incomparable types (e.g. string vs number) never match
+                return False
+        return True
+
+    def result(self, triggered: bool) -> Dict[str, Any]:
+        return {
+            "rule_id": self.rule_id,
+            "rule_name": self.rule_name,
+            "triggered": triggered,
+            "severity": self.severity,
+        }
+
+
+def normalize_conditions(conditions: Any) -> List[Dict[str, Any]]:
+    """Accept both a list of conditions and a {"conditions": [...]} document"""
+    if isinstance(conditions, dict):
+        if "conditions" in conditions:
+            return list(conditions["conditions"] or [])
+        return [conditions] if "field" in conditions else []
+    return list(conditions or [])
+
+
+def compile_rule(rule) -> CompiledRule:
+    """Compile a FraudRule row into a CompiledRule"""
+    compiled = []
+    for condition in normalize_conditions(rule.conditions):
+        field = condition.get("field")
+        operator = condition.get("operator")
+        if field is None or operator not in _OPERATORS:
+            # Unknown operators never rejected an event in the interpreted evaluator
+            continue
+        value = condition.get("value")
+        compiled.append(CompiledCondition(field, operator, value, _OPERATORS[operator](value)))
+
+    return CompiledRule(
+        rule_id=rule.rule_id,
+        rule_name=rule.rule_name,
+        severity=rule.severity or "medium",
+        conditions=tuple(compiled),
+    )
+
+
+class CompiledRuleSet:
+    """Compiled rules for one tenant, indexed by referenced field"""
+
+    def __init__(self, rules: Iterable[CompiledRule]):
+        self.rules: List[CompiledRule] = list(rules)
+        self.field_index: Dict[str, List[int]] = {}
+        self.unconditional: List[int] = []
+
+        for position, rule in enumerate(self.rules):
+            if not rule.fields:
+                self.unconditional.append(position)
+            for field in rule.fields:
+                self.field_index.setdefault(field, []).append(position)
+
+    def candidate_rules(self, event_data: Dict[str, Any], features: Dict[str, Any]) -> List[CompiledRule]:
+        """Rules that reference at least one field present on the event"""
+        positions = set(self.unconditional)
+        for field, rule_positions in self.field_index.items():
+            if field in event_data or field in features:
+                positions.update(rule_positions)
+        return [self.rules[position] for position in sorted(positions)]
+
+    def evaluate(self, event_data: Dict[str, Any], features: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Evaluate the relevant rules for a single event"""
+        def lookup(field: str) -> Any:
+            if field in event_data:
+                return event_data[field]
+            return features.get(field, _MISSING)
+
+        return [
+            rule.result(rule.matches(lookup))
+            for rule in self.candidate_rules(event_data, features)
+        ]
+
+    def evaluate_batch(self, events: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+        """Evaluate many events column-wise, returning results in input order"""
+        size = len(events)
+        if size == 0:
+            return []
+
+        columns: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for field in self.field_index:
+            values = np.empty(size, dtype=object)
+            present = np.zeros(size, dtype=bool)
+            for i, (event_data, features) in enumerate(events):
+                if field in event_data:
+                    values[i] = event_data[field]
+                    present[i] = True
+                elif field in features:
+                    values[i] = features[field]
+                    present[i] = True
+            columns[field] = (values, present)
+
+        per_event: List[List[Dict[str, Any]]] = [[] for _ in range(size)]
+        for rule in self.rules:
+            relevant = np.zeros(size, dtype=bool) if rule.fields else np.ones(size, dtype=bool)
+            triggered = np.ones(size, dtype=bool)
+
+            for condition in rule.conditions:
+                values, present = columns[condition.field]
+                relevant |= present
+                if not present.any():
+                    continue
+                passed = np.ones(size, dtype=bool)
+                passed[present] = self._vector_check(condition, values[present])
+                triggered &= passed
+
+            for i in np.flatnonzero(relevant):
+                per_event[i].append(rule.result(bool(triggered[i])))
+
+        return per_event
+
+    @staticmethod
+    def _vector_check(condition: CompiledCondition, values: np.ndarray) -> np.ndarray:
+        """Apply one condition to a column of present values"""
+        vector_op = _VECTOR_OPERATORS.get(condition.operator)
+        if vector_op is not None and not isinstance(condition.value, (list, tuple, dict)):
+            try:
+                return np.asarray(vector_op(values, condition.value), dtype=bool)
+            except TypeError:
+                pass
+
+        def safe(value: Any) -> bool:
+            try:
+                return bool(condition.predicate(value))
+            except TypeError:
+                return False
+
+        return np.fromiter((safe(value) for value in values), dtype=bool, count=len(values))
+
+
+class FraudRuleEngine:
+    """Per-tenant cache of compiled rule sets"""
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self._rule_sets: Dict[Optional[str], Tuple[float, Any, CompiledRuleSet]] = {}
+        self.compilations = 0
+
+    def get_rule_set(self, tenant_id: Optional[str],
+                     loader: Callable[[], Iterable[Any]],
+                     version: Any = None) -> CompiledRuleSet:
+        """Return the cached rule set, compiling from loader() on a miss
+
+        ``version`` is an optional shared rule-set version (e.g. a Redis counter
+        bumped on rule changes) so other workers pick up new rules before the TTL.
+        """
+        cached = self._rule_sets.get(tenant_id)
+        if (cached is not None and cached[1] == version
+                and time.monotonic() - cached[0] < self.ttl_seconds):
+            return cached[2]
+
+        rule_set = CompiledRuleSet(compile_rule(rule) for rule in loader())
+        self._rule_sets[tenant_id] = (time.monotonic(), version, rule_set)
+        self.compilations += 1
+        logger.info(f"Compiled {len(rule_set.rules)} fraud rules for tenant {tenant_id}")
+        return rule_set
+
+    def invalidate(self, tenant_id: Optional[str] = None):
+        """Drop the compiled rules for a tenant"""
+        self._rule_sets.pop(tenant_id, None)
+
+    def clear(self):
+        """Drop every compiled rule set"""
+        self._rule_sets.clear()
+
+
+# Shared per-process engine; FraudDetection instances are created per request
+fraud_rule_engine = FraudRuleEngine()
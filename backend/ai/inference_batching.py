@@ -0,0 +1,267 @@
+"""
+Dynamic micro-batching executor for Soladia AI inference
+Queues per-model inference requests and runs them as batched forward passes
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+BatchFunction = Callable[[List[Any]], Sequence[Any]]
+
+
+@dataclass
+class BatchingConfig:
+    """Batching configuration for a single model"""
+    max_batch_size: int = 16
+    max_wait_ms: float = 5.0
+    max_queue_size: int = 1024
+    inference_mode: bool = True
+    torch_threads: Optional[int] = None
+
+
+@dataclass
+class BatchingStats:
+    """Runtime statistics for a batched model"""
+    requests: int = 0
+    batches: int = 0
+    items: int = 0
+    errors: int = 0
+    total_inference_time: float = 0.0
+    total_queue_wait: float = 0.0
+    batch_size_histogram: Dict[int, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize stats for API responses"""
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "avg_inference_ms": (self.total_inference_time / self.batches * 1000) if self.batches else 0.0,
+            "avg_queue_wait_ms": (self.total_queue_wait / self.items * 1000) if self.items else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+        }
+
+
+@dataclass
+class _PendingRequest:
+    """Single queued inference request"""
+    payload: Any
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class ModelBatcher:
+    """Collects requests for one model and flushes them as batches"""
+
+    def __init__(self, name: str, batch_fn: BatchFunction, config: BatchingConfig):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.config = config
+        self.stats = BatchingStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # A dedicated single worker keeps the forward pass off the event loop and
+        # gives the model a stable thread for its intra-op thread pool.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"batcher-{name}")
+        self._thread_configured = threading.Event()
+
+    def _ensure_started(self):
+        """Lazily start the collector on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._collector is None or self._collector.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.config.max_queue_size)
+            self._collector = loop.create_task(self._collect())
+
+    async def submit(self, payload: Any) -> Any:
+        """Queue a single input and wait for its result"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        self.stats.requests += 1
+        await self._queue.put(_PendingRequest(payload, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """Gather requests until the batch is full or the wait budget expires"""
+        max_wait = self.config.max_wait_ms / 1000.0
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = time.perf_counter() + max_wait
+
+            while len(batch) < self.config.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_PendingRequest]):
+        """Run one batched forward pass and resolve the request futures"""
+        started = time.perf_counter()
+        for request in batch:
+            self.stats.total_queue_wait += started - request.enqueued_at
+
+        try:
+            results = await self._loop.run_in_executor(
+                self._executor, self._run_batch, [request.payload for request in batch]
+            )
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch function for {self.name} returned {len(results)} results for {len(batch)} inputs"
+                )
+            for request, result in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.error(f"Batched inference failed for {self.name}: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            size = len(batch)
+            self.stats.batches += 1
+            self.stats.items += size
+            self.stats.total_inference_time += time.perf_counter() - started
+            self.stats.batch_size_histogram[size] = self.stats.batch_size_histogram.get(size, 0) + 1
+
+    def _run_batch(self, payloads: List[Any]) -> Sequence[Any]:
+        """Execute the batch function inside the worker thread"""
+        if not self.config.inference_mode:
+            return self.batch_fn(payloads)
+
+        import torch
+
+        if self.config.torch_threads and not self._thread_configured.is_set():
+            torch.set_num_threads(self.config.torch_threads)
+            self._thread_configured.set()
+
+        with torch.inference_mode():
+            return self.batch_fn(payloads)
+
+    async def close(self):
+        """Stop the collector and release the worker thread"""
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        self._executor.shutdown(wait=False)
+
+
+class InferenceBatcher:
+    """Registry of per-model batchers"""
+
+    def __init__(self, default_config: Optional[BatchingConfig] = None):
+        self.default_config = default_config or BatchingConfig()
+        self.batchers: Dict[str, ModelBatcher] = {}
+
+    def register_model(self, name: str, batch_fn: BatchFunction,
+                       config: Optional[BatchingConfig] = None) -> ModelBatcher:
+        """Register a batch function for a model name"""
+        batcher = ModelBatcher(name, batch_fn, config or self.default_config)
+        self.batchers[name] = batcher
+        return batcher
+
+    def is_registered(self, name: str) -> bool:
+        """Check whether a model has a batcher"""
+        return name in self.batchers
+
+    async def submit(self, name: str, payload: Any) -> Any:
+        """Submit a single input to a model's batcher"""
+        if name not in self.batchers:
+            raise KeyError(f"No batcher registered for model: {name}")
+        return await self.batchers[name].submit(payload)
+
+    async def submit_many(self, name: str, payloads: List[Any]) -> List[Any]:
+        """Submit several inputs and return results in input order"""
+        return list(await asyncio.gather(*(self.submit(name, payload) for payload in payloads)))
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get batching statistics for all models"""
+        return {name: batcher.stats.to_dict() for name, batcher in self.batchers.items()}
+
+    async def close(self):
+        """Shut down every batcher"""
+        for batcher in self.batchers.values():
+            await batcher.close()
+
+
+async def benchmark_throughput(batch_fn: BatchFunction,
+                               make_input: Callable[[int], Any],
+                               batch_sizes: Sequence[int] = (1, 2, 4, 8, 16, 32, 64),
+                               num_requests: int = 512,
+                               max_wait_ms: float = 5.0,
+                               inference_mode: bool = True) -> List[Dict[str, Any]]:
+    """Measure requests/sec of a batch function at several max batch sizes"""
+    results = []
+    for batch_size in batch_sizes:
+        batcher = InferenceBatcher()
+        batcher.register_model("bench", batch_fn, BatchingConfig(
+            max_batch_size=batch_size,
+            max_wait_ms=max_wait_ms,
+            max_queue_size=num_requests,
+            inference_mode=inference_mode,
+        ))
+        inputs = [make_input(i) for i in range(num_requests)]
+
+        # Warm up the worker thread and any lazy model state
+        await batcher.submit("bench", inputs[0])
+
+        start = time.perf_counter()
+        await batcher.submit_many("bench", inputs)
+        elapsed = time.perf_counter() - start
+
+        stats = batcher.get_stats()["bench"]
+        results.append({
+            "max_batch_size": batch_size,
+            "requests": num_requests,
+            "elapsed_seconds": elapsed,
+            "requests_per_second": num_requests / elapsed if elapsed > 0 else 0.0,
+            "avg_batch_size": stats["avg_batch_size"],
+            "avg_inference_ms": stats["avg_inference_ms"],
+        })
+        await batcher.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    import torch
+
+    # CPU benchmark with a small MLP standing in for a text/vision encoder head
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        torch.nn.Linear(768, 1024),
+        torch.nn.GELU(),
+        torch.nn.Linear(1024, 1024),
+        torch.nn.GELU(),
+        torch.nn.Linear(1024, 3),
+    ).eval()
+
+    def mlp_batch(inputs: List[Any]) -> List[List[float]]:
+        return model(torch.stack(inputs)).softmax(dim=-1).tolist()
+
+    report = asyncio.run(benchmark_throughput(mlp_batch, lambda i: torch.randn(768)))
+    print(f"{'batch':>6} {'req/s':>10} {'avg batch':>10} {'ms/batch':>10}")
+    for row in report:
+        print(f"{row['max_batch_size']:>6} {row['requests_per_second']:>10.1f} "
+              f"{row['avg_batch_size']:>10.1f} {row['avg_inference_ms']:>10.2f}")
@@ -0,0 +1,371 @@
+"""
+Content-addressed result cache for Soladia AI inference
+Reuses model outputs for identical inputs across users and requests
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from monitoring.instrumentation import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_KEY = "ai_model_registry"
+CACHE_PREFIX = "ai_cache"
+
+
+def normalize_text(text: str) -> bytes:
+    """Normalize text input so trivially different spellings share a key"""
+    normalized = unicodedata.normalize("NFC", text or "")
+    return " ".join(normalized.split()).encode("utf-8")
+
+
+@dataclass
+class InferenceCacheStats:
+    """Cache effectiveness counters"""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    disk_stores: int = 0
+    disk_evictions: int = 0
+    errors: int = 0
+    saved_compute_seconds: float = 0.0
+    compute_seconds: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups served from cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize stats for API responses"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "disk_stores": self.disk_stores,
+            "disk_evictions": self.disk_evictions,
+            "errors": self.errors,
+            "hit_ratio": self.hit_ratio,
+            "saved_compute_seconds": self.saved_compute_seconds,
+            "compute_seconds": self.compute_seconds,
+        }
+
+
+class ModelRegistry:
+    """Tracks the deployed version of every cached model
+
+    A version found in Redis is adopted as is: it only selects which keys
+    are read. Cached results are purged only by an explicit ``set_version``.
+    """
+
+    def __init__(self, redis_client, refresh_interval: float = 5.0):
+        self.redis = redis_client
+        self.refresh_interval = refresh_interval
+        self.versions: Dict[str, str] = {}
+        self._last_refresh: Dict[str, float] = {}
+        self._listeners = []
+
+    def register(self, model_id: str, version: str):
+        """Register a model with its current version"""
+        self.versions[model_id] = version
+
+    def on_version_change(self, callback: Callable[[str, str, str], Awaitable[None]]):
+        """Subscribe to version changes as (model_id, old_version, new_version)"""
+        self._listeners.append(callback)
+
+    async def get_version(self, model_id: str) -> str:
+        """Get the current model version, picking up bumps from other workers"""
+        now = time.monotonic()
+        if now - self._last_refresh.get(model_id, 0.0) < self.refresh_interval:
+            return self.versions.get(model_id, "unversioned")
+        self._last_refresh[model_id] = now
+
+        try:
+            remote = await self.redis.hget(REGISTRY_KEY, model_id)
+            if remote is not None:
+                remote = remote.decode() if isinstance(remote, bytes) else remote
+                if remote != self.versions.get(model_id):
+                    logger.info(f"Model {model_id} using shared version {remote}")
+                    self.versions[model_id] = remote
+        except Exception as e:
+            logger.warning(f"Failed to read model registry for {model_id}: {e}")
+        return self.versions.get(model_id, "unversioned")
+
+    async def set_version(self, model_id: str, version: str):
+        """Publish a new model version and invalidate its cached results"""
+        if not isinstance(version, str) or not version.strip():
+            raise ValueError(f"Model version for {model_id} must be a non-empty string")
+        try:
+            await self.redis.hset(REGISTRY_KEY, model_id, version)
+        except Exception as e:
+            logger.warning(f"Failed to publish model version for {model_id}: {e}")
+        await self._apply_version(model_id, version)
+
+    async def _apply_version(self, model_id: str, version: str):
+        """Update the local version and notify listeners"""
+        old_version = self.versions.get(model_id, "unversioned")
+        self.versions[model_id] = version
+        if old_version == version:
+            return
+        logger.info(f"Model {model_id} version changed: {old_version} -> {version}")
+        for callback in self._listeners:
+            try:
+                await callback(model_id, old_version, version)
+            except Exception as e:
+                logger.error(f"Model version listener failed for {model_id}: {e}")
+
+
+class InferenceResultCache:
+    """Redis-backed inference cache with an on-disk tier for large payloads
+
+    Redis bounds the memory tier with its own LRU policy; the disk tier is
+    bounded here, evicting the least recently used files past ``max_disk_bytes``.
+    """
+
+    def __init__(self, redis_client, registry: ModelRegistry,
+                 cache_dir: str = "cache/ai_results",
+                 ttl_seconds: int = 86400 * 7,
+                 max_redis_bytes: int = 64 * 1024,
+                 max_disk_bytes: int = 1024 ** 3):
+        self.redis = redis_client
+        self.registry = registry
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_redis_bytes = max_redis_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.stats: Dict[str, InferenceCacheStats] = {}
+
+        # Disk tier LRU: path -> size, least recently used first. Loaded from the
+        # cache directory on first use so files from earlier runs count too.
+        self._disk_index: "OrderedDict[Path, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_loaded = False
+        self._disk_lock = threading.Lock()
+
+        self.registry.on_version_change(self._on_version_change)
+
+    def _stats_for(self, model_id: str) -> InferenceCacheStats:
+        if model_id not in self.stats:
+            self.stats[model_id] = InferenceCacheStats()
+        return self.stats[model_id]
+
+    @staticmethod
+    def build_key(model_id: str, version: str, input_bytes: bytes,
+                  params: Optional[Dict[str, Any]] = None) -> str:
+        """Hash (model id, model version, normalized input, params) into a cache key"""
+        digest = hashlib.sha256()
+        digest.update(model_id.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(input_bytes)
+        return f"{CACHE_PREFIX}:{model_id}:{digest.hexdigest()}"
+
+    def _disk_path(self, key: str) -> Path:
+        _, model_id, digest = key.split(":", 2)
+        return self.cache_dir / model_id / digest[:2] / f"{digest}.bin"
+
+    async def get_or_compute(self, model_id: str, input_bytes: bytes,
+                             compute: Callable[[], Awaitable[Any]],
+                             params: Optional[Dict[str, Any]] = None,
+                             binary: bool = False,
+                             cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return a cached result or compute, store and return it"""
+        stats = self._stats_for(model_id)
+        version = await self.registry.get_version(model_id)
+        key = self.build_key(model_id, version, input_bytes, params)
+
+        cached = await self._load(key, binary)
+        if cached is not None:
+            value, compute_time = cached
+            stats.hits += 1
+            stats.saved_compute_seconds += compute_time
+            CACHE_REQUESTS.labels("ai_inference", "hit").inc()
+            return value
+
+        stats.misses += 1
+        CACHE_REQUESTS.labels("ai_inference", "miss").inc()
+        start_time = time.perf_counter()
+        value = await compute()
+        compute_time = time.perf_counter() - start_time
+        stats.compute_seconds += compute_time
+
+        if cacheable is None or cacheable(value):
+            await self._store(key, value, compute_time, binary)
+
+        return value
+
+    async def _load(self, key: str, binary: bool) -> Optional[tuple]:
+        """Load a value from Redis, following disk pointers"""
+        try:
+            raw = await self.redis.get(key)
+        except Exception as e:
+            logger.warning(f"Inference cache read failed for {key}: {e}")
+            raw = None
+
+        if raw is None:
+            # Redis may have evicted the pointer while the payload is still on disk
+            raw_disk = await asyncio.to_thread(self._read_disk, key)
+            if raw_disk is None:
+                return None
+            return self._decode_payload(raw_disk, binary), 0.0
+
+        envelope = json.loads(raw)
+        if "disk" in envelope:
+            payload = await asyncio.to_thread(self._read_disk, key)
+            if payload is None:
+                return None
+            return self._decode_payload(payload, binary), envelope.get("compute_time", 0.0)
+        return envelope["value"], envelope.get("compute_time", 0.0)
+
+    async def _store(self, key: str, value: Any, compute_time: float, binary: bool):
+        """Store a value in Redis or spill it to disk when it is large"""
+        stats = self._stats_for(key.split(":", 2)[1])
+        try:
+            payload = value if binary else json.dumps(value, default=str).encode("utf-8")
+            if isinstance(payload, str):
+                payload = payload.encode("utf-8")
+
+            if binary or len(payload) > self.max_redis_bytes:
+                await asyncio.to_thread(self._write_disk, key, payload)
+                envelope = {"disk": True, "size": len(payload), "compute_time": compute_time}
+                stats.disk_stores += 1
+            else:
+                envelope = {"value": value, "compute_time": compute_time}
+
+            await self.redis.setex(key, self.ttl_seconds, json.dumps(envelope, default=str))
+            stats.stores += 1
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f"Inference cache write failed for {key}: {e}")
+
+    @staticmethod
+    def _decode_payload(payload: bytes, binary: bool) -> Any:
+        return payload if binary else json.loads(payload)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._disk_path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                self._forget_disk(path)
+                return None
+            payload = path.read_bytes()
+        except FileNotFoundError:
+            self._forget_disk(path)
+            return None
+        self._touch_disk(path, len(payload))
+        return payload
+
+    def _write_disk(self, key: str, payload: bytes):
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+        self._touch_disk(path, len(payload))
+        self._evict_disk()
+
+    def _load_disk_index(self):
+        """Index files already on disk, oldest first; caller holds the lock"""
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        if not self.cache_dir.exists():
+            return
+        entries = []
+        for path in self.cache_dir.rglob("*.bin"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries, key=lambda entry: entry[0]):
+            self._disk_index[path] = size
+            self._disk_bytes += size
+
+    def _touch_disk(self, path: Path, size: int):
+        """Mark a file as most recently used"""
+        with self._disk_lock:
+            self._load_disk_index()
+            self._disk_bytes += size - self._disk_index.pop(path, 0)
+            self._disk_index[path] = size
+
+    def _forget_disk(self, path: Path):
+        with self._disk_lock:
+            self._disk_bytes -= self._disk_index.pop(path, 0)
+
+    def _evict_disk(self):
+        """Delete least recently used files until the tier fits its budget"""
+        evicted = []
+        with self._disk_lock:
+            # Never evict the file just written, even if it alone exceeds the budget
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk_index) > 1:
+                path, size = self._disk_index.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(path)
+        for path in evicted:
+            path.unlink(missing_ok=True)
+            self._stats_for(path.relative_to(self.cache_dir).parts[0]).disk_evictions += 1
+
+    async def invalidate_model(self, model_id: str) -> int:
+        """Drop every cached result for a model"""
+        removed = 0
+        try:
+            async for key in self.redis.scan_iter(match=f"{CACHE_PREFIX}:{model_id}:*", count=500):
+                await self.redis.delete(key)
+                removed += 1
+        except Exception as e:
+            logger.warning(f"Failed to purge Redis cache for {model_id}: {e}")
+
+        removed += await asyncio.to_thread(self._purge_disk, model_id)
+        logger.info(f"Invalidated {removed} cached results for {model_id}")
+        return removed
+
+    def _purge_disk(self, model_id: str) -> int:
+        removed = 0
+        model_dir = self.cache_dir / model_id
+        if model_dir.exists():
+            for path in model_dir.rglob("*.bin"):
+                path.unlink(missing_ok=True)
+                self._forget_disk(path)
+                removed += 1
+        return removed
+
+    async def _on_version_change(self, model_id: str, old_version: str, new_version: str):
+        # Keys already embed the version, so stale entries can never hit; purging
+        # just reclaims the space they hold.
+        await self.invalidate_model(model_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit ratio and saved compute per model plus totals"""
+        total = InferenceCacheStats()
+        for stats in self.stats.values():
+            total.hits += stats.hits
+            total.misses += stats.misses
+            total.stores += stats.stores
+            total.disk_stores += stats.disk_stores
+            total.disk_evictions += stats.disk_evictions
+            total.errors += stats.errors
+            total.saved_compute_seconds += stats.saved_compute_seconds
+            total.compute_seconds += stats.compute_seconds
+
+        return {
+            "models": {model_id: stats.to_dict() for model_id, stats in self.stats.items()},
+            "total": total.to_dict(),
+        }
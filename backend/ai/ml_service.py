@@ -413,6 +413,29 @@ class MLService:
             logger.error(f"Failed to detect fraud: {e}")
             return False, 0.0
     
+    async def detect_fraud_batch(self, transactions: List[Dict]) -> List[Tuple[bool, float]]:
+        """Detect fraud for many transactions with a single model call"""
+        try:
+            if not self.fraud_detection_model or not transactions:
+                return [(False, 0.0)] * len(transactions)
+            
+            amounts = np.array([t.get('amount', 0) for t in transactions], dtype=np.float64)
+            features = np.column_stack([
+                amounts,
+                np.array([t.get('hour', 12) for t in transactions], dtype=np.float64),
+                np.array([t.get('user_age_days', 0) for t in transactions], dtype=np.float64),
+                np.array([t.get('transaction_count', 0) for t in transactions], dtype=np.float64),
+                np.array([t.get('avg_transaction_amount', 0) for t in transactions], dtype=np.float64),
+                np.log1p(amounts)
+            ])
+            
+            anomaly_scores = self.fraud_detection_model.decision_function(features)
+            return [(bool(score < -0.1), float(score)) for score in anomaly_scores]
+            
+        except Exception as e:
+            logger.error(f"Failed to detect fraud in batch: {e}")
+            return [(False, 0.0)] * len(transactions)
+    
     async def predict_price(self, product_data: Dict) -> float:
         """Predict optimal price for a product"""
         try:
@@ -10,7 +10,6 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import your models
 from models import Base
-from models.solana_models import Base as SolanaBase
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
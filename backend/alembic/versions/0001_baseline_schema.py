@@ -0,0 +1,259 @@
+"""Baseline schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The schema as it stood when migrations were introduced, frozen here so later
+    # model changes never leak into this revision. Databases created earlier by
+    # ``Base.metadata.create_all`` already have these tables, which are left untouched
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'categories' not in existing:
+        op.create_table('categories',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=True),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('icon_url', sa.String(length=500), nullable=True),
+            sa.Column('parent_id', sa.Integer(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['parent_id'], ['categories.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_categories_id', 'categories', ['id'], unique=False)
+        op.create_index('ix_categories_name', 'categories', ['name'], unique=True)
+
+    if 'users' not in existing:
+        op.create_table('users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('wallet_address', sa.String(length=44), nullable=False),
+            sa.Column('username', sa.String(length=50), nullable=True),
+            sa.Column('email', sa.String(length=100), nullable=True),
+            sa.Column('full_name', sa.String(length=100), nullable=True),
+            sa.Column('avatar_url', sa.String(length=500), nullable=True),
+            sa.Column('user_type', sa.Enum('BUYER', 'SELLER', 'BOTH', name='usertype'), nullable=True),
+            sa.Column('is_verified', sa.Boolean(), nullable=True),
+            sa.Column('rating', sa.Float(), nullable=True),
+            sa.Column('total_sales', sa.Integer(), nullable=True),
+            sa.Column('total_purchases', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_id', 'users', ['id'], unique=False)
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_wallet_address', 'users', ['wallet_address'], unique=True)
+
+    if 'products' not in existing:
+        op.create_table('products',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('currency', sa.String(length=10), nullable=True),
+            sa.Column('condition', sa.Enum('NEW', 'LIKE_NEW', 'GOOD', 'FAIR', 'POOR', name='productcondition'), nullable=True),
+            sa.Column('category_id', sa.Integer(), nullable=True),
+            sa.Column('seller_id', sa.Integer(), nullable=False),
+            sa.Column('images', sa.Text(), nullable=True),
+            sa.Column('is_featured', sa.Boolean(), nullable=True),
+            sa.Column('is_trending', sa.Boolean(), nullable=True),
+            sa.Column('is_auction', sa.Boolean(), nullable=True),
+            sa.Column('auction_end_time', sa.DateTime(), nullable=True),
+            sa.Column('current_bid', sa.Float(), nullable=True),
+            sa.Column('buy_now_price', sa.Float(), nullable=True),
+            sa.Column('shipping_cost', sa.Float(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('views_count', sa.Integer(), nullable=True),
+            sa.Column('likes_count', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+            sa.ForeignKeyConstraint(['seller_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_products_category_id', 'products', ['category_id'], unique=False)
+        op.create_index('ix_products_created_at', 'products', ['created_at'], unique=False)
+        op.create_index('ix_products_id', 'products', ['id'], unique=False)
+        op.create_index('ix_products_is_active', 'products', ['is_active'], unique=False)
+        op.create_index('ix_products_seller_id', 'products', ['seller_id'], unique=False)
+        op.create_index('ix_products_title', 'products', ['title'], unique=False)
+
+    if 'orders' not in existing:
+        op.create_table('orders',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('buyer_id', sa.Integer(), nullable=False),
+            sa.Column('seller_id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=True),
+            sa.Column('unit_price', sa.Float(), nullable=False),
+            sa.Column('total_price', sa.Float(), nullable=False),
+            sa.Column('shipping_cost', sa.Float(), nullable=True),
+            sa.Column('status', sa.Enum('PENDING', 'CONFIRMED', 'SHIPPED', 'DELIVERED', 'CANCELLED', 'DISPUTED', name='orderstatus'), nullable=True),
+            sa.Column('transaction_hash', sa.String(length=100), nullable=True),
+            sa.Column('shipping_address', sa.Text(), nullable=True),
+            sa.Column('tracking_number', sa.String(length=100), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['buyer_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['seller_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_orders_buyer_id', 'orders', ['buyer_id'], unique=False)
+        op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False)
+        op.create_index('ix_orders_id', 'orders', ['id'], unique=False)
+        op.create_index('ix_orders_seller_id', 'orders', ['seller_id'], unique=False)
+        op.create_index('ix_orders_status', 'orders', ['status'], unique=False)
+        op.create_index('ix_orders_transaction_hash', 'orders', ['transaction_hash'], unique=True)
+
+    if 'watchlist' not in existing:
+        op.create_table('watchlist',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_watchlist_id', 'watchlist', ['id'], unique=False)
+        op.create_index('ix_watchlist_user_product', 'watchlist', ['user_id', 'product_id'], unique=False)
+
+    if 'payments' not in existing:
+        op.create_table('payments',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('payment_id', sa.String(length=100), nullable=False),
+            sa.Column('buyer_id', sa.Integer(), nullable=False),
+            sa.Column('seller_id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('currency', sa.String(length=10), nullable=True),
+            sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED', 'CANCELLED', 'DISPUTED', 'REFUNDED', name='paymentstatus'), nullable=True),
+            sa.Column('transaction_hash', sa.String(length=100), nullable=True),
+            sa.Column('buyer_wallet_address', sa.String(length=44), nullable=False),
+            sa.Column('seller_wallet_address', sa.String(length=44), nullable=False),
+            sa.Column('escrow_address', sa.String(length=44), nullable=True),
+            sa.Column('escrow_release_time', sa.DateTime(), nullable=True),
+            sa.Column('dispute_period_days', sa.Integer(), nullable=True),
+            sa.Column('memo', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['buyer_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['seller_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_payments_buyer_id', 'payments', ['buyer_id'], unique=False)
+        op.create_index('ix_payments_buyer_wallet_address', 'payments', ['buyer_wallet_address'], unique=False)
+        op.create_index('ix_payments_created_at', 'payments', ['created_at'], unique=False)
+        op.create_index('ix_payments_escrow_address', 'payments', ['escrow_address'], unique=False)
+        op.create_index('ix_payments_id', 'payments', ['id'], unique=False)
+        op.create_index('ix_payments_payment_id', 'payments', ['payment_id'], unique=True)
+        op.create_index('ix_payments_product_id', 'payments', ['product_id'], unique=False)
+        op.create_index('ix_payments_seller_id', 'payments', ['seller_id'], unique=False)
+        op.create_index('ix_payments_seller_wallet_address', 'payments', ['seller_wallet_address'], unique=False)
+        op.create_index('ix_payments_status', 'payments', ['status'], unique=False)
+        op.create_index('ix_payments_transaction_hash', 'payments', ['transaction_hash'], unique=True)
+
+    if 'reviews' not in existing:
+        op.create_table('reviews',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('reviewer_id', sa.Integer(), nullable=False),
+            sa.Column('reviewee_id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('rating', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=200), nullable=True),
+            sa.Column('comment', sa.Text(), nullable=True),
+            sa.Column('is_verified_purchase', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['reviewee_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['reviewer_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_reviews_created_at', 'reviews', ['created_at'], unique=False)
+        op.create_index('ix_reviews_id', 'reviews', ['id'], unique=False)
+        op.create_index('ix_reviews_product_id', 'reviews', ['product_id'], unique=False)
+        op.create_index('ix_reviews_reviewee_id', 'reviews', ['reviewee_id'], unique=False)
+
+    if 'escrows' not in existing:
+        op.create_table('escrows',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('escrow_id', sa.String(length=100), nullable=False),
+            sa.Column('payment_id', sa.Integer(), nullable=False),
+            sa.Column('escrow_address', sa.String(length=44), nullable=False),
+            sa.Column('buyer_address', sa.String(length=44), nullable=False),
+            sa.Column('seller_address', sa.String(length=44), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('release_time', sa.DateTime(), nullable=False),
+            sa.Column('dispute_period_days', sa.Integer(), nullable=True),
+            sa.Column('is_released', sa.Boolean(), nullable=True),
+            sa.Column('is_disputed', sa.Boolean(), nullable=True),
+            sa.Column('dispute_reason', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('released_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_escrows_buyer_address', 'escrows', ['buyer_address'], unique=False)
+        op.create_index('ix_escrows_created_at', 'escrows', ['created_at'], unique=False)
+        op.create_index('ix_escrows_escrow_address', 'escrows', ['escrow_address'], unique=True)
+        op.create_index('ix_escrows_escrow_id', 'escrows', ['escrow_id'], unique=True)
+        op.create_index('ix_escrows_id', 'escrows', ['id'], unique=False)
+        op.create_index('ix_escrows_is_disputed', 'escrows', ['is_disputed'], unique=False)
+        op.create_index('ix_escrows_is_released', 'escrows', ['is_released'], unique=False)
+        op.create_index('ix_escrows_payment_id', 'escrows', ['payment_id'], unique=False)
+        op.create_index('ix_escrows_release_time', 'escrows', ['release_time'], unique=False)
+        op.create_index('ix_escrows_seller_address', 'escrows', ['seller_address'], unique=False)
+
+    if 'disputes' not in existing:
+        op.create_table('disputes',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('dispute_id', sa.String(length=100), nullable=False),
+            sa.Column('payment_id', sa.Integer(), nullable=False),
+            sa.Column('escrow_id', sa.Integer(), nullable=False),
+            sa.Column('initiator_id', sa.Integer(), nullable=False),
+            sa.Column('reason', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(length=50), nullable=True),
+            sa.Column('resolution', sa.Text(), nullable=True),
+            sa.Column('resolved_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('resolved_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['escrow_id'], ['escrows.id'], ),
+            sa.ForeignKeyConstraint(['initiator_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ),
+            sa.ForeignKeyConstraint(['resolved_by'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_disputes_created_at', 'disputes', ['created_at'], unique=False)
+        op.create_index('ix_disputes_dispute_id', 'disputes', ['dispute_id'], unique=True)
+        op.create_index('ix_disputes_escrow_id', 'disputes', ['escrow_id'], unique=False)
+        op.create_index('ix_disputes_id', 'disputes', ['id'], unique=False)
+        op.create_index('ix_disputes_initiator_id', 'disputes', ['initiator_id'], unique=False)
+        op.create_index('ix_disputes_payment_id', 'disputes', ['payment_id'], unique=False)
+        op.create_index('ix_disputes_status', 'disputes', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    raise NotImplementedError("The baseline schema cannot be downgraded; restore a backup instead")
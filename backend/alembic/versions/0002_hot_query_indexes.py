@@ -0,0 +1,62 @@
+"""Composite indexes for hot queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns) -- kept in step with ``__table_args__`` in models.py
+INDEXES = [
+    # Seller dashboards: orders by seller and status over a date range
+    ("ix_orders_seller_status_created", "orders", ["seller_id", "status", "created_at"]),
+    # Product listing: active products in a category within a price range
+    ("ix_products_active_category_price", "products", ["is_active", "category_id", "price"]),
+    # Trending products ordered by views
+    ("ix_products_trending_active_views", "products", ["is_trending", "is_active", "views_count"]),
+    # Product reviews, newest first
+    ("ix_reviews_product_created", "reviews", ["product_id", "created_at"]),
+]
+
+
+def _drop_invalid(name: str):
+    """A failed concurrent build leaves an INVALID index that IF NOT EXISTS would keep"""
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+        return
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            _drop_invalid(name)
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
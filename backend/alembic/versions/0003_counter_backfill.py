@@ -0,0 +1,44 @@
+"""Rating count column and counter backfill
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created by ``create_all`` before migrations already have the column
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'rating_count' not in columns:
+        op.add_column('users', sa.Column('rating_count', sa.Integer(), nullable=True, server_default='0'))
+
+    # The counters had no update path until now; rebuild the ones the source rows still allow.
+    # Cancelled orders do not count toward sales or purchases, as in OrderService
+    op.execute("""
+        UPDATE users SET
+            rating_count = (SELECT COUNT(*) FROM reviews WHERE reviews.reviewee_id = users.id),
+            rating = COALESCE((SELECT AVG(reviews.rating) FROM reviews WHERE reviews.reviewee_id = users.id), 0),
+            total_sales = (SELECT COUNT(*) FROM orders WHERE orders.seller_id = users.id
+                           AND (orders.status IS NULL OR orders.status <> 'CANCELLED')),
+            total_purchases = (SELECT COUNT(*) FROM orders WHERE orders.buyer_id = users.id
+                               AND (orders.status IS NULL OR orders.status <> 'CANCELLED'))
+    """)
+    op.execute("""
+        UPDATE products SET
+            likes_count = (SELECT COUNT(*) FROM watchlist WHERE watchlist.product_id = products.id)
+    """)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('rating_count')
@@ -0,0 +1,177 @@
+"""Monthly range partitioning for orders, payments and solana_transactions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 13:00:00.000000
+
+Postgres only. Each table is rebuilt as ``PARTITION BY RANGE (created_at)``
+with one partition per month from its oldest row through the premade
+months, plus a default partition. Postgres requires the partition key in
+every primary key and unique constraint, so:
+
+- the primary key becomes (id, created_at) and unique columns
+  (transaction_hash, payment_id, signature, ...) are unique per created_at
+- an unpartitioned ``<table>_keys`` registry holds id and every unique
+  column under the original, global constraints; a row trigger writes it in
+  the same statement, so a duplicate id or key still fails the insert
+- foreign keys *into* these tables (reviews.order_id, payments.order_id,
+  escrows/disputes.payment_id) reference the registry instead, and keep
+  their ON DELETE behaviour through the trigger's delete
+
+Archiving a month leaves its registry rows in place, so archived keys stay
+reserved. ``created_at`` is never updated; moving a row between partitions
+with UPDATE would reach the trigger as a delete and an insert.
+
+This migration is irreversible on Postgres: archived months live only in
+Parquet files and the original global constraints cannot be rebuilt from the
+partitioned data, so ``downgrade()`` refuses with an explicit error. Restore a
+backup taken before 0004 to go back. On other databases upgrade and downgrade
+are both no-ops.
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from partitioning import (
+    PARTITION_KEY, PARTITIONED_TABLES, add_months, create_default_partition_sql,
+    create_partition_sql, key_sync_function_sql, key_sync_trigger_sql, key_table_name, month_floor
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+PREMAKE_MONTHS = 3
+
+
+def _is_partitioned(bind, table: str) -> bool:
+    return bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": table}).scalar() is not None
+
+
+def _partition_table(bind, table: str):
+    inspector = sa.inspect(bind)
+    legacy = f"{table}_unpartitioned"
+    pk = inspector.get_pk_constraint(table)
+    indexes = [index for index in inspector.get_indexes(table) if not index.get("duplicates_constraint")]
+    uniques = inspector.get_unique_constraints(table)
+    outbound = inspector.get_foreign_keys(table)
+    inbound = [
+        (other, fk)
+        for other in inspector.get_table_names()
+        for fk in inspector.get_foreign_keys(other)
+        if fk["referred_table"] == table and other != table
+    ]
+
+    for other, fk in inbound:
+        op.drop_constraint(fk["name"], other, type_="foreignkey")
+
+    op.execute(f"UPDATE {table} SET {PARTITION_KEY} = timezone('utc', now()) WHERE {PARTITION_KEY} IS NULL")
+    # Free the index and constraint names for the partitioned table
+    op.rename_table(table, legacy)
+    for index in indexes:
+        op.drop_index(index["name"], table_name=legacy)
+    for unique in uniques:
+        op.drop_constraint(unique["name"], legacy, type_="unique")
+    if pk.get("name"):
+        op.execute(f'ALTER TABLE {legacy} RENAME CONSTRAINT "{pk["name"]}" TO "{legacy}_pkey"')
+
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({PARTITION_KEY})"
+    )
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN {PARTITION_KEY} SET NOT NULL")
+    pk_columns = list(pk["constrained_columns"] or ["id"])
+    op.execute(
+        f'ALTER TABLE {table} ADD CONSTRAINT "{pk.get("name") or table + "_pkey"}" '
+        f'PRIMARY KEY ({", ".join(pk_columns + [PARTITION_KEY])})'
+    )
+
+    # The id sequence belongs to the old column and would be dropped with it
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": legacy}).scalar()
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+
+    oldest = bind.execute(sa.text(f"SELECT min({PARTITION_KEY}) FROM {legacy}")).scalar()
+    current = month_floor(datetime.utcnow())
+    month = month_floor(oldest) if oldest is not None and oldest < current else current
+    while month <= add_months(current, PREMAKE_MONTHS):
+        op.execute(create_partition_sql(table, month))
+        month = add_months(month, 1)
+    op.execute(create_default_partition_sql(table))
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+    op.drop_table(legacy)
+
+    # Indexes on the parent cascade to every partition, current and future
+    for index in indexes:
+        columns = index["column_names"]
+        if index["unique"] and PARTITION_KEY not in columns:
+            columns = columns + [PARTITION_KEY]
+        op.create_index(index["name"], table, columns, unique=index["unique"])
+    for unique in uniques:
+        columns = unique["column_names"]
+        if PARTITION_KEY not in columns:
+            columns = columns + [PARTITION_KEY]
+        op.create_unique_constraint(unique["name"], table, columns)
+    _create_key_registry(table, pk_columns, _unique_keys(indexes, uniques))
+    for other, fk in inbound:
+        op.create_foreign_key(
+            fk["name"], other, key_table_name(table), fk["constrained_columns"], fk["referred_columns"],
+            ondelete=(fk.get("options") or {}).get("ondelete")
+        )
+    for fk in outbound:
+        op.create_foreign_key(
+            fk["name"], table, fk["referred_table"], fk["constrained_columns"], fk["referred_columns"],
+            ondelete=(fk.get("options") or {}).get("ondelete")
+        )
+
+
+def _unique_keys(indexes, uniques) -> list:
+    """Column lists of the unpartitioned table's unique constraints and indexes"""
+    keys = []
+    for constraint in [index for index in indexes if index["unique"]] + uniques:
+        if constraint["column_names"] not in keys:
+            keys.append(constraint["column_names"])
+    return keys
+
+
+def _create_key_registry(table: str, pk_columns: list, unique_keys: list):
+    registry = key_table_name(table)
+    unique_columns = [column for key in unique_keys for column in key if column not in pk_columns]
+    unique_columns = list(dict.fromkeys(unique_columns))
+    columns = ", ".join(f'"{column}"' for column in pk_columns + unique_columns)
+    op.execute(f'CREATE TABLE "{registry}" AS SELECT {columns} FROM "{table}" WITH NO DATA')
+    op.execute(f'INSERT INTO "{registry}" SELECT {columns} FROM "{table}"')
+    op.create_primary_key(f"{registry}_pkey", registry, pk_columns)
+    for key in unique_keys:
+        op.create_unique_constraint(f"uq_{registry}_{'_'.join(key)}", registry, key)
+    op.execute(key_sync_function_sql(table, pk_columns, unique_columns))
+    op.execute(key_sync_trigger_sql(table))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    existing = set(sa.inspect(bind).get_table_names())
+    for table in PARTITIONED_TABLES:
+        if table in existing and not _is_partitioned(bind, table):
+            _partition_table(bind, table)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    raise NotImplementedError(
+        "Revision 0004 is irreversible on Postgres: orders, payments and solana_transactions are "
+        "partitioned, archived months exist only as Parquet files and the original unique "
+        "constraints cannot be rebuilt; restore a backup taken before 0004 instead"
+    )
@@ -15,6 +15,8 @@ import logging
 from collections import defaultdict
 import statistics
 
+from . import indicators
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -333,7 +335,7 @@ class AdvancedAnalyticsService:
         max_drawdown = self._calculate_max_drawdown(returns)
         
         # Calculate volatility
-        volatility = statistics.stdev(returns) if len(returns) > 1 else 0
+        volatility = indicators.volatility(returns)
         
         return TradingMetrics(
             total_volume=total_volume,
@@ -448,41 +450,12 @@ class AdvancedAnalyticsService:
         
     def _calculate_sharpe_ratio(self, returns: List[float]) -> float:
         """Calculate Sharpe ratio"""
-        if not returns or len(returns) < 2:
-            return 0.0
-            
-        mean_return = statistics.mean(returns)
-        std_return = statistics.stdev(returns)
-        
-        if std_return == 0:
-            return 0.0
-            
         # Assuming risk-free rate of 0 for simplicity
-        sharpe_ratio = mean_return / std_return
-        return sharpe_ratio
+        return indicators.sharpe_ratio(returns)
         
     def _calculate_max_drawdown(self, returns: List[float]) -> float:
         """Calculate maximum drawdown"""
-        if not returns:
-            return 0.0
-            
-        cumulative_returns = []
-        cumulative = 1.0
-        
-        for ret in returns:
-            cumulative *= (1 + ret)
-            cumulative_returns.append(cumulative)
-            
-        peak = cumulative_returns[0]
-        max_drawdown = 0.0
-        
-        for value in cumulative_returns:
-            if value > peak:
-                peak = value
-            drawdown = (peak - value) / peak
-            max_drawdown = max(max_drawdown, drawdown)
-            
-        return max_drawdown
+        return indicators.max_drawdown(returns)
         
     # Empty data methods
     def _empty_analytics(self) -> Dict[str, Any]:
@@ -0,0 +1,500 @@
+"""
+Pre-aggregated rollup tables for Soladia business intelligence
+Maintains hourly and daily marketplace metrics incrementally from a watermark
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Float, DateTime, UniqueConstraint, Index, func, select
+)
+from sqlalchemy.orm import Session
+
+from database import Base
+from models import User, Product, Order, Payment, PaymentStatus
+
+logger = logging.getLogger(__name__)
+
+# Core marketplace tables are single-tenant; multi-tenant sources write their own id
+DEFAULT_TENANT = ""
+# Products without a category roll up under category 0
+NO_CATEGORY = 0
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+# Facts are read through Core tables so refreshing never configures the marketplace mappers
+orders_table = Order.__table__
+payments_table = Payment.__table__
+products_table = Product.__table__
+users_table = User.__table__
+
+
+def completed_payments(start: datetime, end: datetime):
+    """Completed payments made in [start, end) with their product's category
+
+    Revenue and conversions are settled money. The rollups and the live
+    dashboard queries both read them through this select so they agree.
+    """
+    pay, p = payments_table.c, products_table.c
+    return select(pay.created_at, pay.amount, p.category_id).select_from(
+        payments_table.outerjoin(products_table, p.id == pay.product_id)
+    ).where(pay.status == PaymentStatus.COMPLETED, pay.created_at >= start, pay.created_at < end)
+
+
+def live_revenue_totals(db: Session, start: datetime, end: datetime) -> Dict[str, float]:
+    """Revenue and conversions for [start, end) computed from the raw payments"""
+    payments = completed_payments(start, end).subquery()
+    revenue, conversions = db.execute(
+        select(func.coalesce(func.sum(payments.c.amount), 0), func.count())
+    ).one()
+    return {'revenue': float(revenue or 0), 'conversions': int(conversions or 0)}
+
+
+def payment_method_revenue(db: Session, start: datetime, end: datetime) -> List[Tuple[str, float, int]]:
+    """(currency, revenue, payments) for completed payments in [start, end), largest first
+
+    Every payment is a Solana transfer, so the currency (SOL or a token) is its method.
+    """
+    pay = payments_table.c
+    revenue = func.sum(pay.amount)
+    rows = db.execute(
+        select(pay.currency, revenue, func.count())
+        .where(pay.status == PaymentStatus.COMPLETED, pay.created_at >= start, pay.created_at < end)
+        .group_by(pay.currency)
+        .order_by(revenue.desc())
+    )
+    return [(currency or 'SOL', float(total or 0), int(count)) for currency, total, count in rows]
+
+
+class _RollupColumns:
+    """Columns shared by the hourly and daily rollup tables"""
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False)
+    tenant_id = Column(String(36), nullable=False, default=DEFAULT_TENANT)
+    category_id = Column(Integer, nullable=False, default=NO_CATEGORY)
+
+    revenue = Column(Float, nullable=False, default=0.0)
+    order_count = Column(Integer, nullable=False, default=0)
+    conversions = Column(Integer, nullable=False, default=0)
+    new_users = Column(Integer, nullable=False, default=0)
+    active_sellers = Column(Integer, nullable=False, default=0)
+    active_buyers = Column(Integer, nullable=False, default=0)
+    product_views = Column(BigInteger, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class HourlyRollup(_RollupColumns, Base):
+    __tablename__ = "bi_hourly_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "tenant_id", "category_id", name="uq_bi_hourly_bucket"),
+        Index("ix_bi_hourly_tenant_bucket", "tenant_id", "bucket_start"),
+    )
+
+
+class DailyRollup(_RollupColumns, Base):
+    __tablename__ = "bi_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "tenant_id", "category_id", name="uq_bi_daily_bucket"),
+        Index("ix_bi_daily_tenant_bucket", "tenant_id", "bucket_start"),
+    )
+
+
+class RollupWatermark(Base):
+    __tablename__ = "bi_rollup_watermarks"
+
+    source = Column(String(50), primary_key=True)
+    last_seen_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CategoryViewSnapshot(Base):
+    __tablename__ = "bi_category_view_snapshots"
+
+    category_id = Column(Integer, primary_key=True)
+    views_total = Column(BigInteger, nullable=False, default=0)
+    captured_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Metrics recomputed from raw facts; product_views is accumulated from snapshots instead
+RECOMPUTED_METRICS = ('revenue', 'order_count', 'conversions', 'new_users', 'active_sellers', 'active_buyers')
+ADDITIVE_METRICS = ('revenue', 'order_count', 'conversions', 'new_users', 'product_views')
+
+
+@dataclass
+class _Bucket:
+    """In-memory aggregate for one (bucket, tenant, category)"""
+    revenue: float = 0.0
+    order_count: int = 0
+    conversions: int = 0
+    new_users: int = 0
+    sellers: Set[int] = field(default_factory=set)
+    buyers: Set[int] = field(default_factory=set)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'revenue': self.revenue,
+            'order_count': self.order_count,
+            'conversions': self.conversions,
+            'new_users': self.new_users,
+            'active_sellers': len(self.sellers),
+            'active_buyers': len(self.buyers),
+        }
+
+
+@dataclass
+class RollupRunStats:
+    """Outcome of one incremental rollup pass"""
+    hours_recomputed: int = 0
+    days_recomputed: int = 0
+    view_delta: int = 0
+    duration_ms: float = 0.0
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _contiguous_ranges(buckets: Iterable[datetime], step: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Collapse bucket starts into [start, end) ranges of consecutive buckets"""
+    ranges: List[Tuple[datetime, datetime]] = []
+    for bucket in sorted(set(buckets)):
+        if ranges and ranges[-1][1] == bucket:
+            ranges[-1] = (ranges[-1][0], bucket + step)
+        else:
+            ranges.append((bucket, bucket + step))
+    return ranges
+
+
+class BIRollupService:
+    """Incrementally maintains and queries the BI rollup tables"""
+
+    def __init__(self, batch_size: int = 5000, watermark_overlap_seconds: int = 120):
+        self.batch_size = batch_size
+        # Rows committed slightly out of timestamp order are caught by re-reading a short overlap;
+        # recomputing a bucket is idempotent so the overlap is safe
+        self.watermark_overlap = timedelta(seconds=watermark_overlap_seconds)
+
+    # Maintenance
+
+    def refresh(self, db: Session, now: Optional[datetime] = None) -> RollupRunStats:
+        """Fold every fact changed since the last watermark into the rollups"""
+        started = datetime.utcnow()
+        now = now or datetime.utcnow()
+        stats = RollupRunStats()
+
+        try:
+            order_hours, order_mark = self._changed_hours(db, orders_table, 'orders')
+            payment_hours, payment_mark = self._changed_hours(db, payments_table, 'payments')
+            user_hours, user_mark = self._changed_user_hours(db)
+            hours = order_hours | payment_hours | user_hours
+
+            for start, end in _contiguous_ranges(hours, HOUR):
+                stats.hours_recomputed += self._recompute(db, HourlyRollup, start, end, floor_hour)
+
+            stats.view_delta = self._apply_view_snapshot(db, floor_hour(now))
+            if stats.view_delta:
+                hours.add(floor_hour(now))
+
+            days = {floor_day(hour) for hour in hours}
+            for start, end in _contiguous_ranges(days, DAY):
+                stats.days_recomputed += self._recompute(db, DailyRollup, start, end, floor_day)
+                self._sum_views_into_daily(db, start, end)
+
+            self._set_watermark(db, 'orders', order_mark or now)
+            self._set_watermark(db, 'payments', payment_mark or now)
+            self._set_watermark(db, 'users', user_mark or now)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to refresh BI rollups: {e}")
+            raise
+
+        stats.duration_ms = (datetime.utcnow() - started).total_seconds() * 1000
+        return stats
+
+    def rebuild(self, db: Session, since: datetime, now: Optional[datetime] = None) -> RollupRunStats:
+        """Recompute rollups from raw facts for everything after ``since``"""
+        now = now or datetime.utcnow()
+        start_day = floor_day(since)
+        end_day = floor_day(now) + DAY
+
+        hours = self._recompute(db, HourlyRollup, start_day, end_day, floor_hour)
+        days = self._recompute(db, DailyRollup, start_day, end_day, floor_day)
+        self._sum_views_into_daily(db, start_day, end_day)
+        for source in ('orders', 'payments', 'users'):
+            self._set_watermark(db, source, now)
+        db.commit()
+        return RollupRunStats(hours_recomputed=hours, days_recomputed=days)
+
+    def _get_watermark(self, db: Session, source: str) -> Optional[datetime]:
+        mark = db.query(RollupWatermark).filter(RollupWatermark.source == source).first()
+        return mark.last_seen_at if mark else None
+
+    def _set_watermark(self, db: Session, source: str, value: Optional[datetime]):
+        if value is None:
+            return
+        mark = db.query(RollupWatermark).filter(RollupWatermark.source == source).first()
+        if mark is None:
+            db.add(RollupWatermark(source=source, last_seen_at=value))
+        elif mark.last_seen_at is None or value > mark.last_seen_at:
+            mark.last_seen_at = value
+
+    def _changed_hours(self, db: Session, table, source: str) -> Tuple[Set[datetime], Optional[datetime]]:
+        """Hours whose rows in ``table`` were created or changed since the watermark"""
+        changed_at = func.coalesce(table.c.updated_at, table.c.created_at)
+        query = select(table.c.created_at, changed_at)
+        watermark = self._get_watermark(db, source)
+        if watermark is not None:
+            query = query.where(changed_at > watermark - self.watermark_overlap)
+
+        hours: Set[datetime] = set()
+        latest = watermark
+        for created_at, changed in self._stream(db, query):
+            if created_at is not None:
+                hours.add(floor_hour(created_at))
+            if changed is not None and (latest is None or changed > latest):
+                latest = changed
+        return hours, latest
+
+    def _changed_user_hours(self, db: Session) -> Tuple[Set[datetime], Optional[datetime]]:
+        """Hours with user registrations since the watermark"""
+        query = select(users_table.c.created_at).where(users_table.c.created_at.isnot(None))
+        watermark = self._get_watermark(db, 'users')
+        if watermark is not None:
+            query = query.where(users_table.c.created_at > watermark - self.watermark_overlap)
+
+        hours: Set[datetime] = set()
+        latest = watermark
+        for (created_at,) in self._stream(db, query):
+            hours.add(floor_hour(created_at))
+            if latest is None or created_at > latest:
+                latest = created_at
+        return hours, latest
+
+    def _stream(self, db: Session, query):
+        """Iterate a Core select in batches without buffering the whole result"""
+        return db.execute(query.execution_options(yield_per=self.batch_size))
+
+    def _aggregate(self, db: Session, start: datetime, end: datetime,
+                   bucket_fn) -> Dict[Tuple[datetime, str, int], _Bucket]:
+        """Aggregate raw orders, completed payments and registrations in [start, end) into buckets"""
+        buckets: Dict[Tuple[datetime, str, int], _Bucket] = defaultdict(_Bucket)
+
+        o, p = orders_table.c, products_table.c
+        orders = select(
+            o.created_at, o.seller_id, o.buyer_id, p.category_id
+        ).select_from(
+            orders_table.outerjoin(products_table, p.id == o.product_id)
+        ).where(o.created_at >= start, o.created_at < end)
+        for created_at, seller_id, buyer_id, category_id in self._stream(db, orders):
+            bucket = buckets[(bucket_fn(created_at), DEFAULT_TENANT, category_id or NO_CATEGORY)]
+            bucket.order_count += 1
+            bucket.sellers.add(seller_id)
+            bucket.buyers.add(buyer_id)
+
+        for created_at, amount, category_id in self._stream(db, completed_payments(start, end)):
+            bucket = buckets[(bucket_fn(created_at), DEFAULT_TENANT, category_id or NO_CATEGORY)]
+            bucket.conversions += 1
+            bucket.revenue += float(amount or 0.0)
+
+        users = select(users_table.c.created_at).where(
+            users_table.c.created_at >= start, users_table.c.created_at < end
+        )
+        for (created_at,) in self._stream(db, users):
+            buckets[(bucket_fn(created_at), DEFAULT_TENANT, NO_CATEGORY)].new_users += 1
+
+        return buckets
+
+    def _recompute(self, db: Session, table, start: datetime, end: datetime, bucket_fn) -> int:
+        """Replace the recomputed metrics of every bucket in [start, end)"""
+        aggregates = self._aggregate(db, start, end, bucket_fn)
+        existing = {
+            (row.bucket_start, row.tenant_id, row.category_id): row
+            for row in db.query(table).filter(table.bucket_start >= start, table.bucket_start < end)
+        }
+
+        for key, row in existing.items():
+            if key not in aggregates:
+                for metric in RECOMPUTED_METRICS:
+                    setattr(row, metric, 0)
+
+        for (bucket_start, tenant_id, category_id), bucket in aggregates.items():
+            row = existing.get((bucket_start, tenant_id, category_id))
+            if row is None:
+                row = table(bucket_start=bucket_start, tenant_id=tenant_id, category_id=category_id,
+                            product_views=0)
+                db.add(row)
+            for metric, value in bucket.metrics().items():
+                setattr(row, metric, value)
+
+        db.flush()
+        return len({key[0] for key in aggregates})
+
+    def _apply_view_snapshot(self, db: Session, hour: datetime) -> int:
+        """Attribute the growth of products.views_count since the last run to ``hour``
+
+        View counts are only kept as running totals, so the first run records a
+        baseline and later runs add the per-category delta.
+        """
+        totals = db.execute(
+            select(products_table.c.category_id, func.sum(products_table.c.views_count))
+            .group_by(products_table.c.category_id)
+        ).all()
+        snapshots = {row.category_id: row for row in db.query(CategoryViewSnapshot)}
+
+        total_delta = 0
+        for category_id, views_total in totals:
+            category_id = category_id or NO_CATEGORY
+            views_total = int(views_total or 0)
+            snapshot = snapshots.get(category_id)
+            if snapshot is None:
+                db.add(CategoryViewSnapshot(category_id=category_id, views_total=views_total, captured_at=hour))
+                continue
+
+            delta = max(views_total - snapshot.views_total, 0)
+            snapshot.views_total = views_total
+            snapshot.captured_at = hour
+            if not delta:
+                continue
+
+            row = db.query(HourlyRollup).filter(
+                HourlyRollup.bucket_start == hour,
+                HourlyRollup.tenant_id == DEFAULT_TENANT,
+                HourlyRollup.category_id == category_id
+            ).first()
+            if row is None:
+                row = HourlyRollup(bucket_start=hour, tenant_id=DEFAULT_TENANT, category_id=category_id,
+                                   revenue=0.0, order_count=0, conversions=0, new_users=0,
+                                   active_sellers=0, active_buyers=0, product_views=0)
+                db.add(row)
+            row.product_views += delta
+            total_delta += delta
+
+        db.flush()
+        return total_delta
+
+    def _sum_views_into_daily(self, db: Session, start: datetime, end: datetime):
+        """Daily product_views are the sum of their hourly rows"""
+        hourly = db.query(HourlyRollup).filter(
+            HourlyRollup.bucket_start >= start, HourlyRollup.bucket_start < end,
+            HourlyRollup.product_views > 0
+        )
+        views: Dict[Tuple[datetime, str, int], int] = defaultdict(int)
+        for row in hourly:
+            views[(floor_day(row.bucket_start), row.tenant_id, row.category_id)] += row.product_views
+
+        daily = {
+            (row.bucket_start, row.tenant_id, row.category_id): row
+            for row in db.query(DailyRollup).filter(DailyRollup.bucket_start >= start, DailyRollup.bucket_start < end)
+        }
+        for key, row in daily.items():
+            row.product_views = views.pop(key, 0)
+        for (bucket_start, tenant_id, category_id), count in views.items():
+            db.add(DailyRollup(bucket_start=bucket_start, tenant_id=tenant_id, category_id=category_id,
+                               revenue=0.0, order_count=0, conversions=0, new_users=0,
+                               active_sellers=0, active_buyers=0, product_views=count))
+        db.flush()
+
+    async def run_periodically(self, session_factory, interval_seconds: float = 300.0):
+        """Refresh the rollups forever on a fixed interval"""
+        while True:
+            db = session_factory()
+            try:
+                stats = await asyncio.get_running_loop().run_in_executor(None, self.refresh, db)
+                logger.info(f"BI rollups refreshed: {stats}")
+            except Exception as e:
+                logger.error(f"BI rollup refresh failed: {e}")
+            finally:
+                db.close()
+            await asyncio.sleep(interval_seconds)
+
+    # Queries
+
+    def is_ready(self, db: Session) -> bool:
+        """True once the rollups have been built at least once"""
+        return self._get_watermark(db, 'orders') is not None
+
+    def _segments(self, start: datetime, end: datetime) -> List[Tuple[Any, datetime, datetime]]:
+        """Split [start, end) into hourly edges and whole days"""
+        first_day = floor_day(start) if start == floor_day(start) else floor_day(start) + DAY
+        last_day = floor_day(end)
+        if first_day >= last_day:
+            return [(HourlyRollup, floor_hour(start), end)]
+
+        segments = []
+        if start < first_day:
+            segments.append((HourlyRollup, floor_hour(start), first_day))
+        segments.append((DailyRollup, first_day, last_day))
+        if last_day < end:
+            segments.append((HourlyRollup, last_day, end))
+        return segments
+
+    def get_totals(self, db: Session, start: datetime, end: datetime,
+                   tenant_id: Optional[str] = None) -> Dict[str, float]:
+        """Additive metric totals for [start, end)"""
+        totals = {metric: 0.0 for metric in ADDITIVE_METRICS}
+        for table, seg_start, seg_end in self._segments(start, end):
+            query = db.query(*[func.coalesce(func.sum(getattr(table, m)), 0) for m in ADDITIVE_METRICS]).filter(
+                table.bucket_start >= seg_start, table.bucket_start < seg_end
+            )
+            if tenant_id is not None:
+                query = query.filter(table.tenant_id == tenant_id)
+            for metric, value in zip(ADDITIVE_METRICS, query.one()):
+                totals[metric] += float(value or 0)
+        return totals
+
+    def get_daily_series(self, db: Session, start: datetime, end: datetime,
+                         tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-day metrics summed over categories, ordered by day"""
+        query = db.query(
+            DailyRollup.bucket_start,
+            *[func.sum(getattr(DailyRollup, m)) for m in ADDITIVE_METRICS],
+            func.sum(DailyRollup.active_sellers)
+        ).filter(
+            DailyRollup.bucket_start >= floor_day(start), DailyRollup.bucket_start < end
+        )
+        if tenant_id is not None:
+            query = query.filter(DailyRollup.tenant_id == tenant_id)
+
+        series = []
+        for row in query.group_by(DailyRollup.bucket_start).order_by(DailyRollup.bucket_start):
+            point = {'date': row[0]}
+            point.update({metric: float(value or 0) for metric, value in zip(ADDITIVE_METRICS, row[1:])})
+            # Distinct sellers are exact per category; across categories this is an upper bound
+            point['active_sellers'] = int(row[-1] or 0)
+            series.append(point)
+        return series
+
+    def get_category_breakdown(self, db: Session, start: datetime, end: datetime,
+                               tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Additive metrics per category over whole days, highest revenue first"""
+        query = db.query(
+            DailyRollup.category_id,
+            *[func.sum(getattr(DailyRollup, m)) for m in ADDITIVE_METRICS]
+        ).filter(
+            DailyRollup.bucket_start >= floor_day(start), DailyRollup.bucket_start < end
+        )
+        if tenant_id is not None:
+            query = query.filter(DailyRollup.tenant_id == tenant_id)
+
+        breakdown = []
+        for row in query.group_by(DailyRollup.category_id):
+            entry = {'category_id': row[0]}
+            entry.update({metric: float(value or 0) for metric, value in zip(ADDITIVE_METRICS, row[1:])})
+            breakdown.append(entry)
+        return sorted(breakdown, key=lambda entry: entry['revenue'], reverse=True)
+
+
+# Shared service used by the BI dashboard and the background refresh job
+bi_rollup_service = BIRollupService()
@@ -18,6 +18,10 @@ import base64
 import requests
 from collections import defaultdict, deque
 
+from . import indicators
+from .indicators import TickIndicators
+from .timeseries_store import SeriesSlice, TimeSeriesStore, parse_period
+
 logger = logging.getLogger(__name__)
 
 class AnalysisType(Enum):
@@ -96,8 +100,9 @@ class AdvancedBlockchainIntelligence:
         self.whale_wallets: Set[str] = set()
         self.arbitrage_opportunities: List[ArbitrageOpportunity] = []
         self.market_intelligence: List[MarketIntelligence] = []
-        self.price_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
-        self.volume_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        # Price and volume series keyed "{token}:price" / "{token}:volume"
+        self.series_store = TimeSeriesStore(capacity=10000)
+        self.indicator_states: Dict[str, TickIndicators] = defaultdict(TickIndicators)
         
         # Initialize whale wallet addresses (mock data)
         self._initialize_whale_wallets()
@@ -460,142 +465,126 @@ class AdvancedBlockchainIntelligence:
             logger.error(f"Failed to detect market manipulation: {str(e)}")
             return []
             
-    async def _get_price_data(self, token: str, time_period: str) -> List[Dict[str, Any]]:
+    async def _get_price_data(self, token: str, time_period: str) -> SeriesSlice:
         """Get price data for a token"""
-        # Mock implementation - would fetch real price data
-        return [
-            {'timestamp': datetime.utcnow() - timedelta(hours=i), 'price': 100 + np.random.normal(0, 5)}
-            for i in range(24)
-        ]
+        return await self._get_series(token, "price", time_period, 100, 5)
         
-    async def _get_volume_data(self, token: str, time_period: str) -> List[Dict[str, Any]]:
+    async def _get_volume_data(self, token: str, time_period: str) -> SeriesSlice:
         """Get volume data for a token"""
-        # Mock implementation - would fetch real volume data
-        return [
-            {'timestamp': datetime.utcnow() - timedelta(hours=i), 'volume': 1000000 + np.random.normal(0, 100000)}
-            for i in range(24)
-        ]
-        
-    async def _analyze_price_trends(self, price_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._get_series(token, "volume", time_period, 1000000, 100000)
+        
+    async def _get_series(self, token: str, field: str, time_period: str,
+                          mock_mean: float, mock_std: float) -> SeriesSlice:
+        """Read a token series from the store, backfilling hourly points when empty"""
+        key = f"{token}:{field}"
+        now = datetime.utcnow()
+        start = now - parse_period(time_period)
+        data = self.series_store.range(key, start)
+        if len(data) == 0:
+            # Mock implementation - would fetch real data
+            hours = max(1, int((now - start).total_seconds() // 3600))
+            self.series_store.extend(
+                key,
+                [now - timedelta(hours=i) for i in range(hours - 1, -1, -1)],
+                np.random.normal(mock_mean, mock_std, hours)
+            )
+            data = self.series_store.range(key, start)
+        return data
+        
+    async def _analyze_price_trends(self, price_data: SeriesSlice) -> Dict[str, Any]:
         """Analyze price trends"""
-        prices = [d['price'] for d in price_data]
+        prices = price_data.values
         
         # Calculate trend
         if len(prices) >= 2:
-            trend = (prices[-1] - prices[0]) / prices[0]
+            trend = float((prices[-1] - prices[0]) / prices[0])
         else:
             trend = 0
             
-        # Calculate volatility
-        volatility = np.std(prices) / np.mean(prices) if prices else 0
+        # Calculate volatility (coefficient of variation)
+        volatility = float(np.std(prices) / np.mean(prices)) if len(prices) else 0
         
         return {
             'trend': trend,
             'volatility': volatility,
-            'current_price': prices[-1] if prices else 0,
+            'current_price': float(prices[-1]) if len(prices) else 0,
             'price_change': trend * 100
         }
         
-    async def _analyze_volume_patterns(self, volume_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _analyze_volume_patterns(self, volume_data: SeriesSlice) -> Dict[str, Any]:
         """Analyze volume patterns"""
-        volumes = [d['volume'] for d in volume_data]
+        volumes = volume_data.values
         
         # Calculate volume trend
         if len(volumes) >= 2:
-            volume_trend = (volumes[-1] - volumes[0]) / volumes[0]
+            volume_trend = float((volumes[-1] - volumes[0]) / volumes[0])
         else:
             volume_trend = 0
             
         # Calculate average volume
-        avg_volume = np.mean(volumes) if volumes else 0
+        avg_volume = float(np.mean(volumes)) if len(volumes) else 0
         
         return {
             'volume_trend': volume_trend,
             'average_volume': avg_volume,
-            'current_volume': volumes[-1] if volumes else 0,
+            'current_volume': float(volumes[-1]) if len(volumes) else 0,
             'volume_change': volume_trend * 100
         }
         
-    async def _calculate_technical_indicators(self, price_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def _calculate_technical_indicators(self, price_data: SeriesSlice) -> Dict[str, Any]:
         """Calculate technical indicators"""
-        prices = [d['price'] for d in price_data]
+        prices = price_data.values
         
         if len(prices) < 20:
             return {}
             
         # Calculate moving averages
-        sma_20 = np.mean(prices[-20:])
-        sma_50 = np.mean(prices[-50:]) if len(prices) >= 50 else sma_20
-        
-        # Calculate RSI
-        rsi = self._calculate_rsi(prices)
-        
-        # Calculate MACD
-        macd = self._calculate_macd(prices)
+        sma_20 = float(indicators.sma(prices, 20)[-1])
+        sma_50 = float(indicators.sma(prices, 50)[-1]) if len(prices) >= 50 else sma_20
+        middle, upper, lower = indicators.bollinger_bands(prices, 20)
         
         return {
             'sma_20': sma_20,
             'sma_50': sma_50,
-            'rsi': rsi,
-            'macd': macd,
-            'current_price': prices[-1]
+            'rsi': self._calculate_rsi(prices),
+            'macd': self._calculate_macd(prices),
+            'bollinger': {'middle': float(middle[-1]), 'upper': float(upper[-1]), 'lower': float(lower[-1])},
+            'current_price': float(prices[-1])
         }
         
     def _calculate_rsi(self, prices: List[float], period: int = 14) -> float:
-        """Calculate RSI"""
+        """Calculate Wilder's RSI"""
         if len(prices) < period + 1:
             return 50
-            
-        deltas = [prices[i] - prices[i-1] for i in range(1, len(prices))]
-        gains = [d if d > 0 else 0 for d in deltas]
-        losses = [-d if d < 0 else 0 for d in deltas]
-        
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-        
-        if avg_loss == 0:
-            return 100
-            
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return float(indicators.rsi(prices, period)[-1])
         
     def _calculate_macd(self, prices: List[float]) -> Dict[str, float]:
-        """Calculate MACD"""
+        """Calculate MACD with a signal line over the MACD series"""
         if len(prices) < 26:
             return {'macd': 0, 'signal': 0, 'histogram': 0}
             
-        # Calculate EMAs
-        ema_12 = self._calculate_ema(prices, 12)
-        ema_26 = self._calculate_ema(prices, 26)
-        
-        macd = ema_12 - ema_26
-        
-        # Calculate signal line (9-period EMA of MACD)
-        macd_values = [macd] * len(prices)
-        signal = self._calculate_ema(macd_values, 9)
-        
-        histogram = macd - signal
+        macd, signal, histogram = indicators.macd(prices)
         
         return {
-            'macd': macd,
-            'signal': signal,
-            'histogram': histogram
+            'macd': float(macd[-1]),
+            'signal': float(signal[-1]),
+            'histogram': float(histogram[-1])
         }
         
     def _calculate_ema(self, prices: List[float], period: int) -> float:
         """Calculate EMA"""
         if len(prices) < period:
-            return prices[-1] if prices else 0
-            
-        multiplier = 2 / (period + 1)
-        ema = prices[0]
+            return prices[-1] if len(prices) else 0
+        return float(indicators.ema(prices, period)[-1])
         
-        for price in prices[1:]:
-            ema = (price * multiplier) + (ema * (1 - multiplier))
-            
-        return ema
+    def update_price_tick(self, token: str, price: float) -> Dict[str, Any]:
+        """Advance the streaming indicators for a token by one tick in O(1)"""
+        self.series_store.append(f"{token}:price", datetime.utcnow(), price)
+        return self.indicator_states[token].update(price)
+        
+    def load_indicator_state(self, token: str, state: Dict[str, Any]):
+        """Resume streaming indicators from a saved state"""
+        self.indicator_states[token] = TickIndicators.from_dict(state)
         
     async def _determine_market_condition(self, 
                                         trend_analysis: Dict[str, Any],
@@ -5,21 +5,27 @@ Provides comprehensive analytics, reporting, and business insights
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func, desc, asc
+from sqlalchemy import text, func, desc, asc, select
 import json
 import redis
 from dataclasses import dataclass
 from enum import Enum
 
-from ..database import get_db
-from ..models import User, Product, Order, Transaction, NFT, Review
+from ..database import SessionLocal
+from ..config import settings
+from ..models import User, Product, Order, Category, Payment, PaymentStatus, NFT, Review
 from ..services.caching import CacheService
 from ..services.ml_service import MLService
+from .bi_rollups import (
+    BIRollupService, bi_rollup_service, completed_payments, live_revenue_totals, payment_method_revenue
+)
+from .report_executor import ReportExecutor
+from .fact_export import ExportFormat, stream_fact_export
 
 logger = logging.getLogger(__name__)
 
@@ -53,9 +59,17 @@ class ChartData:
 class BusinessIntelligenceService:
     """Advanced Business Intelligence Service for Soladia Marketplace"""
     
-    def __init__(self, cache_service: CacheService, ml_service: MLService):
+    def __init__(self, cache_service: CacheService, ml_service: MLService,
+                 rollup_service: Optional[BIRollupService] = None,
+                 report_executor: Optional[ReportExecutor] = None):
         self.cache_service = cache_service
         self.ml_service = ml_service
+        self.rollups = rollup_service or bi_rollup_service
+        self.report_executor = report_executor or ReportExecutor(
+            SessionLocal,
+            max_workers=settings.BI_REPORT_MAX_WORKERS,
+            timeout_seconds=settings.BI_REPORT_TIMEOUT_SECONDS
+        )
         self.redis_client = redis.Redis(host='localhost', port=6379, db=0)
         
         # Cache TTL settings
@@ -76,8 +90,6 @@ class BusinessIntelligenceService:
             if cached_result:
                 return cached_result
             
-            db = next(get_db())
-            
             # Calculate date range
             end_date = datetime.now()
             if period == '7d':
@@ -91,29 +103,28 @@ class BusinessIntelligenceService:
             else:
                 start_date = end_date - timedelta(days=30)
             
-            # Get key metrics
-            metrics = await self._get_key_metrics(db, start_date, end_date)
-            
-            # Get revenue analytics
-            revenue_data = await self._get_revenue_analytics(db, start_date, end_date)
-            
-            # Get user analytics
-            user_data = await self._get_user_analytics(db, start_date, end_date)
-            
-            # Get product analytics
-            product_data = await self._get_product_analytics(db, start_date, end_date)
-            
-            # Get conversion analytics
-            conversion_data = await self._get_conversion_analytics(db, start_date, end_date)
-            
-            # Get geographic analytics
-            geographic_data = await self._get_geographic_analytics(db, start_date, end_date)
-            
-            # Get blockchain analytics
-            blockchain_data = await self._get_blockchain_analytics(db, start_date, end_date)
+            # Independent sub-reports run concurrently, each on its own session; a report that
+            # raises or times out is left out and listed in failed_reports
+            reports = {
+                'metrics': self._get_key_metrics,
+                'revenue': self._get_revenue_analytics,
+                'users': self._get_user_analytics,
+                'products': self._get_product_analytics,
+                'conversion': self._get_conversion_analytics,
+                'geographic': self._get_geographic_analytics,
+                'blockchain': self._get_blockchain_analytics,
+                'performance': self._get_performance_metrics
+            }
+            started = datetime.now()
+            results, timings = await self.report_executor.run({
+                name: (lambda db, report=report: report(db, start_date, end_date))
+                for name, report in reports.items()
+            })
             
-            # Get performance metrics
-            performance_data = await self._get_performance_metrics(db, start_date, end_date)
+            performance_data = dict(results.get('performance') or {})
+            performance_data['report_timings'] = {name: timing.to_dict() for name, timing in timings.items()}
+            performance_data['total_ms'] = round((datetime.now() - started).total_seconds() * 1000, 2)
+            failed_reports = [name for name, timing in timings.items() if timing.status != 'ok']
             
             dashboard_data = {
                 'period': period,
@@ -121,64 +132,96 @@ class BusinessIntelligenceService:
                     'start': start_date.isoformat(),
                     'end': end_date.isoformat()
                 },
-                'metrics': metrics,
-                'revenue': revenue_data,
-                'users': user_data,
-                'products': product_data,
-                'conversion': conversion_data,
-                'geographic': geographic_data,
-                'blockchain': blockchain_data,
+                'metrics': results.get('metrics', []),
+                'revenue': results.get('revenue', {}),
+                'users': results.get('users', {}),
+                'products': results.get('products', {}),
+                'conversion': results.get('conversion', {}),
+                'geographic': results.get('geographic', {}),
+                'blockchain': results.get('blockchain', {}),
                 'performance': performance_data,
+                'partial': bool(failed_reports),
+                'failed_reports': failed_reports,
                 'generated_at': datetime.now().isoformat()
             }
             
-            await self.cache_service.set(cache_key, dashboard_data, ttl=self.cache_ttl['hourly'])
+            # Partial dashboards are only cached briefly so a recovered report shows up soon
+            ttl = self.cache_ttl['realtime'] if failed_reports else self.cache_ttl['hourly']
+            await self.cache_service.set(cache_key, dashboard_data, ttl=ttl)
             return dashboard_data
             
         except Exception as e:
             logger.error(f"Failed to get dashboard overview: {e}")
             return {}
-        finally:
-            db.close()
+    
+    def _build_metric(self, name: str, value: float, prev_value: float, start_date: datetime,
+                      end_date: datetime, category: str) -> MetricData:
+        """Build a MetricData comparing a value against the previous period"""
+        change = value - prev_value
+        return MetricData(
+            name=name,
+            value=float(value),
+            change=float(change),
+            change_percentage=(change / prev_value * 100) if prev_value > 0 else 0,
+            trend="up" if change > 0 else "down",
+            period=f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}",
+            category=category
+        )
+    
+    async def _get_key_metrics_from_rollups(self, db: Session, start_date: datetime,
+                                           end_date: datetime) -> List[MetricData]:
+        """Get key business metrics from the pre-aggregated rollups"""
+        prev_start = start_date - (end_date - start_date)
+        current = self.rollups.get_totals(db, start_date, end_date)
+        previous = self.rollups.get_totals(db, prev_start, start_date)
+        
+        # Distinct buyers are not additive across buckets, so count both periods in one pass
+        active_users_query = text("""
+            SELECT 
+                COUNT(DISTINCT CASE WHEN o.created_at >= :start_date THEN o.buyer_id END) as active_users,
+                COUNT(DISTINCT CASE WHEN o.created_at < :start_date THEN o.buyer_id END) as prev_active_users
+            FROM orders o
+            WHERE o.created_at >= :prev_start AND o.created_at < :end_date
+        """)
+        active_users, prev_active_users = db.execute(active_users_query, {
+            "prev_start": prev_start,
+            "start_date": start_date,
+            "end_date": end_date
+        }).fetchone()
+        
+        aov = current['revenue'] / current['order_count'] if current['order_count'] > 0 else 0
+        prev_aov = previous['revenue'] / previous['order_count'] if previous['order_count'] > 0 else 0
+        
+        return [
+            self._build_metric("Total Revenue", current['revenue'], previous['revenue'],
+                               start_date, end_date, "financial"),
+            self._build_metric("Total Orders", current['order_count'], previous['order_count'],
+                               start_date, end_date, "operational"),
+            self._build_metric("Active Users", active_users or 0, prev_active_users or 0,
+                               start_date, end_date, "user"),
+            self._build_metric("Average Order Value", aov, prev_aov, start_date, end_date, "financial"),
+            self._build_metric("New Users", current['new_users'], previous['new_users'],
+                               start_date, end_date, "user"),
+            self._build_metric("Product Views", current['product_views'], previous['product_views'],
+                               start_date, end_date, "engagement"),
+            self._build_metric("Conversions", current['conversions'], previous['conversions'],
+                               start_date, end_date, "conversion"),
+        ]
     
     async def _get_key_metrics(self, db: Session, start_date: datetime, end_date: datetime) -> List[MetricData]:
         """Get key business metrics"""
         try:
-            metrics = []
+            if self.rollups.is_ready(db):
+                return await self._get_key_metrics_from_rollups(db, start_date, end_date)
             
-            # Total Revenue
-            revenue_query = text("""
-                SELECT 
-                    COALESCE(SUM(t.amount), 0) as total_revenue,
-                    COUNT(DISTINCT t.id) as transaction_count
-                FROM transactions t
-                WHERE t.created_at BETWEEN :start_date AND :end_date
-                AND t.status = 'completed'
-            """)
-            
-            revenue_result = db.execute(revenue_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchone()
+            metrics = []
             
-            total_revenue = float(revenue_result[0]) if revenue_result[0] else 0.0
-            transaction_count = revenue_result[1] if revenue_result[1] else 0
+            # Total Revenue, from the same completed payments the rollups are built from
+            total_revenue = live_revenue_totals(db, start_date, end_date)['revenue']
             
             # Previous period revenue for comparison
             prev_start = start_date - (end_date - start_date)
-            prev_revenue_query = text("""
-                SELECT COALESCE(SUM(t.amount), 0) as prev_revenue
-                FROM transactions t
-                WHERE t.created_at BETWEEN :prev_start AND :start_date
-                AND t.status = 'completed'
-            """)
-            
-            prev_revenue_result = db.execute(prev_revenue_query, {
-                "prev_start": prev_start,
-                "start_date": start_date
-            }).fetchone()
-            
-            prev_revenue = float(prev_revenue_result[0]) if prev_revenue_result[0] else 0.0
+            prev_revenue = live_revenue_totals(db, prev_start, start_date)['revenue']
             revenue_change = total_revenue - prev_revenue
             revenue_change_pct = (revenue_change / prev_revenue * 100) if prev_revenue > 0 else 0
             
@@ -296,31 +339,57 @@ class BusinessIntelligenceService:
             
         except Exception as e:
             logger.error(f"Failed to get key metrics: {e}")
-            return []
+            raise
+    
+    async def _get_revenue_analytics_from_rollups(self, db: Session, start_date: datetime,
+                                                  end_date: datetime) -> Dict[str, Any]:
+        """Get daily and per-category revenue from the pre-aggregated rollups"""
+        series = self.rollups.get_daily_series(db, start_date, end_date)
+        breakdown = self.rollups.get_category_breakdown(db, start_date, end_date)
+        category_names = dict(db.execute(text("SELECT id, name FROM categories")).fetchall())
+        
+        return {
+            'daily_trend': {
+                'labels': [point['date'].strftime('%Y-%m-%d') for point in series],
+                'datasets': [{
+                    'label': 'Daily Revenue',
+                    'data': [point['revenue'] for point in series],
+                    'borderColor': '#E60012',
+                    'backgroundColor': 'rgba(230, 0, 18, 0.1)',
+                    'fill': True
+                }]
+            },
+            'by_category': {
+                'labels': [category_names.get(entry['category_id'], 'Uncategorized') for entry in breakdown],
+                'datasets': [{
+                    'label': 'Revenue by Category',
+                    'data': [entry['revenue'] for entry in breakdown],
+                    'backgroundColor': [
+                        '#E60012', '#0066CC', '#FFD700', '#00A650', 
+                        '#FF8C00', '#DC2626', '#0EA5E9'
+                    ]
+                }]
+            }
+        }
     
     async def _get_revenue_analytics(self, db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get revenue analytics data"""
         try:
-            # Daily revenue trend
-            daily_revenue_query = text("""
-                SELECT 
-                    DATE(t.created_at) as date,
-                    SUM(t.amount) as daily_revenue,
-                    COUNT(DISTINCT t.id) as daily_transactions
-                FROM transactions t
-                WHERE t.created_at BETWEEN :start_date AND :end_date
-                AND t.status = 'completed'
-                GROUP BY DATE(t.created_at)
-                ORDER BY date
-            """)
+            if self.rollups.is_ready(db):
+                rollup_data = await self._get_revenue_analytics_from_rollups(db, start_date, end_date)
+                rollup_data['by_payment_method'] = await self._get_payment_method_revenue(db, start_date, end_date)
+                return rollup_data
             
-            daily_revenue_result = db.execute(daily_revenue_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            payments = completed_payments(start_date, end_date).subquery()
+            
+            # Daily revenue trend
+            day = func.date(payments.c.created_at)
+            daily_revenue_result = db.execute(
+                select(day, func.sum(payments.c.amount), func.count()).group_by(day).order_by(day)
+            ).fetchall()
             
             daily_revenue_data = {
-                'labels': [row[0].strftime('%Y-%m-%d') for row in daily_revenue_result],
+                'labels': [str(row[0]) for row in daily_revenue_result],
                 'datasets': [{
                     'label': 'Daily Revenue',
                     'data': [float(row[1]) for row in daily_revenue_result],
@@ -331,27 +400,16 @@ class BusinessIntelligenceService:
             }
             
             # Revenue by category
-            category_revenue_query = text("""
-                SELECT 
-                    p.category,
-                    SUM(t.amount) as category_revenue,
-                    COUNT(DISTINCT t.id) as category_transactions
-                FROM transactions t
-                JOIN order_items oi ON t.order_id = oi.order_id
-                JOIN products p ON oi.product_id = p.id
-                WHERE t.created_at BETWEEN :start_date AND :end_date
-                AND t.status = 'completed'
-                GROUP BY p.category
-                ORDER BY category_revenue DESC
-            """)
-            
-            category_revenue_result = db.execute(category_revenue_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            category_revenue = func.sum(payments.c.amount)
+            category_revenue_result = db.execute(
+                select(Category.name, category_revenue, func.count())
+                .select_from(payments.outerjoin(Category.__table__, Category.id == payments.c.category_id))
+                .group_by(Category.name)
+                .order_by(category_revenue.desc())
+            ).fetchall()
             
             category_revenue_data = {
-                'labels': [row[0] for row in category_revenue_result],
+                'labels': [row[0] or 'Uncategorized' for row in category_revenue_result],
                 'datasets': [{
                     'label': 'Revenue by Category',
                     'data': [float(row[1]) for row in category_revenue_result],
@@ -362,34 +420,7 @@ class BusinessIntelligenceService:
                 }]
             }
             
-            # Revenue by payment method
-            payment_revenue_query = text("""
-                SELECT 
-                    t.payment_method,
-                    SUM(t.amount) as payment_revenue,
-                    COUNT(DISTINCT t.id) as payment_transactions
-                FROM transactions t
-                WHERE t.created_at BETWEEN :start_date AND :end_date
-                AND t.status = 'completed'
-                GROUP BY t.payment_method
-                ORDER BY payment_revenue DESC
-            """)
-            
-            payment_revenue_result = db.execute(payment_revenue_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
-            
-            payment_revenue_data = {
-                'labels': [row[0] for row in payment_revenue_result],
-                'datasets': [{
-                    'label': 'Revenue by Payment Method',
-                    'data': [float(row[1]) for row in payment_revenue_result],
-                    'backgroundColor': [
-                        '#E60012', '#0066CC', '#FFD700', '#00A650'
-                    ]
-                }]
-            }
+            payment_revenue_data = await self._get_payment_method_revenue(db, start_date, end_date)
             
             return {
                 'daily_trend': daily_revenue_data,
@@ -399,26 +430,50 @@ class BusinessIntelligenceService:
             
         except Exception as e:
             logger.error(f"Failed to get revenue analytics: {e}")
-            return {}
+            raise
+    
+    async def _get_payment_method_revenue(self, db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """Get revenue by payment method, from completed payments"""
+        payment_revenue_result = payment_method_revenue(db, start_date, end_date)
+        
+        payment_revenue_data = {
+            'labels': [row[0] for row in payment_revenue_result],
+            'datasets': [{
+                'label': 'Revenue by Payment Method',
+                'data': [float(row[1]) for row in payment_revenue_result],
+                'backgroundColor': [
+                    '#E60012', '#0066CC', '#FFD700', '#00A650'
+                ]
+            }]
+        }
+        
+        return payment_revenue_data
     
     async def _get_user_analytics(self, db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get user analytics data"""
         try:
             # User registration trend
-            registration_query = text("""
-                SELECT 
-                    DATE(created_at) as date,
-                    COUNT(*) as new_users
-                FROM users
-                WHERE created_at BETWEEN :start_date AND :end_date
-                GROUP BY DATE(created_at)
-                ORDER BY date
-            """)
-            
-            registration_result = db.execute(registration_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            if self.rollups.is_ready(db):
+                registration_result = [
+                    (point['date'], int(point['new_users']))
+                    for point in self.rollups.get_daily_series(db, start_date, end_date)
+                    if point['new_users']
+                ]
+            else:
+                registration_query = text("""
+                    SELECT 
+                        DATE(created_at) as date,
+                        COUNT(*) as new_users
+                    FROM users
+                    WHERE created_at BETWEEN :start_date AND :end_date
+                    GROUP BY DATE(created_at)
+                    ORDER BY date
+                """)
+            
+                registration_result = db.execute(registration_query, {
+                    "start_date": start_date,
+                    "end_date": end_date
+                }).fetchall()
             
             registration_data = {
                 'labels': [row[0].strftime('%Y-%m-%d') for row in registration_result],
@@ -510,7 +565,7 @@ class BusinessIntelligenceService:
             
         except Exception as e:
             logger.error(f"Failed to get user analytics: {e}")
-            return {}
+            raise
     
     async def _get_product_analytics(self, db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get product analytics data"""
@@ -620,43 +675,24 @@ class BusinessIntelligenceService:
             
         except Exception as e:
             logger.error(f"Failed to get product analytics: {e}")
-            return {}
+            raise
     
     async def _get_conversion_analytics(self, db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get conversion analytics data"""
         try:
-            # Conversion funnel
-            funnel_query = text("""
-                WITH user_actions AS (
-                    SELECT 
-                        u.id as user_id,
-                        CASE WHEN u.created_at IS NOT NULL THEN 1 ELSE 0 END as registered,
-                        CASE WHEN o.id IS NOT NULL THEN 1 ELSE 0 END as made_order,
-                        CASE WHEN t.id IS NOT NULL AND t.status = 'completed' THEN 1 ELSE 0 END as completed_purchase
-                    FROM users u
-                    LEFT JOIN orders o ON u.id = o.user_id AND o.created_at BETWEEN :start_date AND :end_date
-                    LEFT JOIN transactions t ON o.id = t.order_id AND t.created_at BETWEEN :start_date AND :end_date
-                )
-                SELECT 
-                    'Registered' as step,
-                    SUM(registered) as count
-                FROM user_actions
-                UNION ALL
-                SELECT 
-                    'Made Order' as step,
-                    SUM(made_order) as count
-                FROM user_actions
-                UNION ALL
-                SELECT 
-                    'Completed Purchase' as step,
-                    SUM(completed_purchase) as count
-                FROM user_actions
-            """)
-            
-            funnel_result = db.execute(funnel_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            # Conversion funnel: users, buyers who ordered, buyers with a completed payment
+            ordered = select(func.count(func.distinct(Order.buyer_id))).where(
+                Order.created_at >= start_date, Order.created_at < end_date
+            )
+            purchased = select(func.count(func.distinct(Payment.buyer_id))).where(
+                Payment.status == PaymentStatus.COMPLETED,
+                Payment.created_at >= start_date, Payment.created_at < end_date
+            )
+            funnel_result = [
+                ('Registered', db.execute(select(func.count()).select_from(User)).scalar() or 0),
+                ('Made Order', db.execute(ordered).scalar() or 0),
+                ('Completed Purchase', db.execute(purchased).scalar() or 0)
+            ]
             
             funnel_data = {
                 'labels': [row[0] for row in funnel_result],
@@ -702,7 +738,7 @@ class BusinessIntelligenceService:
             
         except Exception as e:
             logger.error(f"Failed to get conversion analytics: {e}")
-            return {}
+            raise
     
     async def _get_geographic_analytics(self, db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get geographic analytics data"""
@@ -711,13 +747,12 @@ class BusinessIntelligenceService:
             country_revenue_query = text("""
                 SELECT 
                     COALESCE(u.country, 'Unknown') as country,
-                    SUM(t.amount) as revenue,
-                    COUNT(DISTINCT t.id) as transaction_count
-                FROM transactions t
-                JOIN orders o ON t.order_id = o.id
-                JOIN users u ON o.user_id = u.id
-                WHERE t.created_at BETWEEN :start_date AND :end_date
-                AND t.status = 'completed'
+                    SUM(p.amount) as revenue,
+                    COUNT(DISTINCT p.id) as payment_count
+                FROM payments p
+                JOIN users u ON p.buyer_id = u.id
+                WHERE p.created_at >= :start_date AND p.created_at < :end_date
+                AND p.status = :completed
                 GROUP BY u.country
                 ORDER BY revenue DESC
                 LIMIT 10
@@ -725,7 +760,9 @@ class BusinessIntelligenceService:
             
             country_revenue_result = db.execute(country_revenue_query, {
                 "start_date": start_date,
-                "end_date": end_date
+                "end_date": end_date,
+                # Enum columns store the member name
+                "completed": PaymentStatus.COMPLETED.name
             }).fetchall()
             
             country_revenue_data = {
@@ -774,7 +811,7 @@ class BusinessIntelligenceService:
             
         except Exception as e:
             logger.error(f"Failed to get geographic analytics: {e}")
-            return {}
+            raise
     
     async def _get_blockchain_analytics(self, db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get blockchain analytics data"""
@@ -817,22 +854,13 @@ class BusinessIntelligenceService:
                 ]
             }
             
-            # Solana transaction analytics
-            solana_query = text("""
-                SELECT 
-                    t.payment_method,
-                    COUNT(*) as transaction_count,
-                    SUM(t.amount) as total_amount
-                FROM transactions t
-                WHERE t.created_at BETWEEN :start_date AND :end_date
-                AND t.payment_method LIKE '%solana%'
-                GROUP BY t.payment_method
-            """)
-            
-            solana_result = db.execute(solana_query, {
-                "start_date": start_date,
-                "end_date": end_date
-            }).fetchall()
+            # Solana transaction analytics: payments that reached the chain, by currency
+            solana_result = db.execute(
+                select(Payment.currency, func.count(), func.sum(Payment.amount))
+                .where(Payment.transaction_hash.isnot(None),
+                       Payment.created_at >= start_date, Payment.created_at < end_date)
+                .group_by(Payment.currency)
+            ).fetchall()
             
             solana_data = {
                 'labels': [row[0] for row in solana_result],
@@ -850,7 +878,7 @@ class BusinessIntelligenceService:
             
         except Exception as e:
             logger.error(f"Failed to get blockchain analytics: {e}")
-            return {}
+            raise
     
     async def _get_performance_metrics(self, db: Session, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get performance metrics data"""
@@ -887,7 +915,7 @@ class BusinessIntelligenceService:
             
         except Exception as e:
             logger.error(f"Failed to get performance metrics: {e}")
-            return {}
+            raise
     
     async def get_custom_report(self, report_config: Dict[str, Any]) -> Dict[str, Any]:
         """Generate custom report based on configuration"""
@@ -923,6 +951,14 @@ class BusinessIntelligenceService:
             logger.error(f"Failed to export analytics data: {e}")
             return ""
     
+    def stream_fact_export(self, source: str, format: str = 'csv',
+                           start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None,
+                           batch_size: int = 5000) -> Iterator[bytes]:
+        """Stream raw order/payment facts for a date range without loading them all"""
+        return stream_fact_export(SessionLocal, source, ExportFormat(format), start_date, end_date, batch_size,
+                                  archive_dir=settings.PARTITION_ARCHIVE_DIR)
+    
     def _convert_to_csv(self, data: Dict[str, Any]) -> str:
         """Convert analytics data to CSV format"""
         try:
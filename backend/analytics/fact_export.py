@@ -0,0 +1,300 @@
+"""
+Streaming fact export for Soladia business intelligence
+Streams order and payment facts as gzip CSV/NDJSON or Parquet without buffering the range
+"""
+
+import csv
+import enum
+import io
+import itertools
+import json
+import logging
+import os
+import re
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, BigInteger, DateTime, Float, Integer, Table, select
+from sqlalchemy.orm import Session
+
+from models import Order, Payment, Product
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class ExportFormat(Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+
+@dataclass
+class ExportSource:
+    """A fact table that can be exported for a time range"""
+    name: str
+    table: Table
+    timestamp_column: str = "created_at"
+
+    @property
+    def columns(self) -> List[str]:
+        return [column.name for column in self.table.columns]
+
+
+EXPORT_SOURCES: Dict[str, ExportSource] = {
+    "orders": ExportSource("orders", Order.__table__),
+    "payments": ExportSource("payments", Payment.__table__),
+    "products": ExportSource("products", Product.__table__),
+}
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def _plain(value: Any) -> Any:
+    """Convert enums and datetimes to JSON/CSV friendly values"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def archive_path(archive_dir: str, table_name: str, month: datetime) -> str:
+    """Parquet file holding one archived monthly partition"""
+    return os.path.join(archive_dir, table_name, f"{table_name}_y{month:%Y}m{month:%m}.parquet")
+
+
+def archived_files(archive_dir: Optional[str], table_name: str, start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> List[Tuple[datetime, str]]:
+    """(month, path) of archived partitions overlapping [start, end), oldest first"""
+    directory = os.path.join(archive_dir, table_name) if archive_dir else None
+    if not directory or not os.path.isdir(directory):
+        return []
+    pattern = re.compile(rf"^{re.escape(table_name)}_y(\d{{4}})m(\d{{2}})\.parquet$")
+    files = []
+    for filename in os.listdir(directory):
+        match = pattern.match(filename)
+        if not match:
+            continue
+        month = datetime(int(match.group(1)), int(match.group(2)), 1)
+        next_month = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+        if (end is None or month < _naive(end)) and (start is None or next_month > _naive(start)):
+            files.append((month, os.path.join(directory, filename)))
+    return sorted(files)
+
+
+def _naive(value: datetime) -> datetime:
+    # Archived timestamps are UTC; compare timezone-aware bounds as naive UTC
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def iter_archived_batches(paths: Sequence[str], source: "ExportSource", start: Optional[datetime] = None,
+                          end: Optional[datetime] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                          filters: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield row dicts from archived Parquet partitions, filtered like the live query"""
+    import pyarrow.parquet as pq
+
+    expected = {name: _plain(value) for name, value in (filters or {}).items()}
+    lower = _naive(start) if start is not None else None
+    upper = _naive(end) if end is not None else None
+    for path in paths:
+        parquet = pq.ParquetFile(path)
+        for record_batch in parquet.iter_batches(batch_size=batch_size):
+            rows = []
+            for row in record_batch.to_pylist():
+                timestamp = row.get(source.timestamp_column)
+                if timestamp is not None:
+                    timestamp = _naive(timestamp)
+                    if (lower is not None and timestamp < lower) or (upper is not None and timestamp >= upper):
+                        continue
+                if any(_plain(row.get(name)) != value for name, value in expected.items()):
+                    continue
+                rows.append(row)
+            if rows:
+                yield rows
+
+
+def iter_fact_batches(db: Session, source: ExportSource, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                      filters: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield lists of row dicts from a server-side cursor, ordered by timestamp"""
+    timestamp = source.table.c[source.timestamp_column]
+    query = select(source.table).order_by(timestamp)
+    for name, value in (filters or {}).items():
+        query = query.where(source.table.c[name] == value)
+    if start is not None:
+        query = query.where(timestamp >= start)
+    if end is not None:
+        query = query.where(timestamp < end)
+
+    result = db.execute(query.execution_options(yield_per=batch_size, stream_results=True))
+    for partition in result.mappings().partitions(batch_size):
+        yield [dict(row) for row in partition]
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose buffered bytes can be taken after each write"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _csv_chunks(batches: Iterator[List[Dict[str, Any]]], columns: Sequence[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(columns), extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows({key: _plain(value) for key, value in row.items()} for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder.encode("utf-8")
+
+
+def _ndjson_chunks(batches: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [json.dumps({key: _plain(value) for key, value in row.items()}) for row in batch]
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def arrow_schema(table: Table):
+    """Map SQLAlchemy column types to a pyarrow schema"""
+    import pyarrow as pa
+
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, (Integer, BigInteger)):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us", tz="UTC" if column.type.timezone else None)
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _parquet_string(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    plain = _plain(value)
+    return plain if isinstance(plain, str) else str(plain)
+
+
+def _parquet_chunks(batches: Iterator[List[Dict[str, Any]]], table: Table,
+                    compression: str = "zstd") -> Iterator[bytes]:
+    """Write one row group per batch, yielding the bytes produced so far"""
+    # Imported lazily so CSV/NDJSON exports do not require pyarrow
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(table)
+    string_columns = {field.name for field in schema if pa.types.is_string(field.type)}
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            columns = {
+                name: [
+                    (_parquet_string(row.get(name)) if name in string_columns and row.get(name) is not None
+                     else row.get(name))
+                    for row in batch
+                ]
+                for name in schema.names
+            }
+            writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+            data = sink.take()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.take()
+    if data:
+        yield data
+
+
+def gzip_chunks(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    """Incrementally gzip a byte stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_fact_export(session_factory: Callable[[], Session], source_name: str,
+                       export_format: ExportFormat, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                       compress: bool = True, filters: Optional[Dict[str, Any]] = None,
+                       archive_dir: Optional[str] = None) -> Iterator[bytes]:
+    """Stream a fact table export; the session lives as long as the stream
+
+    CSV and NDJSON are gzip-compressed on the fly. Parquet pages are already
+    compressed internally, so Parquet is never wrapped in gzip. Monthly
+    partitions archived under ``archive_dir`` are read first, then live rows.
+    """
+    source = EXPORT_SOURCES[source_name]
+    db = session_factory()
+    try:
+        archived = [path for _, path in archived_files(archive_dir, source.table.name, start, end)]
+        batches = itertools.chain(
+            iter_archived_batches(archived, source, start, end, batch_size, filters),
+            iter_fact_batches(db, source, start, end, batch_size, filters)
+        )
+        if export_format == ExportFormat.PARQUET:
+            yield from _parquet_chunks(batches, source.table)
+            return
+
+        if export_format == ExportFormat.CSV:
+            chunks = _csv_chunks(batches, source.columns)
+        else:
+            chunks = _ndjson_chunks(batches)
+        yield from (gzip_chunks(chunks) if compress else chunks)
+    except Exception as e:
+        logger.error(f"Failed to stream {source_name} export: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def export_filename(source_name: str, export_format: ExportFormat,
+                    start: Optional[datetime], end: Optional[datetime]) -> str:
+    span = "_".join(value.strftime("%Y%m%d") for value in (start, end) if value is not None) or "all"
+    return f"{source_name}_{span}.{export_format.value}"
@@ -0,0 +1,435 @@
+"""
+Vectorized technical indicators for Soladia analytics
+Whole-array NumPy implementations plus O(1) incremental state for streaming paths
+"""
+
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Sequence[float]
+
+# Largest exponent used when rescaling EMA blocks; keeps (1 - alpha) ** -k finite in float64
+_MAX_BLOCK_EXPONENT = 500.0
+
+
+def _as_array(values: ArrayLike) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _smooth(values: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """y[t] = (1 - alpha) * y[t-1] + alpha * x[t], with y[-1] = seed
+
+    The recurrence is solved in closed form per block (a scaled cumulative sum),
+    with block lengths chosen so the scaling factors stay inside float64 range.
+    """
+    n = len(values)
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = values
+        return out
+
+    block = max(1, min(n, int(_MAX_BLOCK_EXPONENT / -math.log(decay))))
+    # y[k] = d^(k+1) * (seed + sum_{j<=k} alpha * x[j] * d^-(j+1)), d = 1 - alpha
+    powers = decay ** np.arange(1, block + 1)
+    inverse = 1.0 / powers
+    previous = seed
+    for start in range(0, n, block):
+        chunk = values[start:start + block]
+        length = len(chunk)
+        out[start:start + length] = powers[:length] * (previous + np.cumsum(alpha * chunk * inverse[:length]))
+        previous = out[start + length - 1]
+    return out
+
+
+def sma(values: ArrayLike, period: int) -> np.ndarray:
+    """Simple moving average; the first period - 1 entries are NaN"""
+    x = _as_array(values)
+    out = np.full(len(x), np.nan)
+    if period <= 0 or len(x) < period:
+        return out
+    cumulative = np.cumsum(np.insert(x, 0, 0.0))
+    out[period - 1:] = (cumulative[period:] - cumulative[:-period]) / period
+    return out
+
+
+def ema(values: ArrayLike, period: int) -> np.ndarray:
+    """Exponential moving average seeded with the first value (alpha = 2 / (period + 1))"""
+    x = _as_array(values)
+    if len(x) == 0:
+        return x.copy()
+    alpha = 2.0 / (period + 1)
+    out = np.empty(len(x))
+    out[0] = x[0]
+    out[1:] = _smooth(x[1:], alpha, x[0])
+    return out
+
+
+def rsi(values: ArrayLike, period: int = 14) -> np.ndarray:
+    """Wilder's RSI; entries before the first full period are NaN"""
+    x = _as_array(values)
+    out = np.full(len(x), np.nan)
+    if len(x) <= period:
+        return out
+    avg_gain, avg_loss = _wilder_averages(x, period)
+    out[period:] = _rsi_from_averages(avg_gain, avg_loss)
+    return out
+
+
+def _wilder_averages(x: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Average gain/loss series, seeded with the simple mean of the first period changes"""
+    deltas = np.diff(x)
+    gains = np.clip(deltas, 0, None)
+    losses = np.clip(-deltas, 0, None)
+
+    avg_gain = np.empty(len(deltas) - period + 1)
+    avg_loss = np.empty(len(deltas) - period + 1)
+    avg_gain[0] = gains[:period].mean()
+    avg_loss[0] = losses[:period].mean()
+    avg_gain[1:] = _smooth(gains[period:], 1.0 / period, avg_gain[0])
+    avg_loss[1:] = _smooth(losses[period:], 1.0 / period, avg_loss[0])
+    return avg_gain, avg_loss
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100.0 - 100.0 / (1.0 + np.asarray(avg_gain) / np.asarray(avg_loss))
+    return np.where(np.asarray(avg_loss) == 0, np.where(np.asarray(avg_gain) == 0, 50.0, 100.0), value)
+
+
+def macd(values: ArrayLike, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line (EMA of the MACD line) and histogram"""
+    x = _as_array(values)
+    macd_line = ema(x, fast) - ema(x, slow)
+    signal_line = ema(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def bollinger_bands(values: ArrayLike, period: int = 20,
+                    num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Middle (SMA), upper and lower bands using the population standard deviation"""
+    x = _as_array(values)
+    middle = sma(x, period)
+    width = np.full(len(x), np.nan)
+    if period > 0 and len(x) >= period:
+        # Centering first keeps the E[x^2] - E[x]^2 cancellation small
+        centered = x - x.mean()
+        mean = sma(centered, period)[period - 1:]
+        mean_sq = sma(centered * centered, period)[period - 1:]
+        width[period - 1:] = num_std * np.sqrt(np.clip(mean_sq - mean * mean, 0.0, None))
+    return middle, middle + width, middle - width
+
+
+def simple_returns(prices: ArrayLike) -> np.ndarray:
+    """Period-over-period returns"""
+    x = _as_array(prices)
+    if len(x) < 2:
+        return np.empty(0)
+    return np.diff(x) / x[:-1]
+
+
+def drawdown(returns: ArrayLike) -> np.ndarray:
+    """Drawdown from the running peak of the compounded return series"""
+    r = _as_array(returns)
+    if len(r) == 0:
+        return r.copy()
+    wealth = np.cumprod(1.0 + r)
+    peak = np.maximum.accumulate(wealth)
+    return (peak - wealth) / peak
+
+
+def max_drawdown(returns: ArrayLike) -> float:
+    """Largest peak-to-trough drawdown of a return series"""
+    series = drawdown(returns)
+    return float(series.max()) if len(series) else 0.0
+
+
+def volatility(returns: ArrayLike, periods_per_year: Optional[int] = None) -> float:
+    """Sample standard deviation of returns, optionally annualized"""
+    r = _as_array(returns)
+    if len(r) < 2:
+        return 0.0
+    value = float(r.std(ddof=1))
+    return value * math.sqrt(periods_per_year) if periods_per_year else value
+
+
+def sharpe_ratio(returns: ArrayLike, risk_free_rate: float = 0.0,
+                 periods_per_year: Optional[int] = None) -> float:
+    """Mean excess return over its sample standard deviation"""
+    r = _as_array(returns) - risk_free_rate
+    if len(r) < 2:
+        return 0.0
+    std = float(r.std(ddof=1))
+    if std == 0:
+        return 0.0
+    value = float(r.mean()) / std
+    return value * math.sqrt(periods_per_year) if periods_per_year else value
+
+
+# Incremental state for streaming paths; every update is O(1)
+
+class _State:
+    """Serializable indicator state"""
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for key, value in data.items():
+            if isinstance(value, deque):
+                data[key] = list(value)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        state = cls(**{key: value for key, value in data.items() if key != "window"})
+        if "window" in data:
+            state.window = deque(data["window"], maxlen=state.period)
+        return state
+
+
+@dataclass
+class EMAState(_State):
+    period: int
+    value: Optional[float] = None
+
+    @property
+    def alpha(self) -> float:
+        return 2.0 / (self.period + 1)
+
+    def update(self, x: float) -> float:
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+    @classmethod
+    def from_series(cls, values: ArrayLike, period: int) -> "EMAState":
+        series = ema(values, period)
+        return cls(period, float(series[-1]) if len(series) else None)
+
+
+@dataclass
+class SMAState(_State):
+    period: int
+    total: float = 0.0
+    window: Deque[float] = field(default_factory=deque)
+
+    def update(self, x: float) -> Optional[float]:
+        if len(self.window) == self.period:
+            self.total -= self.window.popleft()
+        self.window.append(x)
+        self.total += x
+        return self.total / self.period if len(self.window) == self.period else None
+
+
+@dataclass
+class RSIState(_State):
+    period: int = 14
+    previous: Optional[float] = None
+    count: int = 0
+    avg_gain: float = 0.0
+    avg_loss: float = 0.0
+
+    def update(self, price: float) -> Optional[float]:
+        if self.previous is None:
+            self.previous = price
+            return None
+        delta = price - self.previous
+        self.previous = price
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self.count += 1
+
+        if self.count <= self.period:
+            # Seed with the simple average of the first period changes
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.count < self.period:
+                return None
+        else:
+            self.avg_gain += (gain - self.avg_gain) / self.period
+            self.avg_loss += (loss - self.avg_loss) / self.period
+        return float(_rsi_from_averages(self.avg_gain, self.avg_loss))
+
+    @classmethod
+    def from_series(cls, values: ArrayLike, period: int = 14) -> "RSIState":
+        x = _as_array(values)
+        if len(x) <= period:
+            state = cls(period)
+            for price in x:
+                state.update(float(price))
+            return state
+        avg_gain, avg_loss = _wilder_averages(x, period)
+        return cls(period, float(x[-1]), len(x) - 1, float(avg_gain[-1]), float(avg_loss[-1]))
+
+
+@dataclass
+class MACDState(_State):
+    fast: EMAState = field(default_factory=lambda: EMAState(12))
+    slow: EMAState = field(default_factory=lambda: EMAState(26))
+    signal: EMAState = field(default_factory=lambda: EMAState(9))
+
+    def update(self, price: float) -> Dict[str, float]:
+        line = self.fast.update(price) - self.slow.update(price)
+        signal = self.signal.update(line)
+        return {'macd': line, 'signal': signal, 'histogram': line - signal}
+
+    @classmethod
+    def from_series(cls, values: ArrayLike, fast: int = 12, slow: int = 26, signal: int = 9) -> "MACDState":
+        x = _as_array(values)
+        if not len(x):
+            return cls(EMAState(fast), EMAState(slow), EMAState(signal))
+        fast_line, slow_line = ema(x, fast), ema(x, slow)
+        signal_line = ema(fast_line - slow_line, signal)
+        return cls(
+            EMAState(fast, float(fast_line[-1])),
+            EMAState(slow, float(slow_line[-1])),
+            EMAState(signal, float(signal_line[-1]))
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MACDState":
+        return cls(EMAState(**data['fast']), EMAState(**data['slow']), EMAState(**data['signal']))
+
+
+@dataclass
+class BollingerState(_State):
+    period: int = 20
+    num_std: float = 2.0
+    total: float = 0.0
+    total_sq: float = 0.0
+    window: Deque[float] = field(default_factory=deque)
+
+    def update(self, x: float) -> Optional[Dict[str, float]]:
+        if len(self.window) == self.period:
+            old = self.window.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+        self.window.append(x)
+        self.total += x
+        self.total_sq += x * x
+        if len(self.window) < self.period:
+            return None
+        mean = self.total / self.period
+        std = math.sqrt(max(self.total_sq / self.period - mean * mean, 0.0))
+        return {'middle': mean, 'upper': mean + self.num_std * std, 'lower': mean - self.num_std * std}
+
+
+@dataclass
+class ReturnStats(_State):
+    """Running drawdown, volatility and Sharpe ratio over a return stream"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    wealth: float = 1.0
+    peak: float = 0.0
+    max_drawdown: float = 0.0
+
+    def update(self, ret: float) -> Dict[str, float]:
+        # Welford's online mean/variance
+        self.count += 1
+        delta = ret - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (ret - self.mean)
+
+        self.wealth *= 1.0 + ret
+        self.peak = max(self.peak, self.wealth)
+        self.max_drawdown = max(self.max_drawdown, (self.peak - self.wealth) / self.peak)
+        return {'volatility': self.volatility, 'sharpe_ratio': self.sharpe_ratio, 'max_drawdown': self.max_drawdown}
+
+    @property
+    def volatility(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def sharpe_ratio(self) -> float:
+        std = self.volatility
+        return self.mean / std if std > 0 else 0.0
+
+
+
+@dataclass
+class TickIndicators:
+    """Every streaming indicator for one price series, advanced together per tick"""
+    sma_20: SMAState = field(default_factory=lambda: SMAState(20))
+    sma_50: SMAState = field(default_factory=lambda: SMAState(50))
+    rsi: RSIState = field(default_factory=RSIState)
+    macd: MACDState = field(default_factory=MACDState)
+    bollinger: BollingerState = field(default_factory=BollingerState)
+    returns: ReturnStats = field(default_factory=ReturnStats)
+    last_price: Optional[float] = None
+
+    def update(self, price: float) -> Dict[str, Any]:
+        if self.last_price:
+            self.returns.update(price / self.last_price - 1.0)
+        self.last_price = price
+        return {
+            'sma_20': self.sma_20.update(price),
+            'sma_50': self.sma_50.update(price),
+            'rsi': self.rsi.update(price),
+            'macd': self.macd.update(price),
+            'bollinger': self.bollinger.update(price),
+            'volatility': self.returns.volatility,
+            'sharpe_ratio': self.returns.sharpe_ratio,
+            'max_drawdown': self.returns.max_drawdown,
+            'current_price': price
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'sma_20': self.sma_20.to_dict(),
+            'sma_50': self.sma_50.to_dict(),
+            'rsi': self.rsi.to_dict(),
+            'macd': self.macd.to_dict(),
+            'bollinger': self.bollinger.to_dict(),
+            'returns': self.returns.to_dict(),
+            'last_price': self.last_price
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TickIndicators":
+        return cls(
+            SMAState.from_dict(data['sma_20']),
+            SMAState.from_dict(data['sma_50']),
+            RSIState.from_dict(data['rsi']),
+            MACDState.from_dict(data['macd']),
+            BollingerState.from_dict(data['bollinger']),
+            ReturnStats.from_dict(data['returns']),
+            data.get('last_price')
+        )
+
+
+def benchmark(size: int = 1_000_000, seed: int = 7) -> Dict[str, float]:
+    """Time each vectorized indicator over a random-walk series of ``size`` points"""
+    rng = np.random.default_rng(seed)
+    prices = 100.0 + np.cumsum(rng.normal(0, 1, size))
+    prices -= min(prices.min(), 0.0) - 1.0
+    returns = simple_returns(prices)
+
+    timings = {}
+    for name, fn in (
+        ('sma_20', lambda: sma(prices, 20)),
+        ('ema_12', lambda: ema(prices, 12)),
+        ('rsi_14', lambda: rsi(prices, 14)),
+        ('macd', lambda: macd(prices)),
+        ('bollinger_20', lambda: bollinger_bands(prices, 20)),
+        ('max_drawdown', lambda: max_drawdown(returns)),
+        ('sharpe_ratio', lambda: sharpe_ratio(returns)),
+        ('volatility', lambda: volatility(returns)),
+    ):
+        started = time.perf_counter()
+        fn()
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+    return timings
+
+
+if __name__ == "__main__":
+    for name, ms in benchmark().items():
+        print(f"{name:>14}: {ms:8.2f} ms")
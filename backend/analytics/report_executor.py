@@ -0,0 +1,141 @@
+"""
+Concurrent report executor for Soladia business intelligence
+Runs independent sub-reports on their own pooled sessions with per-report timeouts
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+ReportFn = Callable[[Session], Union[Awaitable[Any], Any]]
+
+
+@dataclass
+class ReportTiming:
+    """Timing and outcome of one sub-report"""
+    name: str
+    duration_ms: float
+    status: str  # ok, timeout, error
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _ReportHandle:
+    """Lets the caller stop a report that has outlived its timeout"""
+
+    def __init__(self):
+        self.cancelled = False
+        self.task: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = None
+        self._lock = threading.Lock()
+
+    def attach(self, loop: asyncio.AbstractEventLoop, task: asyncio.Task) -> bool:
+        with self._lock:
+            self.task = (loop, task)
+            return not self.cancelled
+
+    def cancel(self):
+        """Skip a report that has not started and cancel a running coroutine report
+
+        Synchronous reports cannot be interrupted; their queries are bounded
+        by the statement timeout instead.
+        """
+        with self._lock:
+            self.cancelled = True
+            if self.task is not None:
+                loop, task = self.task
+                try:
+                    loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    pass  # the loop already finished and closed
+
+
+class ReportExecutor:
+    """Run sub-reports concurrently, each with its own session from the pool"""
+
+    def __init__(self, session_factory: Callable[[], Session], max_workers: int = 8,
+                 timeout_seconds: float = 10.0):
+        self.session_factory = session_factory
+        self.timeout_seconds = timeout_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bi-report")
+
+    def _apply_statement_timeout(self, db: Session, timeout: float):
+        """Let the server abort a report's queries once its timeout has passed"""
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text(f"SET statement_timeout = {int(timeout * 1000)}"))
+
+    def _run_report(self, fn: ReportFn, timeout: float, handle: _ReportHandle) -> Any:
+        """Executed on a worker thread"""
+        if handle.cancelled:
+            raise asyncio.CancelledError()
+        db = self.session_factory()
+        try:
+            self._apply_statement_timeout(db, timeout)
+            result = fn(db)
+            if asyncio.iscoroutine(result):
+                result = self._run_coroutine(result, handle)
+            return result
+        finally:
+            db.close()
+
+    @staticmethod
+    def _run_coroutine(coro, handle: _ReportHandle) -> Any:
+        """Run a coroutine report on a fresh event loop that is closed afterwards"""
+        loop = asyncio.new_event_loop()
+        try:
+            task = loop.create_task(coro)
+            if not handle.attach(loop, task):
+                task.cancel()
+            return loop.run_until_complete(task)
+        finally:
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+
+    async def _timed(self, name: str, fn: ReportFn, timeout: float) -> Tuple[str, Any, ReportTiming]:
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        handle = _ReportHandle()
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self._pool, self._run_report, fn, timeout, handle), timeout
+            )
+            status, error = "ok", None
+        except asyncio.TimeoutError:
+            handle.cancel()
+            result, status, error = None, "timeout", f"exceeded {timeout}s"
+            logger.error(f"Report {name} timed out after {timeout}s")
+        except Exception as e:
+            result, status, error = None, "error", str(e)
+            logger.error(f"Report {name} failed: {e}")
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        return name, result, ReportTiming(name, round(duration_ms, 2), status, error)
+
+    async def run(self, reports: Dict[str, ReportFn],
+                  timeouts: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, Any], Dict[str, ReportTiming]]:
+        """Run every report concurrently; failed or timed-out reports are omitted from results"""
+        timeouts = timeouts or {}
+        outcomes = await asyncio.gather(*[
+            self._timed(name, fn, timeouts.get(name, self.timeout_seconds))
+            for name, fn in reports.items()
+        ])
+
+        results = {name: result for name, result, timing in outcomes if timing.status == "ok"}
+        timings = {name: timing for name, _, timing in outcomes}
+        return results, timings
+
+    def shutdown(self):
+        """Stop the worker threads; queued reports are dropped"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,419 @@
+"""
+Columnar time-series store for Soladia analytics
+Preallocated NumPy ring buffers (int64 ns timestamps + float64 values) with an optional memory-mapped tier
+"""
+
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+Timestamp = Union[datetime, int, np.integer]
+
+# One on-disk record; record 0 is a header whose "t" field counts records ever written
+DISK_RECORD = np.dtype([("t", "<i8"), ("v", "<f8")])
+
+
+def to_ns(value: Timestamp) -> int:
+    """Nanoseconds since the Unix epoch; naive datetimes are taken as UTC"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return ((value - EPOCH) // timedelta(microseconds=1)) * 1000
+    return int(value)
+
+
+def from_ns(value: int) -> datetime:
+    """Naive UTC datetime for a nanosecond timestamp"""
+    return EPOCH + timedelta(microseconds=int(value) // 1000)
+
+
+def parse_period(period: str) -> timedelta:
+    """Parse periods such as '15m', '24h', '7d' or '1w'"""
+    match = re.fullmatch(r"\s*(\d+)\s*([smhdw])\s*", period or "")
+    if not match:
+        raise ValueError(f"Invalid period: {period}")
+    units = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+    return timedelta(**{units[match.group(2)]: int(match.group(1))})
+
+
+class Aggregation(Enum):
+    OHLC = "ohlc"
+    MEAN = "mean"
+    LAST = "last"
+    SUM = "sum"
+    MIN = "min"
+    MAX = "max"
+
+
+@dataclass
+class SeriesSlice:
+    """A contiguous copy of part of a series"""
+    timestamps: np.ndarray  # int64 ns
+    values: np.ndarray      # float64
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def datetimes(self) -> List[datetime]:
+        return [from_ns(ts) for ts in self.timestamps]
+
+    def to_records(self, field: str = "value") -> List[dict]:
+        """List-of-dicts view for callers that still want records"""
+        return [{"timestamp": from_ns(ts), field: float(value)}
+                for ts, value in zip(self.timestamps, self.values)]
+
+
+@dataclass
+class Downsampled:
+    """Per-bucket aggregates; OHLC fills open/high/low/close, others fill value"""
+    bucket_start: np.ndarray
+    count: np.ndarray
+    value: Optional[np.ndarray] = None
+    open: Optional[np.ndarray] = None
+    high: Optional[np.ndarray] = None
+    low: Optional[np.ndarray] = None
+    close: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.bucket_start)
+
+    def to_records(self) -> List[dict]:
+        columns = {name: getattr(self, name) for name in ("value", "open", "high", "low", "close")
+                   if getattr(self, name) is not None}
+        return [
+            {"timestamp": from_ns(start), "count": int(self.count[i]),
+             **{name: float(column[i]) for name, column in columns.items()}}
+            for i, start in enumerate(self.bucket_start)
+        ]
+
+
+def _empty_slice() -> SeriesSlice:
+    return SeriesSlice(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+
+
+class MemmapTier:
+    """Fixed-size on-disk ring of (timestamp, value) records for longer retention"""
+
+    def __init__(self, path: str, capacity: int):
+        self.path = path
+        self.capacity = capacity
+        exists = os.path.exists(path)
+        self._records = np.memmap(path, dtype=DISK_RECORD, mode="r+" if exists else "w+",
+                                  shape=(capacity + 1,))
+
+    @property
+    def written(self) -> int:
+        return int(self._records[0]["t"])
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def append(self, ts: int, value: float):
+        written = self.written
+        self._records[1 + written % self.capacity] = (ts, value)
+        self._records[0]["t"] = written + 1
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray):
+        # Points that would be overwritten within this same call are skipped but still counted
+        skipped = max(0, len(timestamps) - self.capacity)
+        written = self.written + skipped
+        positions = 1 + (written + np.arange(len(timestamps) - skipped)) % self.capacity
+        self._records["t"][positions] = timestamps[skipped:]
+        self._records["v"][positions] = values[skipped:]
+        self._records[0]["t"] = written + len(positions)
+
+    def segments(self) -> List[np.ndarray]:
+        """Stored records in chronological order, as at most two views"""
+        body = self._records[1:]
+        count, head = len(self), self.written % self.capacity
+        if count < self.capacity:
+            return [body[:count]]
+        return [body[head:], body[:head]]
+
+    def flush(self):
+        self._records.flush()
+
+
+class RingSeries:
+    """One series in a ring buffer of up to capacity points; appends are O(1) amortized
+
+    With initial_capacity, the buffers start that small and double until they
+    reach capacity, after which the oldest points are overwritten.
+    """
+
+    def __init__(self, capacity: int, disk_tier: Optional[MemmapTier] = None,
+                 initial_capacity: Optional[int] = None):
+        self.capacity = capacity
+        size = min(capacity, max(1, initial_capacity)) if initial_capacity else capacity
+        self._timestamps = np.zeros(size, dtype=np.int64)
+        self._values = np.zeros(size, dtype=np.float64)
+        self._head = 0     # next write position
+        self._count = 0
+        self._sorted = True
+        self.disk_tier = disk_tier
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamps.nbytes + self._values.nbytes
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._timestamps[self._head - 1]) if self._count else None
+
+    @property
+    def _size(self) -> int:
+        return len(self._timestamps)
+
+    def _grow(self, needed: int):
+        """Reallocate for at least needed points, up to capacity
+
+        Only called before the ring first fills, so the points are already in order.
+        """
+        size = min(self.capacity, max(self._size * 2, needed))
+        if size <= self._size:
+            return
+        timestamps = np.zeros(size, dtype=np.int64)
+        values = np.zeros(size, dtype=np.float64)
+        timestamps[:self._count] = self._timestamps[:self._count]
+        values[:self._count] = self._values[:self._count]
+        self._timestamps, self._values = timestamps, values
+        self._head = self._count
+
+    def append(self, ts: Timestamp, value: float):
+        ts = to_ns(ts)
+        if self._count and ts < self._timestamps[self._head - 1]:
+            self._sorted = False
+        if self._count == self._size:
+            self._grow(self._count + 1)
+        if self._count == self._size:
+            if self.disk_tier is not None:
+                self.disk_tier.append(int(self._timestamps[self._head]), float(self._values[self._head]))
+        else:
+            self._count += 1
+        self._timestamps[self._head] = ts
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self._size
+
+    def extend(self, timestamps: Iterable[Timestamp], values: Iterable[float]):
+        """Bulk append; copies at most capacity points into the buffer in one pass"""
+        ts = np.asarray([to_ns(t) for t in timestamps] if not isinstance(timestamps, np.ndarray)
+                        else timestamps, dtype=np.int64)
+        vals = np.asarray(values, dtype=np.float64)
+        if len(ts) != len(vals):
+            raise ValueError("timestamps and values must have the same length")
+        if not len(ts):
+            return
+        if np.any(np.diff(ts) < 0) or (self._count and ts[0] < self._timestamps[self._head - 1]):
+            self._sorted = False
+        if self._count + len(ts) > self._size:
+            self._grow(self._count + len(ts))
+
+        overflow = self._count + len(ts) - self.capacity
+        if overflow > 0 and self.disk_tier is not None:
+            # Spill what is about to be overwritten (or never fits) to disk, oldest first
+            old_ts, old_vals = self._ordered()
+            self.disk_tier.extend(np.concatenate([old_ts, ts])[:overflow],
+                                  np.concatenate([old_vals, vals])[:overflow])
+
+        size = self._size
+        ts, vals = ts[-size:], vals[-size:]
+        positions = (self._head + np.arange(len(ts))) % size
+        self._timestamps[positions] = ts
+        self._values[positions] = vals
+        self._head = (self._head + len(ts)) % size
+        self._count = min(size, self._count + len(ts))
+
+    def _segments(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Chronological (timestamps, values) views without copying"""
+        if self._count < self._size:
+            return [(self._timestamps[:self._count], self._values[:self._count])]
+        h = self._head
+        return [(self._timestamps[h:], self._values[h:]), (self._timestamps[:h], self._values[:h])]
+
+    def _ordered(self) -> Tuple[np.ndarray, np.ndarray]:
+        segments = self._segments()
+        return (np.concatenate([s[0] for s in segments]), np.concatenate([s[1] for s in segments]))
+
+    def _all_segments(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        segments = []
+        if self.disk_tier is not None:
+            segments = [(records["t"], records["v"]) for records in self.disk_tier.segments()]
+        return segments + self._segments()
+
+    def range(self, start: Optional[Timestamp] = None, end: Optional[Timestamp] = None) -> SeriesSlice:
+        """Points with start <= timestamp < end, including the disk tier"""
+        lo = to_ns(start) if start is not None else None
+        hi = to_ns(end) if end is not None else None
+        ts_parts, value_parts = [], []
+        for ts, vals in self._all_segments():
+            if not len(ts):
+                continue
+            if self._sorted:
+                left = np.searchsorted(ts, lo, "left") if lo is not None else 0
+                right = np.searchsorted(ts, hi, "left") if hi is not None else len(ts)
+                ts_parts.append(ts[left:right])
+                value_parts.append(vals[left:right])
+            else:
+                mask = np.ones(len(ts), dtype=bool)
+                if lo is not None:
+                    mask &= ts >= lo
+                if hi is not None:
+                    mask &= ts < hi
+                ts_parts.append(ts[mask])
+                value_parts.append(vals[mask])
+
+        if not ts_parts:
+            return _empty_slice()
+        timestamps = np.concatenate(ts_parts).astype(np.int64, copy=False)
+        values = np.concatenate(value_parts).astype(np.float64, copy=False)
+        if not self._sorted:
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, values = timestamps[order], values[order]
+        return SeriesSlice(timestamps, values)
+
+    def last(self, n: int) -> SeriesSlice:
+        """The most recent n in-memory points"""
+        if not self._count:
+            return _empty_slice()
+        ts, vals = self._ordered()
+        n = max(0, min(n, len(ts)))
+        return SeriesSlice(ts[len(ts) - n:].copy(), vals[len(vals) - n:].copy())
+
+    def downsample(self, interval: Union[timedelta, int], how: Aggregation = Aggregation.MEAN,
+                   start: Optional[Timestamp] = None, end: Optional[Timestamp] = None) -> Downsampled:
+        """Aggregate into fixed buckets aligned to the epoch"""
+        return downsample(self.range(start, end), interval, how)
+
+
+def downsample(series: SeriesSlice, interval: Union[timedelta, int],
+               how: Aggregation = Aggregation.MEAN) -> Downsampled:
+    """Bucket a sorted slice with reduceat; empty buckets are omitted"""
+    step = (interval // timedelta(microseconds=1)) * 1000 if isinstance(interval, timedelta) else int(interval)
+    if step <= 0:
+        raise ValueError("interval must be positive")
+    how = Aggregation(how)
+    if not len(series):
+        empty = np.empty(0)
+        return Downsampled(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                           **({"open": empty, "high": empty, "low": empty, "close": empty}
+                              if how == Aggregation.OHLC else {"value": empty}))
+
+    buckets = series.timestamps // step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)]
+    counts = ends - starts
+    values = series.values
+    result = Downsampled(buckets[starts] * step, counts)
+
+    if how == Aggregation.OHLC:
+        result.open = values[starts]
+        result.high = np.maximum.reduceat(values, starts)
+        result.low = np.minimum.reduceat(values, starts)
+        result.close = values[ends - 1]
+    elif how == Aggregation.MEAN:
+        result.value = np.add.reduceat(values, starts) / counts
+    elif how == Aggregation.SUM:
+        result.value = np.add.reduceat(values, starts)
+    elif how == Aggregation.LAST:
+        result.value = values[ends - 1]
+    elif how == Aggregation.MIN:
+        result.value = np.minimum.reduceat(values, starts)
+    else:
+        result.value = np.maximum.reduceat(values, starts)
+    return result
+
+
+class TimeSeriesStore:
+    """Keyed collection of ring-buffered series"""
+
+    def __init__(self, capacity: int = 10000, disk_dir: Optional[str] = None,
+                 disk_capacity: int = 1_000_000, initial_capacity: Optional[int] = None):
+        self.capacity = capacity
+        self.initial_capacity = initial_capacity
+        self.disk_dir = disk_dir
+        self.disk_capacity = disk_capacity
+        self._series: Dict[str, RingSeries] = {}
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        return os.path.join(self.disk_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".ts")
+
+    def _disk_tier(self, key: str) -> Optional[MemmapTier]:
+        path = self._disk_path(key)
+        return MemmapTier(path, self.disk_capacity) if path else None
+
+    def _existing(self, key: str) -> Optional[RingSeries]:
+        """A series held in memory, or reopened from a previous run's disk tier"""
+        if key in self._series:
+            return self._series[key]
+        path = self._disk_path(key)
+        if path and os.path.exists(path):
+            return self.series(key)
+        return None
+
+    def series(self, key: str) -> RingSeries:
+        """Get or create a series"""
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = RingSeries(self.capacity, self._disk_tier(key), self.initial_capacity)
+                    self._series[key] = series
+        return series
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._series
+
+    def keys(self) -> List[str]:
+        return list(self._series)
+
+    def append(self, key: str, ts: Timestamp, value: float):
+        self.series(key).append(ts, value)
+
+    def extend(self, key: str, timestamps: Iterable[Timestamp], values: Iterable[float]):
+        self.series(key).extend(timestamps, values)
+
+    def range(self, key: str, start: Optional[Timestamp] = None,
+              end: Optional[Timestamp] = None) -> SeriesSlice:
+        series = self._existing(key)
+        return series.range(start, end) if series is not None else _empty_slice()
+
+    def last(self, key: str, n: int) -> SeriesSlice:
+        series = self._existing(key)
+        return series.last(n) if series is not None else _empty_slice()
+
+    def downsample(self, key: str, interval: Union[timedelta, int],
+                   how: Aggregation = Aggregation.MEAN, start: Optional[Timestamp] = None,
+                   end: Optional[Timestamp] = None) -> Downsampled:
+        return downsample(self.range(key, start, end), interval, how)
+
+    def count(self, key: str) -> int:
+        return len(self._series[key]) if key in self._series else 0
+
+    def memory_bytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())
+
+    def flush(self):
+        """Flush memory-mapped tiers to disk"""
+        for series in self._series.values():
+            if series.disk_tier is not None:
+                series.disk_tier.flush()
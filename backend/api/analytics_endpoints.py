@@ -0,0 +1,65 @@
+"""
+Analytics export API endpoints
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Optional
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from database import SessionLocal
+from api.dependencies import Caller, get_caller, seller_scope
+from middleware.rate_limiter import limiter
+from analytics.fact_export import (
+    EXPORT_SOURCES,
+    MEDIA_TYPES,
+    ExportFormat,
+    export_filename,
+    stream_fact_export
+)
+
+router = APIRouter(prefix="/api/analytics/export", tags=["analytics"])
+
+
+def get_export_session_factory():
+    """Session factory for exports; each stream opens and closes its own session"""
+    return SessionLocal
+
+
+@router.get("/{source}")
+@limiter.limit(settings.RATE_LIMIT_BULK)
+async def export_facts(
+    request: Request,
+    source: str,
+    format: ExportFormat = Query(ExportFormat.CSV),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    seller_id: Optional[int] = Query(None, gt=0),
+    batch_size: int = Query(5000, ge=100, le=50000),
+    caller: Caller = Depends(get_caller),
+    session_factory = Depends(get_export_session_factory)
+):
+    """Stream raw order or payment facts for a date range; sellers get their own, admins any or all"""
+    if source not in EXPORT_SOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown export source: {source}")
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    seller_id = seller_scope(caller, seller_id)
+
+    filename = export_filename(source, format, start, end)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format != ExportFormat.PARQUET:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        stream_fact_export(session_factory, source, format, start, end, batch_size,
+                           filters={"seller_id": seller_id} if seller_id else None,
+                           archive_dir=settings.PARTITION_ARCHIVE_DIR),
+        media_type=MEDIA_TYPES[format],
+        headers=headers
+    )
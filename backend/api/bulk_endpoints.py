@@ -0,0 +1,110 @@
+"""
+Bulk product and order import/export API endpoints
+"""
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import Optional
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from database import SessionLocal
+from api.dependencies import Caller, get_caller, seller_scope
+from analytics.fact_export import MEDIA_TYPES, ExportFormat, export_filename, stream_fact_export
+from bulk_import import DEFAULT_CHUNK_SIZE, ImportFormat, OrderImporter, ProductImporter, run_import
+from middleware.rate_limiter import limiter
+
+router = APIRouter(prefix="/api/bulk", tags=["bulk"])
+
+BULK_KINDS = ("products", "orders")
+
+
+def get_bulk_session_factory():
+    """Session factory for bulk jobs; each import or export owns its session"""
+    return SessionLocal
+
+
+def _import_format(format: Optional[ImportFormat], filename: Optional[str]) -> ImportFormat:
+    if format is not None:
+        return format
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return ImportFormat.NDJSON
+    return ImportFormat.CSV
+
+
+@router.post("/products/import")
+@limiter.limit(settings.RATE_LIMIT_BULK)
+async def import_products(
+    request: Request,
+    seller_id: int = Query(..., gt=0),
+    file: UploadFile = File(...),
+    format: Optional[ImportFormat] = Query(None),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=100, le=50000),
+    caller: Caller = Depends(get_caller),
+    session_factory = Depends(get_bulk_session_factory)
+):
+    """Import a seller's listings from CSV or NDJSON; invalid rows are reported, not fatal"""
+    seller_scope(caller, seller_id)
+    report = await run_in_threadpool(
+        run_import, session_factory, ProductImporter(seller_id), file.file,
+        _import_format(format, file.filename), chunk_size
+    )
+    return report.to_dict()
+
+
+@router.post("/orders/import")
+@limiter.limit(settings.RATE_LIMIT_BULK)
+async def import_orders(
+    request: Request,
+    file: UploadFile = File(...),
+    format: Optional[ImportFormat] = Query(None),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=100, le=50000),
+    caller: Caller = Depends(get_caller),
+    session_factory = Depends(get_bulk_session_factory)
+):
+    """Import orders from CSV or NDJSON; prices are taken from the referenced products.
+
+    Sellers may only import orders for their own products; admins may import any.
+    """
+    report = await run_in_threadpool(
+        run_import, session_factory, OrderImporter(seller_scope(caller, None)), file.file,
+        _import_format(format, file.filename), chunk_size
+    )
+    return report.to_dict()
+
+
+@router.get("/{kind}/export")
+@limiter.limit(settings.RATE_LIMIT_BULK)
+async def export_bulk(
+    request: Request,
+    kind: str,
+    format: ExportFormat = Query(ExportFormat.CSV),
+    seller_id: Optional[int] = Query(None, gt=0),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    batch_size: int = Query(5000, ge=100, le=50000),
+    caller: Caller = Depends(get_caller),
+    session_factory = Depends(get_bulk_session_factory)
+):
+    """Stream products or orders back out; sellers get their own, admins any or all"""
+    if kind not in BULK_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown bulk kind: {kind}")
+    seller_id = seller_scope(caller, seller_id)
+
+    filename = export_filename(kind, format, start, end)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format != ExportFormat.PARQUET:
+        headers["Content-Encoding"] = "gzip"
+
+    filters = {"seller_id": seller_id} if seller_id else None
+    return StreamingResponse(
+        stream_fact_export(session_factory, kind, format, start, end, batch_size, filters=filters,
+                           archive_dir=settings.PARTITION_ARCHIVE_DIR),
+        media_type=MEDIA_TYPES[format],
+        headers=headers
+    )
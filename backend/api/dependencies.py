@@ -0,0 +1,53 @@
+"""
+Shared API dependencies for callers authenticated by the API gateway
+"""
+
+import hmac
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+
+
+@dataclass
+class Caller:
+    user_id: int
+    is_admin: bool = False
+
+
+def get_optional_caller(x_user_id: Optional[int] = Header(None),
+                        x_user_roles: str = Header("")) -> Optional[Caller]:
+    """Caller identity as set by the API gateway after authentication, if any"""
+    if x_user_id is None:
+        return None
+    roles = {role.strip() for role in x_user_roles.split(",")}
+    return Caller(user_id=x_user_id, is_admin="admin" in roles)
+
+
+def get_caller(x_user_id: Optional[int] = Header(None), x_user_roles: str = Header("")) -> Caller:
+    """Caller identity as set by the API gateway; 401 without one"""
+    caller = get_optional_caller(x_user_id, x_user_roles)
+    if caller is None:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return caller
+
+
+def admin_token_valid(token: Optional[str]) -> bool:
+    """True for the configured internal admin token; always False while none is configured"""
+    expected = settings.ADMIN_API_TOKEN
+    return bool(expected and token and hmac.compare_digest(token, expected))
+
+
+def seller_scope(caller: Caller, seller_id: Optional[int]) -> Optional[int]:
+    """The seller a caller may act for: any for admins, otherwise only themselves"""
+    if caller.is_admin:
+        return seller_id
+    if seller_id is not None and seller_id != caller.user_id:
+        raise HTTPException(status_code=403, detail="Not allowed to act for this seller")
+    return caller.user_id
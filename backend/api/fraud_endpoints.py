@@ -0,0 +1,80 @@
+"""
+Fraud scoring API endpoints
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Header
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import List, Optional
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from api.dependencies import Caller, admin_token_valid, get_optional_caller
+from ai.fraud_detection import (
+    FraudDetection,
+    FraudDetectionRequest,
+    FraudBatchScoreRequest,
+    get_fraud_detection
+)
+from ai.fraud_batch_scoring import chunked, iter_ndjson, parse_ndjson
+
+router = APIRouter(prefix="/fraud", tags=["fraud"])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _read_batch(request: Request) -> FraudBatchScoreRequest:
+    """Parse a JSON {"events": [...]} body or one NDJSON event per line"""
+    try:
+        body = await request.body()
+        if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+            persist = request.query_params.get("persist", "false").lower() == "true"
+            return FraudBatchScoreRequest(
+                events=[FraudDetectionRequest(**event) for event in parse_ndjson(body)],
+                persist=persist
+            )
+        return FraudBatchScoreRequest.parse_raw(body)
+    except (ValidationError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.post("/score/batch")
+async def score_batch(
+    request: Request,
+    accept: Optional[str] = Header(None),
+    x_tenant_id: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+    caller: Optional[Caller] = Depends(get_optional_caller),
+    fraud_detection: FraudDetection = Depends(get_fraud_detection)
+):
+    """Score a batch of events; results are returned in input order
+
+    Any authenticated caller may score. Persisting events and updating the
+    shared feature store needs an admin or the internal admin token.
+    """
+    internal = admin_token_valid(x_admin_token)
+    if caller is None and not internal:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    batch = await _read_batch(request)
+    if batch.persist and not (internal or caller.is_admin):
+        raise HTTPException(status_code=403, detail="Persisting fraud events requires admin access")
+    events: List[FraudDetectionRequest] = batch.events
+    stream = (accept or "").startswith(NDJSON_MEDIA_TYPE) or len(events) > settings.FRAUD_BATCH_STREAM_THRESHOLD
+
+    if not stream:
+        try:
+            results = await fraud_detection.detect_fraud_batch(events, x_tenant_id, batch.persist)
+            return {"count": len(results), "results": [result.to_dict() for result in results]}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def generate():
+        for offset, chunk in chunked(events, settings.FRAUD_BATCH_CHUNK_SIZE):
+            results = await fraud_detection.detect_fraud_batch(chunk, x_tenant_id, batch.persist, offset)
+            for line in iter_ndjson(results):
+                yield line
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
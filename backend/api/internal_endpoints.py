@@ -0,0 +1,146 @@
+"""
+Internal diagnostics API endpoints
+"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from api.dependencies import admin_token_valid
+from database import db_router
+from database_pool import pool_controllers
+from middleware.profiling_middleware import slow_request_capture
+from monitoring.profiling import AllocationTracker, SamplingProfiler
+from monitoring.tracing import InMemoryExporter, tracer
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow the request only with the configured admin token"""
+    if not admin_token_valid(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_admin)]
+)
+
+allocation_tracker = AllocationTracker()
+_profiler_lock = asyncio.Lock()
+
+
+def _trace_store() -> InMemoryExporter:
+    if not isinstance(tracer.exporter, InMemoryExporter):
+        raise HTTPException(status_code=404, detail="Traces are exported to an OTLP collector")
+    return tracer.exporter
+
+
+def _profile_response(profile, fmt: str) -> Response:
+    body, media_type = profile.export(fmt)
+    extension = "txt" if fmt == "collapsed" else "speedscope.json"
+    filename = f"{profile.name.replace(' ', '_').replace('/', '_')}.{extension}"
+    return Response(
+        content=body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/traces")
+async def list_traces(limit: int = Query(50, ge=1, le=500)):
+    """Most recent sampled traces with their span category breakdown"""
+    return {"sample_rate": tracer.sample_rate, "traces": _trace_store().recent(limit)}
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """All spans of one sampled trace"""
+    spans = _trace_store().get(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "spans": spans}
+
+
+@router.get("/profiling/cpu")
+async def profile_cpu(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0),
+    mode: str = Query("wall", pattern="^(wall|cpu)$"),
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$")
+):
+    """Sample every thread of this worker and return a flamegraph file"""
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be <= {settings.PROFILER_MAX_SECONDS}")
+    if _profiler_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profiler_lock:
+        profiler = SamplingProfiler(interval=interval_ms / 1000.0, mode=mode)
+        profile = await asyncio.to_thread(profiler.run, seconds, f"worker-{os.getpid()}-{mode}")
+    return _profile_response(profile, format)
+
+
+@router.get("/profiling/slow-requests")
+async def list_slow_requests():
+    """Profiles captured for requests over the slow threshold"""
+    return {
+        "threshold_ms": slow_request_capture.threshold * 1000,
+        "skipped": slow_request_capture.skipped,
+        "captures": slow_request_capture.list()
+    }
+
+
+@router.get("/profiling/slow-requests/{capture_id}")
+async def get_slow_request(capture_id: int, format: str = Query("speedscope", pattern="^(speedscope|collapsed)$")):
+    """Flamegraph file for one slow request"""
+    capture = slow_request_capture.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Capture not found")
+    return _profile_response(capture["profile"], format)
+
+
+@router.post("/profiling/memory/snapshots")
+async def take_memory_snapshot(label: Optional[str] = None):
+    """Take a tracemalloc snapshot; tracing starts on the first call"""
+    label = await asyncio.to_thread(allocation_tracker.snapshot, label)
+    return {"label": label, "snapshots": allocation_tracker.list()}
+
+
+@router.get("/profiling/memory/diff")
+async def diff_memory_snapshots(before: str, after: str, limit: int = Query(20, ge=1, le=200)):
+    """Top allocation growth between two snapshots"""
+    try:
+        stats = allocation_tracker.diff(before, after, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"before": before, "after": after, "top": stats}
+
+
+@router.delete("/profiling/memory")
+async def stop_memory_tracing():
+    """Drop snapshots and stop tracemalloc"""
+    allocation_tracker.stop()
+    return {"tracing": allocation_tracker.tracing}
+
+
+@router.get("/db-routing")
+async def database_routing_status():
+    """Replica health, lag and connection counts"""
+    if db_router is None:
+        return {"enabled": False}
+    return {"enabled": True, **db_router.status()}
+
+
+@router.get("/db-pool")
+async def database_pool_status():
+    """Pool size, checkout wait and hold percentiles, and resize history per controlled pool"""
+    return {"pools": [controller.status() for controller in list(pool_controllers.values())]}
@@ -0,0 +1,20 @@
+"""
+Prometheus metrics endpoint
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring.instrumentation import CONTENT_TYPE_LATEST, render_metrics
+
+router = APIRouter(tags=["monitoring"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Scrape target for monitoring/prometheus.yml"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
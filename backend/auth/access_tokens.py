@@ -0,0 +1,226 @@
+"""
+Signed access tokens for Soladia sessions
+Short-lived tokens verified locally with keys parsed once, plus a Redis-synced revocation filter
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_ALGORITHMS = ("HS256", "EdDSA")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _to_bytes(value: Union[str, bytes]) -> bytes:
+    return value.encode() if isinstance(value, str) else value
+
+
+def fingerprint_hash(device_fingerprint: str) -> str:
+    """Digest of a device fingerprint as embedded in access tokens"""
+    return hashlib.sha256(device_fingerprint.encode()).hexdigest()[:32]
+
+
+def token_revocation_id(token: str, claims: Dict[str, Any]) -> str:
+    """What the revocation filter tracks for a token: its session, else the token itself"""
+    return claims.get("sid") or claims.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+class AccessTokenCodec:
+    """Compact JWS (JWT) signing and verification
+
+    Keys are parsed once at construction. HS256 signs with ``secret``;
+    EdDSA signs with an Ed25519 PEM ``private_key`` and verifies with its
+    public half, or with ``public_key`` alone on verify-only services.
+    """
+
+    def __init__(self, secret: Optional[Union[str, bytes]] = None, algorithm: str = "HS256",
+                 private_key: Optional[Union[str, bytes]] = None,
+                 public_key: Optional[Union[str, bytes]] = None, leeway: int = 5):
+        if algorithm not in ACCESS_TOKEN_ALGORITHMS:
+            raise ValueError(f"Unsupported access token algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.leeway = leeway
+        self._secret = None
+        self._private_key = None
+        self._public_key = None
+
+        if algorithm == "HS256":
+            if not secret:
+                raise ValueError("HS256 access tokens need a secret")
+            self._secret = _to_bytes(secret)
+        else:
+            from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+            if private_key:
+                self._private_key = load_pem_private_key(_to_bytes(private_key), password=None)
+                self._public_key = self._private_key.public_key()
+            if public_key:
+                self._public_key = load_pem_public_key(_to_bytes(public_key))
+            if self._public_key is None:
+                raise ValueError("EdDSA access tokens need a private or public key")
+
+        self._header = _b64encode(json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":")).encode())
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        if self._secret is not None:
+            return hmac.new(self._secret, signing_input, hashlib.sha256).digest()
+        if self._private_key is None:
+            raise ValueError("This codec has no signing key")
+        return self._private_key.sign(signing_input)
+
+    def _verify(self, signing_input: bytes, signature: bytes) -> bool:
+        if self._secret is not None:
+            return hmac.compare_digest(hmac.new(self._secret, signing_input, hashlib.sha256).digest(), signature)
+        from cryptography.exceptions import InvalidSignature
+
+        try:
+            self._public_key.verify(signature, signing_input)
+            return True
+        except InvalidSignature:
+            return False
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        payload = _b64encode(json.dumps(claims, separators=(",", ":"), default=str).encode())
+        signing_input = f"{self._header}.{payload}"
+        return f"{signing_input}.{_b64encode(self._sign(signing_input.encode('ascii')))}"
+
+    def decode(self, token: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Verified claims, or None for a malformed, forged or expired token"""
+        try:
+            header, payload, signature = token.split(".")
+            # Tokens from other JWT libraries may order or space the header differently
+            if header != self._header and json.loads(_b64decode(header)).get("alg") != self.algorithm:
+                return None
+            if not self._verify(f"{header}.{payload}".encode("ascii"), _b64decode(signature)):
+                return None
+            claims = json.loads(_b64decode(payload))
+            if float(claims["exp"]) + self.leeway < (now if now is not None else time.time()):
+                return None
+            return claims
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None
+
+
+class RevocationFilter:
+    """Bloom filter of revoked session ids, shared through Redis
+
+    Revocations set bits in one Redis bitmap per ``bucket_seconds`` (the
+    access token lifetime). Two buckets after a revocation every token
+    issued before it has expired, so old bitmaps just expire. Workers pull
+    the current and previous bitmaps at most every ``sync_interval``
+    seconds. A hit only means *maybe revoked* and must be confirmed
+    against the session store. While the last sync failed every item is a
+    hit, so callers fall back to the store until Redis is reachable again.
+    """
+
+    KEY_PREFIX = "token_revocations"
+
+    def __init__(self, redis_client=None, bucket_seconds: int = 300, capacity: int = 20000,
+                 error_rate: float = 0.01, sync_interval: float = 2.0, clock=time.time):
+        self.redis = redis_client
+        self.bucket_seconds = bucket_seconds
+        self.sync_interval = sync_interval
+        self.clock = clock
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.size = max(64, (bits + 7) // 8 * 8)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray(self.size // 8)
+        self._local: Dict[str, float] = {}
+        self._synced_at: Optional[float] = None
+        self.degraded = False
+        self._lock = asyncio.Lock()
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def _set(self, bits: bytearray, item: str):
+        # Same bit order as Redis SETBIT: bit 0 is the high bit of byte 0
+        for position in self._positions(item):
+            bits[position >> 3] |= 0x80 >> (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        if self.degraded:
+            return True
+        bits = self._bits
+        return all(bits[position >> 3] & (0x80 >> (position & 7)) for position in self._positions(item))
+
+    def key(self, bucket: int) -> str:
+        return f"{self.KEY_PREFIX}:{bucket}"
+
+    def bucket(self) -> int:
+        return int(self.clock() // self.bucket_seconds)
+
+    def add_local(self, items: Iterable[str]):
+        """Mark items revoked on this worker, ahead of the next sync"""
+        now = self.clock()
+        for item in items:
+            self._local[item] = now
+            self._set(self._bits, item)
+
+    def add_to_pipeline(self, pipe, items: Iterable[str]):
+        """Queue the bitmap writes for a revocation on the caller's pipeline"""
+        items = list(items)
+        key = self.key(self.bucket())
+        for item in items:
+            for position in self._positions(item):
+                pipe.setbit(key, position, 1)
+        pipe.expire(key, 2 * self.bucket_seconds + int(self.sync_interval) + 1)
+        self.add_local(items)
+
+    async def sync(self):
+        """Replace the local bits with the shared bitmaps plus this worker's recent revocations"""
+        length = self.size // 8
+        merged = 0
+        bucket = self.bucket()
+        if self.redis is not None:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(self.key(bucket))
+            pipe.get(self.key(bucket - 1))
+            for data in await pipe.execute():
+                merged |= int.from_bytes((data or b"").ljust(length, b"\0")[:length], "big")
+        bits = bytearray(merged.to_bytes(length, "big"))
+
+        # Local revocations stay visible exactly as long as their shared bitmap
+        for item, added_at in list(self._local.items()):
+            if int(added_at // self.bucket_seconds) < bucket - 1:
+                del self._local[item]
+            else:
+                self._set(bits, item)
+        self._bits = bits
+        self._synced_at = time.monotonic()
+        self.degraded = False
+
+    async def sync_if_stale(self):
+        """Sync at most once per ``sync_interval``; concurrent callers share one sync"""
+        if self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        async with self._lock:
+            if self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+                return
+            try:
+                await self.sync()
+            except Exception as e:
+                # Retry after the interval rather than on every request; until then
+                # revocations may be missing, so every token goes to the store
+                self._synced_at = time.monotonic()
+                self.degraded = True
+                logger.warning(f"Failed to sync token revocations, checking every token against Redis: {e}")
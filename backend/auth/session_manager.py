@@ -8,7 +8,9 @@ import logging
 import secrets
 import hashlib
 import hmac
-from typing import Dict, Optional, Any, List, Set
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Any, List, Set, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
 import json
@@ -22,8 +24,15 @@ from cryptography.fernet import Fernet
 import ipaddress
 import user_agents
 
+from config import settings
+from .access_tokens import AccessTokenCodec, RevocationFilter, fingerprint_hash
+
 logger = logging.getLogger(__name__)
 
+# Revoked and expired session ids are published here so every worker drops them from its cache
+SESSION_INVALIDATION_CHANNEL = "session_invalidations"
+REMEMBER_ME_DURATION = timedelta(days=30)
+
 class SessionStatus(Enum):
     ACTIVE = "active"
     EXPIRED = "expired"
@@ -54,6 +63,23 @@ class SessionData:
     is_http_only: bool
     same_site: str
     metadata: Dict[str, Any]
+    
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["session_type"] = self.session_type.value
+        data["status"] = self.status.value
+        for name in ("created_at", "last_activity", "expires_at"):
+            data[name] = data[name].isoformat()
+        return json.dumps(data, default=str)
+    
+    @classmethod
+    def from_json(cls, raw) -> "SessionData":
+        data = json.loads(raw)
+        data["session_type"] = SessionType(data["session_type"])
+        data["status"] = SessionStatus(data["status"])
+        for name in ("created_at", "last_activity", "expires_at"):
+            data[name] = datetime.fromisoformat(data[name])
+        return cls(**data)
 
 @dataclass
 class SecurityEvent:
@@ -69,8 +95,65 @@ class SecurityEvent:
     timestamp: datetime
     metadata: Dict[str, Any]
 
+def _session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+def _user_sessions_key(user_id: str) -> str:
+    return f"user_sessions:{user_id}"
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+class SessionCache:
+    """Bounded LRU of sessions with a short TTL
+    
+    Sits in front of Redis on each worker. Entries are dropped when an
+    invalidation arrives over pub/sub; the TTL bounds how stale an entry
+    can get if a message is missed.
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl: float = 5.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, SessionData]]" = OrderedDict()
+    
+    def get(self, session_id: str) -> Optional[SessionData]:
+        entry = self._entries.get(session_id)
+        if entry is None or self.clock() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._entries[session_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, session_data: SessionData):
+        self._entries[session_data.session_id] = (self.clock(), session_data)
+        self._entries.move_to_end(session_data.session_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def discard(self, session_ids: Iterable[str]):
+        for session_id in session_ids:
+            self._entries.pop(session_id, None)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
 class SecureSessionManager:
-    """Secure session management system"""
+    """Secure session management system
+    
+    With Redis, sessions live in ``session:{id}`` keys and a per-user
+    ``user_sessions:{id}`` set, fronted by a per-worker ``SessionCache``.
+    Without Redis, ``active_sessions`` is the (single worker) store.
+    """
     
     def __init__(
         self,
@@ -78,22 +161,48 @@ class SecureSessionManager:
         redis_client: Optional[redis.Redis] = None,
         session_timeout: int = 3600,  # 1 hour
         max_sessions_per_user: int = 5,
-        enable_security_monitoring: bool = True
+        enable_security_monitoring: bool = True,
+        cache_size: int = 10000,
+        cache_ttl: float = 5.0,
+        activity_write_interval: int = 60,
+        access_token_ttl: int = 300,
+        access_token_algorithm: str = "HS256",
+        access_token_private_key: Optional[str] = None,
+        revocation_sync_interval: float = 2.0
     ):
         self.secret_key = secret_key
         self.redis_client = redis_client
         self.session_timeout = session_timeout
         self.max_sessions_per_user = max_sessions_per_user
         self.enable_security_monitoring = enable_security_monitoring
+        self.activity_write_interval = activity_write_interval
+        self.access_token_ttl = access_token_ttl
         
         # Security settings
         self.encryption_key = Fernet.generate_key()
         self.cipher = Fernet(self.encryption_key)
         
         # Session storage
+        self.cache = SessionCache(cache_size, cache_ttl)
         self.active_sessions: Dict[str, SessionData] = {}
         self.user_sessions: Dict[str, Set[str]] = {}
         self.security_events: List[SecurityEvent] = []
+        self._invalidation_task: Optional[asyncio.Task] = None
+        
+        # Stateless access tokens
+        self.tokens = AccessTokenCodec(
+            secret_key, access_token_algorithm, private_key=access_token_private_key
+        )
+        # The gateway reads the same bitmaps, so both sides use the shared bucket width
+        bucket_seconds = settings.ACCESS_TOKEN_REVOCATION_BUCKET_SECONDS
+        if access_token_ttl > bucket_seconds:
+            raise ValueError(
+                f"access_token_ttl ({access_token_ttl}s) exceeds the revocation bucket ({bucket_seconds}s)"
+            )
+        self.revocations = RevocationFilter(
+            redis_client, bucket_seconds=bucket_seconds, sync_interval=revocation_sync_interval
+        )
+        self._background_tasks: Set[asyncio.Task] = set()
         
         # Security monitoring
         self.failed_login_attempts: Dict[str, List[datetime]] = {}
@@ -109,6 +218,9 @@ class SecureSessionManager:
     def _setup_security_features(self):
         """Setup security features and monitoring"""
         try:
+            if self.redis_client:
+                self._invalidation_task = asyncio.create_task(self._listen_for_invalidations())
+            
             # Start background security monitoring
             if self.enable_security_monitoring:
                 asyncio.create_task(self._security_monitor())
@@ -160,7 +272,7 @@ class SecureSessionManager:
             
             # Calculate expiration time
             if remember_me:
-                expires_at = datetime.now() + timedelta(days=30)
+                expires_at = datetime.now() + REMEMBER_ME_DURATION
             else:
                 expires_at = datetime.now() + timedelta(seconds=self.session_timeout)
             
@@ -179,17 +291,12 @@ class SecureSessionManager:
                 is_secure=request.url.scheme == "https",
                 is_http_only=True,
                 same_site="strict",
-                metadata={}
+                metadata={"remember_me": remember_me}
             )
             
-            # Store session
+            # Store session and add it to the user's index
             await self._store_session(session_data)
             
-            # Update user sessions
-            if user_id not in self.user_sessions:
-                self.user_sessions[user_id] = set()
-            self.user_sessions[user_id].add(session_id)
-            
             # Log session creation
             await self._log_security_event(
                 session_id=session_id,
@@ -213,7 +320,12 @@ class SecureSessionManager:
             )
     
     async def validate_session(self, session_id: str, request: Request) -> Optional[SessionData]:
-        """Validate and refresh session"""
+        """Validate and refresh session
+        
+        A cache hit needs no Redis round trip and a miss needs one GET.
+        ``last_activity`` is written back at most once per
+        ``activity_write_interval``, off the request path.
+        """
         try:
             # Get session data
             session_data = await self._get_session(session_id)
@@ -221,8 +333,9 @@ class SecureSessionManager:
                 return None
             
             # Check if session is expired
-            if datetime.now() > session_data.expires_at:
-                await self._expire_session(session_id)
+            now = datetime.now()
+            if now > session_data.expires_at:
+                await self._expire_session(session_data)
                 return None
             
             # Check if session is revoked
@@ -231,12 +344,15 @@ class SecureSessionManager:
             
             # Check for security violations
             if await self._has_security_violation(session_data, request):
-                await self._revoke_session(session_id, "Security violation detected")
+                await self._revoke_sessions(
+                    session_data.user_id, [session_id], "Security violation detected"
+                )
                 return None
             
             # Update last activity
-            session_data.last_activity = datetime.now()
-            await self._store_session(session_data)
+            if (now - session_data.last_activity).total_seconds() >= self.activity_write_interval:
+                session_data.last_activity = now
+                self._spawn(self._touch_session(session_data))
             
             return session_data
             
@@ -249,20 +365,18 @@ class SecureSessionManager:
         try:
             session_data = await self._get_session(session_id)
             if session_data:
-                await self._revoke_session(session_id, reason)
+                await self._revoke_sessions(session_data.user_id, [session_id], reason)
                 logger.info(f"Session revoked: {session_id} - {reason}")
             
         except Exception as e:
             logger.error(f"Failed to revoke session: {e}")
     
     async def revoke_user_sessions(self, user_id: str, reason: str = "User logout"):
-        """Revoke all sessions for a user"""
+        """Revoke all sessions for a user with one index read and one pipelined delete"""
         try:
-            if user_id in self.user_sessions:
-                for session_id in list(self.user_sessions[user_id]):
-                    await self._revoke_session(session_id, reason)
-                
-                self.user_sessions[user_id].clear()
+            session_ids = await self._user_session_ids(user_id)
+            if session_ids:
+                await self._revoke_sessions(user_id, session_ids, reason)
                 logger.info(f"All sessions revoked for user {user_id}")
             
         except Exception as e:
@@ -275,9 +389,14 @@ class SecureSessionManager:
             if not session_data or session_data.status != SessionStatus.ACTIVE:
                 return None
             
-            # Update expiration time
-            session_data.expires_at = datetime.now() + timedelta(seconds=self.session_timeout)
-            session_data.last_activity = datetime.now()
+            # Extend by the session's own lifetime, never shortening a remember-me session
+            now = datetime.now()
+            if session_data.metadata.get("remember_me"):
+                lifetime = REMEMBER_ME_DURATION
+            else:
+                lifetime = timedelta(seconds=self.session_timeout)
+            session_data.expires_at = max(session_data.expires_at, now + lifetime)
+            session_data.last_activity = now
             
             await self._store_session(session_data)
             return session_data
@@ -289,24 +408,64 @@ class SecureSessionManager:
     async def get_user_sessions(self, user_id: str) -> List[SessionData]:
         """Get all active sessions for a user"""
         try:
-            sessions = []
-            if user_id in self.user_sessions:
-                for session_id in self.user_sessions[user_id]:
-                    session_data = await self._get_session(session_id)
-                    if session_data and session_data.status == SessionStatus.ACTIVE:
-                        sessions.append(session_data)
-            
-            return sessions
+            return await self._active_user_sessions(user_id)
             
         except Exception as e:
             logger.error(f"Failed to get user sessions: {e}")
             return []
     
-    async def _generate_session_id(self) -> str:
+    def issue_access_token(self, session_data: SessionData) -> str:
+        """Short-lived signed token carrying the session id and device fingerprint hash"""
+        now = int(time.time())
+        expires_at = min(now + self.access_token_ttl, int(session_data.expires_at.timestamp()))
+        return self.tokens.encode({
+            "sub": session_data.user_id,
+            "sid": session_data.session_id,
+            "fph": fingerprint_hash(session_data.device_fingerprint),
+            "typ": session_data.session_type.value,
+            "iat": now,
+            "exp": expires_at
+        })
+    
+    async def validate_access_token(self, token: str, request: Request) -> Optional[Dict[str, Any]]:
+        """Validate an access token locally, returning its claims
+        
+        The signature, expiry and fingerprint are checked without Redis.
+        Only a revocation filter hit or a fingerprint mismatch falls back
+        to ``validate_session``, which confirms (and on a device change
+        revokes) against the session store.
+        """
+        try:
+            claims = self.tokens.decode(token)
+            if not claims or not claims.get("sid"):
+                return None
+            
+            await self.revocations.sync_if_stale()
+            fingerprint_matches = hmac.compare_digest(
+                claims.get("fph", ""), fingerprint_hash(self._generate_device_fingerprint(request))
+            )
+            if fingerprint_matches and claims["sid"] not in self.revocations:
+                return claims
+            
+            session_data = await self.validate_session(claims["sid"], request)
+            return claims if session_data else None
+            
+        except Exception as e:
+            logger.error(f"Access token validation failed: {e}")
+            return None
+    
+    async def refresh_access_token(self, session_id: str, request: Request) -> Optional[str]:
+        """Issue a new access token after validating the session against the store"""
+        session_data = await self.validate_session(session_id, request)
+        if not session_data:
+            return None
+        return self.issue_access_token(session_data)
+    
+    def _generate_session_id(self) -> str:
         """Generate a secure session ID"""
         return secrets.token_urlsafe(32)
     
-    async def _generate_device_fingerprint(self, request: Request) -> str:
+    def _generate_device_fingerprint(self, request: Request) -> str:
         """Generate device fingerprint for security"""
         try:
             # Collect fingerprint data
@@ -325,96 +484,211 @@ class SecureSessionManager:
             return ""
     
     async def _store_session(self, session_data: SessionData):
-        """Store session data"""
+        """Store session data and index it under its user"""
         try:
-            # Store in memory
-            self.active_sessions[session_data.session_id] = session_data
+            if not self.redis_client:
+                self.active_sessions[session_data.session_id] = session_data
+                self.user_sessions.setdefault(session_data.user_id, set()).add(session_data.session_id)
+                return
             
-            # Store in Redis if available
-            if self.redis_client:
-                session_json = json.dumps(asdict(session_data), default=str)
-                await self.redis_client.setex(
-                    f"session:{session_data.session_id}",
-                    self.session_timeout,
-                    session_json
-                )
+            ttl = max(1, int((session_data.expires_at - datetime.now()).total_seconds()))
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(_session_key(session_data.session_id), ttl, session_data.to_json())
+            pipe.sadd(_user_sessions_key(session_data.user_id), session_data.session_id)
+            # Members outlive their session keys; they are pruned when the index is read
+            pipe.expire(_user_sessions_key(session_data.user_id), int(REMEMBER_ME_DURATION.total_seconds()))
+            await pipe.execute()
+            self.cache.put(session_data)
             
         except Exception as e:
             logger.error(f"Failed to store session: {e}")
     
+    async def _touch_session(self, session_data: SessionData):
+        """Write back ``last_activity`` only while the stored session is still active
+
+        The key keeps its TTL and the user index is left alone, so a session
+        revoked or expired since it was read is not brought back.
+        """
+        try:
+            if not self.redis_client:
+                if session_data.session_id in self.active_sessions:
+                    self.active_sessions[session_data.session_id].last_activity = session_data.last_activity
+                return
+            
+            key = _session_key(session_data.session_id)
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                await pipe.watch(key)
+                session_json = await pipe.get(key)
+                if not session_json:
+                    return
+                stored = SessionData.from_json(session_json)
+                if stored.status != SessionStatus.ACTIVE:
+                    return
+                stored.last_activity = session_data.last_activity
+                pipe.multi()
+                pipe.set(key, stored.to_json(), xx=True, keepttl=True)
+                await pipe.execute()
+            
+        except redis.WatchError:
+            # Rewritten or deleted since the read; that write wins
+            pass
+        except Exception as e:
+            logger.error(f"Failed to update session activity: {e}")
+    
     async def _get_session(self, session_id: str) -> Optional[SessionData]:
-        """Get session data"""
+        """Get session data from the cache, or with one Redis GET"""
         try:
-            # Check memory first
-            if session_id in self.active_sessions:
-                return self.active_sessions[session_id]
+            if not self.redis_client:
+                return self.active_sessions.get(session_id)
             
-            # Check Redis if available
-            if self.redis_client:
-                session_json = await self.redis_client.get(f"session:{session_id}")
-                if session_json:
-                    session_data = SessionData(**json.loads(session_json))
-                    self.active_sessions[session_id] = session_data
-                    return session_data
+            session_data = self.cache.get(session_id)
+            if session_data:
+                return session_data
             
-            return None
+            session_json = await self.redis_client.get(_session_key(session_id))
+            if not session_json:
+                return None
+            session_data = SessionData.from_json(session_json)
+            self.cache.put(session_data)
+            return session_data
             
         except Exception as e:
             logger.error(f"Failed to get session: {e}")
             return None
     
-    async def _expire_session(self, session_id: str):
+    async def _user_session_ids(self, user_id: str) -> List[str]:
+        if not self.redis_client:
+            return list(self.user_sessions.get(user_id, ()))
+        return [_decode(session_id) for session_id in await self.redis_client.smembers(_user_sessions_key(user_id))]
+    
+    async def _active_user_sessions(self, user_id: str) -> List[SessionData]:
+        """Active sessions of a user, pruning index entries whose session has expired"""
+        session_ids = await self._user_session_ids(user_id)
+        if not session_ids:
+            return []
+        
+        if self.redis_client:
+            values = await self.redis_client.mget([_session_key(session_id) for session_id in session_ids])
+            loaded = {
+                session_id: SessionData.from_json(value)
+                for session_id, value in zip(session_ids, values) if value
+            }
+            stale = [session_id for session_id in session_ids if session_id not in loaded]
+            if stale:
+                await self.redis_client.srem(_user_sessions_key(user_id), *stale)
+        else:
+            loaded = {
+                session_id: self.active_sessions[session_id]
+                for session_id in session_ids if session_id in self.active_sessions
+            }
+        
+        return [
+            session_data for session_data in loaded.values()
+            if session_data.status == SessionStatus.ACTIVE and session_data.expires_at > datetime.now()
+        ]
+    
+    async def _remove_sessions(self, user_id: str, session_ids: List[str]) -> List[SessionData]:
+        """Delete a user's sessions and invalidate them on every worker
+        
+        With Redis this is one pipeline: read the sessions for logging,
+        delete them, drop them from the user index, publish the ids and
+        mark them in the access token revocation filter.
+        """
+        self.cache.discard(session_ids)
+        if not session_ids:
+            return []
+        
+        if not self.redis_client:
+            self.revocations.add_local(session_ids)
+            removed = [self.active_sessions.pop(session_id) for session_id in session_ids
+                       if session_id in self.active_sessions]
+            remaining = self.user_sessions.get(user_id, set())
+            remaining.difference_update(session_ids)
+            if not remaining:
+                self.user_sessions.pop(user_id, None)
+            return removed
+        
+        keys = [_session_key(session_id) for session_id in session_ids]
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.mget(keys)
+        pipe.delete(*keys)
+        pipe.srem(_user_sessions_key(user_id), *session_ids)
+        pipe.publish(SESSION_INVALIDATION_CHANNEL, json.dumps(session_ids))
+        self.revocations.add_to_pipeline(pipe, session_ids)
+        values = (await pipe.execute())[0]
+        return [SessionData.from_json(value) for value in values if value]
+    
+    async def _expire_session(self, session_data: SessionData):
         """Expire a session"""
         try:
-            if session_id in self.active_sessions:
-                session_data = self.active_sessions[session_id]
-                session_data.status = SessionStatus.EXPIRED
-                
-                # Remove from user sessions
-                if session_data.user_id in self.user_sessions:
-                    self.user_sessions[session_data.user_id].discard(session_id)
-                
-                # Remove from active sessions
-                del self.active_sessions[session_id]
-                
-                # Remove from Redis
-                if self.redis_client:
-                    await self.redis_client.delete(f"session:{session_id}")
+            await self._remove_sessions(session_data.user_id, [session_data.session_id])
+            session_data.status = SessionStatus.EXPIRED
             
         except Exception as e:
             logger.error(f"Failed to expire session: {e}")
     
-    async def _revoke_session(self, session_id: str, reason: str):
-        """Revoke a session"""
+    async def _revoke_sessions(self, user_id: str, session_ids: List[str], reason: str):
+        """Revoke a batch of one user's sessions"""
         try:
-            if session_id in self.active_sessions:
-                session_data = self.active_sessions[session_id]
+            removed = await self._remove_sessions(user_id, list(session_ids))
+            events = []
+            for session_data in removed:
                 session_data.status = SessionStatus.REVOKED
-                
-                # Remove from user sessions
-                if session_data.user_id in self.user_sessions:
-                    self.user_sessions[session_data.user_id].discard(session_id)
-                
-                # Remove from active sessions
-                del self.active_sessions[session_id]
-                
-                # Remove from Redis
-                if self.redis_client:
-                    await self.redis_client.delete(f"session:{session_id}")
-                
-                # Log revocation
-                await self._log_security_event(
-                    session_id=session_id,
-                    user_id=session_data.user_id,
+                events.append(self._build_security_event(
+                    session_id=session_data.session_id,
+                    user_id=user_id,
                     event_type="session_revoked",
                     severity="info",
                     description=f"Session revoked: {reason}",
                     ip_address=session_data.ip_address,
                     user_agent=session_data.user_agent
-                )
+                ))
+            await self._record_security_events(events)
             
         except Exception as e:
-            logger.error(f"Failed to revoke session: {e}")
+            logger.error(f"Failed to revoke sessions: {e}")
+    
+    def _spawn(self, coro):
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _listen_for_invalidations(self):
+        """Drop sessions revoked or expired on other workers from the local cache"""
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(SESSION_INVALIDATION_CHANNEL)
+                # Anything cached while unsubscribed may have missed an invalidation
+                self.cache.clear()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        session_ids = json.loads(message["data"])
+                        self.cache.discard(session_ids)
+                        self.revocations.add_local(session_ids)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Session invalidation listener error: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+    
+    async def close(self):
+        """Stop the invalidation listener and wait for pending activity writes"""
+        if self._invalidation_task:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self._invalidation_task = None
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
     
     async def _is_rate_limited(self, ip_address: str) -> bool:
         """Check if IP is rate limited"""
@@ -474,16 +748,12 @@ class SecureSessionManager:
     async def _exceeds_session_limit(self, user_id: str) -> bool:
         """Check if user exceeds session limit"""
         try:
-            if user_id in self.user_sessions:
-                active_sessions = 0
-                for session_id in self.user_sessions[user_id]:
-                    session_data = await self._get_session(session_id)
-                    if session_data and session_data.status == SessionStatus.ACTIVE:
-                        active_sessions += 1
-                
-                return active_sessions >= self.max_sessions_per_user
+            # The index may still hold expired ids, so a small set is conclusive on its own
+            if self.redis_client:
+                if await self.redis_client.scard(_user_sessions_key(user_id)) < self.max_sessions_per_user:
+                    return False
             
-            return False
+            return len(await self._active_user_sessions(user_id)) >= self.max_sessions_per_user
             
         except Exception as e:
             logger.error(f"Session limit check failed: {e}")
@@ -492,24 +762,20 @@ class SecureSessionManager:
     async def _revoke_oldest_sessions(self, user_id: str):
         """Revoke oldest sessions for a user"""
         try:
-            if user_id not in self.user_sessions:
-                return
-            
-            # Get active sessions with timestamps
-            active_sessions = []
-            for session_id in self.user_sessions[user_id]:
-                session_data = await self._get_session(session_id)
-                if session_data and session_data.status == SessionStatus.ACTIVE:
-                    active_sessions.append((session_id, session_data.last_activity))
-            
             # Sort by last activity (oldest first)
-            active_sessions.sort(key=lambda x: x[1])
+            active_sessions = sorted(
+                await self._active_user_sessions(user_id),
+                key=lambda session_data: session_data.last_activity
+            )
             
             # Revoke oldest sessions
             sessions_to_revoke = len(active_sessions) - self.max_sessions_per_user + 1
-            for i in range(sessions_to_revoke):
-                session_id, _ = active_sessions[i]
-                await self._revoke_session(session_id, "Session limit exceeded")
+            if sessions_to_revoke > 0:
+                await self._revoke_sessions(
+                    user_id,
+                    [session_data.session_id for session_data in active_sessions[:sessions_to_revoke]],
+                    "Session limit exceeded"
+                )
             
         except Exception as e:
             logger.error(f"Failed to revoke oldest sessions: {e}")
@@ -548,7 +814,7 @@ class SecureSessionManager:
             logger.error(f"Security violation check failed: {e}")
             return False
     
-    async def _log_security_event(
+    def _build_security_event(
         self,
         session_id: str,
         user_id: str,
@@ -558,36 +824,44 @@ class SecureSessionManager:
         request: Optional[Request] = None,
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None
-    ):
+    ) -> SecurityEvent:
+        return SecurityEvent(
+            event_id=str(uuid.uuid4()),
+            session_id=session_id,
+            user_id=user_id,
+            event_type=event_type,
+            severity=severity,
+            description=description,
+            ip_address=ip_address or (request.client.host if request else ""),
+            user_agent=user_agent or (request.headers.get("user-agent", "") if request else ""),
+            timestamp=datetime.now(),
+            metadata={}
+        )
+    
+    async def _log_security_event(self, **kwargs):
         """Log a security event"""
         try:
-            event = SecurityEvent(
-                event_id=str(uuid.uuid4()),
-                session_id=session_id,
-                user_id=user_id,
-                event_type=event_type,
-                severity=severity,
-                description=description,
-                ip_address=ip_address or (request.client.host if request else ""),
-                user_agent=user_agent or (request.headers.get("user-agent", "") if request else ""),
-                timestamp=datetime.now(),
-                metadata={}
-            )
-            
-            self.security_events.append(event)
-            
-            # Log to file
-            logger.warning(f"Security event: {event_type} - {description}")
-            
-            # Store in Redis if available
-            if self.redis_client:
-                event_json = json.dumps(asdict(event), default=str)
-                await self.redis_client.lpush("security_events", event_json)
-                await self.redis_client.ltrim("security_events", 0, 999)  # Keep last 1000 events
-            
+            await self._record_security_events([self._build_security_event(**kwargs)])
         except Exception as e:
             logger.error(f"Failed to log security event: {e}")
     
+    async def _record_security_events(self, events: List[SecurityEvent]):
+        if not events:
+            return
+        
+        self.security_events.extend(events)
+        
+        # Log to file
+        for event in events:
+            logger.warning(f"Security event: {event.event_type} - {event.description}")
+        
+        # Store in Redis if available
+        if self.redis_client:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.lpush("security_events", *[json.dumps(asdict(event), default=str) for event in events])
+            pipe.ltrim("security_events", 0, 999)  # Keep last 1000 events
+            await pipe.execute()
+    
     async def _security_monitor(self):
         """Background security monitoring"""
         while True:
@@ -606,18 +880,17 @@ class SecureSessionManager:
                 await asyncio.sleep(300)
     
     async def _cleanup_expired_sessions(self):
-        """Clean up expired sessions"""
+        """Clean up expired sessions held in memory; Redis keys expire on their own TTL"""
         while True:
             try:
                 current_time = datetime.now()
-                expired_sessions = []
-                
-                for session_id, session_data in self.active_sessions.items():
-                    if current_time > session_data.expires_at:
-                        expired_sessions.append(session_id)
+                expired_sessions = [
+                    session_data for session_data in self.active_sessions.values()
+                    if current_time > session_data.expires_at
+                ]
                 
-                for session_id in expired_sessions:
-                    await self._expire_session(session_id)
+                for session_data in expired_sessions:
+                    await self._expire_session(session_data)
                 
                 # Wait before next cleanup
                 await asyncio.sleep(60)  # 1 minute
@@ -723,6 +996,9 @@ class SecureSessionManager:
         return {
             "active_sessions": len(self.active_sessions),
             "total_users": len(self.user_sessions),
+            "cached_sessions": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
             "security_events": len(self.security_events),
             "suspicious_ips": len(self.suspicious_ips),
             "blocked_ips": len(self.blocked_ips),
@@ -745,7 +1021,14 @@ def initialize_session_manager(
     redis_client: Optional[redis.Redis] = None,
     session_timeout: int = 3600,
     max_sessions_per_user: int = 5,
-    enable_security_monitoring: bool = True
+    enable_security_monitoring: bool = True,
+    cache_size: int = 10000,
+    cache_ttl: float = 5.0,
+    activity_write_interval: int = 60,
+    access_token_ttl: int = 300,
+    access_token_algorithm: str = "HS256",
+    access_token_private_key: Optional[str] = None,
+    revocation_sync_interval: float = 2.0
 ) -> SecureSessionManager:
     """Initialize the global session manager"""
     global _session_manager
@@ -754,6 +1037,13 @@ def initialize_session_manager(
         redis_client=redis_client,
         session_timeout=session_timeout,
         max_sessions_per_user=max_sessions_per_user,
-        enable_security_monitoring=enable_security_monitoring
+        enable_security_monitoring=enable_security_monitoring,
+        cache_size=cache_size,
+        cache_ttl=cache_ttl,
+        activity_write_interval=activity_write_interval,
+        access_token_ttl=access_token_ttl,
+        access_token_algorithm=access_token_algorithm,
+        access_token_private_key=access_token_private_key,
+        revocation_sync_interval=revocation_sync_interval
     )
     return _session_manager
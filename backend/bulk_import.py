@@ -0,0 +1,345 @@
+"""
+Bulk product and order import for Soladia
+Streams CSV/NDJSON uploads, validates rows in chunks and writes them in large batches
+"""
+
+import codecs
+import csv
+import enum
+import io
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models import Order, Product
+from schemas import OrderCreate, ProductCreate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+READ_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormat(Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+@dataclass
+class RowError:
+    line: int
+    errors: List[Dict[str, Any]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"line": self.line, "errors": self.errors}
+
+
+@dataclass
+class ImportReport:
+    """Outcome of one import; errors past ``MAX_REPORTED_ERRORS`` are only counted"""
+    kind: str
+    received: int = 0
+    inserted: int = 0
+    failed: int = 0
+    batches: int = 0
+    duration_seconds: float = 0.0
+    errors: List[RowError] = field(default_factory=list)
+
+    def add_error(self, line: int, errors: List[Dict[str, Any]]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, errors))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "batches": self.batches,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "errors": [error.to_dict() for error in self.errors],
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+# Callbacks run once after an import commits, e.g. to refresh search or cache state
+ImportHook = Callable[[Connection, "ImportReport"], None]
+import_hooks: Dict[str, List[ImportHook]] = {"products": [], "orders": []}
+
+
+def register_import_hook(kind: str, hook: ImportHook):
+    import_hooks.setdefault(kind, []).append(hook)
+
+
+def read_chunks(stream: BinaryIO, size: int = READ_SIZE) -> Iterator[bytes]:
+    return iter(lambda: stream.read(size), b"")
+
+
+def iter_lines(chunks: Iterable[bytes], encoding: str = "utf-8-sig") -> Iterator[str]:
+    """Decode a byte stream incrementally and yield lines with their newline"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_records(chunks: Iterable[bytes], import_format: ImportFormat) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """(line, record, parse error) per input row; empty CSV cells are left out so defaults apply"""
+    if import_format == ImportFormat.CSV:
+        reader = csv.DictReader(iter_lines(chunks))
+        for row in reader:
+            yield reader.line_num, {
+                key: value for key, value in row.items() if key is not None and value not in (None, "")
+            }, None
+        return
+
+    for line_number, line in enumerate(iter_lines(chunks), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def _chunked(items: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _error_details(error: ValidationError) -> List[Dict[str, Any]]:
+    return [{"loc": list(item["loc"]), "msg": item["msg"]} for item in error.errors()]
+
+
+def complete_row(table: Table, values: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill Python-side column defaults so every row in a batch has the same keys"""
+    row = {}
+    for column in table.columns:
+        if column.name in values:
+            row[column.name] = values[column.name]
+        elif column.primary_key and column.autoincrement:
+            continue
+        elif column.default is not None and column.default.is_scalar:
+            row[column.name] = column.default.arg
+        elif column.default is not None and column.default.is_callable:
+            row[column.name] = column.default.arg(None)
+        else:
+            row[column.name] = None
+    return row
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        # SQLAlchemy stores Python enums by member name
+        return value.name
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _copy_rows(conn: Connection, table: Table, rows: List[Dict[str, Any]]):
+    """Postgres COPY FROM STDIN; NULL is an unquoted empty field, so strings are always quoted"""
+    columns = list(rows[0].keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        writer.writerow([_copy_value(row[name]) for name in columns])
+    buffer.seek(0)
+
+    column_list = ", ".join(f'"{name}"' for name in columns)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "{table.name}" ({column_list}) FROM STDIN WITH (FORMAT csv)', buffer)
+    finally:
+        cursor.close()
+
+
+def _supports_copy(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+
+
+def write_batch(conn: Connection, table: Table, rows: List[Tuple[int, Dict[str, Any]]], report: ImportReport):
+    """Insert a batch in one statement; if any row fails, retry row by row to isolate it"""
+    if not rows:
+        return
+    report.batches += 1
+    values = [row for _, row in rows]
+    try:
+        with conn.begin_nested():
+            if _supports_copy(conn):
+                _copy_rows(conn, table, values)
+            else:
+                # executemany renders batched multi-row VALUES (insertmanyvalues)
+                conn.execute(table.insert(), values)
+        report.inserted += len(values)
+        return
+    except (SQLAlchemyError, conn.dialect.dbapi.Error) as e:
+        logger.warning(f"Batch insert into {table.name} failed, isolating bad rows: {e}")
+
+    for line, row in rows:
+        try:
+            with conn.begin_nested():
+                conn.execute(table.insert(), [row])
+            report.inserted += 1
+        except SQLAlchemyError as e:
+            report.add_error(line, [{"loc": [], "msg": str(getattr(e, "orig", None) or e)}])
+
+
+class BulkImporter:
+    """Validates one chunk of records with a Pydantic schema and maps them to table rows"""
+    kind = ""
+    table: Table = None
+    schema: Type[BaseModel] = None
+
+    def rows(self, conn: Connection, models: List[Tuple[int, BaseModel]],
+             report: ImportReport) -> List[Tuple[int, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def validate(self, records: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+                 report: ImportReport) -> List[Tuple[int, BaseModel]]:
+        valid = []
+        for line, record, parse_error in records:
+            report.received += 1
+            if parse_error:
+                report.add_error(line, [{"loc": [], "msg": parse_error}])
+                continue
+            try:
+                valid.append((line, self.schema(**record)))
+            except ValidationError as e:
+                report.add_error(line, _error_details(e))
+        return valid
+
+    def run(self, conn: Connection, records: Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+            chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportReport:
+        report = ImportReport(self.kind)
+        start = time.perf_counter()
+        for chunk in _chunked(records, chunk_size):
+            valid = self.validate(chunk, report)
+            write_batch(conn, self.table, self.rows(conn, valid, report), report)
+        report.errors.sort(key=lambda error: error.line)
+        report.duration_seconds = time.perf_counter() - start
+        return report
+
+
+class ProductImporter(BulkImporter):
+    """Listings for one seller, validated with ``ProductCreate``"""
+    kind = "products"
+    table = Product.__table__
+    schema = ProductCreate
+
+    def __init__(self, seller_id: int):
+        self.seller_id = seller_id
+
+    def rows(self, conn, models, report):
+        now = datetime.utcnow()
+        return [
+            (line, complete_row(self.table, {
+                **product.dict(), "seller_id": self.seller_id, "created_at": now, "updated_at": now
+            }))
+            for line, product in models
+        ]
+
+
+class OrderImporter(BulkImporter):
+    """Orders validated with ``OrderCreate``; prices and sellers come from the products, as in create_order"""
+    kind = "orders"
+    table = Order.__table__
+    schema = OrderCreate
+
+    def __init__(self, seller_id: Optional[int] = None):
+        # When set, only orders for this seller's products are accepted
+        self.seller_id = seller_id
+
+    def rows(self, conn, models, report):
+        product_ids = {order.product_id for _, order in models}
+        products = Product.__table__
+        query = select(products.c.id, products.c.price, products.c.seller_id).where(products.c.id.in_(product_ids))
+        if self.seller_id is not None:
+            query = query.where(products.c.seller_id == self.seller_id)
+        found = {row.id: row for row in conn.execute(query)} if product_ids else {}
+
+        now = datetime.utcnow()
+        rows = []
+        for line, order in models:
+            product = found.get(order.product_id)
+            if product is None:
+                report.add_error(line, [{"loc": ["product_id"], "msg": "Product not found"}])
+                continue
+            values = order.dict()
+            rows.append((line, complete_row(self.table, {
+                **values,
+                "seller_id": product.seller_id,
+                "unit_price": product.price,
+                "total_price": product.price * order.quantity + order.shipping_cost,
+                "created_at": now,
+                "updated_at": now
+            })))
+        return rows
+
+
+def run_import(session_factory: Callable[[], Session], importer: BulkImporter, stream: BinaryIO,
+               import_format: ImportFormat, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportReport:
+    """Import a whole upload in one transaction, then run the completion hooks once"""
+    db = session_factory()
+    try:
+        conn = db.connection()
+        records = iter_records(read_chunks(stream), import_format)
+        report = importer.run(conn, records, chunk_size)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to import {importer.kind}: {e}")
+        raise
+    else:
+        for hook in import_hooks.get(importer.kind, []):
+            try:
+                hook(db.connection(), report)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to run {importer.kind} import hook: {e}")
+        logger.info(f"Imported {report.inserted}/{report.received} {importer.kind} ({report.failed} failed)")
+        return report
+    finally:
+        db.close()
+
+
+def _analyze(table_name: str) -> ImportHook:
+    def hook(conn: Connection, report: ImportReport):
+        # A large load skews planner statistics until autovacuum gets to the table
+        if report.inserted and conn.dialect.name == "postgresql":
+            conn.execute(text(f'ANALYZE "{table_name}"'))
+    return hook
+
+
+register_import_hook("products", _analyze("products"))
+register_import_hook("orders", _analyze("orders"))
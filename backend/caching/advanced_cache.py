@@ -12,6 +12,9 @@ from functools import wraps
 import asyncio
 import logging
 
+from monitoring.instrumentation import CACHE_REQUESTS
+from monitoring.tracing import TracedRedis
+
 logger = logging.getLogger(__name__)
 
 class CacheStrategy:
@@ -80,7 +83,7 @@ class CacheKeyGenerator:
 class CacheMetrics:
     """Cache performance metrics"""
     
-    def __init__(self):
+    def __init__(self, cache_name: str = "redis"):
         self.hits = 0
         self.misses = 0
         self.sets = 0
@@ -88,16 +91,20 @@ class CacheMetrics:
         self.errors = 0
         self.total_requests = 0
         self.start_time = time.time()
+        self._hit_counter = CACHE_REQUESTS.labels(cache_name, "hit")
+        self._miss_counter = CACHE_REQUESTS.labels(cache_name, "miss")
     
     def record_hit(self):
         """Record cache hit"""
         self.hits += 1
         self.total_requests += 1
+        self._hit_counter.inc()
     
     def record_miss(self):
         """Record cache miss"""
         self.misses += 1
         self.total_requests += 1
+        self._miss_counter.inc()
     
     def record_set(self):
         """Record cache set operation"""
@@ -173,7 +180,7 @@ class AdvancedCache:
         """Get Redis connection from pool"""
         if not self.redis_pool:
             await self.initialize()
-        return aioredis.Redis(connection_pool=self.redis_pool)
+        return TracedRedis(aioredis.Redis(connection_pool=self.redis_pool))
     
     async def get(
         self,
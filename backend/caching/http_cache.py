@@ -0,0 +1,495 @@
+"""
+Shared HTTP response cache for the gateway and edge services
+RFC 9111-style: Vary-aware keys, validators, 304s, stale-while-revalidate and request collapsing
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from starlette.responses import Response
+
+from monitoring.instrumentation import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+Headers = List[Tuple[str, str]]
+# Called with the conditional request headers to send; returns status, headers and body
+Fetch = Callable[[Dict[str, str]], Awaitable[Tuple[int, Headers, bytes]]]
+
+# RFC 9110 section 15.1: cacheable by default when freshness is known or assigned heuristically
+CACHEABLE_STATUSES = frozenset({200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501})
+# Refreshed from a 304; body-describing headers stay those of the stored response
+NOT_UPDATED_BY_304 = frozenset({"content-length", "content-encoding", "transfer-encoding", "content-range"})
+# RFC 9110 section 15.4.5
+NOT_MODIFIED_HEADERS = frozenset({
+    "etag", "last-modified", "cache-control", "expires", "vary", "date", "content-location", "age"
+})
+# Never stored or replayed from the cache
+UNSTORED_HEADERS = frozenset({
+    "age", "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "content-length", "x-cache"
+})
+ENCODINGS = ("br", "gzip", "deflate", "zstd")
+
+_DIRECTIVE = re.compile(r'\s*([^=,\s]+)\s*(?:=\s*(?:"([^"]*)"|([^,\s]*)))?\s*(?:,|$)')
+
+
+def header_value(headers: Iterable[Tuple[str, str]], name: str) -> Optional[str]:
+    """Comma-joined values of a header, matched case-insensitively"""
+    name = name.lower()
+    values = [value for key, value in headers if key.lower() == name]
+    return ", ".join(values) if values else None
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for match in _DIRECTIVE.finditer(value or ""):
+        if match.group(1):
+            directives.setdefault(match.group(1).lower(), match.group(2) or match.group(3) or None)
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(0, int(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_url(url: str) -> str:
+    """Scheme, host and path plus the query with its parameters sorted"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path or '/'}" + (f"?{query}" if query else "")
+
+
+def normalize_header(name: str, value: Optional[str]) -> str:
+    """Canonical form of a request header value as it affects a Vary match
+
+    Whitespace and case are folded and list members sorted. Accept-Encoding
+    is reduced to the codings that could be chosen, so the many ways clients
+    spell "gzip, br" share one variant.
+    """
+    if value is None:
+        return ""
+    items = sorted({" ".join(item.split()).lower() for item in value.split(",") if item.strip()})
+    if name == "accept-encoding":
+        accepted = set()
+        for item in items:
+            coding, _, params = item.partition(";")
+            params = params.strip()
+            try:
+                quality = float(params[2:]) if params.startswith("q=") else 1.0
+            except ValueError:
+                quality = 1.0
+            if quality > 0:
+                accepted.add(coding.strip())
+        items = [coding for coding in ENCODINGS if coding in accepted or "*" in accepted]
+    return ",".join(items)
+
+
+def etag_matches(if_none_match: str, etag: Optional[str]) -> bool:
+    """Weak comparison, as If-None-Match uses"""
+    if not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == target:
+            return True
+    return False
+
+
+@dataclass
+class CachedResponse:
+    """A stored response: header blob plus binary body"""
+    key: str
+    status_code: int
+    headers: Headers
+    body: bytes
+    stored_at: float
+    freshness: float
+    stale_while_revalidate: float = 0.0
+    initial_age: float = 0.0
+    vary: Tuple[str, ...] = ()
+
+    @property
+    def etag(self) -> Optional[str]:
+        return header_value(self.headers, "etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return header_value(self.headers, "last-modified")
+
+    def age(self, now: float) -> float:
+        return self.initial_age + max(0.0, now - self.stored_at)
+
+    def is_fresh(self, now: float) -> bool:
+        return self.age(now) < self.freshness
+
+    def can_serve_stale(self, now: float) -> bool:
+        return self.age(now) < self.freshness + self.stale_while_revalidate
+
+    def meta(self) -> bytes:
+        return json.dumps({
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "stored_at": self.stored_at,
+            "freshness": self.freshness,
+            "stale_while_revalidate": self.stale_while_revalidate,
+            "initial_age": self.initial_age,
+            "vary": list(self.vary)
+        }, separators=(",", ":")).encode()
+
+    @classmethod
+    def from_stored(cls, key: str, meta: bytes, body: bytes) -> "CachedResponse":
+        data = json.loads(meta)
+        return cls(
+            key=key,
+            status_code=data["status_code"],
+            headers=[tuple(header) for header in data["headers"]],
+            body=body,
+            stored_at=data["stored_at"],
+            freshness=data["freshness"],
+            stale_while_revalidate=data.get("stale_while_revalidate", 0.0),
+            initial_age=data.get("initial_age", 0.0),
+            vary=tuple(data.get("vary", ()))
+        )
+
+
+@dataclass
+class CacheResult:
+    """What to send to the client and how the cache produced it"""
+    status_code: int
+    headers: Headers
+    body: bytes = b""
+    cache_status: str = "BYPASS"
+
+    def to_response(self) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        headers = [(name, value) for name, value in self.headers
+                   if name.lower() == "age" or name.lower() not in UNSTORED_HEADERS]
+        if self.status_code not in (204, 304) and self.status_code >= 200:
+            headers.append(("content-length", str(len(self.body))))
+        headers.append(("x-cache", self.cache_status))
+        response.raw_headers = [
+            (name.lower().encode("latin-1"), str(value).encode("latin-1")) for name, value in headers
+        ]
+        return response
+
+
+class HTTPCache:
+    """Shared response cache stored in Redis
+
+    Each variant is two keys, a JSON header blob and the raw body, fetched
+    with one MGET. The request headers named by the response's ``Vary`` are
+    remembered per URL and normalized into the variant key, so unrelated
+    headers (cookies, user agents) do not fragment the cache. Concurrent
+    misses for one variant in this process share a single upstream fetch.
+    """
+
+    def __init__(self, redis_client, name: str = "http", default_ttl: int = 0,
+                 stale_while_revalidate: int = 0, retain_stale: int = 300,
+                 max_body_size: int = 8 * 1024 * 1024, clock=time.time):
+        self.redis = redis_client
+        self.name = name
+        self.default_ttl = default_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.retain_stale = retain_stale
+        self.max_body_size = max_body_size
+        self.clock = clock
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._counters = {result: CACHE_REQUESTS.labels(name, result) for result in (
+            "hit", "miss", "stale", "revalidated", "collapsed"
+        )}
+
+    # Keys
+
+    def primary_key(self, method: str, url: str) -> str:
+        digest = hashlib.sha256(f"{method.upper()} {normalize_url(url)}".encode()).hexdigest()[:40]
+        return f"{self.name}_cache:{digest}"
+
+    def variant_key(self, primary: str, vary: Iterable[str], headers: Iterable[Tuple[str, str]]) -> str:
+        vary = list(vary)
+        if not vary:
+            return primary
+        headers = list(headers)
+        values = "\n".join(f"{name}:{normalize_header(name, header_value(headers, name))}" for name in vary)
+        return f"{primary}:{hashlib.sha256(values.encode()).hexdigest()[:16]}"
+
+    @staticmethod
+    def cacheable_request(method: str, headers: Iterable[Tuple[str, str]]) -> bool:
+        return method.upper() == "GET" and "no-store" not in parse_cache_control(
+            header_value(list(headers), "cache-control")
+        )
+
+    # Storage
+
+    async def _vary(self, primary: str) -> Optional[Tuple[str, ...]]:
+        stored = await self.redis.get(f"{primary}:vary")
+        if stored is None:
+            return None
+        return tuple(json.loads(stored))
+
+    async def lookup(self, method: str, url: str, headers: Headers) -> Optional[CachedResponse]:
+        """The stored variant matching these request headers, fresh or not"""
+        primary = self.primary_key(method, url)
+        try:
+            vary = await self._vary(primary)
+            if vary is None:
+                return None
+            key = self.variant_key(primary, vary, headers)
+            meta, body = await self.redis.mget([f"{key}:meta", f"{key}:body"])
+            if meta is None or body is None:
+                return None
+            return CachedResponse.from_stored(key, meta, body)
+        except Exception as e:
+            logger.error(f"Failed to read cached response: {e}")
+            return None
+
+    def _freshness(self, headers: Headers, now: float, default_ttl: Optional[int]) -> Optional[float]:
+        directives = parse_cache_control(header_value(headers, "cache-control"))
+        for directive in ("s-maxage", "max-age"):
+            seconds = _seconds(directives.get(directive))
+            if seconds is not None:
+                return float(seconds)
+        expires = header_value(headers, "expires")
+        if expires is not None:
+            expires_at = _http_date(expires)
+            date = _http_date(header_value(headers, "date")) or now
+            return max(0.0, expires_at - date) if expires_at is not None else 0.0
+        ttl = self.default_ttl if default_ttl is None else default_ttl
+        return float(ttl) if ttl else None
+
+    def build_entry(self, method: str, url: str, request_headers: Headers, status_code: int,
+                    headers: Headers, body: bytes, default_ttl: Optional[int] = None,
+                    authenticated: bool = False) -> Optional[CachedResponse]:
+        """A cache entry for this response, or None when a shared cache must not store it
+
+        ``authenticated`` marks requests the caller identified some other way
+        than an Authorization header (API keys, injected user headers); like
+        those, their responses are stored only when marked shareable.
+        """
+        if method.upper() != "GET" or status_code not in CACHEABLE_STATUSES or len(body) > self.max_body_size:
+            return None
+        response_cc = parse_cache_control(header_value(headers, "cache-control"))
+        if "no-store" in response_cc or "private" in response_cc:
+            return None
+        if "no-store" in parse_cache_control(header_value(request_headers, "cache-control")):
+            return None
+        if header_value(headers, "set-cookie") is not None:
+            return None
+        if (authenticated or header_value(request_headers, "authorization") is not None) and not (
+            {"public", "s-maxage", "must-revalidate"} & response_cc.keys()
+        ):
+            return None
+
+        vary = tuple(sorted({
+            name.strip().lower() for name in (header_value(headers, "vary") or "").split(",") if name.strip()
+        }))
+        if "*" in vary:
+            return None
+
+        now = self.clock()
+        # no-cache responses are stored but always revalidated before use
+        freshness = 0.0 if "no-cache" in response_cc else self._freshness(headers, now, default_ttl)
+        if freshness is None:
+            return None
+        stored = [(name, value) for name, value in headers if name.lower() not in UNSTORED_HEADERS]
+        if header_value(stored, "etag") is None:
+            stored.append(("ETag", f'"{hashlib.sha256(body).hexdigest()[:32]}"'))
+        if header_value(stored, "last-modified") is None:
+            stored.append(("Last-Modified", formatdate(now, usegmt=True)))
+        swr = _seconds(response_cc.get("stale-while-revalidate"))
+        if {"no-cache", "must-revalidate", "proxy-revalidate"} & response_cc.keys():
+            swr = 0
+
+        primary = self.primary_key(method, url)
+        return CachedResponse(
+            key=self.variant_key(primary, vary, request_headers),
+            status_code=status_code,
+            headers=stored,
+            body=body,
+            stored_at=now,
+            freshness=freshness,
+            stale_while_revalidate=float(self.stale_while_revalidate if swr is None else swr),
+            initial_age=float(_seconds(header_value(headers, "age")) or 0),
+            vary=vary
+        )
+
+    async def save(self, method: str, url: str, entry: CachedResponse):
+        ttl = max(1, int(entry.freshness + entry.stale_while_revalidate + self.retain_stale))
+        primary = self.primary_key(method, url)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.setex(f"{primary}:vary", ttl, json.dumps(list(entry.vary)))
+            pipe.setex(f"{entry.key}:meta", ttl, entry.meta())
+            pipe.setex(f"{entry.key}:body", ttl, entry.body)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to cache response: {e}")
+
+    async def invalidate(self, method: str, url: str):
+        """Forget every variant of a URL by dropping its Vary record"""
+        try:
+            await self.redis.delete(f"{self.primary_key(method, url)}:vary")
+        except Exception as e:
+            logger.error(f"Failed to invalidate cached response: {e}")
+
+    # Serving
+
+    def respond(self, entry: CachedResponse, request_headers: Headers, cache_status: str) -> CacheResult:
+        """The stored response, or a 304 when the client's validators still match"""
+        headers = list(entry.headers) + [("Age", str(int(entry.age(self.clock()))))]
+        if_none_match = header_value(request_headers, "if-none-match")
+        not_modified = False
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, entry.etag)
+        else:
+            since = _http_date(header_value(request_headers, "if-modified-since"))
+            modified = _http_date(entry.last_modified)
+            not_modified = since is not None and modified is not None and modified <= since
+        if not_modified and entry.status_code == 200:
+            return CacheResult(304, [(name, value) for name, value in headers if name.lower() in NOT_MODIFIED_HEADERS],
+                               b"", cache_status)
+        return CacheResult(entry.status_code, headers, entry.body, cache_status)
+
+    async def _refresh(self, method: str, url: str, request_headers: Headers, fetch: Fetch,
+                       entry: Optional[CachedResponse], default_ttl: Optional[int],
+                       authenticated: bool = False) -> Tuple[Optional[CachedResponse], CacheResult]:
+        """Fetch from upstream, conditionally when there is a stored entry, and store the outcome"""
+        conditional: Dict[str, str] = {}
+        if entry is not None:
+            if entry.etag:
+                conditional["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                conditional["If-Modified-Since"] = entry.last_modified
+
+        status_code, headers, body = await fetch(conditional)
+
+        if status_code == 304 and entry is not None:
+            updates = {name.lower() for name, _ in headers if name.lower() not in NOT_UPDATED_BY_304}
+            merged = [(name, value) for name, value in entry.headers if name.lower() not in updates]
+            merged += [(name, value) for name, value in headers if name.lower() in updates]
+            refreshed = self.build_entry(
+                method, url, request_headers, entry.status_code, merged, entry.body, default_ttl, authenticated
+            )
+            if refreshed is not None:
+                await self.save(method, url, refreshed)
+                self._counters["revalidated"].inc()
+                return refreshed, CacheResult(
+                    refreshed.status_code, refreshed.headers, refreshed.body, "REVALIDATED"
+                )
+            return None, CacheResult(entry.status_code, merged, entry.body, "REVALIDATED")
+
+        fetched = self.build_entry(
+            method, url, request_headers, status_code, headers, body, default_ttl, authenticated
+        )
+        if fetched is not None:
+            await self.save(method, url, fetched)
+            return fetched, CacheResult(fetched.status_code, fetched.headers, fetched.body, "MISS")
+        return None, CacheResult(status_code, headers, body, "MISS")
+
+    async def _collapsed(self, key: str, refresh: Callable[[], Awaitable[Tuple[Optional[CachedResponse], Any]]]):
+        """Run ``refresh`` once per key at a time; returns (entry, result, leader)"""
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._counters["collapsed"].inc()
+            entry = await asyncio.shield(flight)
+            return entry, None, False
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        entry = None
+        try:
+            entry, result = await refresh()
+            return entry, result, True
+        finally:
+            # Followers only share stored responses; anything else they fetch themselves
+            flight.set_result(entry)
+            del self._flights[key]
+
+    def _revalidate_in_background(self, method: str, url: str, request_headers: Headers, fetch: Fetch,
+                                  entry: CachedResponse, default_ttl: Optional[int], authenticated: bool):
+        if entry.key in self._flights:
+            return
+
+        async def revalidate():
+            try:
+                await self._collapsed(entry.key, lambda: self._refresh(
+                    method, url, request_headers, fetch, entry, default_ttl, authenticated
+                ))
+            except Exception as e:
+                logger.error(f"Failed to revalidate cached response: {e}")
+
+        task = asyncio.create_task(revalidate())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def serve(self, method: str, url: str, request_headers: Headers, fetch: Fetch,
+                    default_ttl: Optional[int] = None, revalidate: bool = False,
+                    authenticated: bool = False) -> CacheResult:
+        """Answer a GET from the cache, revalidating or fetching through ``fetch`` as needed
+
+        With ``revalidate`` every request goes to the origin, conditionally
+        when a copy is stored. ``authenticated`` is passed to ``build_entry``. ``fetch`` must not depend on the caller's
+        request state beyond what it captured, since a stale hit revalidates
+        after the response is sent.
+        """
+        request_headers = list(request_headers)
+        if not self.cacheable_request(method, request_headers):
+            status_code, headers, body = await fetch({})
+            return CacheResult(status_code, headers, body, "BYPASS")
+
+        now = self.clock()
+        request_cc = parse_cache_control(header_value(request_headers, "cache-control"))
+        entry = await self.lookup(method, url, request_headers)
+        if entry is not None and not revalidate and "no-cache" not in request_cc:
+            if entry.is_fresh(now):
+                self._counters["hit"].inc()
+                return self.respond(entry, request_headers, "HIT")
+            if entry.can_serve_stale(now):
+                self._counters["stale"].inc()
+                self._revalidate_in_background(
+                    method, url, request_headers, fetch, entry, default_ttl, authenticated
+                )
+                return self.respond(entry, request_headers, "STALE")
+
+        self._counters["miss"].inc()
+        key = entry.key if entry is not None else self.primary_key(method, url)
+        shared, result, leader = await self._collapsed(key, lambda: self._refresh(
+            method, url, request_headers, fetch, entry, default_ttl, authenticated
+        ))
+        if leader:
+            if shared is not None:
+                return self.respond(shared, request_headers, result.cache_status)
+            return result
+        primary = self.primary_key(method, url)
+        if shared is not None and self.variant_key(primary, shared.vary, request_headers) == shared.key:
+            return self.respond(shared, request_headers, "HIT")
+        _, result = await self._refresh(method, url, request_headers, fetch, entry, default_ttl, authenticated)
+        return result
+
+    async def aclose(self):
+        tasks = list(self._background)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -35,19 +35,86 @@ class Settings(BaseSettings):
     RATE_LIMIT_GENERAL: str = "100/minute"
     RATE_LIMIT_PAYMENT: str = "10/minute"
     RATE_LIMIT_AUTH: str = "5/minute"
+    RATE_LIMIT_BULK: str = "5/minute"
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_MINUTES: int = 30
+    ADMIN_API_TOKEN: str = ""
+    # Revocation filter bucket shared by the session manager and the gateway; covers the longest access token
+    ACCESS_TOKEN_REVOCATION_BUCKET_SECONDS: int = 1800
     
     # Redis (optional)
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_ENABLED: bool = False
     
+    # Counters (views, likes, sales, ratings)
+    COUNTER_BACKEND: str = "memory"
+    COUNTER_FLUSH_INTERVAL_SECONDS: float = 5.0
+    COUNTER_SHARDS: int = 16
+    COUNTER_FLUSH_BATCH_SIZE: int = 500
+    
     # Monitoring
     ENABLE_METRICS: bool = True
     ENABLE_HEALTH_CHECK: bool = True
+    PROMETHEUS_MULTIPROC_DIR: str = ""
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    
+    # Tracing
+    TRACING_ENABLED: bool = True
+    TRACING_SAMPLE_RATE: float = 0.05
+    TRACING_EXPORTER: str = "memory"
+    OTLP_ENDPOINT: str = "http://localhost:4318"
+    TRACING_MAX_TRACES: int = 500
+    
+    # Profiling (off by default: samples of the event-loop thread mix concurrent requests)
+    SLOW_REQUEST_PROFILE_ENABLED: bool = False
+    SLOW_REQUEST_PROFILE_MS: float = 2000.0
+    SLOW_REQUEST_PROFILE_INTERVAL_MS: float = 10.0
+    SLOW_REQUEST_PROFILE_MAX: int = 20
+    SLOW_REQUEST_PROFILE_MIN_INTERVAL_SECONDS: float = 60.0
+    PROFILER_MAX_SECONDS: int = 60
+    
+    # AI Inference Batching
+    AI_BATCH_MAX_SIZE: int = 16
+    AI_BATCH_MAX_WAIT_MS: float = 5.0
+    AI_BATCH_MAX_QUEUE: int = 1024
+    AI_INFERENCE_THREADS: int = 0
+    
+    # AI Inference Result Cache
+    AI_CACHE_DIR: str = "cache/ai_results"
+    AI_CACHE_TTL_SECONDS: int = 604800
+    AI_CACHE_MAX_REDIS_BYTES: int = 65536
+    AI_CACHE_MAX_DISK_BYTES: int = 1073741824
+    
+    # Fraud Batch Scoring
+    FRAUD_SCORING_ENABLED: bool = True
+    FRAUD_FEATURE_BACKEND: str = "memory"
+    FRAUD_BATCH_CHUNK_SIZE: int = 2000
+    FRAUD_BATCH_STREAM_THRESHOLD: int = 5000
+    
+    # Business Intelligence Rollups
+    BI_ROLLUP_INTERVAL_SECONDS: int = 300
+    BI_ROLLUP_BATCH_SIZE: int = 5000
+    BI_REPORT_MAX_WORKERS: int = 8
+    BI_REPORT_TIMEOUT_SECONDS: float = 10.0
+    
+    # Monitoring Metric Storage
+    MONITORING_INGEST_BATCH_SIZE: int = 500
+    MONITORING_INGEST_FLUSH_MS: float = 1000.0
+    MONITORING_INGEST_MAX_PENDING: int = 50000
+    MONITORING_METRIC_CACHE_SIZE: int = 10000
+    MONITORING_RAW_RETENTION_HOURS: int = 24
+    MONITORING_RETENTION_1M_DAYS: int = 7
+    MONITORING_RETENTION_5M_DAYS: int = 30
+    MONITORING_RETENTION_1H_DAYS: int = 365
+    
+    # Fact Table Partitioning
+    PARTITION_PREMAKE_MONTHS: int = 3
+    PARTITION_ARCHIVE_AFTER_MONTHS: int = 12
+    PARTITION_ARCHIVE_DIR: str = "archive/partitions"
+    PARTITION_ARCHIVE_BATCH_SIZE: int = 5000
     
     @property
     def allowed_origins_list(self) -> List[str]:
@@ -0,0 +1,396 @@
+"""
+Denormalized counters for Soladia
+Accumulates view, like, sale and rating increments and writes them back in batched UPDATEs
+"""
+
+import atexit
+import logging
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Float, case, cast, event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import Product, User
+
+logger = logging.getLogger(__name__)
+
+# Counter columns per table; rating_sum is not a column, it feeds the User.rating mean
+COUNTER_COLUMNS = {
+    "products": ("views_count", "likes_count"),
+    "users": ("total_sales", "total_purchases", "rating_count", "rating_sum"),
+}
+TABLES = {"products": Product.__table__, "users": User.__table__}
+FLOAT_COUNTERS = {("users", "rating_sum")}
+
+# Session.info key: identities whose attributes already include pending deltas
+APPLIED = "counters_applied"
+REDIS_PREFIX = "counters"
+
+Key = Tuple[str, str]
+Deltas = Dict[Key, Dict[int, float]]
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_applied(session: Session):
+    # Expired rows reload database values, so pending increments must be applied again
+    session.info.pop(APPLIED, None)
+
+
+def _number(key: Key, value: Any):
+    return float(value) if key in FLOAT_COUNTERS else int(float(value))
+
+
+class InProcessCounterStore:
+    """Increments held in per-row-hashed shards so concurrent requests rarely share a lock"""
+
+    def __init__(self, shards: int = 16):
+        self._locks = [threading.Lock() for _ in range(max(1, shards))]
+        self._values: List[Dict[Tuple[str, str, int], float]] = [defaultdict(float) for _ in self._locks]
+
+    def _shard(self, table: str, row_id: int) -> int:
+        return hash((table, row_id)) % len(self._locks)
+
+    def incr(self, table: str, column: str, row_id: int, amount: float = 1):
+        shard = self._shard(table, row_id)
+        with self._locks[shard]:
+            self._values[shard][(table, column, row_id)] += amount
+
+    def incr_many(self, table: str, row_id: int, amounts: Dict[str, float]):
+        """Increment several counters of one row together; a row's counters share a shard"""
+        shard = self._shard(table, row_id)
+        with self._locks[shard]:
+            for column, amount in amounts.items():
+                self._values[shard][(table, column, row_id)] += amount
+
+    def pending(self, table: str, column: str, row_ids: Iterable[int]) -> Dict[int, float]:
+        return self.pending_columns(table, [column], row_ids)[column]
+
+    def pending_columns(self, table: str, columns: Iterable[str], row_ids: Iterable[int]) -> Dict[str, Dict[int, float]]:
+        """Each row's counters are read under one lock, so related counters stay consistent"""
+        columns = list(columns)
+        result: Dict[str, Dict[int, float]] = {column: {} for column in columns}
+        for row_id in row_ids:
+            shard = self._shard(table, row_id)
+            with self._locks[shard]:
+                amounts = [self._values[shard].get((table, column, row_id)) for column in columns]
+            for column, amount in zip(columns, amounts):
+                if amount:
+                    result[column][row_id] = amount
+        return result
+
+    def pending_all(self, table: str, column: str) -> Dict[int, float]:
+        result = {}
+        for shard, lock in enumerate(self._locks):
+            with lock:
+                result.update({key[2]: amount for key, amount in self._values[shard].items()
+                               if key[0] == table and key[1] == column and amount})
+        return result
+
+    def drain(self) -> Deltas:
+        """Take every pending increment, leaving empty shards for new writes"""
+        deltas: Deltas = defaultdict(dict)
+        for shard, lock in enumerate(self._locks):
+            with lock:
+                values, self._values[shard] = self._values[shard], defaultdict(float)
+            for (table, column, row_id), amount in values.items():
+                if amount:
+                    deltas[(table, column)][row_id] = amount
+        return dict(deltas)
+
+    def restore(self, deltas: Deltas):
+        for (table, row_id), amounts in _by_row(deltas).items():
+            self.incr_many(table, row_id, amounts)
+
+
+class RedisCounterStore:
+    """Increments kept in one Redis hash per counter (``HINCRBY``), shared by every worker"""
+
+    def __init__(self, client, prefix: str = REDIS_PREFIX):
+        self.redis = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCounterStore":
+        import redis
+        return cls(redis.from_url(url))
+
+    def _key(self, table: str, column: str) -> str:
+        return f"{self.prefix}:{table}:{column}"
+
+    def incr(self, table: str, column: str, row_id: int, amount: float = 1):
+        if (table, column) in FLOAT_COUNTERS:
+            self.redis.hincrbyfloat(self._key(table, column), row_id, amount)
+        else:
+            self.redis.hincrby(self._key(table, column), row_id, int(amount))
+
+    def _queue_incr(self, pipe, table: str, column: str, row_id: int, amount: float):
+        if (table, column) in FLOAT_COUNTERS:
+            pipe.hincrbyfloat(self._key(table, column), row_id, amount)
+        else:
+            pipe.hincrby(self._key(table, column), row_id, int(amount))
+
+    def incr_many(self, table: str, row_id: int, amounts: Dict[str, float]):
+        """Increment several counters of one row in one MULTI, so a drain sees all or none"""
+        pipe = self.redis.pipeline(transaction=True)
+        for column, amount in amounts.items():
+            self._queue_incr(pipe, table, column, row_id, amount)
+        pipe.execute()
+
+    def pending(self, table: str, column: str, row_ids: Iterable[int]) -> Dict[int, float]:
+        row_ids = list(row_ids)
+        if not row_ids:
+            return {}
+        values = self.redis.hmget(self._key(table, column), row_ids)
+        return {
+            row_id: _number((table, column), value)
+            for row_id, value in zip(row_ids, values) if value is not None
+        }
+
+    def pending_columns(self, table: str, columns: Iterable[str], row_ids: Iterable[int]) -> Dict[str, Dict[int, float]]:
+        """One ``HMGET`` per counter in a single MULTI round trip"""
+        columns, row_ids = list(columns), list(row_ids)
+        if not row_ids:
+            return {column: {} for column in columns}
+        pipe = self.redis.pipeline(transaction=True)
+        for column in columns:
+            pipe.hmget(self._key(table, column), row_ids)
+        return {
+            column: {
+                row_id: _number((table, column), value)
+                for row_id, value in zip(row_ids, values) if value is not None
+            }
+            for column, values in zip(columns, pipe.execute())
+        }
+
+    def pending_all(self, table: str, column: str) -> Dict[int, float]:
+        return {
+            int(row_id): _number((table, column), value)
+            for row_id, value in self.redis.hgetall(self._key(table, column)).items()
+        }
+
+    def drain(self) -> Deltas:
+        """Rename each hash aside and read it, all in one round trip
+
+        New increments land in a fresh hash while the renamed one is read, so
+        nothing written during a flush is lost or counted twice. The renamed
+        key is unique per flush, so workers flushing at once never collide.
+        """
+        token = uuid.uuid4().hex
+        keys = [(table, column) for table, columns in COUNTER_COLUMNS.items() for column in columns]
+        pipe = self.redis.pipeline(transaction=True)
+        for table, column in keys:
+            source = self._key(table, column)
+            pipe.rename(source, f"{source}:flushing:{token}")
+            pipe.hgetall(f"{source}:flushing:{token}")
+            pipe.delete(f"{source}:flushing:{token}")
+        results = pipe.execute(raise_on_error=False)
+
+        deltas: Deltas = {}
+        for i, key in enumerate(keys):
+            values = results[i * 3 + 1]
+            if isinstance(values, dict) and values:
+                deltas[key] = {int(row_id): _number(key, value) for row_id, value in values.items()}
+        return deltas
+
+    def restore(self, deltas: Deltas):
+        pipe = self.redis.pipeline(transaction=True)
+        for (table, column), rows in deltas.items():
+            for row_id, amount in rows.items():
+                self._queue_incr(pipe, table, column, row_id, amount)
+        pipe.execute()
+
+
+def _by_row(deltas: Deltas) -> Dict[Tuple[str, int], Dict[str, float]]:
+    rows: Dict[Tuple[str, int], Dict[str, float]] = defaultdict(dict)
+    for (table, column), amounts in deltas.items():
+        for row_id, amount in amounts.items():
+            rows[(table, row_id)][column] = amount
+    return rows
+
+
+def _chunks(row_ids: List[int], size: int):
+    for i in range(0, len(row_ids), size):
+        yield row_ids[i:i + size]
+
+
+def counter_updates(table_name: str, deltas: Dict[str, Dict[int, float]], row_ids: List[int]):
+    """``UPDATE table SET col = col + CASE id WHEN ... END, ... WHERE id IN (...)`` for one chunk"""
+    table = TABLES[table_name]
+    values = {}
+    for column, rows in deltas.items():
+        chunk = {row_id: rows[row_id] for row_id in row_ids if row_id in rows}
+        if column == "rating_sum" or not chunk:
+            continue
+        values[column] = func.coalesce(table.c[column], 0) + case(chunk, value=table.c.id, else_=0)
+
+    counts, sums = deltas.get("rating_count", {}), deltas.get("rating_sum", {})
+    rated = [row_id for row_id in row_ids if row_id in counts or row_id in sums]
+    if table_name == "users" and rated:
+        # Running mean: (rating * n + sum of new ratings) / (n + new ratings), using pre-update values.
+        # rating * n is always the sum of the ratings applied so far, so a sum flushed apart
+        # from its count still lands in the mean once both are in
+        count = func.coalesce(table.c.rating_count, 0)
+        added = {row_id: counts.get(row_id, 0) for row_id in rated}
+        added_sum = {row_id: sums.get(row_id, 0.0) for row_id in rated}
+        new_count = count + case(added, value=table.c.id, else_=0)
+        values["rating"] = case(
+            (new_count > 0,
+             (func.coalesce(table.c.rating, 0.0) * count + case(added_sum, value=table.c.id, else_=0.0))
+             / cast(new_count, Float)),
+            else_=table.c.rating
+        )
+    return table.update().where(table.c.id.in_(row_ids)).values(values)
+
+
+class CounterService:
+    """Write-behind counters: requests record increments, a background thread flushes them
+
+    Reads merge the pending increments into rows loaded from the database, so
+    listings and sort orders reflect views that have not been flushed yet.
+    """
+
+    def __init__(self, store=None, batch_size: int = 500):
+        self.store = store or InProcessCounterStore()
+        self.batch_size = batch_size
+        self.engine: Optional[Engine] = None
+        self._in_flight: Deltas = {}
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.interval = 5.0
+
+    # Recording
+
+    def record_view(self, product_id: int):
+        self.store.incr("products", "views_count", product_id)
+
+    def record_like(self, product_id: int, amount: int = 1):
+        self.store.incr("products", "likes_count", product_id, amount)
+
+    def record_sale(self, seller_id: int, buyer_id: int, amount: int = 1):
+        self.store.incr("users", "total_sales", seller_id, amount)
+        self.store.incr("users", "total_purchases", buyer_id, amount)
+
+    def record_rating(self, user_id: int, rating: float):
+        # Sum and count move together so no flush or read sees one without the other
+        self.store.incr_many("users", user_id, {"rating_sum": float(rating), "rating_count": 1})
+
+    # Reading
+
+    def pending(self, table: str, columns: Iterable[str], row_ids: Iterable[int]) -> Dict[str, Dict[int, float]]:
+        """Unflushed increments per counter and row, including a flush that has not committed yet"""
+        row_ids = list(row_ids)
+        result = self.store.pending_columns(table, columns, row_ids)
+        for column, rows in result.items():
+            in_flight = self._in_flight.get((table, column), {})
+            for row_id in row_ids:
+                if row_id in in_flight:
+                    rows[row_id] = rows.get(row_id, 0) + in_flight[row_id]
+        return result
+
+    def top_pending(self, table: str, column: str, limit: int) -> List[int]:
+        """Rows with the largest unflushed increments"""
+        pending = self.store.pending_all(table, column)
+        for row_id, amount in self._in_flight.get((table, column), {}).items():
+            pending[row_id] = pending.get(row_id, 0) + amount
+        return sorted(pending, key=pending.get, reverse=True)[:limit]
+
+    def apply_pending(self, db: Session, objects: Iterable[Any]):
+        """Add unflushed increments to loaded Product/User rows without marking them dirty"""
+        applied = db.info.setdefault(APPLIED, set())
+        by_table: Dict[str, List[Any]] = defaultdict(list)
+        for obj in objects:
+            identity = db.identity_key(instance=obj) if obj in db else None
+            if identity is not None and identity in applied:
+                continue
+            if identity is not None:
+                applied.add(identity)
+            by_table[obj.__table__.name].append(obj)
+
+        for table, rows in by_table.items():
+            pending = self.pending(table, COUNTER_COLUMNS[table], [row.id for row in rows])
+            for row in rows:
+                if table == "users" and (row.id in pending["rating_count"] or row.id in pending["rating_sum"]):
+                    count = row.rating_count or 0
+                    new_count = count + pending["rating_count"].get(row.id, 0)
+                    if new_count > 0:
+                        total = (row.rating or 0.0) * count + pending["rating_sum"].get(row.id, 0.0)
+                        set_committed_value(row, "rating", total / new_count)
+                for column in COUNTER_COLUMNS[table]:
+                    amount = pending[column].get(row.id)
+                    if not amount or column == "rating_sum":
+                        continue
+                    set_committed_value(row, column, (getattr(row, column) or 0) + amount)
+
+    # Flushing
+
+    def flush(self, bind: Optional[Engine] = None) -> int:
+        """Write pending increments in batched UPDATEs; returns the number of rows updated"""
+        bind = bind or self.engine
+        if bind is None:
+            return 0
+        with self._flush_lock:
+            deltas = self.store.drain()
+            if not deltas:
+                return 0
+            self._in_flight = deltas
+            try:
+                updated = 0
+                with bind.begin() as conn:
+                    for table in COUNTER_COLUMNS:
+                        columns = {column: rows for (name, column), rows in deltas.items() if name == table}
+                        row_ids = sorted({row_id for rows in columns.values() for row_id in rows})
+                        for chunk in _chunks(row_ids, self.batch_size):
+                            updated += conn.execute(counter_updates(table, columns, chunk)).rowcount
+                return updated
+            except Exception as e:
+                logger.error(f"Failed to flush counters: {e}")
+                self.store.restore(deltas)
+                raise
+            finally:
+                self._in_flight = {}
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def start(self, engine: Engine, interval: float = 5.0):
+        self.engine = engine
+        self.interval = interval
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="counter-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write whatever is still pending"""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+
+counters = CounterService()
+
+
+def configure_counters(engine: Engine, backend: str = "memory", redis_url: Optional[str] = None,
+                       interval: float = 5.0, shards: int = 16, batch_size: int = 500) -> CounterService:
+    """Pick the counter store and start the background flusher"""
+    if backend == "redis" and redis_url:
+        counters.store = RedisCounterStore.from_url(redis_url)
+    else:
+        counters.store = InProcessCounterStore(shards)
+    counters.batch_size = batch_size
+    counters.start(engine, interval)
+    atexit.register(counters.stop)
+    return counters
@@ -1,8 +1,13 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import atexit
 import os
 
+from database_pool import PoolController, TimedQueuePool
+from database_routing import DatabaseRouter
+
 # Database URL - using SQLite for development, can be changed to PostgreSQL for production
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./soladia.db")
 
@@ -13,19 +18,44 @@ POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # 1 hour
 POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
 ECHO_POOL = os.getenv("DB_ECHO_POOL", "False").lower() == "true"
 
+# Compiled-statement cache entries, and executions before psycopg 3 prepares a statement server-side
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1000"))
+PREPARE_THRESHOLD = int(os.getenv("DB_PREPARE_THRESHOLD", "5"))
+
+# Adaptive pool sizing from checkout wait and utilization (queue pools only)
+POOL_ADAPTIVE = os.getenv("DB_POOL_ADAPTIVE", "True").lower() == "true"
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "5"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "50"))
+POOL_MAX_WAIT_MS = float(os.getenv("DB_POOL_MAX_WAIT_MS", "50"))
+POOL_CONTROL_INTERVAL = float(os.getenv("DB_POOL_CONTROL_INTERVAL_SECONDS", "30"))
+
+# Read replicas (comma-separated URLs); read-only service methods are routed to them
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_STRATEGY = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("DB_REPLICA_HEALTH_CHECK_SECONDS", "10"))
+
 # Create engine with connection pooling
 # Note: SQLite doesn't support connection pooling in the same way as PostgreSQL
 # For production, use PostgreSQL with these settings
-if "sqlite" in DATABASE_URL:
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        echo_pool=ECHO_POOL
-    )
-else:
+def _create_engine(url: str):
+    if "sqlite" in url:
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            query_cache_size=STATEMENT_CACHE_SIZE,
+            echo_pool=ECHO_POOL
+        )
+    # Hot lookups are prepared once per connection instead of parsed per call
+    connect_args = {}
+    if make_url(url).drivername == "postgresql+psycopg":
+        connect_args["prepare_threshold"] = PREPARE_THRESHOLD
     # PostgreSQL/MySQL with proper connection pooling
-    engine = create_engine(
-        DATABASE_URL,
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        query_cache_size=STATEMENT_CACHE_SIZE,
+        poolclass=TimedQueuePool,
         pool_size=POOL_SIZE,
         max_overflow=MAX_OVERFLOW,
         pool_recycle=POOL_RECYCLE,
@@ -33,7 +63,40 @@ else:
         echo_pool=ECHO_POOL
     )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = _create_engine(DATABASE_URL)
+
+if DATABASE_REPLICA_URLS:
+    db_router = DatabaseRouter(
+        engine,
+        DATABASE_REPLICA_URLS,
+        strategy=DB_REPLICA_STRATEGY,
+        max_lag_seconds=DB_REPLICA_MAX_LAG_SECONDS,
+        health_check_interval=DB_REPLICA_HEALTH_CHECK_SECONDS,
+        engine_factory=_create_engine
+    )
+    SessionLocal = db_router.session_factory(autocommit=False, autoflush=False)
+    db_router.start_health_checks()
+    atexit.register(db_router.stop_health_checks)
+else:
+    db_router = None
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _control_pool(target, name: str):
+    if POOL_ADAPTIVE and isinstance(target.pool, TimedQueuePool):
+        PoolController(
+            target,
+            name=name,
+            min_size=min(POOL_MIN_SIZE, POOL_SIZE),
+            max_size=max(POOL_MAX_SIZE, POOL_SIZE),
+            max_wait_ms=POOL_MAX_WAIT_MS,
+            interval=POOL_CONTROL_INTERVAL
+        )
+
+
+_control_pool(engine, "primary")
+for replica in (db_router.replicas if db_router else []):
+    _control_pool(replica.engine, replica.name)
 
 Base = declarative_base()
 
@@ -22,6 +22,9 @@ from psycopg2 import pool
 import redis
 import json
 
+from database_pool import PoolController, TimedQueuePool
+from monitoring.tracing import TracedRedis
+
 logger = logging.getLogger(__name__)
 
 class PoolStatus(Enum):
@@ -56,7 +59,9 @@ class AdvancedConnectionPool:
         pool_recycle: int = 3600,
         pool_pre_ping: bool = True,
         pool_timeout: int = 30,
-        redis_url: Optional[str] = None
+        redis_url: Optional[str] = None,
+        min_pool_size: int = 10,
+        max_pool_size: int = 50
     ):
         self.database_url = database_url
         self.pool_size = pool_size
@@ -64,12 +69,15 @@ class AdvancedConnectionPool:
         self.pool_recycle = pool_recycle
         self.pool_pre_ping = pool_pre_ping
         self.pool_timeout = pool_timeout
+        self.min_pool_size = min_pool_size
+        self.max_pool_size = max_pool_size
+        self.controller: Optional[PoolController] = None
         
         # Initialize Redis for caching
         self.redis_client = None
         if redis_url:
             try:
-                self.redis_client = redis.from_url(redis_url)
+                self.redis_client = TracedRedis(redis.from_url(redis_url))
                 self.redis_client.ping()
             except Exception as e:
                 logger.warning(f"Redis connection failed: {e}")
@@ -90,10 +98,8 @@ class AdvancedConnectionPool:
             status=PoolStatus.HEALTHY
         )
         
-        # Performance tracking
+        # Performance tracking; timings live in the controller's fixed-bucket histograms
         self.performance_data = {
-            'query_times': [],
-            'connection_times': [],
             'error_count': 0,
             'success_count': 0
         }
@@ -115,6 +121,16 @@ class AdvancedConnectionPool:
             else:
                 self._initialize_generic_pool()
             
+            # Adaptive sizing for queue pools (SQLite uses a StaticPool)
+            if isinstance(self.engine.pool, QueuePool):
+                self.controller = PoolController(
+                    self.engine,
+                    name="advanced",
+                    min_size=min(self.min_pool_size, self.pool_size),
+                    max_size=max(self.max_pool_size, self.pool_size),
+                    listen=False
+                )
+            
             # Set up event listeners
             self._setup_event_listeners()
             
@@ -130,7 +146,7 @@ class AdvancedConnectionPool:
             # Create engine with optimized settings for PostgreSQL
             self.engine = create_engine(
                 self.database_url,
-                poolclass=QueuePool,
+                poolclass=TimedQueuePool,
                 pool_size=self.pool_size,
                 max_overflow=self.max_overflow,
                 pool_recycle=self.pool_recycle,
@@ -190,7 +206,7 @@ class AdvancedConnectionPool:
         try:
             self.engine = create_engine(
                 self.database_url,
-                poolclass=QueuePool,
+                poolclass=TimedQueuePool,
                 pool_size=self.pool_size,
                 max_overflow=self.max_overflow,
                 pool_recycle=self.pool_recycle,
@@ -218,13 +234,16 @@ class AdvancedConnectionPool:
             def receive_checkout(dbapi_connection, connection_record, connection_proxy):
                 self.metrics.checked_out_connections += 1
                 self.metrics.last_activity = datetime.now()
-                self._track_connection_time()
+                if self.controller:
+                    self.controller.on_checkout(dbapi_connection, connection_record, connection_proxy)
             
             # Connection checkin event
             @event.listens_for(self.engine, "checkin")
             def receive_checkin(dbapi_connection, connection_record):
                 self.metrics.checked_in_connections += 1
                 self.metrics.last_activity = datetime.now()
+                if self.controller:
+                    self.controller.on_checkin(dbapi_connection, connection_record)
             
             # Connection invalidated event
             @event.listens_for(self.engine, "invalidate")
@@ -232,40 +251,17 @@ class AdvancedConnectionPool:
                 self.metrics.invalid_connections += 1
                 logger.warning(f"Connection invalidated: {exception}")
             
-            # Connection pool overflow event
-            @event.listens_for(self.engine, "overflow")
-            def receive_overflow(dbapi_connection, connection_record, connection_proxy):
-                self.metrics.overflow_connections += 1
-                logger.warning("Connection pool overflow detected")
-            
             logger.info("Database event listeners configured")
             
         except Exception as e:
             logger.error(f"Failed to setup event listeners: {e}")
     
-    def _track_connection_time(self):
-        """Track connection acquisition time"""
-        start_time = time.time()
-        
-        def track_time():
-            end_time = time.time()
-            connection_time = end_time - start_time
-            self.performance_data['connection_times'].append(connection_time)
-            
-            # Keep only last 1000 measurements
-            if len(self.performance_data['connection_times']) > 1000:
-                self.performance_data['connection_times'] = self.performance_data['connection_times'][-1000:]
-        
-        # Schedule tracking
-        threading.Timer(0, track_time).start()
-    
     def _start_monitoring(self):
         """Start connection pool monitoring"""
         try:
             # Start background monitoring task
             asyncio.create_task(self._monitor_pool_health())
             asyncio.create_task(self._optimize_pool_performance())
-            asyncio.create_task(self._cleanup_old_connections())
             
             logger.info("Connection pool monitoring started")
             
@@ -366,57 +362,48 @@ class AdvancedConnectionPool:
     async def _analyze_performance(self):
         """Analyze connection pool performance"""
         try:
-            # Calculate average connection time
-            if self.performance_data['connection_times']:
-                avg_connection_time = sum(self.performance_data['connection_times']) / len(self.performance_data['connection_times'])
+            # Checkout wait percentiles
+            if self.controller:
+                wait = self.controller.status()['checkout_wait']
                 
                 # Log performance metrics
-                logger.info(f"Average connection time: {avg_connection_time:.3f}s")
+                logger.info(f"Checkout wait p50={wait['p50_ms']}ms p95={wait['p95_ms']}ms")
                 
                 # Check for performance issues
-                if avg_connection_time > 1.0:  # More than 1 second
+                if wait['p95_ms'] > 1000:  # More than 1 second
                     logger.warning("High connection acquisition time detected")
+            
+            # Calculate success rate
+            total_operations = self.performance_data['success_count'] + self.performance_data['error_count']
+            if total_operations > 0:
+                success_rate = self.performance_data['success_count'] / total_operations
+                logger.info(f"Connection success rate: {success_rate:.2%}")
                 
-                # Calculate success rate
-                total_operations = self.performance_data['success_count'] + self.performance_data['error_count']
-                if total_operations > 0:
-                    success_rate = self.performance_data['success_count'] / total_operations
-                    logger.info(f"Connection success rate: {success_rate:.2%}")
-                    
-                    if success_rate < 0.95:  # Less than 95% success rate
-                        logger.warning("Low connection success rate detected")
+                if success_rate < 0.95:  # Less than 95% success rate
+                    logger.warning("Low connection success rate detected")
                 
         except Exception as e:
             logger.error(f"Performance analysis failed: {e}")
     
     async def _adjust_pool_size(self):
-        """Dynamically adjust pool size based on usage"""
+        """Dynamically adjust pool size based on checkout wait and utilization"""
         try:
-            # Get current utilization
-            utilization = self.metrics.active_connections / (self.metrics.total_connections + self.metrics.overflow_connections)
+            if not self.controller:
+                return
             
-            # Adjust pool size based on utilization
-            if utilization > 0.8 and self.pool_size < 50:
-                # Increase pool size
-                new_pool_size = min(self.pool_size + 5, 50)
-                logger.info(f"Increasing pool size from {self.pool_size} to {new_pool_size}")
-                self.pool_size = new_pool_size
-                
-            elif utilization < 0.3 and self.pool_size > 10:
-                # Decrease pool size
-                new_pool_size = max(self.pool_size - 5, 10)
-                logger.info(f"Decreasing pool size from {self.pool_size} to {new_pool_size}")
-                self.pool_size = new_pool_size
+            # The controller swaps in a resized pool and drains the old one
+            self.controller.tick()
+            self.pool_size = self.engine.pool.size()
                 
         except Exception as e:
             logger.error(f"Pool size adjustment failed: {e}")
     
     async def _cleanup_old_connections(self):
-        """Clean up old and idle connections"""
+        """Close idle connections left in pools retired by a resize"""
         try:
-            # Force pool to recycle old connections
-            self.engine.pool.recreate()
-            logger.info("Connection pool recreated")
+            # Warm connections in the live pool are kept; pool_recycle retires stale ones
+            if self.controller:
+                self.controller.drain()
             
         except Exception as e:
             logger.error(f"Connection cleanup failed: {e}")
@@ -451,7 +438,6 @@ class AdvancedConnectionPool:
     async def get_connection(self):
         """Get a database connection from the pool"""
         connection = None
-        start_time = time.time()
         
         try:
             # Get connection from pool
@@ -468,10 +454,6 @@ class AdvancedConnectionPool:
         finally:
             if connection:
                 connection.close()
-            
-            # Track connection time
-            connection_time = time.time() - start_time
-            self.performance_data['connection_times'].append(connection_time)
     
     def get_session(self) -> Session:
         """Get a database session from the pool"""
@@ -517,7 +499,12 @@ class AdvancedConnectionPool:
     
     def get_performance_data(self) -> Dict[str, Any]:
         """Get performance data"""
-        return self.performance_data.copy()
+        data = self.performance_data.copy()
+        if self.controller:
+            controller_status = self.controller.status()
+            data['checkout_wait'] = controller_status['checkout_wait']
+            data['connection_hold'] = controller_status['connection_hold']
+        return data
     
     async def health_check(self) -> Dict[str, Any]:
         """Perform a comprehensive health check"""
@@ -547,6 +534,8 @@ class AdvancedConnectionPool:
     def close(self):
         """Close the connection pool"""
         try:
+            if self.controller:
+                self.controller.close()
             if hasattr(self, 'engine'):
                 self.engine.dispose()
             logger.info("Connection pool closed")
@@ -571,7 +560,9 @@ def initialize_connection_pool(
     pool_recycle: int = 3600,
     pool_pre_ping: bool = True,
     pool_timeout: int = 30,
-    redis_url: Optional[str] = None
+    redis_url: Optional[str] = None,
+    min_pool_size: int = 10,
+    max_pool_size: int = 50
 ) -> AdvancedConnectionPool:
     """Initialize the global connection pool"""
     global _connection_pool
@@ -582,6 +573,8 @@ def initialize_connection_pool(
         pool_recycle=pool_recycle,
         pool_pre_ping=pool_pre_ping,
         pool_timeout=pool_timeout,
-        redis_url=redis_url
+        redis_url=redis_url,
+        min_pool_size=min_pool_size,
+        max_pool_size=max_pool_size
     )
     return _connection_pool
@@ -0,0 +1,245 @@
+"""
+Adaptive connection-pool control for Soladia database engines
+Checkout wait and utilization drive graceful QueuePool resizes
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util import queue as sqla_queue
+
+from monitoring.instrumentation import (
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_CONNECTION_HOLD,
+    histogram_quantile
+)
+
+logger = logging.getLogger(__name__)
+
+# Controllers by pool name, for the /internal/db-pool endpoint
+pool_controllers: Dict[str, "PoolController"] = {}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection
+
+    The wait is stashed on the connection record and picked up by the
+    ``checkout`` event listener, which fires once the connection is handed out.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        record = super()._do_get()
+        record.info["checkout_wait"] = time.perf_counter() - start
+        return record
+
+
+def _close_idle(pool: QueuePool):
+    """Close a retired pool's idle connections, keeping its checked-out count right"""
+    while True:
+        try:
+            record = pool._pool.get(False)
+        except sqla_queue.Empty:
+            break
+        record.close()
+        pool._dec_overflow()
+
+
+class PoolController:
+    """Grows or shrinks an engine's QueuePool from checkout wait and utilization
+
+    Every ``interval`` seconds (checked lazily on checkout, or via ``tick``)
+    the controller looks at the window since the last tick: peak checked-out
+    connections against the base pool size, and the p95 checkout wait. A
+    resize swaps a new pool into the engine, like ``Engine.dispose(close=False)``
+    does; the old pool stops handing out connections, closes its idle ones and
+    is dropped once everything checked out from it has come back.
+    """
+
+    def __init__(self, engine: Engine, name: str = "primary", min_size: int = 5, max_size: int = 50,
+                 step: int = 5, high_utilization: float = 0.8, low_utilization: float = 0.3,
+                 max_wait_ms: float = 50.0, interval: float = 30.0, cooldown: float = 120.0,
+                 listen: bool = True, clock: Callable[[], float] = time.monotonic):
+        if not isinstance(engine.pool, QueuePool):
+            raise ValueError("Adaptive sizing needs a QueuePool")
+        self.engine = engine
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.step = step
+        self.high_utilization = high_utilization
+        self.low_utilization = low_utilization
+        self.max_wait_ms = max_wait_ms
+        self.interval = interval
+        self.cooldown = cooldown
+        self.clock = clock
+
+        self.draining: List[QueuePool] = []
+        self.resizes = 0
+        self.last_resize: Optional[Dict[str, Any]] = None
+        self.last_window: Dict[str, Any] = {}
+        self._last_resize_at: Optional[float] = None
+        self._wait = DB_POOL_CHECKOUT_WAIT.labels(name)
+        self._hold = DB_POOL_CONNECTION_HOLD.labels(name)
+        self._window_start = self._wait.values()
+        self._peak = self.in_use()
+        self._next_tick = clock() + interval
+        self._lock = threading.Lock()
+
+        self._listening = listen
+        if listen:
+            event.listen(engine, "checkout", self.on_checkout)
+            event.listen(engine, "checkin", self.on_checkin)
+        pool_controllers[name] = self
+
+    @property
+    def pool(self) -> QueuePool:
+        return self.engine.pool
+
+    def in_use(self) -> int:
+        return self.pool.checkedout() + sum(pool.checkedout() for pool in self.draining)
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        wait = connection_record.info.pop("checkout_wait", None)
+        if wait is not None:
+            self._wait.observe(wait)
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+        in_use = self.in_use()
+        if in_use > self._peak:
+            self._peak = in_use
+        if self.clock() >= self._next_tick:
+            self.tick()
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            self._hold.observe(time.perf_counter() - started)
+
+    def _target_size(self, size: int, utilization: float, wait_p95_ms: float) -> int:
+        if wait_p95_ms > self.max_wait_ms or utilization >= self.high_utilization:
+            return min(size + self.step, self.max_size)
+        if utilization < self.low_utilization:
+            return max(size - self.step, self.min_size)
+        return size
+
+    def tick(self) -> Optional[int]:
+        """Drain retired pools and apply one control step; returns the new size if resized"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            now = self.clock()
+            self._next_tick = now + self.interval
+            self.drain()
+
+            counts = self._wait.values()
+            window = [current - start for current, start in zip(counts[:-1], self._window_start[:-1])]
+            self._window_start = counts
+            size = self.pool.size()
+            utilization = self._peak / max(size, 1)
+            wait_p95_ms = histogram_quantile(DB_POOL_CHECKOUT_WAIT.buckets, window, 0.95) * 1000
+            self._peak = self.in_use()
+            self.last_window = {
+                "peak_utilization": round(utilization, 3),
+                "checkouts": int(sum(window)),
+                "wait_p95_ms": round(wait_p95_ms, 3)
+            }
+
+            target = self._target_size(size, utilization, wait_p95_ms)
+            if target == size:
+                return None
+            if self._last_resize_at is not None and now - self._last_resize_at < self.cooldown:
+                return None
+            self.resize(target, reason=self.last_window)
+            return target
+        except Exception as e:
+            logger.error(f"Failed to adjust pool {self.name}: {e}")
+            return None
+        finally:
+            self._lock.release()
+
+    def resize(self, pool_size: int, reason: Optional[Dict[str, Any]] = None):
+        """Swap in a pool of ``pool_size`` and retire the current one"""
+        old = self.pool
+        if pool_size == old.size():
+            return
+        self.engine.pool = TimedQueuePool(
+            old._creator,
+            pool_size=pool_size,
+            max_overflow=old._max_overflow,
+            pre_ping=old._pre_ping,
+            use_lifo=old._pool.use_lifo,
+            timeout=old._timeout,
+            recycle=old._recycle,
+            echo=old.echo,
+            logging_name=old._orig_logging_name,
+            reset_on_return=old._reset_on_return,
+            _dispatch=old.dispatch,
+            dialect=old._dialect
+        )
+        self.draining.append(old)
+        self.drain()
+
+        self.resizes += 1
+        self._last_resize_at = self.clock()
+        self.last_resize = {
+            "from": old.size(),
+            "to": pool_size,
+            "at": datetime.utcnow().isoformat(),
+            "window": reason or {}
+        }
+        logger.info(f"Resized pool {self.name} from {old.size()} to {pool_size}")
+
+    def drain(self):
+        """Close idle connections of retired pools and forget the empty ones"""
+        still_draining = []
+        for pool in self.draining:
+            _close_idle(pool)
+            if pool.checkedout() > 0:
+                still_draining.append(pool)
+        self.draining = still_draining
+
+    @staticmethod
+    def _quantiles(child, buckets) -> Dict[str, float]:
+        counts = child.values()[:-1]
+        return {
+            "count": int(sum(counts)),
+            "p50_ms": round(histogram_quantile(buckets, counts, 0.5) * 1000, 3),
+            "p95_ms": round(histogram_quantile(buckets, counts, 0.95) * 1000, 3),
+            "p99_ms": round(histogram_quantile(buckets, counts, 0.99) * 1000, 3)
+        }
+
+    def status(self) -> Dict[str, Any]:
+        pool = self.pool
+        return {
+            "name": self.name,
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "draining_pools": len(self.draining),
+            "draining_checked_out": sum(retired.checkedout() for retired in self.draining),
+            "bounds": {"min": self.min_size, "max": self.max_size, "step": self.step},
+            "checkout_wait": self._quantiles(self._wait, DB_POOL_CHECKOUT_WAIT.buckets),
+            "connection_hold": self._quantiles(self._hold, DB_POOL_CONNECTION_HOLD.buckets),
+            "last_window": self.last_window,
+            "resizes": self.resizes,
+            "last_resize": self.last_resize
+        }
+
+    def close(self):
+        """Stop controlling the engine; the current pool stays in place"""
+        if self._listening:
+            event.remove(self.engine, "checkout", self.on_checkout)
+            event.remove(self.engine, "checkin", self.on_checkin)
+            self._listening = False
+        self.drain()
+        if pool_controllers.get(self.name) is self:
+            del pool_controllers[self.name]
@@ -0,0 +1,227 @@
+"""
+Read-replica routing for Soladia database sessions
+Read-only service methods are served by healthy replicas; any write pins the session to the primary
+"""
+
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+
+
+def read_only(func):
+    """Mark a service method as safe to serve from a replica"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+class RoutingStrategy(str, Enum):
+    ROUND_ROBIN = "round_robin"
+    LEAST_CONNECTIONS = "least_connections"
+
+
+@dataclass
+class DatabaseNode:
+    name: str
+    engine: Engine
+    healthy: bool = True
+    lag_seconds: float = 0.0
+    checked_at: Optional[float] = None
+    in_use: int = 0
+    last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "in_use": self.in_use,
+            "last_error": self.last_error
+        }
+
+
+def replica_lag(conn: Connection) -> float:
+    """Replication lag in seconds; 0 for a primary or a backend without replication"""
+    if conn.dialect.name != "postgresql":
+        return 0.0
+    value = conn.execute(text(
+        "SELECT CASE WHEN pg_is_in_recovery() "
+        "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+    )).scalar()
+    return float(value or 0.0)
+
+
+def _default_engine(url: str) -> Engine:
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_engine(url, pool_pre_ping=True)
+
+
+class DatabaseRouter:
+    """Primary plus N replicas with health checks and a replication-lag bound
+
+    Replicas are probed every ``health_check_interval`` by a background
+    thread (``start_health_checks``); choosing a reader only reads the last
+    results. A replica that has not been probed, or whose last probe is older
+    than three intervals, is not used.
+    """
+
+    def __init__(self, primary: Union[str, Engine], replicas: Sequence[Union[str, Engine]] = (),
+                 strategy: Union[str, RoutingStrategy] = RoutingStrategy.ROUND_ROBIN,
+                 max_lag_seconds: float = 5.0, health_check_interval: float = 10.0,
+                 lag_probe: Callable[[Connection], float] = replica_lag,
+                 engine_factory: Callable[[str], Engine] = _default_engine,
+                 clock: Callable[[], float] = time.monotonic):
+        def as_engine(target):
+            return target if isinstance(target, Engine) else engine_factory(target)
+
+        self.primary = DatabaseNode("primary", as_engine(primary))
+        self.replicas = [DatabaseNode(f"replica-{i}", as_engine(url)) for i, url in enumerate(replicas)]
+        self.strategy = RoutingStrategy(strategy)
+        self.max_lag_seconds = max_lag_seconds
+        self.health_check_interval = health_check_interval
+        self.lag_probe = lag_probe
+        self.clock = clock
+        self._round_robin = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        for node in self.replicas:
+            self._track_connections(node)
+
+    @staticmethod
+    def _track_connections(node: DatabaseNode):
+        @event.listens_for(node.engine, "checkout")
+        def _checkout(dbapi_connection, connection_record, connection_proxy):
+            node.in_use += 1
+
+        @event.listens_for(node.engine, "checkin")
+        def _checkin(dbapi_connection, connection_record):
+            node.in_use = max(0, node.in_use - 1)
+
+    def check_health(self, force: bool = False):
+        """Probe replicas whose last check is older than the interval"""
+        now = self.clock()
+        for node in self.replicas:
+            if not force and node.checked_at is not None and now - node.checked_at < self.health_check_interval:
+                continue
+            node.checked_at = now
+            try:
+                with node.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                    node.lag_seconds = float(self.lag_probe(conn))
+                node.healthy = True
+                node.last_error = None
+            except Exception as e:
+                if node.healthy:
+                    logger.warning(f"Replica {node.name} failed its health check: {e}")
+                node.healthy = False
+                node.last_error = str(e)
+
+    def _probe_loop(self):
+        while True:
+            try:
+                self.check_health(force=True)
+            except Exception as e:
+                logger.error(f"Failed to check replica health: {e}")
+            if self._stop.wait(self.health_check_interval):
+                return
+
+    def start_health_checks(self):
+        """Probe the replicas now and then every interval from a daemon thread"""
+        if not self.replicas or (self._health_thread is not None and self._health_thread.is_alive()):
+            return
+        self._stop.clear()
+        self._health_thread = threading.Thread(target=self._probe_loop, name="replica-health", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=5)
+            self._health_thread = None
+
+    def available_replicas(self) -> List[DatabaseNode]:
+        """Replicas whose latest probe passed; never probes on the caller's thread"""
+        now = self.clock()
+        return [
+            node for node in self.replicas
+            if node.healthy and node.checked_at is not None
+            and now - node.checked_at <= 3 * self.health_check_interval
+            and node.lag_seconds <= self.max_lag_seconds
+        ]
+
+    def reader(self) -> DatabaseNode:
+        """Replica for a read-only session, or the primary when none qualifies"""
+        candidates = self.available_replicas()
+        if not candidates:
+            return self.primary
+        if self.strategy == RoutingStrategy.LEAST_CONNECTIONS:
+            return min(candidates, key=lambda node: node.in_use)
+        with self._lock:
+            return candidates[next(self._round_robin) % len(candidates)]
+
+    def session_factory(self, **kwargs) -> sessionmaker:
+        return sessionmaker(class_=RoutingSession, router=self, bind=self.primary.engine, **kwargs)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy.value,
+            "max_lag_seconds": self.max_lag_seconds,
+            "primary": self.primary.to_dict(),
+            "replicas": [node.to_dict() for node in self.replicas]
+        }
+
+    def dispose(self):
+        self.stop_health_checks()
+        for node in [self.primary] + self.replicas:
+            node.engine.dispose()
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica inside ``read_only`` methods
+
+    The first write (flush or DML statement) pins the session to the primary
+    for the rest of its life, which is one request with ``get_db``, so a
+    request always reads its own writes.
+    """
+
+    def __init__(self, router: Optional[DatabaseRouter] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.router = router
+        self.pinned_to_primary = False
+        self._reader: Optional[DatabaseNode] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.router is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.pinned_to_primary = True
+        if self.pinned_to_primary or not _read_only.get() or not getattr(clause, "is_select", False):
+            return self.router.primary.engine
+
+        # One reader per session keeps a request's reads on a single snapshot
+        if self._reader is None:
+            self._reader = self.router.reader()
+        return self._reader.engine
@@ -5,8 +5,6 @@ Provides edge computing capabilities, CDN management, and performance optimizati
 
 import asyncio
 import logging
-import hashlib
-import json
 import time
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
@@ -24,6 +22,8 @@ from pydantic import BaseModel
 import yaml
 import os
 
+from caching.http_cache import CacheResult, HTTPCache, header_value, normalize_header
+
 logger = logging.getLogger(__name__)
 
 class EdgeLocation(Enum):
@@ -197,6 +197,7 @@ class EdgeComputingService:
         self.edge_nodes: List[EdgeNode] = []
         self.cache_rules: List[CacheRule] = []
         self.load_balancer = EdgeLoadBalancer()
+        self.cache = HTTPCache(redis_client, name="edge", stale_while_revalidate=60)
         
         # Initialize edge nodes
         self._initialize_edge_nodes()
@@ -362,30 +363,40 @@ class EdgeComputingService:
             
             # Check cache rules
             cache_rule = self._get_cache_rule(request.url.path)
+            headers = list(request.headers.items())
             
-            if cache_rule:
-                # Check if content is cached
-                cache_key = self._generate_cache_key(request)
-                cached_content = await self.redis.get(cache_key)
-                
-                if cached_content and cache_rule.strategy in [CacheStrategy.CACHE_FIRST, CacheStrategy.CACHE_ONLY]:
-                    # Return cached content
-                    return self._create_cached_response(cached_content, cache_rule)
-                
-                if cache_rule.strategy == CacheStrategy.CACHE_ONLY:
+            if (not cache_rule or cache_rule.strategy == CacheStrategy.NETWORK_ONLY
+                    or not self.cache.cacheable_request(request.method, headers)):
+                return await self._process_through_edge_node(request, edge_node, cache_rule)
+            
+            url = str(request.url)
+            # Read now so a background revalidation can still resend it after this response
+            await request.body()
+            
+            if cache_rule.strategy == CacheStrategy.CACHE_ONLY:
+                entry = await self.cache.lookup(request.method, url, headers)
+                if entry is None:
                     # Return 404 if not cached
                     return Response(status_code=404, content="Content not found")
+                return self.cache.respond(entry, headers, "HIT").to_response()
             
-            # Process request through edge node
-            processed_response = await self._process_through_edge_node(
-                request, edge_node, cache_rule
-            )
-            
-            # Cache response if applicable
-            if cache_rule and processed_response.status_code == 200:
-                await self._cache_response(cache_key, processed_response, cache_rule)
+            async def fetch(conditional: Dict[str, str]):
+                try:
+                    return await self._fetch_from_edge_node(request, edge_node, cache_rule, conditional)
+                except Exception as e:
+                    logger.error(f"Failed to process through edge node: {e}")
+                    return 502, [], b"Bad Gateway"
             
-            return processed_response
+            # Network-first rules revalidate every request and fall back to the stored copy
+            network_first = cache_rule.strategy == CacheStrategy.NETWORK_FIRST
+            result = await self.cache.serve(
+                request.method, url, headers, fetch, default_ttl=cache_rule.ttl, revalidate=network_first
+            )
+            if network_first and result.status_code >= 500:
+                entry = await self.cache.lookup(request.method, url, headers)
+                if entry is not None:
+                    return self.cache.respond(entry, headers, "STALE").to_response()
+            return result.to_response()
             
         except Exception as e:
             logger.error(f"Failed to process request: {e}")
@@ -403,46 +414,64 @@ class EdgeComputingService:
         import fnmatch
         return fnmatch.fnmatch(path, pattern)
     
-    def _generate_cache_key(self, request: Request) -> str:
-        """Generate cache key for request"""
-        key_data = {
-            "path": request.url.path,
-            "query": str(request.query_params),
-            "headers": dict(request.headers)
+    async def _fetch_from_edge_node(self, request: Request, edge_node: EdgeNode,
+                                    cache_rule: Optional[CacheRule],
+                                    conditional: Optional[Dict[str, str]] = None
+                                    ) -> Tuple[int, List[Tuple[str, str]], bytes]:
+        """Forward request to edge node; returns status, headers and the transformed body
+        
+        ``conditional`` replaces the client's validators when the cache revalidates.
+        """
+        edge_url = f"{edge_node.url}{request.url.path}"
+        headers = {
+            name: value for name, value in request.headers.items()
+            if name.lower() not in ("host", "content-length")
+            and (conditional is None or name.lower() not in ("if-none-match", "if-modified-since"))
         }
-        key_string = json.dumps(key_data, sort_keys=True)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        headers.update(conditional or {})
+        
+        # Bodies stay encoded as the edge node sent them, matching its Content-Encoding
+        async with aiohttp.ClientSession(auto_decompress=False) as session:
+            async with session.request(
+                method=request.method,
+                url=edge_url,
+                headers=headers,
+                params=request.query_params,
+                data=await request.body()
+            ) as response:
+                content = await response.read()
+                status = response.status
+                response_headers = [
+                    (name, value) for name, value in response.headers.items()
+                    if name.lower() not in ("content-length", "transfer-encoding", "connection", "keep-alive")
+                ]
+        
+        # Apply transformations if needed
+        if cache_rule and status == 200 and header_value(response_headers, "content-encoding") is None:
+            if cache_rule.minify:
+                content = await self._minify_content(content, request.url.path)
+            
+            if cache_rule.compression:
+                response_headers.append(("Vary", "Accept-Encoding"))
+                accepted = normalize_header("accept-encoding", request.headers.get("accept-encoding"))
+                if "gzip" in accepted.split(","):
+                    compressed = await self._compress_content(content)
+                    if compressed is not content:
+                        content = compressed
+                        response_headers.append(("Content-Encoding", "gzip"))
+        
+        if cache_rule and header_value(response_headers, "cache-control") is None:
+            response_headers.extend(cache_rule.headers.items())
+        
+        return status, response_headers, content
     
     async def _process_through_edge_node(self, request: Request, 
                                        edge_node: EdgeNode, 
                                        cache_rule: Optional[CacheRule]) -> Response:
         """Process request through edge node"""
         try:
-            # Forward request to edge node
-            edge_url = f"{edge_node.url}{request.url.path}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method=request.method,
-                    url=edge_url,
-                    headers=dict(request.headers),
-                    params=request.query_params,
-                    data=await request.body()
-                ) as response:
-                    content = await response.read()
-                    
-                    # Apply transformations if needed
-                    if cache_rule and cache_rule.minify:
-                        content = await self._minify_content(content, request.url.path)
-                    
-                    if cache_rule and cache_rule.compression:
-                        content = await self._compress_content(content)
-                    
-                    return Response(
-                        content=content,
-                        status_code=response.status,
-                        headers=dict(response.headers)
-                    )
+            status, headers, content = await self._fetch_from_edge_node(request, edge_node, cache_rule)
+            return CacheResult(status, headers, content, "BYPASS").to_response()
                     
         except Exception as e:
             logger.error(f"Failed to process through edge node: {e}")
@@ -478,39 +507,6 @@ class EdgeComputingService:
             logger.error(f"Failed to compress content: {e}")
             return content
     
-    def _create_cached_response(self, cached_content: bytes, 
-                              cache_rule: CacheRule) -> Response:
-        """Create response from cached content"""
-        headers = cache_rule.headers.copy()
-        headers["X-Cache"] = "HIT"
-        headers["X-Cache-TTL"] = str(cache_rule.ttl)
-        
-        return Response(
-            content=cached_content,
-            status_code=200,
-            headers=headers
-        )
-    
-    async def _cache_response(self, cache_key: str, response: Response, 
-                            cache_rule: CacheRule):
-        """Cache response"""
-        try:
-            cache_data = {
-                "content": response.body.decode() if isinstance(response.body, bytes) else response.body,
-                "headers": dict(response.headers),
-                "status_code": response.status_code,
-                "timestamp": time.time()
-            }
-            
-            await self.redis.setex(
-                cache_key, 
-                cache_rule.ttl, 
-                json.dumps(cache_data)
-            )
-            
-        except Exception as e:
-            logger.error(f"Failed to cache response: {e}")
-    
     async def health_check_edge_nodes(self):
         """Perform health check on all edge nodes"""
         try:
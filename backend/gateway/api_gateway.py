@@ -9,12 +9,12 @@ import time
 import json
 import hashlib
 import hmac
+from contextlib import asynccontextmanager
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 import redis
-import jwt
 from fastapi import FastAPI, Request, Response, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -29,6 +29,14 @@ from pydantic import BaseModel, Field
 import yaml
 import os
 
+from auth.access_tokens import AccessTokenCodec, RevocationFilter, token_revocation_id
+from config import settings
+from caching.http_cache import HTTPCache
+from gateway.upstream import (
+    IDEMPOTENT_METHODS, UpstreamPool, filter_hop_by_hop, send_with_retries, upstream_latency_summary
+)
+from monitoring.instrumentation import CONTENT_TYPE_LATEST, render_metrics
+
 logger = logging.getLogger(__name__)
 
 class RateLimitStrategy(Enum):
@@ -272,12 +280,27 @@ class RateLimiter:
             }
 
 class AuthenticationService:
-    """Authentication service for API Gateway"""
+    """Authentication service for API Gateway
+    
+    JWTs are verified locally with a key parsed once. Redis is only asked
+    about tokens the revocation filter flags. The filter forgets a
+    revocation after two buckets, so tokens living longer than
+    ``max_token_lifetime`` (at most one bucket), or without ``iat``, are
+    always checked against Redis. The bucket width is shared with the
+    session manager, which writes revocations to the same bitmaps.
+    """
     
-    def __init__(self, redis_client: redis.Redis, jwt_secret: str):
+    def __init__(self, redis_client: redis.Redis, jwt_secret: str,
+                 max_token_lifetime: Optional[int] = None, revocation_sync_interval: float = 2.0):
         self.redis = redis_client
         self.jwt_secret = jwt_secret
         self.api_keys = {}  # In production, load from database
+        self.tokens = AccessTokenCodec(jwt_secret, "HS256")
+        bucket_seconds = settings.ACCESS_TOKEN_REVOCATION_BUCKET_SECONDS
+        self.max_token_lifetime = min(max_token_lifetime or bucket_seconds, bucket_seconds)
+        self.revocations = RevocationFilter(
+            redis_client, bucket_seconds=bucket_seconds, sync_interval=revocation_sync_interval
+        )
     
     async def authenticate_request(self, request: Request, auth_method: AuthMethod) -> Optional[Dict[str, Any]]:
         """Authenticate incoming request"""
@@ -305,26 +328,55 @@ class AuthenticationService:
             
             token = auth_header.split(" ")[1]
             
-            # Check if token is blacklisted
-            if await self.redis.get(f"blacklist:{token}"):
+            # Verify signature and expiration locally
+            payload = self.tokens.decode(token)
+            if payload is None:
                 return None
             
-            # Decode and verify token
-            payload = jwt.decode(token, self.jwt_secret, algorithms=["HS256"])
-            
-            # Check token expiration
-            if payload.get("exp", 0) < time.time():
+            # Only possibly revoked tokens are checked against Redis
+            await self.revocations.sync_if_stale()
+            maybe_revoked = (
+                not self._within_filter_lifetime(payload)
+                or token_revocation_id(token, payload) in self.revocations
+            )
+            if maybe_revoked and await self._is_revoked(token, payload):
                 return None
             
             return {
-                "user_id": payload.get("user_id"),
+                "user_id": payload.get("user_id") or payload.get("sub"),
+                "session_id": payload.get("sid"),
                 "roles": payload.get("roles", []),
                 "permissions": payload.get("permissions", []),
                 "token_type": "jwt"
             }
-        except jwt.InvalidTokenError:
+        except Exception as e:
+            logger.error(f"JWT authentication error: {e}")
             return None
     
+    def _within_filter_lifetime(self, payload: Dict[str, Any]) -> bool:
+        try:
+            return float(payload["exp"]) - float(payload["iat"]) <= self.max_token_lifetime
+        except (KeyError, TypeError, ValueError):
+            return False
+    
+    async def _is_revoked(self, token: str, payload: Dict[str, Any]) -> bool:
+        if await self.redis.get(f"blacklist:{token}"):
+            return True
+        # Session-bound tokens die with their session
+        session_id = payload.get("sid")
+        return bool(session_id) and not await self.redis.exists(f"session:{session_id}")
+    
+    async def revoke_token(self, token: str):
+        """Blacklist a token until it expires and flag it in the shared revocation filter"""
+        payload = self.tokens.decode(token)
+        if payload is None:
+            return
+        
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.setex(f"blacklist:{token}", max(1, int(payload["exp"] - time.time())), 1)
+        self.revocations.add_to_pipeline(pipe, [token_revocation_id(token, payload)])
+        await pipe.execute()
+    
     async def _authenticate_api_key(self, request: Request) -> Optional[Dict[str, Any]]:
         """Authenticate API key"""
         try:
@@ -459,7 +511,8 @@ class APIGateway:
         self.app = FastAPI(
             title="Soladia API Gateway",
             description="Advanced API Gateway for Soladia Marketplace",
-            version="1.0.0"
+            version="1.0.0",
+            lifespan=self._lifespan
         )
         
         # Initialize Redis
@@ -471,7 +524,8 @@ class APIGateway:
         # Initialize services
         self.auth_service = AuthenticationService(
             self.redis, 
-            self.config.get("jwt_secret", "your-secret-key")
+            self.config.get("jwt_secret", "your-secret-key"),
+            max_token_lifetime=self.config.get("max_token_lifetime")
         )
         
         self.rate_limiter = RateLimiter(
@@ -485,12 +539,36 @@ class APIGateway:
         
         self.circuit_breakers = {}
         
+        upstream_config = self.config.get("upstream", {})
+        self.upstreams = UpstreamPool(
+            max_connections=upstream_config.get("max_connections", 100),
+            max_keepalive_connections=upstream_config.get("max_keepalive_connections", 20),
+            keepalive_expiry=upstream_config.get("keepalive_expiry", 30),
+            http2=upstream_config.get("http2", True)
+        )
+        self.max_replay_body = upstream_config.get("max_replay_body", 1024 * 1024)
+        
+        cache_config = self.config.get("response_cache", {})
+        self.response_cache = HTTPCache(
+            self.redis,
+            name="gateway",
+            stale_while_revalidate=cache_config.get("stale_while_revalidate", 30),
+            retain_stale=cache_config.get("retain_stale", 300),
+            max_body_size=cache_config.get("max_body_size", 8 * 1024 * 1024)
+        )
+        
         # Setup middleware
         self._setup_middleware()
         
         # Setup routes
         self._setup_routes()
     
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        yield
+        await self.response_cache.aclose()
+        await self.upstreams.aclose()
+    
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Load gateway configuration"""
         try:
@@ -507,6 +585,7 @@ class APIGateway:
         """Get default configuration"""
         return {
             "jwt_secret": "your-secret-key",
+            "max_token_lifetime": settings.ACCESS_TOKEN_REVOCATION_BUCKET_SECONDS,
             "cors_origins": ["*"],
             "trusted_hosts": ["*"],
             "rate_limiting": {
@@ -520,6 +599,18 @@ class APIGateway:
                 "failure_threshold": 5,
                 "recovery_timeout": 60
             },
+            "upstream": {
+                "max_connections": 100,
+                "max_keepalive_connections": 20,
+                "keepalive_expiry": 30,
+                "http2": True,
+                "max_replay_body": 1048576
+            },
+            "response_cache": {
+                "stale_while_revalidate": 30,
+                "retain_stale": 300,
+                "max_body_size": 8388608
+            },
             "routes": [
                 {
                     "path": "/api/v1/auth/*",
@@ -580,6 +671,10 @@ class APIGateway:
         async def get_metrics():
             return await self._get_metrics()
         
+        @self.app.get("/metrics/prometheus", include_in_schema=False)
+        async def prometheus_metrics():
+            return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+        
         # Proxy routes
         for route_config in self.config.get("routes", []):
             self._create_proxy_route(route_config)
@@ -635,49 +730,66 @@ class APIGateway:
                         }
                     )
             
-            # Check cache
-            if caching_enabled and request.method == "GET":
-                cache_key = f"cache:{path}:{hashlib.md5(str(request.url).encode()).hexdigest()}"
-                cached_response = await self.redis.get(cache_key)
-                if cached_response:
-                    return JSONResponse(content=json.loads(cached_response))
+            # Forward request over the pooled client for this upstream
+            client = self.upstreams.client(target_url)
+            request_timeout = self.upstreams.timeout(timeout)
+            # Identity headers come from the gateway only, never from the client
+            headers = [(name, value) for name, value in filter_hop_by_hop(request.headers.items())
+                       if name.lower() not in ("x-user-id", "x-user-roles")]
+            if auth_data:
+                headers.append(("X-User-ID", str(auth_data.get("user_id", ""))))
+                headers.append(("X-User-Roles", ",".join(auth_data.get("roles", []))))
+            url = httpx.URL(request.url.path, query=request.url.query.encode("ascii"))
             
-            # Forward request
-            try:
-                async with httpx.AsyncClient(timeout=timeout) as client:
-                    # Prepare request
-                    headers = dict(request.headers)
-                    if auth_data:
-                        headers["X-User-ID"] = auth_data.get("user_id", "")
-                        headers["X-User-Roles"] = ",".join(auth_data.get("roles", []))
-                    
-                    # Make request
-                    response = await client.request(
-                        method=request.method,
-                        url=f"{target_url}{request.url.path}",
-                        headers=headers,
-                        params=request.query_params,
-                        content=await request.body()
+            replayable = self._replayable(request)
+            if replayable:
+                # Small or empty bodies of idempotent requests are buffered so retries can resend them
+                body = await request.body()
+                retries = retry_count
+                build = lambda: client.build_request(
+                    request.method, url, headers=headers, content=body, timeout=request_timeout
+                )
+            else:
+                retries = 0
+                build = lambda: client.build_request(
+                    request.method, url, headers=headers, content=request.stream(), timeout=request_timeout
+                )
+            
+            # Shared response cache; it answers client validators itself and sends its own upstream
+            if caching_enabled and replayable and self.response_cache.cacheable_request(
+                request.method, request.headers.items()
+            ):
+                upstream_headers = [(name, value) for name, value in headers
+                                    if name.lower() not in ("if-none-match", "if-modified-since")]
+                
+                async def fetch(conditional: Dict[str, str]):
+                    response = await send_with_retries(client, lambda: client.build_request(
+                        request.method, url, headers=upstream_headers + list(conditional.items()), content=body,
+                        timeout=request_timeout
+                    ), retries=retries, route=path)
+                    try:
+                        content = b"".join([chunk async for chunk in response.aiter_raw()])
+                    finally:
+                        await response.aclose()
+                    return response.status_code, filter_hop_by_hop(response.headers.multi_items()), content
+                
+                try:
+                    result = await self.response_cache.serve(
+                        request.method, str(request.url), list(request.headers.items()), fetch,
+                        default_ttl=cache_ttl, authenticated=auth_data is not None
                     )
-                    
-                    # Handle response
-                    response_content = response.content
-                    response_headers = dict(response.headers)
-                    
-                    # Cache response if enabled
-                    if caching_enabled and request.method == "GET" and response.status_code == 200:
-                        await self.redis.setex(cache_key, cache_ttl, response_content)
-                    
-                    # Update circuit breaker
+                except Exception as e:
                     if circuit_breaker_enabled and path in self.circuit_breakers:
-                        self.circuit_breakers[path].on_success()
-                    
-                    return Response(
-                        content=response_content,
-                        status_code=response.status_code,
-                        headers=response_headers
-                    )
-                    
+                        self.circuit_breakers[path].on_failure()
+                    logger.error(f"Proxy request failed: {e}")
+                    raise HTTPException(status_code=502, detail="Bad Gateway")
+                
+                if circuit_breaker_enabled and path in self.circuit_breakers:
+                    self.circuit_breakers[path].on_success()
+                return result.to_response()
+            
+            try:
+                response = await send_with_retries(client, build, retries=retries, route=path)
             except Exception as e:
                 # Update circuit breaker
                 if circuit_breaker_enabled and path in self.circuit_breakers:
@@ -685,6 +797,17 @@ class APIGateway:
                 
                 logger.error(f"Proxy request failed: {e}")
                 raise HTTPException(status_code=502, detail="Bad Gateway")
+            
+            # Update circuit breaker
+            if circuit_breaker_enabled and path in self.circuit_breakers:
+                self.circuit_breakers[path].on_success()
+            
+            proxied = StreamingResponse(self._relay(response), status_code=response.status_code)
+            proxied.raw_headers = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in filter_hop_by_hop(response.headers.multi_items())
+            ]
+            return proxied
         
         # Register route
         for method in methods:
@@ -694,6 +817,24 @@ class APIGateway:
                 methods=[method]
             )
     
+    def _replayable(self, request: Request) -> bool:
+        """Whether a request may be retried: idempotent, with no body or a small sized one"""
+        if request.method not in IDEMPOTENT_METHODS or "transfer-encoding" in request.headers:
+            return False
+        try:
+            return int(request.headers.get("content-length", 0)) <= self.max_replay_body
+        except ValueError:
+            return False
+    
+    @staticmethod
+    async def _relay(response: httpx.Response):
+        """Upstream body chunks as they arrive, still encoded; the connection is released however the stream ends"""
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await response.aclose()
+    
     async def _get_metrics(self) -> Dict[str, Any]:
         """Get gateway metrics"""
         try:
@@ -729,6 +870,7 @@ class APIGateway:
                 "success_rate": (successful_requests / total_requests * 100) if total_requests > 0 else 0,
                 "average_response_time": avg_response_time,
                 "circuit_breakers": circuit_breaker_status,
+                "upstream_latency": upstream_latency_summary(),
                 "timestamp": datetime.now().isoformat()
             }
         except Exception as e:
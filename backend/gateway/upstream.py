@@ -0,0 +1,159 @@
+"""
+Upstream connections for the Soladia API Gateway
+Pooled keep-alive clients per backend service, hop-by-hop header filtering and retries
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from monitoring.instrumentation import GATEWAY_UPSTREAM_DURATION, histogram_quantile
+
+logger = logging.getLogger(__name__)
+
+# RFC 9110 section 7.6.1; Host is rewritten for the upstream by the client
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "proxy-connection",
+    "te", "trailer", "transfer-encoding", "upgrade", "host"
+})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def filter_hop_by_hop(headers: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Headers safe to forward: drops hop-by-hop headers and any named in Connection"""
+    headers = list(headers)
+    dropped = set(HOP_BY_HOP_HEADERS)
+    for name, value in headers:
+        if name.lower() == "connection":
+            dropped.update(token.strip().lower() for token in value.split(",") if token.strip())
+    return [(name, value) for name, value in headers if name.lower() not in dropped]
+
+
+def backoff_delay(attempt: int, base: float = 0.05, cap: float = 2.0) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def status_outcome(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+class UpstreamPool:
+    """One pooled ``httpx.AsyncClient`` per upstream base URL
+
+    Clients keep connections alive between proxied requests and negotiate
+    HTTP/2 when ``h2`` is installed (it is an optional extra of httpx);
+    otherwise they stay on HTTP/1.1 keep-alive.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, http2: bool = True, connect_timeout: float = 5.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and http2_available()
+        self.connect_timeout = connect_timeout
+        self.transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        if http2 and not self.http2:
+            logger.info("h2 is not installed; upstream connections use HTTP/1.1 keep-alive")
+
+    def timeout(self, seconds: float) -> httpx.Timeout:
+        """Per-request timeout; routes sharing an upstream may each set their own"""
+        return httpx.Timeout(seconds, connect=min(seconds, self.connect_timeout))
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=self.timeout(30.0),
+                limits=self.limits,
+                http2=self.http2,
+                transport=self.transport,
+                follow_redirects=False
+            )
+            self._clients[base_url] = client
+        return client
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Failed to close upstream client: {e}")
+
+
+async def send_with_retries(client: httpx.AsyncClient, build: Callable[[], httpx.Request],
+                            retries: int = 0, route: str = "unmatched",
+                            sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep) -> httpx.Response:
+    """Send a request and return the streaming response once its headers arrive
+
+    ``build`` is called once per attempt so a replayable body can be sent
+    again. Transport errors and 502/503/504 answers are retried up to
+    ``retries`` times with jittered backoff; callers pass ``retries=0``
+    for non-idempotent methods and one-shot bodies.
+    """
+    attempt = 0
+    while True:
+        request = build()
+        start = time.perf_counter()
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.TransportError as e:
+            GATEWAY_UPSTREAM_DURATION.labels(route, request.method, "error").observe(time.perf_counter() - start)
+            if attempt >= retries:
+                raise
+            logger.warning(f"Upstream {request.method} {request.url} failed ({e!r}), retrying")
+        else:
+            GATEWAY_UPSTREAM_DURATION.labels(route, request.method, status_outcome(response.status_code)).observe(
+                time.perf_counter() - start
+            )
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            await response.aclose()
+            logger.warning(f"Upstream {request.method} {request.url} returned {response.status_code}, retrying")
+        await sleep(backoff_delay(attempt))
+        attempt += 1
+
+
+def upstream_latency_summary() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Upstream latency quantiles per route and method, across outcomes"""
+    buckets = GATEWAY_UPSTREAM_DURATION.buckets
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    errors: Dict[Tuple[str, str], int] = {}
+    for (route, method, outcome), values in GATEWAY_UPSTREAM_DURATION.snapshot()["series"]:
+        counts = values[:-1]
+        merged = totals.setdefault((route, method), [0.0] * len(counts))
+        for i, count in enumerate(counts):
+            merged[i] += count
+        if outcome in ("error", "5xx"):
+            errors[(route, method)] = errors.get((route, method), 0) + int(sum(counts))
+
+    summary: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (route, method), counts in totals.items():
+        summary.setdefault(route, {})[method] = {
+            "count": int(sum(counts)),
+            "errors": errors.get((route, method), 0),
+            "p50_ms": round(histogram_quantile(buckets, counts, 0.5) * 1000, 3),
+            "p95_ms": round(histogram_quantile(buckets, counts, 0.95) * 1000, 3),
+            "p99_ms": round(histogram_quantile(buckets, counts, 0.99) * 1000, 3)
+        }
+    return summary
@@ -30,6 +30,8 @@ import bluetooth
 import socket
 import threading
 
+from analytics.timeseries_store import TimeSeriesStore, from_ns
+
 logger = logging.getLogger(__name__)
 
 class IoTDeviceType(Enum):
@@ -110,7 +112,10 @@ class IoTDeviceManager:
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
         self.devices: Dict[str, IoTDevice] = {}
-        self.sensor_data: Dict[str, List[IoTSensorData]] = {}
+        # Readings keyed "{device_id}:{sensor_type}", quality under "{device_id}:{sensor_type}:quality"
+        # Buffers start small and grow per sensor up to 1000 readings
+        self.sensor_data = TimeSeriesStore(capacity=1000, initial_capacity=16)
+        self.device_sensors: Dict[str, Dict[str, Dict[str, Any]]] = {}  # device -> sensor_type -> unit/metadata
         self.commands: Dict[str, IoTCommand] = {}
         self.mqtt_client: Optional[mqtt.Client] = None
         self.websocket_connections: Dict[str, WebSocket] = {}
@@ -267,15 +272,14 @@ class IoTDeviceManager:
                 metadata=data.get("metadata", {})
             )
             
-            # Store sensor data
-            if device_id not in self.sensor_data:
-                self.sensor_data[device_id] = []
-            
-            self.sensor_data[device_id].append(sensor_data)
-            
-            # Keep only last 1000 data points
-            if len(self.sensor_data[device_id]) > 1000:
-                self.sensor_data[device_id] = self.sensor_data[device_id][-1000:]
+            # Store sensor data (ring buffers keep the last 1000 points per sensor)
+            key = f"{device_id}:{sensor_data.sensor_type}"
+            self.sensor_data.append(key, sensor_data.timestamp, float(sensor_data.value))
+            self.sensor_data.append(f"{key}:quality", sensor_data.timestamp, float(sensor_data.quality))
+            self.device_sensors.setdefault(device_id, {})[sensor_data.sensor_type] = {
+                "unit": sensor_data.unit,
+                "metadata": sensor_data.metadata
+            }
             
             # Update device status
             device.status = "online"
@@ -285,16 +289,7 @@ class IoTDeviceManager:
             await self.redis.setex(
                 f"iot_sensor_data:{device_id}",
                 86400,  # 1 day TTL
-                json.dumps([{
-                    "device_id": sensor_data.device_id,
-                    "sensor_type": sensor_data.sensor_type,
-                    "value": sensor_data.value,
-                    "unit": sensor_data.unit,
-                    "timestamp": sensor_data.timestamp.isoformat(),
-                    "quality": sensor_data.quality,
-                    "location": sensor_data.location,
-                    "metadata": sensor_data.metadata
-                } for sensor_data in self.sensor_data[device_id][-100:]])  # Last 100 data points
+                json.dumps(self._recent_readings(device_id, 100))  # Last 100 data points
             )
             
             # Broadcast to WebSocket connections
@@ -500,7 +495,7 @@ class IoTDeviceManager:
     async def get_device_data(self, device_id: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Get device sensor data"""
         try:
-            if device_id not in self.sensor_data:
+            if device_id not in self.device_sensors:
                 # Load from Redis
                 data = await self.redis.get(f"iot_sensor_data:{device_id}")
                 if data:
@@ -508,42 +503,55 @@ class IoTDeviceManager:
                 return []
             
             # Return recent data
-            recent_data = self.sensor_data[device_id][-limit:]
-            return [{
-                "device_id": sensor_data.device_id,
-                "sensor_type": sensor_data.sensor_type,
-                "value": sensor_data.value,
-                "unit": sensor_data.unit,
-                "timestamp": sensor_data.timestamp.isoformat(),
-                "quality": sensor_data.quality,
-                "location": sensor_data.location,
-                "metadata": sensor_data.metadata
-            } for sensor_data in recent_data]
+            return self._recent_readings(device_id, limit)
             
         except Exception as e:
             logger.error(f"Failed to get device data: {e}")
             return []
     
+    def _recent_readings(self, device_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Latest readings across a device's sensors as records, oldest first"""
+        device = self.devices.get(device_id)
+        readings = []
+        for sensor_type, info in self.device_sensors.get(device_id, {}).items():
+            key = f"{device_id}:{sensor_type}"
+            values = self.sensor_data.last(key, limit)
+            qualities = self.sensor_data.last(f"{key}:quality", limit)
+            for ts, value, quality in zip(values.timestamps, values.values, qualities.values):
+                readings.append({
+                    "device_id": device_id,
+                    "sensor_type": sensor_type,
+                    "value": float(value),
+                    "unit": info["unit"],
+                    "timestamp": from_ns(ts).isoformat(),
+                    "quality": float(quality),
+                    "location": device.location if device else None,
+                    "metadata": info["metadata"]
+                })
+        readings.sort(key=lambda reading: reading["timestamp"])
+        return readings[-limit:]
+    
     async def get_device_analytics(self, device_id: str) -> Dict[str, Any]:
         """Get device analytics"""
         try:
-            if device_id not in self.sensor_data:
+            sensors = self.device_sensors.get(device_id)
+            if not sensors:
                 return {"error": "No data available"}
             
-            data = self.sensor_data[device_id]
-            if not data:
+            # Calculate analytics over the raw arrays
+            readings = [self.sensor_data.range(f"{device_id}:{sensor_type}") for sensor_type in sensors]
+            qualities = [self.sensor_data.range(f"{device_id}:{sensor_type}:quality") for sensor_type in sensors]
+            values = np.concatenate([r.values for r in readings])
+            timestamps = np.concatenate([r.timestamps for r in readings])
+            if not len(values):
                 return {"error": "No data available"}
             
-            # Calculate analytics
-            values = [d.value for d in data]
-            timestamps = [d.timestamp for d in data]
-            
             analytics = {
                 "device_id": device_id,
-                "total_readings": len(data),
+                "total_readings": len(values),
                 "time_range": {
-                    "start": min(timestamps).isoformat(),
-                    "end": max(timestamps).isoformat()
+                    "start": from_ns(timestamps.min()).isoformat(),
+                    "end": from_ns(timestamps.max()).isoformat()
                 },
                 "statistics": {
                     "mean": float(np.mean(values)),
@@ -552,9 +560,9 @@ class IoTDeviceManager:
                     "min": float(np.min(values)),
                     "max": float(np.max(values))
                 },
-                "quality_score": float(np.mean([d.quality for d in data])),
-                "sensor_types": list(set([d.sensor_type for d in data])),
-                "units": list(set([d.unit for d in data if d.unit])),
+                "quality_score": float(np.mean(np.concatenate([q.values for q in qualities]))),
+                "sensor_types": list(sensors),
+                "units": list(set(info["unit"] for info in sensors.values() if info["unit"])),
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -7,11 +7,10 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 import uvicorn
 import os
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
-from database import get_db, engine, Base
+from database import get_db, engine, db_router, Base
 from models import User, Product, Order, Category, Review, Watchlist
 from schemas import (
     UserCreate, UserResponse, ProductCreate, ProductResponse, 
@@ -23,6 +22,10 @@ from services import (
     CategoryService, ReviewService, WatchlistService
 )
 from enhanced_solana_endpoints import router as solana_router
+from api.analytics_endpoints import router as analytics_export_router
+from api.bulk_endpoints import router as bulk_router
+from api.metrics_endpoints import router as metrics_router
+from api.internal_endpoints import router as internal_router
 from config import settings
 from middleware.error_handler import (
     error_handler_middleware,
@@ -31,6 +34,13 @@ from middleware.error_handler import (
     AppException
 )
 from middleware.logging_middleware import logging_middleware
+from middleware.metrics_middleware import metrics_middleware
+from middleware.tracing_middleware import TracedJSONResponse, tracing_middleware
+from middleware.profiling_middleware import profiling_middleware
+from middleware.rate_limiter import limiter
+from counters import configure_counters
+from monitoring.instrumentation import configure_multiprocess, instrument_engine
+from monitoring.tracing import configure_tracing, trace_engine
 from utils.logger import app_logger, setup_logger
 
 # Create database tables (only creates if not exists)
@@ -40,14 +50,12 @@ Base.metadata.create_all(bind=engine)
 setup_logger("soladia", settings.LOG_LEVEL)
 app_logger.info("Starting Soladia Marketplace API", version="1.0.0", debug=settings.DEBUG)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address, enabled=settings.RATE_LIMIT_ENABLED)
-
 app = FastAPI(
     title="Soladia Marketplace API",
     description="Decentralized marketplace powered by Solana blockchain",
     version="1.0.0",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    default_response_class=TracedJSONResponse
 )
 
 # Add rate limiter to app state
@@ -64,6 +72,41 @@ app.middleware("http")(logging_middleware)
 # Error handling middleware
 app.middleware("http")(error_handler_middleware)
 
+# Prometheus instrumentation (outermost, so latency covers the whole stack)
+database_engines = [engine] + ([node.engine for node in db_router.replicas] if db_router else [])
+
+if settings.ENABLE_METRICS:
+    for db_engine in database_engines:
+        instrument_engine(db_engine)
+    configure_multiprocess(settings.PROMETHEUS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL_SECONDS)
+    app.middleware("http")(metrics_middleware)
+
+# Request tracing with per-category Server-Timing
+if settings.TRACING_ENABLED:
+    configure_tracing(
+        settings.TRACING_SAMPLE_RATE,
+        settings.TRACING_EXPORTER,
+        settings.OTLP_ENDPOINT,
+        settings.TRACING_MAX_TRACES
+    )
+    for db_engine in database_engines:
+        trace_engine(db_engine)
+    app.middleware("http")(tracing_middleware)
+
+# Stack profiles of requests slower than the threshold
+if settings.SLOW_REQUEST_PROFILE_ENABLED:
+    app.middleware("http")(profiling_middleware)
+
+# Write-behind view/like/sale/rating counters
+configure_counters(
+    engine,
+    settings.COUNTER_BACKEND if settings.REDIS_ENABLED else "memory",
+    settings.REDIS_URL,
+    settings.COUNTER_FLUSH_INTERVAL_SECONDS,
+    settings.COUNTER_SHARDS,
+    settings.COUNTER_FLUSH_BATCH_SIZE
+)
+
 # CORS middleware - restricted to allowed origins from config
 app.add_middleware(
     CORSMiddleware,
@@ -78,6 +121,32 @@ app.include_router(solana_router)
 print(f"✅ Solana router included with prefix: {solana_router.prefix}")
 print(f"✅ Solana routes: {[route.path for route in solana_router.routes]}")
 
+# Streaming analytics exports
+app.include_router(analytics_export_router)
+
+# Bulk product and order import/export
+app.include_router(bulk_router)
+
+# Batch fraud scoring; needs the ML extras (numpy, pandas, scikit-learn, redis)
+if settings.FRAUD_SCORING_ENABLED:
+    try:
+        from ai.fraud_feature_store import configure_fraud_feature_store
+        from api.fraud_endpoints import router as fraud_router
+        configure_fraud_feature_store(
+            settings.FRAUD_FEATURE_BACKEND if settings.REDIS_ENABLED else "memory",
+            settings.REDIS_URL
+        )
+        app.include_router(fraud_router)
+    except ImportError as e:
+        app_logger.warning(f"Fraud scoring endpoints disabled, missing dependency: {e}")
+
+# Prometheus scrape target
+if settings.ENABLE_METRICS:
+    app.include_router(metrics_router)
+
+# Internal diagnostics (recent traces)
+app.include_router(internal_router)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -135,7 +204,7 @@ async def create_product(request: Request, product: ProductCreate, db: Session =
 
 @app.get("/api/products/{product_id}", response_model=ProductResponse)
 async def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = product_service.get_product(db, product_id)
+    product = product_service.view_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
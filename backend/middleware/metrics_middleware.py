@@ -0,0 +1,23 @@
+"""
+Metrics Middleware for request latency histograms
+"""
+from fastapi import Request
+import time
+from monitoring.instrumentation import HTTP_REQUEST_DURATION, route_template
+
+
+async def metrics_middleware(request: Request, call_next):
+    """
+    Middleware to record request latency per route template
+    """
+    start_time = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # The router stores the matched route in the shared scope during call_next
+        HTTP_REQUEST_DURATION.labels(
+            request.method, route_template(request), str(status_code)
+        ).observe(time.perf_counter() - start_time)
@@ -0,0 +1,25 @@
+"""
+Profiling Middleware for slow-request flamegraph capture
+"""
+from fastapi import Request
+from config import settings
+from monitoring.instrumentation import route_template
+from monitoring.profiling import SlowRequestCapture
+
+slow_request_capture = SlowRequestCapture(
+    threshold_ms=settings.SLOW_REQUEST_PROFILE_MS,
+    interval=settings.SLOW_REQUEST_PROFILE_INTERVAL_MS / 1000.0,
+    max_profiles=settings.SLOW_REQUEST_PROFILE_MAX,
+    min_interval_seconds=settings.SLOW_REQUEST_PROFILE_MIN_INTERVAL_SECONDS
+)
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Middleware to keep a stack profile of requests slower than the threshold
+    """
+    token = slow_request_capture.begin(f"{request.method} {request.url.path}")
+    try:
+        return await call_next(request)
+    finally:
+        slow_request_capture.end(token, f"{request.method} {route_template(request)}")
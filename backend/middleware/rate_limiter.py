@@ -9,10 +9,15 @@ from typing import Dict, Optional, Tuple
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
 import redis
+from slowapi import Limiter
+from slowapi.util import get_remote_address
 from collections import defaultdict, deque
 import asyncio
 import logging
 
+from config import settings
+from monitoring.tracing import TracedRedis
+
 logger = logging.getLogger(__name__)
 
 class RateLimiter:
@@ -26,7 +31,7 @@ class RateLimiter:
         window_size: int = 60,    # window size in seconds
         block_duration: int = 300  # block duration in seconds
     ):
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        self.redis_client = TracedRedis(redis.from_url(redis_url, decode_responses=True))
         self.default_rate = default_rate
         self.burst_rate = burst_rate
         self.window_size = window_size
@@ -240,6 +245,9 @@ class RateLimiter:
 # Global rate limiter instance
 rate_limiter = RateLimiter()
 
+# Per-route limits declared with @limiter.limit, shared by main and the API routers
+limiter = Limiter(key_func=get_remote_address, enabled=settings.RATE_LIMIT_ENABLED)
+
 async def rate_limit_middleware(request: Request, call_next):
     """Rate limiting middleware"""
     try:
@@ -0,0 +1,49 @@
+"""
+Tracing Middleware for request-scoped spans and Server-Timing
+"""
+from fastapi import Request
+from fastapi.responses import JSONResponse
+import time
+from typing import Any
+from monitoring.instrumentation import route_template
+from monitoring.tracing import tracer
+
+
+class TracedJSONResponse(JSONResponse):
+    """JSON response whose encoding shows up as a serialize span"""
+
+    def render(self, content: Any) -> bytes:
+        with tracer.span("serialize json", "serialize"):
+            return super().render(content)
+
+
+async def tracing_middleware(request: Request, call_next):
+    """
+    Middleware to trace each request and report span categories in Server-Timing
+    """
+    start_time = time.perf_counter()
+    trace, token = tracer.start_trace(
+        f"{request.method} {request.url.path}",
+        request.headers.get("traceparent"),
+        {"http.method": request.method, "http.target": request.url.path}
+    )
+    status_code = 500
+    error = None
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        route = route_template(request)
+        if trace.root is not None:
+            trace.root.name = f"{request.method} {route}"
+        tracer.end_trace(trace, token, error, {"http.route": route, "http.status_code": status_code})
+    
+    # Span categories recorded in this request, plus the total
+    response.headers["Server-Timing"] = trace.server_timing((time.perf_counter() - start_time) * 1000)
+    if trace.sampled:
+        response.headers["X-Trace-Id"] = trace.trace_id
+    
+    return response
@@ -0,0 +1,222 @@
+"""
+Index verification for Soladia
+Runs EXPLAIN on each hot query and fails if any of them falls back to a sequential scan
+
+    python -m migrations.verify_indexes [--database-url URL] [--planner-costs] [--strict]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import ClauseElement, create_engine, desc, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import Executable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Order, OrderStatus, Product, Review
+
+logger = logging.getLogger(__name__)
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN`` wrapper that keeps the statement's bound parameters and type processing"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = {
+        "postgresql": "EXPLAIN (FORMAT JSON) ",
+        "sqlite": "EXPLAIN QUERY PLAN ",
+    }.get(compiler.dialect.name, "EXPLAIN ")
+    return prefix + compiler.process(element.statement, **kw)
+
+
+@dataclass
+class HotQuery:
+    name: str
+    table: str
+    index: str
+    build: Callable[[], Any]
+
+
+orders = Order.__table__
+products = Product.__table__
+reviews = Review.__table__
+
+# Shapes of the queries in services.py; parameter values only need to be plausible
+HOT_QUERIES = [
+    HotQuery(
+        "seller_sales", "orders", "ix_orders_seller_status_created",
+        lambda: select(orders.c.id, orders.c.total_price).where(
+            orders.c.seller_id == 1,
+            orders.c.status.in_([OrderStatus.CONFIRMED, OrderStatus.SHIPPED, OrderStatus.DELIVERED]),
+            orders.c.created_at >= datetime.utcnow() - timedelta(days=365)
+        )
+    ),
+    HotQuery(
+        "category_products", "products", "ix_products_active_category_price",
+        lambda: select(products).where(
+            products.c.is_active == True,
+            products.c.category_id == 1,
+            products.c.price.between(1.0, 100.0)
+        ).limit(100)
+    ),
+    HotQuery(
+        "trending_products", "products", "ix_products_trending_active_views",
+        lambda: select(products).where(
+            products.c.is_trending == True,
+            products.c.is_active == True
+        ).order_by(desc(products.c.views_count)).limit(10)
+    ),
+    HotQuery(
+        "product_reviews", "reviews", "ix_reviews_product_created",
+        lambda: select(reviews).where(reviews.c.product_id == 1).order_by(desc(reviews.c.created_at))
+    ),
+]
+
+
+@dataclass
+class QueryCheck:
+    name: str
+    table: str
+    expected_index: str
+    sequential_scans: List[str] = field(default_factory=list)
+    indexes_used: List[str] = field(default_factory=list)
+    plan: Any = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.sequential_scans
+
+    @property
+    def uses_expected_index(self) -> bool:
+        return self.expected_index in self.indexes_used
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "table": self.table,
+            "expected_index": self.expected_index,
+            "ok": self.ok,
+            "uses_expected_index": self.uses_expected_index,
+            "sequential_scans": self.sequential_scans,
+            "indexes_used": self.indexes_used
+        }
+
+
+def _postgres_nodes(node: Dict[str, Any]):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _postgres_nodes(child)
+
+
+def scans_from_postgres_plan(plan: Any):
+    """(sequentially scanned tables, index names) from ``EXPLAIN (FORMAT JSON)`` output"""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]["Plan"]
+    sequential, indexes = [], []
+    for node in _postgres_nodes(root):
+        if node.get("Node Type") == "Seq Scan":
+            sequential.append(node.get("Relation Name"))
+        if node.get("Index Name"):
+            indexes.append(node["Index Name"])
+    return sequential, indexes
+
+
+_SQLITE_SCAN = re.compile(r"^(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?")
+
+
+def scans_from_sqlite_plan(rows: List[Any]):
+    """(sequentially scanned tables, index names) from ``EXPLAIN QUERY PLAN`` rows"""
+    sequential, indexes = [], []
+    for row in rows:
+        match = _SQLITE_SCAN.match(row[-1])
+        if not match:
+            continue
+        operation, table, index = match.groups()
+        if index:
+            indexes.append(index)
+        elif operation == "SCAN" and "USING INTEGER PRIMARY KEY" not in row[-1]:
+            sequential.append(table)
+    return sequential, indexes
+
+
+def check_query(conn: Connection, query: HotQuery) -> QueryCheck:
+    result = conn.execute(Explain(query.build()))
+    check = QueryCheck(query.name, query.table, query.index)
+    if conn.dialect.name == "postgresql":
+        check.plan = result.scalar()
+        check.sequential_scans, check.indexes_used = scans_from_postgres_plan(check.plan)
+    elif conn.dialect.name == "sqlite":
+        check.plan = [tuple(row) for row in result]
+        check.sequential_scans, check.indexes_used = scans_from_sqlite_plan(check.plan)
+    else:
+        raise ValueError(f"EXPLAIN parsing is not supported for {conn.dialect.name}")
+    return check
+
+
+def verify_indexes(conn: Connection, queries: Optional[List[HotQuery]] = None,
+                   planner_costs: bool = False) -> List[QueryCheck]:
+    """EXPLAIN every hot query; a query is ok when no table in its plan is scanned sequentially
+
+    Small or freshly migrated tables make the Postgres planner prefer sequential
+    scans regardless of indexes, so unless ``planner_costs`` is set they are
+    disabled for the check. The planner still picks a sequential scan when no
+    usable index exists, which is exactly what this catches.
+    """
+    checks = []
+    with conn.begin():
+        if conn.dialect.name == "postgresql" and not planner_costs:
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for query in queries or HOT_QUERIES:
+            check = check_query(conn, query)
+            if not check.ok:
+                logger.error(f"Sequential scan in {query.name} on {', '.join(check.sequential_scans)}")
+            checks.append(check)
+    return checks
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fail if a hot query falls back to a sequential scan")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./soladia.db"))
+    parser.add_argument("--planner-costs", action="store_true",
+                        help="keep sequential scans enabled and report the planner's real choice")
+    parser.add_argument("--strict", action="store_true",
+                        help="also fail when a query does not use the index created for it")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    try:
+        with engine.connect() as conn:
+            checks = verify_indexes(conn, planner_costs=args.planner_costs)
+    finally:
+        engine.dispose()
+
+    failed = [check for check in checks if not check.ok or (args.strict and not check.uses_expected_index)]
+    if args.json:
+        print(json.dumps([check.to_dict() for check in checks], indent=2))
+    else:
+        for check in checks:
+            status = "SEQ SCAN" if not check.ok else "ok" if check.uses_expected_index else "other"
+            used = ", ".join(check.indexes_used) or "-"
+            print(f"{status:>8}  {check.name:<20} indexes: {used} (expected {check.expected_index})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -39,6 +39,7 @@ class User(Base):
     user_type = Column(Enum(UserType), default=UserType.BOTH)
     is_verified = Column(Boolean, default=False)
     rating = Column(Float, default=0.0)
+    rating_count = Column(Integer, default=0)
     total_sales = Column(Integer, default=0)
     total_purchases = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -70,6 +71,10 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index('ix_products_active_category_price', 'is_active', 'category_id', 'price'),
+        Index('ix_products_trending_active_views', 'is_trending', 'is_active', 'views_count'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), index=True, nullable=False)
@@ -102,6 +107,9 @@ class Product(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index('ix_orders_seller_status_created', 'seller_id', 'status', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     buyer_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
@@ -126,6 +134,9 @@ class Order(Base):
 
 class Review(Base):
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index('ix_reviews_product_created', 'product_id', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     reviewer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -17,8 +17,14 @@ from pydantic import BaseModel, Field
 import redis
 import psutil
 import time
-from collections import defaultdict
-import statistics
+import logging
+
+from config import settings
+from database import SessionLocal, get_db
+from monitoring.alert_engine import AlertCooldownGuard, AlertRuleEngine, CompiledRule
+from monitoring.metric_storage import MetricInfoCache, MetricIngestBuffer, MetricStorage, RetentionPolicy
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
@@ -206,6 +212,41 @@ class NotificationChannel(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+# Raw points are written in bulk by the ingest buffer and folded into 1m/5m/1h rollups
+metric_storage = MetricStorage(
+    MetricDataPoint.__table__,
+    RetentionPolicy(
+        raw=timedelta(hours=settings.MONITORING_RAW_RETENTION_HOURS),
+        tiers=(
+            (60, timedelta(days=settings.MONITORING_RETENTION_1M_DAYS)),
+            (300, timedelta(days=settings.MONITORING_RETENTION_5M_DAYS)),
+            (3600, timedelta(days=settings.MONITORING_RETENTION_1H_DAYS)),
+        )
+    )
+)
+metric_ingest_buffer = MetricIngestBuffer(
+    SessionLocal,
+    metric_storage,
+    max_points=settings.MONITORING_INGEST_BATCH_SIZE,
+    max_latency_ms=settings.MONITORING_INGEST_FLUSH_MS,
+    max_pending=settings.MONITORING_INGEST_MAX_PENDING
+)
+
+_metric_info = MetricInfoCache(settings.MONITORING_METRIC_CACHE_SIZE)
+
+
+def _load_active_alert_rules() -> List[CompiledRule]:
+    """Read active alert rules for the in-memory engine"""
+    db = SessionLocal()
+    try:
+        return [CompiledRule.from_model(rule) for rule in db.query(AlertRule).filter(AlertRule.is_active == True).all()]
+    finally:
+        db.close()
+
+
+# Rules are cached per metric and reloaded after changes; windows live in memory, cooldowns also in Redis
+alert_rule_engine = AlertRuleEngine(loader=_load_active_alert_rules)
+
 # Pydantic models
 class MetricCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
@@ -255,10 +296,16 @@ class MonitoringDashboard(BaseModel):
     health_checks: List[Dict[str, Any]]
 
 class AdvancedMonitoringService:
-    def __init__(self, db_session, redis_client):
+    def __init__(self, db_session, redis_client, storage: MetricStorage = metric_storage,
+                 ingest_buffer: MetricIngestBuffer = metric_ingest_buffer,
+                 rule_engine: AlertRuleEngine = alert_rule_engine):
         self.db = db_session
         self.redis = redis_client
-        self.metrics_cache = {}
+        self.storage = storage
+        self.ingest = ingest_buffer
+        self.rule_engine = rule_engine
+        self.cooldowns = AlertCooldownGuard(redis_client)
+        self.metrics_cache = _metric_info
         self.alert_evaluators = {}
         self.health_checkers = {}
     
@@ -281,6 +328,7 @@ class AdvancedMonitoringService:
         
         self.db.add(metric)
         self.db.commit()
+        self.metrics_cache.put(metric_id, (metric.name, tenant_id))
         
         # Start collection if active
         if metric.is_active:
@@ -290,21 +338,13 @@ class AdvancedMonitoringService:
     
     async def record_metric_data(self, metric_id: str, data_point: MetricDataPointCreate, tenant_id: Optional[str] = None):
         """Record metric data point"""
-        # Verify metric exists
-        metric = self.db.query(MonitoringMetric).filter(MonitoringMetric.metric_id == metric_id).first()
-        if not metric:
-            raise HTTPException(status_code=404, detail="Metric not found")
+        # Verify metric exists (cached after the first lookup)
+        _, metric_tenant_id = self._get_metric_info(metric_id)
         
-        # Create data point
-        data_point_record = MetricDataPoint(
-            metric_id=metric_id,
-            tenant_id=tenant_id or metric.tenant_id,
-            value=data_point.value,
-            labels=data_point.labels
-        )
-        
-        self.db.add(data_point_record)
-        self.db.commit()
+        # Buffer the data point; full batches are flushed now, the rest within the flush interval
+        if self.ingest.add(metric_id, data_point.value, tenant_id or metric_tenant_id, data_point.labels):
+            await self.ingest.flush_async()
+        self.ingest.start()
         
         # Update cache
         await self._update_metric_cache(metric_id, data_point.value)
@@ -333,6 +373,7 @@ class AdvancedMonitoringService:
         
         self.db.add(rule)
         self.db.commit()
+        self.rule_engine.invalidate()
         
         return rule_id
     
@@ -404,38 +445,19 @@ class AdvancedMonitoringService:
         )
     
     async def get_metric_data(self, metric_id: str, start_time: datetime, end_time: datetime, 
-                             aggregation: str = "avg") -> List[Dict[str, Any]]:
+                             aggregation: str = "avg", step_seconds: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get metric data for time range"""
-        # Query data points
-        data_points = self.db.query(MetricDataPoint).filter(
-            MetricDataPoint.metric_id == metric_id,
-            MetricDataPoint.timestamp >= start_time,
-            MetricDataPoint.timestamp <= end_time
-        ).order_by(MetricDataPoint.timestamp).all()
-        
-        if not data_points:
-            return []
-        
-        # Apply aggregation
-        if aggregation == "avg":
-            # Group by time intervals and calculate average
-            return await self._aggregate_data_points(data_points, "avg")
-        elif aggregation == "sum":
-            return await self._aggregate_data_points(data_points, "sum")
-        elif aggregation == "max":
-            return await self._aggregate_data_points(data_points, "max")
-        elif aggregation == "min":
-            return await self._aggregate_data_points(data_points, "min")
-        else:
+        if aggregation not in ("avg", "sum", "max", "min", "count"):
             # Return raw data points
-            return [
-                {
-                    "timestamp": dp.timestamp.isoformat(),
-                    "value": dp.value,
-                    "labels": dp.labels
-                }
-                for dp in data_points
-            ]
+            return self.storage.raw_points(self.db, metric_id, start_time, end_time)
+        
+        series = await self.get_metric_series(metric_id, start_time, end_time, aggregation, step_seconds)
+        return series["points"]
+    
+    async def get_metric_series(self, metric_id: str, start_time: datetime, end_time: datetime,
+                                aggregation: str = "avg", step_seconds: Optional[int] = None) -> Dict[str, Any]:
+        """Bucketed series aggregated in SQL; resolution and source tier follow the range"""
+        return self.storage.query(self.db, metric_id, start_time, end_time, aggregation, step_seconds)
     
     async def acknowledge_alert(self, alert_id: str, user_id: int, notes: Optional[str] = None) -> bool:
         """Acknowledge alert"""
@@ -573,53 +595,15 @@ class AdvancedMonitoringService:
             return False
     
     async def _evaluate_alert_rules(self, metric_id: str, value: float):
-        """Evaluate alert rules for metric"""
-        # Get metric
-        metric = self.db.query(MonitoringMetric).filter(MonitoringMetric.metric_id == metric_id).first()
-        if not metric:
-            return
-        
-        # Get applicable alert rules
-        rules = self.db.query(AlertRule).filter(
-            AlertRule.metric_name == metric.name,
-            AlertRule.is_active == True,
-            (AlertRule.tenant_id == metric.tenant_id) | (AlertRule.tenant_id.is_(None))
-        ).all()
-        
-        for rule in rules:
-            if await self._evaluate_rule_condition(rule, value):
-                await self._trigger_alert(rule, value)
-    
-    async def _evaluate_rule_condition(self, rule: AlertRule, value: float) -> bool:
-        """Evaluate alert rule condition"""
-        conditions = {
-            "gt": lambda v, t: v > t,
-            "lt": lambda v, t: v < t,
-            "eq": lambda v, t: v == t,
-            "ne": lambda v, t: v != t,
-            "gte": lambda v, t: v >= t,
-            "lte": lambda v, t: v <= t
-        }
+        """Evaluate the alert rules bound to this metric over their windows"""
+        metric_name, tenant_id = self._get_metric_info(metric_id)
         
-        condition_func = conditions.get(rule.condition)
-        if not condition_func:
-            return False
-        
-        return condition_func(value, rule.threshold)
+        for firing in self.rule_engine.observe(metric_name, value, tenant_id):
+            if await self.cooldowns.claim(firing):
+                await self._trigger_alert(firing.rule, firing.value)
     
-    async def _trigger_alert(self, rule: AlertRule, value: float):
-        """Trigger alert"""
-        # Check if alert already exists and is active
-        existing_alert = self.db.query(Alert).filter(
-            Alert.rule_id == rule.rule_id,
-            Alert.status == AlertStatus.ACTIVE
-        ).first()
-        
-        if existing_alert:
-            # Check cooldown period
-            if existing_alert.triggered_at > datetime.utcnow() - timedelta(seconds=rule.cooldown_period):
-                return
-        
+    async def _trigger_alert(self, rule: CompiledRule, value: float):
+        """Trigger alert; cooldowns are enforced by the rule engine and the shared cooldown guard"""
         # Create new alert
         alert_id = str(uuid.uuid4())
         alert = Alert(
@@ -639,7 +623,7 @@ class AdvancedMonitoringService:
         # Send notifications
         await self._send_alert_notifications(alert, rule)
     
-    async def _send_alert_notifications(self, alert: Alert, rule: AlertRule):
+    async def _send_alert_notifications(self, alert: Alert, rule: CompiledRule):
         """Send alert notifications"""
         for channel_id in rule.notification_channels:
             channel = self.db.query(NotificationChannel).filter(
@@ -718,49 +702,20 @@ class AdvancedMonitoringService:
             for hc in health_checks
         ]
     
+    def _get_metric_info(self, metric_id: str) -> Tuple[str, Optional[str]]:
+        """Metric name and tenant, from the per-process LRU"""
+        info = self.metrics_cache.get(metric_id)
+        if info is None:
+            metric = self.db.query(MonitoringMetric).filter(MonitoringMetric.metric_id == metric_id).first()
+            if not metric:
+                raise HTTPException(status_code=404, detail="Metric not found")
+            info = (metric.name, metric.tenant_id)
+            self.metrics_cache.put(metric_id, info)
+        return info
+    
     async def _update_metric_cache(self, metric_id: str, value: float):
         """Update metric cache"""
         await self.redis.setex(f"metric:{metric_id}:latest", 300, str(value))
-    
-    async def _aggregate_data_points(self, data_points: List[MetricDataPoint], aggregation: str) -> List[Dict[str, Any]]:
-        """Aggregate data points"""
-        if not data_points:
-            return []
-        
-        # Group by time intervals (e.g., 5-minute intervals)
-        interval_minutes = 5
-        grouped = defaultdict(list)
-        
-        for dp in data_points:
-            # Round timestamp to nearest interval
-            rounded_time = dp.timestamp.replace(
-                minute=(dp.timestamp.minute // interval_minutes) * interval_minutes,
-                second=0,
-                microsecond=0
-            )
-            grouped[rounded_time].append(dp.value)
-        
-        # Calculate aggregation for each group
-        result = []
-        for timestamp, values in grouped.items():
-            if aggregation == "avg":
-                agg_value = statistics.mean(values)
-            elif aggregation == "sum":
-                agg_value = sum(values)
-            elif aggregation == "max":
-                agg_value = max(values)
-            elif aggregation == "min":
-                agg_value = min(values)
-            else:
-                agg_value = values[0]  # First value
-            
-            result.append({
-                "timestamp": timestamp.isoformat(),
-                "value": agg_value,
-                "count": len(values)
-            })
-        
-        return sorted(result, key=lambda x: x["timestamp"])
 
 # Dependency injection
 def get_monitoring_service(db_session = Depends(get_db), redis_client = Depends(get_redis)) -> AdvancedMonitoringService:
@@ -0,0 +1,291 @@
+"""
+In-memory alert rule engine for the Soladia monitoring system
+Rules are indexed per metric and evaluated over O(1) sliding windows; cooldowns are
+checked in memory first and then claimed in Redis so only one process fires each alert
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONDITIONS: Dict[str, Callable[[float, float], bool]] = {
+    "gt": lambda v, t: v > t,
+    "lt": lambda v, t: v < t,
+    "eq": lambda v, t: v == t,
+    "ne": lambda v, t: v != t,
+    "gte": lambda v, t: v >= t,
+    "lte": lambda v, t: v <= t,
+}
+
+
+class SlidingWindow:
+    """Time-bounded window with O(1) amortized sum, count, min and max
+
+    Min and max come from monotonic deques: each value is pushed and popped
+    at most once, so eviction never rescans the window.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._values: Deque[Tuple[float, float]] = deque()
+        self._min: Deque[Tuple[float, float]] = deque()  # increasing values
+        self._max: Deque[Tuple[float, float]] = deque()  # decreasing values
+        self.sum = 0.0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, ts: float, value: float):
+        self._values.append((ts, value))
+        self.sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((ts, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((ts, value))
+        self.evict(ts)
+
+    def evict(self, now: float):
+        cutoff = now - self.seconds
+        while self._values and self._values[0][0] <= cutoff:
+            _, value = self._values.popleft()
+            self.sum -= value
+        while self._min and self._min[0][0] <= cutoff:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= cutoff:
+            self._max.popleft()
+        if not self._values:
+            self.sum = 0.0  # drop accumulated float error whenever the window empties
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def avg(self) -> Optional[float]:
+        return self.sum / len(self._values) if self._values else None
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def last(self) -> Optional[float]:
+        return self._values[-1][1] if self._values else None
+
+    def aggregate(self, name: str) -> Optional[float]:
+        return self.count if name == "count" else getattr(self, name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self.count, "avg": self.avg, "min": self.min, "max": self.max, "last": self.last}
+
+
+@dataclass
+class CompiledRule:
+    """Immutable view of an AlertRule row used on the hot path"""
+    rule_id: str
+    name: str
+    metric_name: str
+    condition: str
+    threshold: float
+    tenant_id: Optional[str] = None
+    evaluation_window: int = 300
+    cooldown_period: int = 300
+    severity: Any = None
+    notification_channels: List[str] = field(default_factory=list)
+    aggregation: str = "avg"
+
+    @classmethod
+    def from_model(cls, rule, aggregation: str = "avg") -> "CompiledRule":
+        return cls(
+            rule_id=rule.rule_id,
+            name=rule.name,
+            metric_name=rule.metric_name,
+            condition=rule.condition,
+            threshold=rule.threshold,
+            tenant_id=rule.tenant_id,
+            evaluation_window=rule.evaluation_window or 300,
+            cooldown_period=rule.cooldown_period or 0,
+            severity=rule.severity,
+            notification_channels=list(rule.notification_channels or []),
+            aggregation=aggregation
+        )
+
+    def applies_to(self, tenant_id: Optional[str]) -> bool:
+        return self.tenant_id is None or self.tenant_id == tenant_id
+
+
+@dataclass
+class RuleFiring:
+    """A rule whose condition held and whose cooldown had expired"""
+    rule: CompiledRule
+    value: float
+    window: Dict[str, Any]
+    fired_at: datetime
+    tenant_id: Optional[str] = None
+
+
+class AlertRuleEngine:
+    """Evaluate only the rules bound to the arriving metric, without touching the database
+
+    Rules are loaded through ``loader`` on first use and after ``invalidate``;
+    ``max_age_seconds`` bounds staleness when another process changes rules.
+    """
+
+    def __init__(self, loader: Optional[Callable[[], Iterable[Any]]] = None,
+                 aggregation: str = "avg", max_age_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self.loader = loader
+        self.aggregation = aggregation
+        self.max_age_seconds = max_age_seconds
+        self.clock = clock
+        self._rules: Dict[str, CompiledRule] = {}
+        self._by_metric: Dict[str, List[CompiledRule]] = {}
+        self._windows: Dict[Tuple[str, Optional[str]], SlidingWindow] = {}
+        self._last_fired: Dict[Tuple[str, Optional[str]], float] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self.evaluations = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None and self.clock() - self._loaded_at < self.max_age_seconds
+
+    def load(self, rules: Iterable[Any]):
+        """Replace the rule set; windows and cooldowns survive for rules that still exist"""
+        compiled = [
+            rule if isinstance(rule, CompiledRule) else CompiledRule.from_model(rule, self.aggregation)
+            for rule in rules
+        ]
+        with self._lock:
+            self._rules = {rule.rule_id: rule for rule in compiled}
+            self._reindex()
+            live = set(self._rules)
+            self._windows = {key: window for key, window in self._windows.items() if key[0] in live}
+            self._last_fired = {key: fired for key, fired in self._last_fired.items() if key[0] in live}
+            self._loaded_at = self.clock()
+
+    def _reindex(self):
+        by_metric: Dict[str, List[CompiledRule]] = {}
+        for rule in self._rules.values():
+            by_metric.setdefault(rule.metric_name, []).append(rule)
+        self._by_metric = by_metric
+
+    def _ensure_loaded(self):
+        if not self.loaded and self.loader is not None:
+            try:
+                self.load(self.loader())
+            except Exception as e:
+                logger.error(f"Failed to load alert rules: {e}")
+
+    def invalidate(self):
+        """Force a reload on the next evaluation"""
+        with self._lock:
+            self._loaded_at = None
+
+    def upsert_rule(self, rule: Any):
+        compiled = rule if isinstance(rule, CompiledRule) else CompiledRule.from_model(rule, self.aggregation)
+        with self._lock:
+            previous = self._rules.get(compiled.rule_id)
+            self._rules[compiled.rule_id] = compiled
+            self._reindex()
+            if previous and previous.evaluation_window != compiled.evaluation_window:
+                self._windows = {key: w for key, w in self._windows.items() if key[0] != compiled.rule_id}
+
+    def remove_rule(self, rule_id: str):
+        with self._lock:
+            self._rules.pop(rule_id, None)
+            self._reindex()
+            self._windows = {key: w for key, w in self._windows.items() if key[0] != rule_id}
+            self._last_fired = {key: f for key, f in self._last_fired.items() if key[0] != rule_id}
+
+    def rules_for(self, metric_name: str) -> List[CompiledRule]:
+        self._ensure_loaded()
+        return list(self._by_metric.get(metric_name, ()))
+
+    def observe(self, metric_name: str, value: float, tenant_id: Optional[str] = None,
+                timestamp: Optional[float] = None) -> List[RuleFiring]:
+        """Fold a data point into its rules' windows and return the rules that fire"""
+        self._ensure_loaded()
+        rules = self._by_metric.get(metric_name)
+        if not rules:
+            return []
+
+        now = self.clock() if timestamp is None else timestamp
+        firings = []
+        with self._lock:
+            for rule in rules:
+                if not rule.applies_to(tenant_id):
+                    continue
+                condition = CONDITIONS.get(rule.condition)
+                if condition is None:
+                    continue
+                # Global rules keep one window per tenant so tenants never mix
+                key = (rule.rule_id, tenant_id)
+                window = self._windows.get(key)
+                if window is None:
+                    window = self._windows[key] = SlidingWindow(rule.evaluation_window)
+                window.add(now, value)
+                self.evaluations += 1
+
+                aggregate = window.aggregate(rule.aggregation)
+                if aggregate is None or not condition(aggregate, rule.threshold):
+                    continue
+                last = self._last_fired.get(key)
+                if last is not None and now - last < rule.cooldown_period:
+                    continue
+                self._last_fired[key] = now
+                firings.append(RuleFiring(
+                    rule, aggregate, window.snapshot(), datetime.utcfromtimestamp(now), tenant_id
+                ))
+        return firings
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rules": len(self._rules),
+            "metrics": len(self._by_metric),
+            "windows": len(self._windows),
+            "evaluations": self.evaluations,
+            "loaded": self.loaded
+        }
+
+
+class AlertCooldownGuard:
+    """Cooldowns shared by every process through one Redis key per rule and tenant
+
+    The engine's in-memory cooldown only covers its own process; a firing
+    is delivered once ``SET NX EX`` claims the key for the cooldown period.
+    When Redis is unreachable the firing is let through, so alerts may be
+    duplicated across processes but are never lost.
+    """
+
+    def __init__(self, redis_client, prefix: str = "alert:cooldown"):
+        self.redis = redis_client
+        self.prefix = prefix
+
+    def key(self, rule_id: str, tenant_id: Optional[str]) -> str:
+        return f"{self.prefix}:{rule_id}:{tenant_id or '*'}"
+
+    async def claim(self, firing: RuleFiring) -> bool:
+        """Whether this process should deliver the firing"""
+        if firing.rule.cooldown_period <= 0:
+            return True
+        try:
+            return bool(await self.redis.set(
+                self.key(firing.rule.rule_id, firing.tenant_id), firing.fired_at.isoformat(),
+                nx=True, ex=firing.rule.cooldown_period
+            ))
+        except Exception as e:
+            logger.error(f"Failed to claim alert cooldown: {e}")
+            return True
@@ -0,0 +1,443 @@
+"""
+Unified Prometheus instrumentation for the Soladia backend
+Counters and fixed-bucket histograms with per-thread lock-free shards and text exposition
+"""
+
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+FANOUT_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Shards:
+    """Per-thread value cells; a thread only ever writes to its own list
+
+    The lock is taken once per thread, when its cell is created. Cells of
+    finished threads are kept so counters never go backwards.
+    """
+
+    def __init__(self, width: int):
+        self.width = width
+        self._cells: Dict[int, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def cell(self) -> List[float]:
+        ident = threading.get_ident()
+        cell = self._cells.get(ident)
+        if cell is None:
+            with self._lock:
+                cell = self._cells.setdefault(ident, [0.0] * self.width)
+        return cell
+
+    def total(self) -> List[float]:
+        totals = [0.0] * self.width
+        for cell in list(self._cells.values()):
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+    def reset(self):
+        with self._lock:
+            self._cells = {}
+
+
+class _CounterChild:
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._shards.cell()[0] += amount
+
+    def values(self) -> List[float]:
+        return self._shards.total()
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # One slot per bucket, one for +Inf, one for the running sum
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value: float):
+        cell = self._shards.cell()
+        cell[bisect_left(self._buckets, value)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def values(self) -> List[float]:
+        return self._shards.total()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: Any, **labels: Any):
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "documentation": self.documentation,
+            "labelnames": list(self.labelnames),
+            "series": [[list(key), child.values()] for key, child in list(self._children.items())]
+        }
+
+    def reset(self):
+        for child in list(self._children.values()):
+            child._shards.reset()
+
+
+class Counter(_Metric):
+    """Monotonic counter; names should end in _total"""
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; observe is a bisect and two list increments"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["Registry"] = None):
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        return render_snapshot(self.snapshot())
+
+
+def merge_snapshots(snapshots: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Sum series with the same name and labels across processes"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "series": {}})
+            for labels, values in metric["series"]:
+                key = tuple(labels)
+                current = target["series"].get(key)
+                if current is None or len(current) != len(values):
+                    target["series"][key] = list(values)
+                else:
+                    target["series"][key] = [a + b for a, b in zip(current, values)]
+    for metric in merged.values():
+        metric["series"] = [[list(key), values] for key, values in metric["series"].items()]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_snapshot(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """Prometheus text exposition format 0.0.4"""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        series = sorted(metric["series"], key=lambda item: item[0])
+        lines.append(f"# HELP {name} {metric['documentation']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric["labelnames"]
+        for labels, values in series:
+            if metric["kind"] == "counter":
+                lines.append(f"{name}{_labels(names, labels)} {_number(values[0])}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip(list(metric["buckets"]) + [math.inf], values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, labels, ('le', _number(bound)))} {_number(cumulative)}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(values[-1])}")
+            lines.append(f"{name}_count{_labels(names, labels)} {_number(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiProcessCollector:
+    """Share metrics between gunicorn/uvicorn workers through snapshot files
+
+    Each worker rewrites ``metrics_<pid>.json`` every ``flush_interval``
+    seconds; whichever worker serves the scrape writes its own file first,
+    then sums all of them. Files of exited workers are kept so counters stay
+    monotonic; clear the directory on deploy.
+    """
+
+    def __init__(self, registry: Registry, directory: str, flush_interval: float = 5.0):
+        self.registry = registry
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+
+    def write(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp_path, self.path)
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        self.write()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "metrics_*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read metrics file {path}: {e}")
+        return merge_snapshots(snapshots)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.write()
+            except Exception as e:
+                logger.error(f"Failed to write metrics snapshot: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+REGISTRY = Registry()
+_multiprocess: Optional[MultiProcessCollector] = None
+
+HTTP_REQUEST_DURATION = Histogram(
+    "soladia_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+DB_QUERY_DURATION = Histogram(
+    "soladia_db_query_duration_seconds", "SQL statement execution time",
+    ("operation",), buckets=DB_BUCKETS
+)
+RPC_REQUEST_DURATION = Histogram(
+    "soladia_rpc_request_duration_seconds", "Solana RPC call latency by method",
+    ("method", "outcome")
+)
+CACHE_REQUESTS = Counter(
+    "soladia_cache_requests_total", "Cache lookups by cache and result",
+    ("cache", "result")
+)
+WEBSOCKET_FANOUT_RECIPIENTS = Histogram(
+    "soladia_websocket_fanout_recipients", "Connections targeted per websocket fan-out",
+    ("channel",), buckets=FANOUT_BUCKETS
+)
+WEBSOCKET_FANOUT_DURATION = Histogram(
+    "soladia_websocket_fanout_duration_seconds", "Time to deliver one websocket fan-out",
+    ("channel",)
+)
+GATEWAY_UPSTREAM_DURATION = Histogram(
+    "soladia_gateway_upstream_duration_seconds", "API gateway time to upstream response headers by route",
+    ("route", "method", "outcome")
+)
+OPERATION_DURATION = Histogram(
+    "soladia_operation_duration_seconds", "Duration of tracked internal operations",
+    ("operation", "outcome")
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "soladia_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    ("pool",), buckets=POOL_WAIT_BUCKETS
+)
+DB_POOL_CONNECTION_HOLD = Histogram(
+    "soladia_db_pool_connection_hold_seconds", "Time a pooled connection stays checked out",
+    ("pool",)
+)
+METRIC_INGEST_DROPPED = Counter(
+    "soladia_metric_ingest_dropped_total", "Monitoring points dropped because the ingest backlog was full"
+)
+
+
+def histogram_quantile(buckets: Sequence[float], counts: Sequence[float], q: float) -> float:
+    """Quantile estimate from per-bucket (non-cumulative) counts, interpolating inside the bucket
+
+    ``counts`` has one slot per bucket plus a trailing +Inf slot, as returned
+    by ``values()[:-1]``; observations past the last bound report that bound.
+    """
+    total = sum(counts)
+    if not total:
+        return 0.0
+    rank = q * total
+    seen = 0.0
+    for i, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if i >= len(buckets):
+                return buckets[-1]
+            lower = buckets[i - 1] if i else 0.0
+            return lower + (buckets[i] - lower) * (rank - seen) / count
+        seen += count
+    return buckets[-1]
+
+
+def route_template(request) -> str:
+    """Route path template (``/api/products/{product_id}``) so label cardinality stays bounded"""
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+def statement_operation(statement: str) -> str:
+    head = statement.lstrip().split(None, 1)
+    return head[0].upper() if head else "UNKNOWN"
+
+
+def instrument_engine(engine):
+    """Record every statement executed on a SQLAlchemy engine"""
+    from sqlalchemy import event
+
+    if getattr(engine, "_soladia_instrumented", False):
+        return engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            DB_QUERY_DURATION.labels(statement_operation(statement)).observe(time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    engine._soladia_instrumented = True
+    return engine
+
+
+def _reset_after_fork():
+    # Forked workers start from zero so the parent's samples are not counted twice
+    REGISTRY.reset()
+    if _multiprocess is not None:
+        _multiprocess._thread = None
+        _multiprocess.start()
+
+
+def configure_multiprocess(directory: Optional[str], flush_interval: float = 5.0) -> Optional[MultiProcessCollector]:
+    """Enable multiprocess mode when a shared directory is configured"""
+    global _multiprocess
+    if not directory:
+        return None
+    if _multiprocess is None:
+        _multiprocess = MultiProcessCollector(REGISTRY, directory, flush_interval)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_reset_after_fork)
+    _multiprocess.start()
+    return _multiprocess
+
+
+def render_metrics() -> str:
+    """Current metrics for this process, or summed across workers in multiprocess mode"""
+    if _multiprocess is not None:
+        return render_snapshot(_multiprocess.collect())
+    return REGISTRY.render()
@@ -0,0 +1,451 @@
+"""
+Metric storage for the Soladia monitoring system
+Buffered bulk ingest, 1m/5m/1h rollups with tiered retention and SQL-side bucketing
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, Integer, String, Float, DateTime, UniqueConstraint, Index, Table, case, cast, delete, extract, func, select
+)
+from sqlalchemy.orm import Session
+
+from database import Base
+from monitoring.instrumentation import METRIC_INGEST_DROPPED
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+# Bucket widths offered to readers, smallest first
+QUERY_STEPS = (10, 60, 300, 900, 3600, 6 * 3600, 86400)
+DEFAULT_MAX_POINTS = 300
+
+AGGREGATIONS = ("avg", "sum", "max", "min", "count")
+
+
+class MetricRollup(Base):
+    __tablename__ = "metric_rollups"
+    __table_args__ = (
+        UniqueConstraint("metric_id", "resolution", "bucket_start", name="uq_metric_rollup_bucket"),
+        Index("ix_metric_rollup_lookup", "metric_id", "resolution", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    metric_id = Column(String(36), nullable=False)
+    tenant_id = Column(String(36), nullable=True)
+    resolution = Column(Integer, nullable=False)  # seconds: 60, 300 or 3600
+    bucket_start = Column(DateTime, nullable=False)
+
+    count = Column(Integer, nullable=False, default=0)
+    sum = Column(Float, nullable=False, default=0.0)
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+    last = Column(Float, nullable=True)
+    last_at = Column(DateTime, nullable=True)
+
+
+rollups_table = MetricRollup.__table__
+
+
+@dataclass
+class RetentionPolicy:
+    """How long each tier is kept; raw points are dropped first"""
+    raw: timedelta = timedelta(hours=24)
+    tiers: Tuple[Tuple[int, timedelta], ...] = (
+        (60, timedelta(days=7)),
+        (300, timedelta(days=30)),
+        (3600, timedelta(days=365)),
+    )
+
+    @property
+    def resolutions(self) -> List[int]:
+        return [resolution for resolution, _ in self.tiers]
+
+    def retention(self, resolution: int) -> timedelta:
+        return dict(self.tiers)[resolution]
+
+
+@dataclass
+class PendingPoint:
+    metric_id: str
+    tenant_id: Optional[str]
+    value: float
+    timestamp: datetime
+    labels: Dict[str, Any]
+
+
+def bucket_start(timestamp: datetime, resolution: int) -> datetime:
+    seconds = int((timestamp - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=seconds - seconds % resolution)
+
+
+def pick_step(start: datetime, end: datetime, max_points: int = DEFAULT_MAX_POINTS) -> int:
+    """Smallest bucket width that keeps the series under max_points"""
+    span = max((end - start).total_seconds(), 1)
+    for step in QUERY_STEPS:
+        if span / step <= max_points:
+            return step
+    return QUERY_STEPS[-1]
+
+
+def bucket_expression(column, step: int, dialect: str):
+    """Integer epoch bucketing evaluated by the database"""
+    if dialect == "postgresql":
+        return func.floor(extract("epoch", column) / step) * step
+    # Integer division already floors for post-epoch timestamps
+    return cast(func.strftime("%s", column), Integer) / step * step
+
+
+class MetricStorage:
+    """Reads and writes raw metric points and their rollups
+
+    The raw table is passed in so the storage can sit under any table with
+    metric_id, tenant_id, value, timestamp and labels columns.
+    """
+
+    def __init__(self, raw_table: Table, retention: Optional[RetentionPolicy] = None):
+        self.raw_table = raw_table
+        self.retention = retention or RetentionPolicy()
+
+    # Writes
+
+    def write(self, db: Session, points: List[PendingPoint]) -> int:
+        """Bulk insert raw points and merge them into every rollup tier; caller commits"""
+        if not points:
+            return 0
+        extra = {"created_at": datetime.utcnow()} if "created_at" in self.raw_table.c else {}
+        db.execute(self.raw_table.insert(), [
+            {
+                "metric_id": point.metric_id,
+                "tenant_id": point.tenant_id,
+                "value": point.value,
+                "timestamp": point.timestamp,
+                "labels": point.labels,
+                **extra
+            }
+            for point in points
+        ])
+        self._merge_rollups(db, points)
+        return len(points)
+
+    def _merge_rollups(self, db: Session, points: List[PendingPoint]):
+        buckets: Dict[Tuple[str, int, datetime], Dict[str, Any]] = {}
+        for point in points:
+            for resolution in self.retention.resolutions:
+                key = (point.metric_id, resolution, bucket_start(point.timestamp, resolution))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = {
+                        "metric_id": point.metric_id, "tenant_id": point.tenant_id,
+                        "resolution": resolution, "bucket_start": key[2],
+                        "count": 1, "sum": point.value, "min": point.value, "max": point.value,
+                        "last": point.value, "last_at": point.timestamp
+                    }
+                    continue
+                bucket["count"] += 1
+                bucket["sum"] += point.value
+                bucket["min"] = min(bucket["min"], point.value)
+                bucket["max"] = max(bucket["max"], point.value)
+                if point.timestamp >= bucket["last_at"]:
+                    bucket["last"], bucket["last_at"] = point.value, point.timestamp
+
+        rows = list(buckets.values())
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            self._upsert(db, rows, dialect)
+        else:
+            self._merge_rows(db, rows)
+
+    def _upsert(self, db: Session, rows: List[Dict[str, Any]], dialect: str):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        statement = insert(rollups_table)
+        current, incoming = rollups_table.c, statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=["metric_id", "resolution", "bucket_start"],
+            set_={
+                "count": current["count"] + incoming["count"],
+                "sum": current["sum"] + incoming["sum"],
+                "min": func.min(current["min"], incoming["min"]) if dialect == "sqlite"
+                else func.least(current["min"], incoming["min"]),
+                "max": func.max(current["max"], incoming["max"]) if dialect == "sqlite"
+                else func.greatest(current["max"], incoming["max"]),
+                "last": case((incoming["last_at"] >= current["last_at"], incoming["last"]), else_=current["last"]),
+                "last_at": case((incoming["last_at"] >= current["last_at"], incoming["last_at"]),
+                                else_=current["last_at"]),
+            }
+        )
+        db.execute(statement, rows)
+
+    def _merge_rows(self, db: Session, rows: List[Dict[str, Any]]):
+        """Portable fallback: read-modify-write per bucket"""
+        for row in rows:
+            existing = db.query(MetricRollup).filter(
+                MetricRollup.metric_id == row["metric_id"],
+                MetricRollup.resolution == row["resolution"],
+                MetricRollup.bucket_start == row["bucket_start"]
+            ).first()
+            if existing is None:
+                db.add(MetricRollup(**row))
+                continue
+            existing.count += row["count"]
+            existing.sum += row["sum"]
+            existing.min = min(existing.min, row["min"])
+            existing.max = max(existing.max, row["max"])
+            if row["last_at"] >= existing.last_at:
+                existing.last, existing.last_at = row["last"], row["last_at"]
+
+    def prune(self, db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Drop raw points and rollups older than their tier's retention"""
+        now = now or datetime.utcnow()
+        deleted = {
+            "raw": db.execute(delete(self.raw_table).where(
+                self.raw_table.c.timestamp < now - self.retention.raw
+            )).rowcount
+        }
+        for resolution, keep in self.retention.tiers:
+            deleted[f"{resolution}s"] = db.execute(delete(rollups_table).where(
+                rollups_table.c.resolution == resolution,
+                rollups_table.c.bucket_start < now - keep
+            )).rowcount
+        db.commit()
+        return deleted
+
+    # Reads
+
+    def choose_source(self, start: datetime, step: int, now: Optional[datetime] = None) -> Optional[int]:
+        """Coarsest rollup tier that divides the step and still covers start; None means raw
+
+        Raw points are only read when start is inside the raw retention window,
+        since older ones have been pruned whatever the step.
+        """
+        now = now or datetime.utcnow()
+        candidates = [
+            resolution for resolution, keep in self.retention.tiers
+            if step % resolution == 0 and start >= now - keep
+        ]
+        if candidates:
+            return max(candidates)
+        if start >= now - self.retention.raw:
+            return None
+        # Past the raw window: the finest tier that still covers start, else the longest-lived one
+        covering = [resolution for resolution, keep in self.retention.tiers if start >= now - keep]
+        if covering:
+            return min(covering)
+        return max(self.retention.tiers, key=lambda tier: tier[1])[0]
+
+    def query(self, db: Session, metric_id: str, start: datetime, end: datetime,
+              aggregation: str = "avg", step: Optional[int] = None,
+              max_points: int = DEFAULT_MAX_POINTS, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Bucketed series computed in SQL, from rollups where they cover the range"""
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation: {aggregation}")
+        step = step or pick_step(start, end, max_points)
+        resolution = self.choose_source(start, step, now)
+        step = max(step, resolution or 0)
+        dialect = db.get_bind().dialect.name
+
+        if resolution is None:
+            table = self.raw_table
+            bucket = bucket_expression(table.c.timestamp, step, dialect).label("bucket")
+            columns = {
+                "avg": func.avg(table.c.value),
+                "sum": func.sum(table.c.value),
+                "max": func.max(table.c.value),
+                "min": func.min(table.c.value),
+                "count": func.count(),
+            }
+            filters = [table.c.metric_id == metric_id, table.c.timestamp >= start, table.c.timestamp <= end]
+            count_column = func.count()
+        else:
+            table = rollups_table
+            bucket = bucket_expression(table.c.bucket_start, step, dialect).label("bucket")
+            columns = {
+                "avg": func.sum(table.c.sum) / func.sum(table.c["count"]),
+                "sum": func.sum(table.c.sum),
+                "max": func.max(table.c.max),
+                "min": func.min(table.c.min),
+                "count": func.sum(table.c["count"]),
+            }
+            filters = [
+                table.c.metric_id == metric_id, table.c.resolution == resolution,
+                table.c.bucket_start >= bucket_start(start, resolution), table.c.bucket_start <= end
+            ]
+            count_column = func.sum(table.c["count"])
+
+        query = (
+            select(bucket, columns[aggregation].label("value"), count_column.label("count"))
+            .where(*filters)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        points = [
+            {
+                "timestamp": (EPOCH + timedelta(seconds=int(row.bucket))).isoformat(),
+                "value": float(row.value) if row.value is not None else None,
+                "count": int(row.count or 0)
+            }
+            for row in db.execute(query)
+        ]
+        return {
+            "step_seconds": step,
+            "source": "raw" if resolution is None else f"rollup_{resolution}s",
+            "points": points
+        }
+
+    def raw_points(self, db: Session, metric_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        table = self.raw_table
+        rows = db.execute(
+            select(table.c.timestamp, table.c.value, table.c.labels)
+            .where(table.c.metric_id == metric_id, table.c.timestamp >= start, table.c.timestamp <= end)
+            .order_by(table.c.timestamp)
+        )
+        return [{"timestamp": row.timestamp.isoformat(), "value": row.value, "labels": row.labels} for row in rows]
+
+
+class MetricInfoCache:
+    """Bounded LRU of metric_id -> (name, tenant_id); metrics are immutable once created"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, metric_id: str) -> Optional[Tuple[str, Optional[str]]]:
+        with self._lock:
+            info = self._entries.get(metric_id)
+            if info is not None:
+                self._entries.move_to_end(metric_id)
+            return info
+
+    def put(self, metric_id: str, info: Tuple[str, Optional[str]]):
+        with self._lock:
+            self._entries[metric_id] = info
+            self._entries.move_to_end(metric_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MetricIngestBuffer:
+    """Collects data points and flushes them in bulk every N points or T milliseconds
+
+    At most max_pending points are held; while flushes keep failing the
+    oldest are dropped and counted in ``dropped_points``.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], storage: MetricStorage,
+                 max_points: int = 500, max_latency_ms: float = 1000.0, max_pending: Optional[int] = None):
+        self.session_factory = session_factory
+        self.storage = storage
+        self.max_points = max_points
+        self.max_latency_ms = max_latency_ms
+        self.max_pending = max(max_pending or max_points * 100, max_points)
+        self._pending: List[PendingPoint] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_points = 0
+        self.flush_count = 0
+        self.dropped_points = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, metric_id: str, value: float, tenant_id: Optional[str] = None,
+            labels: Optional[Dict[str, Any]] = None, timestamp: Optional[datetime] = None) -> bool:
+        """Queue a point; returns True when the batch is full and should be flushed"""
+        point = PendingPoint(metric_id, tenant_id, value, timestamp or datetime.utcnow(), labels or {})
+        with self._lock:
+            self._pending.append(point)
+            self._trim()
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            return len(self._pending) >= self.max_points
+
+    def _trim(self):
+        """Drop the oldest points beyond max_pending; caller holds the lock"""
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped_points += overflow
+            METRIC_INGEST_DROPPED.inc(overflow)
+
+    def due(self) -> bool:
+        with self._lock:
+            if not self._pending:
+                return False
+            return (len(self._pending) >= self.max_points
+                    or (time.monotonic() - self._oldest) * 1000 >= self.max_latency_ms)
+
+    def flush(self) -> int:
+        """Write everything pending in one transaction"""
+        with self._lock:
+            points, self._pending, self._oldest = self._pending, [], None
+        if not points:
+            return 0
+
+        db = self.session_factory()
+        try:
+            written = self.storage.write(db, points)
+            db.commit()
+            self.flushed_points += written
+            self.flush_count += 1
+            return written
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to flush {len(points)} metric points: {e}")
+            with self._lock:
+                # Put the batch back in front so it is retried on the next flush
+                self._pending = points + self._pending
+                self._trim()
+                self._oldest = self._oldest or time.monotonic()
+            return 0
+        finally:
+            db.close()
+
+    async def flush_async(self) -> int:
+        return await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    async def run(self):
+        """Flush whenever the oldest pending point exceeds max_latency_ms"""
+        interval = max(self.max_latency_ms / 4000, 0.01)
+        while True:
+            try:
+                if self.due():
+                    await self.flush_async()
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                self.flush()
+                raise
+            except Exception as e:
+                logger.error(f"Metric ingest loop error: {e}")
+                await asyncio.sleep(interval)
+
+    def start(self):
+        """Start the background flusher on the running loop (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
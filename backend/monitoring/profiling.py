@@ -0,0 +1,323 @@
+"""
+Live-worker profiling for the Soladia backend
+Stack sampling from a background thread, slow-request capture and tracemalloc diffs
+"""
+
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (function, filename, first line)
+Frame = Tuple[str, str, int]
+
+MAX_STACK_DEPTH = 128
+
+# Leaf frames where a thread is blocked rather than running; dropped in cpu mode
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("selectors.py", "poll"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+}
+
+
+def _stack(frame) -> Tuple[Frame, ...]:
+    """Root-first stack keyed by function, so lines of one function merge in flamegraphs"""
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        frames.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+
+def _is_idle(stack: Tuple[Frame, ...]) -> bool:
+    if not stack:
+        return True
+    name, filename, _ = stack[-1]
+    return (os.path.basename(filename), name) in IDLE_FRAMES
+
+
+def _label(frame: Frame) -> str:
+    name, filename, line = frame
+    if not filename:
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class Profile:
+    """Aggregated stack samples, exportable as collapsed stacks or speedscope JSON"""
+
+    def __init__(self, name: str, interval: float, mode: str = "wall"):
+        self.name = name
+        self.interval = interval
+        self.mode = mode
+        self.started_at = datetime.utcnow()
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.duration = 0.0
+
+    def add(self, thread_name: str, stack: Tuple[Frame, ...]):
+        self.samples[((f"thread {thread_name}", "", 0),) + stack] += 1
+        self.sample_count += 1
+
+    def top_functions(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Functions by self time (leaf samples)"""
+        leaves: Counter = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack[-1]] += count
+        total = max(sum(leaves.values()), 1)
+        return [
+            {"function": _label(frame), "samples": count, "percent": round(100.0 * count / total, 2)}
+            for frame, count in leaves.most_common(limit)
+        ]
+
+    def to_collapsed(self) -> str:
+        """Brendan Gregg collapsed format, one ``frame;frame;frame count`` line per stack"""
+        return "".join(
+            ";".join(_label(frame) for frame in stack) + f" {count}\n"
+            for stack, count in sorted(self.samples.items(), key=lambda item: -item[1])
+        )
+
+    def to_speedscope(self) -> Dict[str, Any]:
+        """speedscope sampled-profile file"""
+        index: Dict[Frame, int] = {}
+        frames = []
+        samples = []
+        weights = []
+        for stack, count in self.samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": filename, "line": line} if filename else {"name": name})
+                indices.append(index[frame])
+            samples.append(indices)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights
+            }],
+            "name": self.name,
+            "exporter": "soladia-profiler"
+        }
+
+    def export(self, fmt: str = "speedscope") -> Tuple[str, str]:
+        """(body, media type) for the requested format"""
+        if fmt == "collapsed":
+            return self.to_collapsed(), "text/plain"
+        return json.dumps(self.to_speedscope()), "application/json"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(self.duration, 3),
+            "samples": self.sample_count,
+            "top_functions": self.top_functions()
+        }
+
+
+def sample_threads(profile: Profile, exclude: set, idle: bool = True):
+    """Add one sample of every thread's current stack to the profile"""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    for ident, frame in sys._current_frames().items():
+        if ident in exclude:
+            continue
+        stack = _stack(frame)
+        if not idle and _is_idle(stack):
+            continue
+        profile.add(names.get(ident, str(ident)), stack)
+
+
+class SamplingProfiler:
+    """On-demand sampler; ``wall`` keeps blocked threads, ``cpu`` drops them"""
+
+    def __init__(self, interval: float = 0.005, mode: str = "wall"):
+        if mode not in ("wall", "cpu"):
+            raise ValueError("mode must be 'wall' or 'cpu'")
+        self.interval = interval
+        self.mode = mode
+
+    def run(self, seconds: float, name: str = "on-demand") -> Profile:
+        """Sample every other thread for ``seconds``; call from a worker thread"""
+        profile = Profile(name, self.interval, self.mode)
+        exclude = {threading.get_ident()}
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            sample_threads(profile, exclude, idle=self.mode == "wall")
+            time.sleep(self.interval)
+        profile.duration = time.perf_counter() - start
+        return profile
+
+
+class SlowRequestCapture:
+    """Profiles requests that run past a latency threshold
+
+    A watchdog thread samples stacks only while some in-flight request is
+    overdue, so fast requests cost two dict operations. Captures are
+    rate-limited and kept in a ring buffer.
+
+    Samples are taken per thread, not per request: every async handler runs
+    on the event-loop thread, so a slow request's profile also contains the
+    stacks of requests that were running concurrently with it.
+    """
+
+    def __init__(self, threshold_ms: float = 2000.0, interval: float = 0.01, max_profiles: int = 20,
+                 min_interval_seconds: float = 60.0, max_samples: int = 5000):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval
+        self.min_interval_seconds = min_interval_seconds
+        self.max_samples = max_samples
+        self.captures: Deque[Dict[str, Any]] = deque(maxlen=max_profiles)
+        self.skipped = 0
+        self._active: Dict[int, Tuple[float, Profile]] = {}
+        self._ids = itertools.count(1)
+        self._last_capture: Optional[float] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, name: str) -> int:
+        token = next(self._ids)
+        with self._lock:
+            self._active[token] = (time.perf_counter(), Profile(name, self.interval))
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._thread.start()
+        return token
+
+    def end(self, token: int, name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            started, profile = self._active.pop(token, (None, None))
+        if profile is None:
+            return None
+        duration = time.perf_counter() - started
+        if duration < self.threshold or not profile.sample_count:
+            return None
+
+        now = time.monotonic()
+        if self._last_capture is not None and now - self._last_capture < self.min_interval_seconds:
+            self.skipped += 1
+            return None
+        self._last_capture = now
+        profile.name = name or profile.name
+        profile.duration = duration
+        capture = {"id": token, "name": profile.name, "duration_ms": round(duration * 1000, 2), "profile": profile}
+        self.captures.append(capture)
+        logger.info(f"Captured profile for slow request {profile.name} ({capture['duration_ms']}ms)")
+        return capture
+
+    def sample_overdue(self) -> float:
+        """Sample once if any request is overdue; returns seconds until the next check"""
+        now = time.perf_counter()
+        with self._lock:
+            active = list(self._active.values())
+        if not active:
+            return self.threshold
+        overdue = [profile for started, profile in active
+                   if now - started >= self.threshold and profile.sample_count < self.max_samples]
+        if not overdue:
+            return max(self.interval, min(started for started, _ in active) + self.threshold - now)
+
+        # One snapshot of all threads is shared by every overdue request
+        snapshot = Profile("snapshot", self.interval)
+        sample_threads(snapshot, {threading.get_ident()})
+        for profile in overdue:
+            for stack, count in snapshot.samples.items():
+                profile.samples[stack] += count
+            profile.sample_count += 1
+        return self.interval
+
+    def _run(self):
+        delay = self.interval
+        while True:
+            time.sleep(delay)
+            try:
+                delay = self.sample_overdue()
+            except Exception as e:
+                logger.error(f"Failed to sample slow requests: {e}")
+                delay = self.threshold
+
+    def get(self, capture_id: int) -> Optional[Dict[str, Any]]:
+        return next((capture for capture in self.captures if capture["id"] == capture_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {**capture["profile"].summary(), "id": capture["id"], "duration_ms": capture["duration_ms"]}
+            for capture in reversed(self.captures)
+        ]
+
+
+class AllocationTracker:
+    """Labelled tracemalloc snapshots and top-allocation diffs between them"""
+
+    def __init__(self, max_snapshots: int = 10, frames: int = 10):
+        self.max_snapshots = max_snapshots
+        self.frames = frames
+        self.snapshots: "OrderedDict[str, Tuple[datetime, tracemalloc.Snapshot]]" = OrderedDict()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def snapshot(self, label: Optional[str] = None) -> str:
+        """Take a snapshot, starting tracemalloc on first use"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        label = label or datetime.utcnow().strftime("%Y%m%dT%H%M%S.%f")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        self.snapshots[label] = (datetime.utcnow(), snapshot)
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+        return label
+
+    def diff(self, before: str, after: str, limit: int = 20, key_type: str = "lineno") -> List[Dict[str, Any]]:
+        if before not in self.snapshots or after not in self.snapshots:
+            raise KeyError("Unknown snapshot label")
+        stats = self.snapshots[after][1].compare_to(self.snapshots[before][1], key_type)
+        return [
+            {
+                "file": stat.traceback[0].filename,
+                "line": stat.traceback[0].lineno,
+                "size_diff_kb": round(stat.size_diff / 1024, 2),
+                "size_kb": round(stat.size / 1024, 2),
+                "count_diff": stat.count_diff,
+                "count": stat.count
+            }
+            for stat in stats[:limit]
+        ]
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [{"label": label, "taken_at": taken_at.isoformat()} for label, (taken_at, _) in self.snapshots.items()]
+
+    def stop(self):
+        self.snapshots.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
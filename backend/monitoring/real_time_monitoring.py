@@ -22,6 +22,8 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from monitoring.scheduler import PeriodicScheduler
+
 logger = logging.getLogger(__name__)
 
 class AlertLevel(Enum):
@@ -87,6 +89,7 @@ class RealTimeMonitor:
         self.metrics: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
         self.alert_handlers: Dict[AlertType, List[Callable]] = defaultdict(list)
         self.monitoring_tasks = []
+        self.scheduler = PeriodicScheduler()
         self.is_running = False
         
         # Alert thresholds
@@ -104,15 +107,15 @@ class RealTimeMonitor:
         try:
             self.is_running = True
             
-            # Start monitoring tasks
-            self.monitoring_tasks = [
-                asyncio.create_task(self._monitor_transactions()),
-                asyncio.create_task(self._monitor_system_health()),
-                asyncio.create_task(self._monitor_wallet_activity()),
-                asyncio.create_task(self._monitor_performance()),
-                asyncio.create_task(self._process_alerts()),
-                asyncio.create_task(self._websocket_monitor())
-            ]
+            # Periodic checks share one scheduler task; the WebSocket stream keeps its own
+            self.scheduler.add("transactions", self._monitor_transactions, interval=10, error_interval=30)
+            self.scheduler.add("system_health", self._check_system_health, interval=60)
+            self.scheduler.add("wallet_activity", self._check_wallet_activity, interval=30, error_interval=60)
+            self.scheduler.add("performance", self._check_performance_metrics, interval=30, error_interval=60)
+            self.scheduler.add("alerts", self._process_pending_alerts, interval=5, error_interval=10)
+            self.scheduler.start()
+            
+            self.monitoring_tasks = [asyncio.create_task(self._websocket_monitor())]
             
             logger.info("Real-time monitoring started")
             
@@ -125,7 +128,10 @@ class RealTimeMonitor:
         try:
             self.is_running = False
             
-            # Cancel all monitoring tasks
+            # Cancel the scheduler and the WebSocket task
+            await self.scheduler.stop()
+            for name in list(self.scheduler.jobs):
+                self.scheduler.remove(name)
             for task in self.monitoring_tasks:
                 task.cancel()
             
@@ -137,107 +143,11 @@ class RealTimeMonitor:
             logger.error(f"Failed to stop monitoring: {e}")
     
     async def _monitor_transactions(self):
-        """Monitor blockchain transactions"""
-        try:
-            while self.is_running:
-                try:
-                    # Get recent transactions
-                    recent_transactions = await self._get_recent_transactions()
-                    
-                    for tx in recent_transactions:
-                        await self._analyze_transaction(tx)
-                    
-                    # Wait before next check
-                    await asyncio.sleep(10)
-                    
-                except Exception as e:
-                    logger.error(f"Transaction monitoring error: {e}")
-                    await asyncio.sleep(30)
-                    
-        except asyncio.CancelledError:
-            logger.info("Transaction monitoring cancelled")
-        except Exception as e:
-            logger.error(f"Transaction monitoring failed: {e}")
-    
-    async def _monitor_system_health(self):
-        """Monitor system health metrics"""
-        try:
-            while self.is_running:
-                try:
-                    # Check system metrics
-                    await self._check_system_health()
-                    
-                    # Wait before next check
-                    await asyncio.sleep(60)
-                    
-                except Exception as e:
-                    logger.error(f"System health monitoring error: {e}")
-                    await asyncio.sleep(60)
-                    
-        except asyncio.CancelledError:
-            logger.info("System health monitoring cancelled")
-        except Exception as e:
-            logger.error(f"System health monitoring failed: {e}")
-    
-    async def _monitor_wallet_activity(self):
-        """Monitor wallet activity for suspicious behavior"""
-        try:
-            while self.is_running:
-                try:
-                    # Check wallet activity
-                    await self._check_wallet_activity()
-                    
-                    # Wait before next check
-                    await asyncio.sleep(30)
-                    
-                except Exception as e:
-                    logger.error(f"Wallet activity monitoring error: {e}")
-                    await asyncio.sleep(60)
-                    
-        except asyncio.CancelledError:
-            logger.info("Wallet activity monitoring cancelled")
-        except Exception as e:
-            logger.error(f"Wallet activity monitoring failed: {e}")
-    
-    async def _monitor_performance(self):
-        """Monitor system performance metrics"""
-        try:
-            while self.is_running:
-                try:
-                    # Check performance metrics
-                    await self._check_performance_metrics()
-                    
-                    # Wait before next check
-                    await asyncio.sleep(30)
-                    
-                except Exception as e:
-                    logger.error(f"Performance monitoring error: {e}")
-                    await asyncio.sleep(60)
-                    
-        except asyncio.CancelledError:
-            logger.info("Performance monitoring cancelled")
-        except Exception as e:
-            logger.error(f"Performance monitoring failed: {e}")
-    
-    async def _process_alerts(self):
-        """Process and send alerts"""
-        try:
-            while self.is_running:
-                try:
-                    # Process pending alerts
-                    await self._process_pending_alerts()
-                    
-                    # Wait before next check
-                    await asyncio.sleep(5)
-                    
-                except Exception as e:
-                    logger.error(f"Alert processing error: {e}")
-                    await asyncio.sleep(10)
-                    
-        except asyncio.CancelledError:
-            logger.info("Alert processing cancelled")
-        except Exception as e:
-            logger.error(f"Alert processing failed: {e}")
+        """Analyze recent blockchain transactions"""
+        recent_transactions = await self._get_recent_transactions()
+        
+        for tx in recent_transactions:
+            await self._analyze_transaction(tx)
     
     async def _websocket_monitor(self):
         """Monitor blockchain events via WebSocket"""
@@ -0,0 +1,146 @@
+"""
+Single-task periodic scheduler for Soladia monitoring jobs
+Replaces one polling loop per check with a timer heap driven by one asyncio task
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    fn: Callable[[], Awaitable[Any]]
+    interval: float
+    error_interval: float
+    runs: int = 0
+    failures: int = 0
+    last_duration_ms: float = 0.0
+    last_error: Optional[str] = None
+
+
+class PeriodicScheduler:
+    """Run async jobs at fixed intervals from one task
+
+    Each due job runs in its own task and is rescheduled when it finishes,
+    so a slow job never delays the others and never overlaps itself. A
+    failed job is retried after its ``error_interval`` instead of its
+    normal interval.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def add(self, name: str, fn: Callable[[], Awaitable[Any]], interval: float,
+            error_interval: Optional[float] = None, initial_delay: float = 0.0):
+        """Register a job; the first run happens after initial_delay"""
+        job = ScheduledJob(name, fn, interval, error_interval or interval)
+        self.jobs[name] = job
+        heapq.heappush(self._heap, (self.clock() + initial_delay, next(self._sequence), name))
+        self._wakeup.set()
+
+    def remove(self, name: str):
+        # Heap entries for removed jobs are skipped when they come due
+        self.jobs.pop(name, None)
+
+    def next_delay(self) -> Optional[float]:
+        while self._heap and self._heap[0][2] not in self.jobs:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
+
+    async def _run_job(self, job: ScheduledJob) -> float:
+        started = self.clock()
+        try:
+            await job.fn()
+            job.last_error = None
+            return job.interval
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"Scheduled job {job.name} failed: {e}")
+            return job.error_interval
+        finally:
+            job.runs += 1
+            job.last_duration_ms = round((self.clock() - started) * 1000, 2)
+
+    async def _run_and_reschedule(self, job: ScheduledJob):
+        try:
+            delay = await self._run_job(job)
+        finally:
+            self._running.pop(job.name, None)
+        if self.jobs.get(job.name) is job:
+            heapq.heappush(self._heap, (self.clock() + delay, next(self._sequence), job.name))
+            self._wakeup.set()
+
+    def start_pending(self) -> Dict[str, asyncio.Task]:
+        """Start a task for every job that is due now; each reschedules itself when done"""
+        now = self.clock()
+        started = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, _, name = heapq.heappop(self._heap)
+            job = self.jobs.get(name)
+            if job is not None:
+                task = asyncio.get_running_loop().create_task(self._run_and_reschedule(job))
+                started[name] = self._running[name] = task
+        return started
+
+    async def run_pending(self) -> List[str]:
+        """Run every job that is due now and wait for them to finish"""
+        started = self.start_pending()
+        await asyncio.gather(*started.values())
+        return list(started)
+
+    async def run(self):
+        while True:
+            self.start_pending()
+            delay = self.next_delay()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        running, self._running = list(self._running.values()), {}
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "interval": job.interval,
+                "runs": job.runs,
+                "failures": job.failures,
+                "last_duration_ms": job.last_duration_ms,
+                "last_error": job.last_error,
+                "running": name in self._running
+            }
+            for name, job in self.jobs.items()
+        }
@@ -0,0 +1,429 @@
+"""
+Request-scoped tracing for the Soladia backend
+OpenTelemetry-compatible spans with head sampling, an in-process exporter and optional OTLP/HTTP export
+"""
+
+import inspect
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from monitoring.instrumentation import statement_operation
+
+logger = logging.getLogger(__name__)
+
+MAX_STATEMENT_LENGTH = 500
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+CLIENT_CATEGORIES = {"db", "rpc", "redis", "http"}
+
+
+def _new_id(length: int) -> str:
+    return os.urandom(length // 2).hex()
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """W3C traceparent -> (trace_id, parent_span_id, sampled)"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3][:2], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    category: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "category": self.category,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class RequestTrace:
+    """Per-request span timings; span objects are only kept when the trace is sampled"""
+
+    def __init__(self, trace_id: str, sampled: bool, root: Optional[Span] = None):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.root = root
+        self.spans: List[Span] = []
+        self.timings: Dict[str, List[float]] = {}
+
+    def record(self, category: str, duration_ms: float):
+        timing = self.timings.get(category)
+        if timing is None:
+            self.timings[category] = [duration_ms, 1]
+        else:
+            timing[0] += duration_ms
+            timing[1] += 1
+
+    def server_timing(self, total_ms: Optional[float] = None) -> str:
+        """Server-Timing header value with one entry per span category"""
+        entries = [
+            f'{category};dur={duration:.1f};desc="{int(count)} calls"'
+            for category, (duration, count) in sorted(self.timings.items())
+        ]
+        if total_ms is not None:
+            entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+
+@dataclass
+class _SpanHandle:
+    trace: RequestTrace
+    category: str
+    started: float
+    span: Optional[Span] = None
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+
+class InMemoryExporter:
+    """Keeps the most recent sampled traces for inspection in-process"""
+
+    def __init__(self, max_traces: int = 500):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        if not spans:
+            return
+        with self._lock:
+            self._traces[spans[0].trace_id] = spans
+            self._traces.move_to_end(spans[0].trace_id)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[List[Dict[str, Any]]]:
+        spans = self._traces.get(trace_id)
+        return [span.to_dict() for span in spans] if spans else None
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._traces.values())[-limit:]
+        summaries = []
+        for spans in reversed(traces):
+            root = next((span for span in spans if span.category == "request"), spans[0])
+            breakdown: Dict[str, float] = {}
+            for span in spans:
+                if span is not root:
+                    breakdown[span.category] = breakdown.get(span.category, 0.0) + span.duration_ms
+            summaries.append({
+                "trace_id": root.trace_id,
+                "name": root.name,
+                "duration_ms": round(root.duration_ms, 3),
+                "spans": len(spans),
+                "breakdown_ms": {category: round(ms, 3) for category, ms in breakdown.items()}
+            })
+        return summaries
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """OTLP/HTTP JSON payload for a batch of spans"""
+    otlp_spans = []
+    for span in spans:
+        if span.category == "request":
+            kind = SPAN_KIND_SERVER
+        elif span.category in CLIENT_CATEGORIES:
+            kind = SPAN_KIND_CLIENT
+        else:
+            kind = SPAN_KIND_INTERNAL
+        status = {"code": STATUS_ERROR, "message": span.error} if span.error else {"code": STATUS_OK}
+        otlp_spans.append({
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            "kind": kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+            "status": status
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "soladia.tracing"}, "spans": otlp_spans}]
+        }]
+    }
+
+
+class OTLPExporter:
+    """Batches spans to an OTLP/HTTP collector from a background thread
+
+    Export never blocks a request: when the queue is full, spans are dropped
+    and counted.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = "soladia-backend",
+                 max_batch: int = 512, flush_interval: float = 2.0, max_queue: int = 10000):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, spans: List[Span]):
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+            self._thread.start()
+
+    def _drain(self, timeout: float) -> List[Span]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < self.max_batch:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        import httpx
+
+        with httpx.Client(timeout=5.0) as client:
+            while True:
+                batch = self._drain(self.flush_interval)
+                if not batch:
+                    continue
+                try:
+                    client.post(self.url, json=to_otlp(batch, self.service_name))
+                except Exception as e:
+                    logger.error(f"Failed to export {len(batch)} spans: {e}")
+
+
+class Tracer:
+    """Head-sampled tracer; unsampled requests only accumulate Server-Timing totals"""
+
+    def __init__(self, sample_rate: float = 0.0, exporter=None, service_name: str = "soladia-backend"):
+        self.sample_rate = sample_rate
+        self.exporter = exporter or InMemoryExporter()
+        self.service_name = service_name
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None,
+                    attributes: Optional[Dict[str, Any]] = None) -> Tuple[RequestTrace, Any]:
+        upstream = parse_traceparent(traceparent)
+        if upstream:
+            # Respect the caller's sampling decision so distributed traces stay whole
+            trace_id, parent_id, sampled = upstream
+        else:
+            trace_id, parent_id = _new_id(32), None
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+
+        root = None
+        if sampled:
+            root = Span(trace_id, _new_id(16), parent_id, name, "request", time.time_ns(),
+                        attributes=dict(attributes or {}))
+        trace = RequestTrace(trace_id, sampled, root)
+        return trace, _current_trace.set(trace)
+
+    def end_trace(self, trace: RequestTrace, token, error: Optional[str] = None,
+                  attributes: Optional[Dict[str, Any]] = None):
+        _current_trace.reset(token)
+        if not trace.sampled or trace.root is None:
+            return
+        trace.root.end_ns = time.time_ns()
+        trace.root.error = error
+        trace.root.attributes.update(attributes or {})
+        try:
+            self.exporter.export([trace.root] + trace.spans)
+        except Exception as e:
+            logger.error(f"Failed to export trace {trace.trace_id}: {e}")
+
+    def begin_span(self, name: str, category: str,
+                   attributes: Optional[Dict[str, Any]] = None) -> Optional[_SpanHandle]:
+        """Start a leaf span; returns None outside a request so callers pay one ContextVar lookup"""
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        handle = _SpanHandle(trace, category, time.perf_counter())
+        if trace.sampled:
+            parent = _current_span_id.get() or (trace.root.span_id if trace.root else None)
+            handle.span = Span(trace.trace_id, _new_id(16), parent, name, category, time.time_ns(),
+                               attributes=dict(attributes or {}))
+        return handle
+
+    def end_span(self, handle: Optional[_SpanHandle], error: Optional[BaseException] = None):
+        if handle is None:
+            return
+        handle.trace.record(handle.category, (time.perf_counter() - handle.started) * 1000)
+        if handle.span is not None:
+            handle.span.end_ns = time.time_ns()
+            if error is not None:
+                handle.span.error = str(error)
+            handle.trace.spans.append(handle.span)
+
+    @contextmanager
+    def span(self, name: str, category: str = "app", **attributes: Any) -> Iterator[Optional[Span]]:
+        """Span around a block; nested spans become its children"""
+        handle = self.begin_span(name, category, attributes)
+        token = _current_span_id.set(handle.span.span_id) if handle and handle.span else None
+        try:
+            yield handle.span if handle else None
+        except BaseException as e:
+            self.end_span(handle, e)
+            raise
+        else:
+            self.end_span(handle)
+        finally:
+            if token is not None:
+                _current_span_id.reset(token)
+
+
+tracer = Tracer()
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def configure_tracing(sample_rate: float, exporter: str = "memory", otlp_endpoint: str = "",
+                      max_traces: int = 500, service_name: str = "soladia-backend") -> Tracer:
+    """Apply settings to the module tracer"""
+    tracer.sample_rate = sample_rate
+    tracer.service_name = service_name
+    if exporter == "otlp" and otlp_endpoint:
+        tracer.exporter = OTLPExporter(otlp_endpoint, service_name)
+    else:
+        tracer.exporter = InMemoryExporter(max_traces)
+    return tracer
+
+
+def trace_engine(engine):
+    """Create a db span for every statement executed on a SQLAlchemy engine"""
+    from sqlalchemy import event
+
+    if getattr(engine, "_soladia_traced", False):
+        return engine
+    system = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        operation = statement_operation(statement)
+        handle = tracer.begin_span(f"db {operation}", "db", {
+            "db.system": system,
+            "db.operation": operation,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH]
+        })
+        if handle is not None:
+            conn.info.setdefault("trace_spans", []).append(handle)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        handles = conn.info.get("trace_spans")
+        if handles:
+            tracer.end_span(handles.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        handles = context.connection.info.get("trace_spans") if context.connection is not None else None
+        if handles:
+            tracer.end_span(handles.pop(), context.original_exception)
+
+    engine._soladia_traced = True
+    return engine
+
+
+async def _finish_awaitable(awaitable, handle: _SpanHandle):
+    try:
+        result = await awaitable
+    except BaseException as e:
+        tracer.end_span(handle, e)
+        raise
+    tracer.end_span(handle)
+    return result
+
+
+class TracedRedis:
+    """Redis client proxy that records a span per command, for sync and asyncio clients"""
+
+    _UNTRACED = {"pipeline", "pubsub", "lock", "close", "monitor", "connection_pool"}
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name.startswith("_") or name in self._UNTRACED or not callable(attr):
+            return attr
+        operation = name.upper()
+
+        def traced(*args, **kwargs):
+            handle = tracer.begin_span(f"redis {operation}", "redis", {"db.system": "redis", "db.operation": operation})
+            if handle is None:
+                return attr(*args, **kwargs)
+            try:
+                result = attr(*args, **kwargs)
+            except BaseException as e:
+                tracer.end_span(handle, e)
+                raise
+            if inspect.isawaitable(result):
+                return _finish_awaitable(result, handle)
+            tracer.end_span(handle)
+            return result
+
+        return traced
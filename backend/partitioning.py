@@ -0,0 +1,341 @@
+"""
+Monthly range partitioning and Parquet archival for Soladia fact tables
+Keeps future partitions created ahead of time and moves cold months to local Parquet files
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import MetaData, Table, create_engine, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from analytics.fact_export import EXPORT_SOURCES, _parquet_chunks, archive_path, archived_files
+
+logger = logging.getLogger(__name__)
+
+# Append-only tables partitioned by month on ``created_at`` (see alembic revision 0004)
+PARTITIONED_TABLES = ("orders", "payments", "solana_transactions")
+PARTITION_KEY = "created_at"
+# Transaction-local setting that pauses the key registry triggers
+KEY_SYNC_SETTING = "soladia.key_sync"
+
+
+def month_floor(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: datetime) -> str:
+    """``orders_y2026m10``; archive files use the same name"""
+    return f"{table_name}_y{month:%Y}m{month:%m}"
+
+
+def default_partition_name(table_name: str) -> str:
+    return f"{table_name}_default"
+
+
+def partition_month(table_name: str, name: str) -> Optional[datetime]:
+    """Month covered by a monthly partition, or None for the default partition"""
+    match = re.fullmatch(rf"{re.escape(table_name)}_y(\d{{4}})m(\d{{2}})", name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_bounds_sql(month: datetime) -> str:
+    return (f"FOR VALUES FROM ('{month:%Y-%m-%d}') "
+            f"TO ('{add_months(month, 1):%Y-%m-%d}')")
+
+
+def create_partition_sql(table_name: str, month: datetime) -> str:
+    return (f'CREATE TABLE IF NOT EXISTS "{partition_name(table_name, month)}" '
+            f'PARTITION OF "{table_name}" {partition_bounds_sql(month)}')
+
+
+def create_default_partition_sql(table_name: str) -> str:
+    return (f'CREATE TABLE IF NOT EXISTS "{default_partition_name(table_name)}" '
+            f'PARTITION OF "{table_name}" DEFAULT')
+
+
+def key_table_name(table_name: str) -> str:
+    """Unpartitioned registry of ids and unique keys, ``orders_keys``"""
+    return f"{table_name}_keys"
+
+
+def key_sync_function_sql(table_name: str, key_columns: Sequence[str], unique_columns: Sequence[str]) -> str:
+    """Trigger function mirroring every row's keys into the registry
+
+    The registry carries the global primary key and unique constraints the
+    partitioned table cannot, so a duplicate fails the writing statement.
+    Rows moved between partitions by maintenance set ``KEY_SYNC_SETTING``
+    to leave the registry alone.
+    """
+    registry = key_table_name(table_name)
+    columns = list(key_columns) + [column for column in unique_columns if column not in key_columns]
+    names = ", ".join(f'"{column}"' for column in columns)
+    values = ", ".join(f'NEW."{column}"' for column in columns)
+    assignments = ", ".join(f'"{column}" = NEW."{column}"' for column in columns)
+    match = " AND ".join(f'"{column}" = OLD."{column}"' for column in key_columns)
+    return f"""
+CREATE OR REPLACE FUNCTION "{table_name}_sync_keys"() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('{KEY_SYNC_SETTING}', true) = 'off' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO "{registry}" ({names}) VALUES ({values});
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE "{registry}" SET {assignments} WHERE {match};
+    ELSE
+        DELETE FROM "{registry}" WHERE {match};
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql"""
+
+
+def key_sync_trigger_sql(table_name: str) -> str:
+    return (f'CREATE TRIGGER "{table_name}_sync_keys" AFTER INSERT OR UPDATE OR DELETE ON "{table_name}" '
+            f'FOR EACH ROW EXECUTE FUNCTION "{table_name}_sync_keys"()')
+
+
+def write_archive(conn: Connection, table_name: str, path: str, table: Optional[Table] = None,
+                  batch_size: int = 5000) -> int:
+    """Write every row of ``table_name`` to a zstd Parquet file; returns the row count
+
+    ``table`` supplies column types (so enums are archived by value, as the
+    export path writes them); without it the columns are reflected. The file
+    appears at ``path`` only once it is complete.
+    """
+    import pyarrow.parquet as pq
+
+    if table is not None:
+        source = table.to_metadata(MetaData(), name=table_name)
+    else:
+        source = Table(table_name, MetaData(), autoload_with=conn)
+
+    rows = 0
+
+    def batches():
+        nonlocal rows
+        result = conn.execute(select(source).execution_options(yield_per=batch_size, stream_results=True))
+        for partition in result.mappings().partitions(batch_size):
+            rows += len(partition)
+            yield [dict(row) for row in partition]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in _parquet_chunks(batches(), source):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        written = pq.ParquetFile(tmp_path).metadata.num_rows
+        if written != rows:
+            raise RuntimeError(f"Archive of {table_name} has {written} rows, expected {rows}")
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
+
+
+@dataclass
+class MaintenanceResult:
+    created: List[str] = field(default_factory=list)
+    archived: Dict[str, int] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"created": self.created, "archived": self.archived, "skipped": self.skipped}
+
+
+class PartitionManager:
+    """Create upcoming monthly partitions and archive cold ones
+
+    Only Postgres tables converted by revision 0004 are touched; anything
+    else (SQLite, tables not yet migrated) is reported as skipped.
+    """
+
+    def __init__(self, archive_dir: str, premake_months: int = 3, archive_after_months: int = 12,
+                 batch_size: int = 5000, tables: Sequence[str] = PARTITIONED_TABLES):
+        self.archive_dir = archive_dir
+        self.premake_months = premake_months
+        self.archive_after_months = archive_after_months
+        self.batch_size = batch_size
+        self.tables = tuple(tables)
+        self.model_tables = {source.table.name: source.table for source in EXPORT_SOURCES.values()}
+
+    def is_partitioned(self, conn: Connection, table_name: str) -> bool:
+        if conn.dialect.name != "postgresql":
+            return False
+        return conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+        ), {"name": table_name}).scalar() is not None
+
+    def partitions(self, conn: Connection, table_name: str) -> List[str]:
+        return list(conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name AND pg_table_is_visible(p.oid) ORDER BY c.relname"
+        ), {"name": table_name}).scalars())
+
+    def ensure_partitions(self, conn: Connection, table_name: str, now: Optional[datetime] = None) -> List[str]:
+        """Create partitions for the current month and ``premake_months`` ahead"""
+        existing = set(self.partitions(conn, table_name))
+        default = default_partition_name(table_name)
+        created = []
+        current = month_floor(now or datetime.utcnow())
+        for offset in range(self.premake_months + 1):
+            month = add_months(current, offset)
+            name = partition_name(table_name, month)
+            if name in existing:
+                continue
+            if default in existing and self._default_has_rows(conn, table_name, month):
+                self._split_default(conn, table_name, month)
+            else:
+                conn.execute(text(create_partition_sql(table_name, month)))
+            created.append(name)
+        if default not in existing:
+            conn.execute(text(create_default_partition_sql(table_name)))
+            created.append(default)
+        return created
+
+    def _default_has_rows(self, conn: Connection, table_name: str, month: datetime) -> bool:
+        return conn.execute(text(
+            f'SELECT 1 FROM "{default_partition_name(table_name)}" '
+            f'WHERE {PARTITION_KEY} >= :start AND {PARTITION_KEY} < :end LIMIT 1'
+        ), {"start": month, "end": add_months(month, 1)}).scalar() is not None
+
+    def _split_default(self, conn: Connection, table_name: str, month: datetime):
+        """Move a month out of the default partition, which would otherwise block the new partition"""
+        name = partition_name(table_name, month)
+        default = default_partition_name(table_name)
+        logger.warning(f"Moving {table_name} rows for {month:%Y-%m} out of {default}")
+        # The rows keep their keys, so the registry must not see the move as a delete
+        conn.execute(text("SELECT set_config(:name, 'off', true)"), {"name": KEY_SYNC_SETTING})
+        conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{table_name}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+        conn.execute(text(
+            f'WITH moved AS (DELETE FROM "{default}" '
+            f'WHERE {PARTITION_KEY} >= :start AND {PARTITION_KEY} < :end RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ), {"start": month, "end": add_months(month, 1)})
+        conn.execute(text(f'ALTER TABLE "{table_name}" ATTACH PARTITION "{name}" {partition_bounds_sql(month)}'))
+        conn.execute(text("SELECT set_config(:name, 'on', true)"), {"name": KEY_SYNC_SETTING})
+
+    def cold_partitions(self, conn: Connection, table_name: str,
+                        now: Optional[datetime] = None) -> List[Tuple[str, datetime]]:
+        """Monthly partitions older than ``archive_after_months``; 0 disables archival"""
+        if self.archive_after_months <= 0:
+            return []
+        cutoff = add_months(month_floor(now or datetime.utcnow()), -self.archive_after_months)
+        cold = []
+        for name in self.partitions(conn, table_name):
+            month = partition_month(table_name, name)
+            if month is not None and month < cutoff:
+                cold.append((name, month))
+        return sorted(cold, key=lambda item: item[1])
+
+    def archive_partition(self, conn: Connection, table_name: str, name: str, month: datetime) -> int:
+        """Copy a partition to Parquet, then detach and drop it
+
+        Run inside a transaction: the SHARE lock blocks writes to the
+        partition until the drop commits, so no row can miss the file.
+        Dropping fires no row triggers, so archived ids and unique keys stay
+        reserved in the key registry and rows referencing them stay valid.
+        """
+        conn.execute(text(f'LOCK TABLE "{name}" IN SHARE MODE'))
+        path = archive_path(self.archive_dir, table_name, month)
+        rows = write_archive(conn, name, path, self.model_tables.get(table_name), self.batch_size)
+        conn.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{name}"'))
+        conn.execute(text(f'DROP TABLE "{name}"'))
+        logger.info(f"Archived {rows} rows from {name} to {path}")
+        return rows
+
+    def maintain(self, engine: Engine, now: Optional[datetime] = None) -> MaintenanceResult:
+        """Create upcoming partitions and archive cold ones, one transaction per step"""
+        result = MaintenanceResult()
+        for table_name in self.tables:
+            with engine.connect() as conn:
+                partitioned = self.is_partitioned(conn, table_name)
+            if not partitioned:
+                result.skipped.append(table_name)
+                continue
+            try:
+                with engine.begin() as conn:
+                    result.created.extend(self.ensure_partitions(conn, table_name, now))
+                with engine.connect() as conn:
+                    cold = self.cold_partitions(conn, table_name, now)
+                for name, month in cold:
+                    with engine.begin() as conn:
+                        result.archived[name] = self.archive_partition(conn, table_name, name, month)
+            except Exception as e:
+                logger.error(f"Failed to maintain partitions for {table_name}: {e}")
+                raise
+        return result
+
+    def status(self, engine: Engine) -> Dict[str, Dict[str, object]]:
+        """Live partitions and archived months per table"""
+        status = {}
+        with engine.connect() as conn:
+            for table_name in self.tables:
+                partitioned = self.is_partitioned(conn, table_name)
+                status[table_name] = {
+                    "partitioned": partitioned,
+                    "partitions": self.partitions(conn, table_name) if partitioned else [],
+                    "archived": [path for _, path in archived_files(self.archive_dir, table_name)],
+                }
+        return status
+
+
+def partition_manager_from_settings() -> PartitionManager:
+    from config import settings
+
+    return PartitionManager(
+        settings.PARTITION_ARCHIVE_DIR,
+        premake_months=settings.PARTITION_PREMAKE_MONTHS,
+        archive_after_months=settings.PARTITION_ARCHIVE_AFTER_MONTHS,
+        batch_size=settings.PARTITION_ARCHIVE_BATCH_SIZE,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions of the fact tables")
+    parser.add_argument("command", choices=["maintain", "status"])
+    parser.add_argument("--database-url", default=None, help="defaults to DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    url = args.database_url or os.getenv("DATABASE_URL")
+    if not url:
+        from config import settings
+        url = settings.DATABASE_URL
+    engine = create_engine(url)
+    manager = partition_manager_from_settings()
+    try:
+        if args.command == "maintain":
+            output = manager.maintain(engine).to_dict()
+        else:
+            output = manager.status(engine)
+    finally:
+        engine.dispose()
+    print(json.dumps(output, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
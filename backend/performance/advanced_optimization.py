@@ -8,6 +8,7 @@ import json
 from typing import Dict, List, Optional, Any, Tuple, Union
 from functools import wraps
 from datetime import datetime, timedelta
+from collections import defaultdict, deque
 import redis
 import aioredis
 from sqlalchemy import text
@@ -15,12 +16,15 @@ from sqlalchemy.orm import sessionmaker
 import aiohttp
 import uvloop
 
+from monitoring.instrumentation import OPERATION_DURATION
+
 class PerformanceMonitor:
     """Performance monitoring and metrics collection"""
     
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(self, redis_client: redis.Redis, max_samples: int = 10000):
         self.redis = redis_client
-        self.metrics = {}
+        # Recent samples stay in process; aggregates go to the Prometheus histogram
+        self.metrics = defaultdict(lambda: deque(maxlen=max_samples))
     
     def track_execution_time(self, operation_name: str):
         """Decorator to track execution time"""
@@ -55,22 +59,16 @@ class PerformanceMonitor:
     
     async def record_metric(self, metric_name: str, value: float):
         """Record a performance metric"""
-        timestamp = int(time.time())
-        key = f"perf:{metric_name}:{timestamp}"
-        await self.redis.setex(key, 3600, value)  # Keep for 1 hour
+        operation, _, outcome = metric_name.rpartition("_")
+        if outcome not in ("success", "error"):
+            operation, outcome = metric_name, "success"
+        OPERATION_DURATION.labels(operation, outcome).observe(value)
+        self.metrics[metric_name].append((time.time(), value))
     
     async def get_metrics(self, metric_name: str, time_range: int = 3600) -> List[float]:
         """Get metrics for a specific operation"""
-        current_time = int(time.time())
-        start_time = current_time - time_range
-        
-        keys = []
-        for timestamp in range(start_time, current_time):
-            key = f"perf:{metric_name}:{timestamp}"
-            keys.append(key)
-        
-        values = await self.redis.mget(keys)
-        return [float(v) for v in values if v is not None]
+        start_time = time.time() - time_range
+        return [value for timestamp, value in self.metrics.get(metric_name, ()) if timestamp >= start_time]
 
 class CacheManager:
     """Advanced caching system with multiple strategies"""
@@ -134,7 +132,7 @@ class CacheManager:
         """Invalidate all cache entries with a specific tag"""
         try:
             keys = await self.redis.smembers(f"cache:tags:{tag}")
-                    if keys:
+            if keys:
                 await self.redis.delete(*keys)
                 await self.redis.delete(f"cache:tags:{tag}")
             return len(keys)
@@ -145,8 +143,8 @@ class CacheManager:
         """Get cache statistics"""
         total_requests = self.cache_stats["hits"] + self.cache_stats["misses"]
         hit_rate = (self.cache_stats["hits"] / total_requests * 100) if total_requests > 0 else 0
-            
-            return {
+        
+        return {
             **self.cache_stats,
             "hit_rate": hit_rate,
             "total_requests": total_requests
@@ -224,7 +222,7 @@ class ConnectionPoolManager:
                 self.active_connections
             )
             return connection
-            else:
+        else:
             # Create new connection
             connection = await self._create_connection()
             self.active_connections += 1
@@ -0,0 +1,179 @@
+"""
+Hot-path lookups for Soladia
+Single-row reads through a per-session identity map and statements built once with bound parameters
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import bindparam, lambda_stmt, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+# Session.info keys: unique-key -> primary-key index, and strong references to loaded rows
+KEY_INDEX = "hot_path_keys"
+LOADED = "hot_path_loaded"
+
+
+_statements: Dict[Tuple, Select] = {}
+_statements_lock = threading.Lock()
+
+
+def lookup_statement(model: Type, *column_names: str) -> Select:
+    """``SELECT model WHERE col = :col ... LIMIT 1``, built once per model and column set
+
+    Reusing one immutable statement skips per-call construction and its
+    memoized cache key always hits the engine's compiled-SQL cache.
+    """
+    key = (model,) + column_names
+    stmt = _statements.get(key)
+    if stmt is None:
+        criteria = [getattr(model, name) == bindparam(name) for name in column_names]
+        with _statements_lock:
+            stmt = _statements.setdefault(key, select(model).where(*criteria).limit(1))
+    return stmt
+
+
+class HotPathRepository:
+    """Cached single-row lookups scoped to one session (one request with ``get_db``)
+
+    Primary-key reads go through ``Session.get``, which answers from the
+    identity map without SQL when the row is already loaded. The session's
+    identity map only holds weak references, so rows loaded here are also
+    kept in ``Session.info`` for the life of the session. Unique-key reads
+    keep a small key -> primary-key index there as well, so a repeated lookup
+    in the same request becomes a primary-key read too. Misses are never
+    cached, so a row created later in the request is found.
+    """
+
+    @staticmethod
+    def _keep(db: Session, obj):
+        if obj is not None:
+            db.info.setdefault(LOADED, {})[db.identity_key(instance=obj)] = obj
+        return obj
+
+    def get(self, db: Session, model: Type, pk: Any):
+        return self._keep(db, db.get(model, pk))
+
+    def get_by(self, db: Session, model: Type, column_name: str, value: Any):
+        """Row whose unique ``column_name`` equals ``value``"""
+        index: Dict[Tuple, Any] = db.info.setdefault(KEY_INDEX, {})
+        key = (model, column_name, value)
+        pk = index.get(key)
+        if pk is not None:
+            obj = db.get(model, pk)
+            # The row may have been deleted or re-keyed since it was indexed
+            if obj is not None and getattr(obj, column_name) == value:
+                return obj
+            index.pop(key, None)
+
+        obj = db.execute(lookup_statement(model, column_name), {column_name: value}).scalars().first()
+        if obj is not None:
+            identity = db.identity_key(instance=obj)[1]
+            index[key] = identity[0] if len(identity) == 1 else identity
+        return self._keep(db, obj)
+
+    def first_by_pair(self, db: Session, model: Type, first_name: str, first_value: Any,
+                      second_name: str, second_value: Any):
+        """First row matching two equality criteria, e.g. a (user, product) link"""
+        stmt = lookup_statement(model, first_name, second_name)
+        return db.execute(stmt, {first_name: first_value, second_name: second_value}).scalars().first()
+
+    def forget(self, db: Session, model: Optional[Type] = None):
+        """Drop indexed unique keys and kept rows, for one model or all of them"""
+        index = db.info.get(KEY_INDEX, {})
+        loaded = db.info.get(LOADED, {})
+        if model is None:
+            index.clear()
+            loaded.clear()
+            return
+        for key in [key for key in index if key[0] is model]:
+            del index[key]
+        for key in [key for key in loaded if key[0] is model]:
+            del loaded[key]
+
+
+hot_path = HotPathRepository()
+
+
+def benchmark_lookups(session_factory: Callable[[], Session], model: Type, column_name: str,
+                      values: Sequence[Any], requests: int = 500, lookups_per_request: int = 10,
+                      distinct_per_request: int = 3) -> List[Dict[str, Any]]:
+    """Lookups/sec of the legacy ``db.query(...).filter(...).first()`` pattern against the hot path
+
+    Each simulated request opens a session and looks up ``distinct_per_request``
+    keys ``lookups_per_request`` times in total, as an endpoint that resolves
+    the same product or user from several service calls does.
+    """
+    column = getattr(model, column_name)
+    statement = lookup_statement(model, column_name)
+    patterns = {
+        "query_first": lambda db, value: db.query(model).filter(column == value).first(),
+        "select": lambda db, value: db.execute(select(model).where(column == value).limit(1)).scalars().first(),
+        "lambda_stmt": lambda db, value: db.execute(
+            lambda_stmt(lambda: select(model).where(column == value).limit(1))
+        ).scalars().first(),
+        "bound_statement": lambda db, value: db.execute(statement, {column_name: value}).scalars().first(),
+        "hot_path": lambda db, value: hot_path.get_by(db, model, column_name, value),
+    }
+
+    results = []
+    for name, lookup in patterns.items():
+        start = time.perf_counter()
+        for i in range(requests):
+            db = session_factory()
+            try:
+                for j in range(lookups_per_request):
+                    lookup(db, values[(i + j % distinct_per_request) % len(values)])
+            finally:
+                db.close()
+        elapsed = time.perf_counter() - start
+        lookups = requests * lookups_per_request
+        results.append({
+            "pattern": name,
+            "lookups": lookups,
+            "elapsed_seconds": elapsed,
+            "ops_per_second": lookups / elapsed if elapsed > 0 else 0.0,
+        })
+
+    baseline = results[0]["ops_per_second"] or 1.0
+    for row in results:
+        row["speedup"] = row["ops_per_second"] / baseline
+    return results
+
+
+if __name__ == "__main__":
+    from sqlalchemy import Boolean, Column, Float, Integer, String, Text, create_engine
+    from sqlalchemy.orm import declarative_base, sessionmaker
+
+    # Stand-alone table shaped like products so the benchmark needs no app database
+    BenchBase = declarative_base()
+
+    class BenchProduct(BenchBase):
+        __tablename__ = "bench_products"
+
+        id = Column(Integer, primary_key=True)
+        slug = Column(String, unique=True, index=True)
+        title = Column(String)
+        description = Column(Text)
+        price = Column(Float)
+        is_active = Column(Boolean, default=True)
+
+    engine = create_engine("sqlite://")
+    BenchBase.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add_all(
+            BenchProduct(slug=f"product-{i}", title=f"Product {i}", description="x" * 200, price=i * 0.5)
+            for i in range(1000)
+        )
+        db.commit()
+
+    report = benchmark_lookups(factory, BenchProduct, "slug", [f"product-{i}" for i in range(1000)])
+    print(f"{'pattern':>16} {'ops/s':>10} {'speedup':>8}")
+    for row in report:
+        print(f"{row['pattern']:>16} {row['ops_per_second']:>10.0f} {row['speedup']:>7.2f}x")
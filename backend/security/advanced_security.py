@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 import jwt
+from jwt.algorithms import get_default_algorithms
 from passlib.context import CryptContext
 from passlib.hash import bcrypt, argon2
 import ipaddress
@@ -502,11 +503,21 @@ class PasswordManager:
 class TokenManager:
     """Advanced token management with JWT"""
     
-    def __init__(self, secret_key: str, algorithm: str = "HS256"):
+    def __init__(self, secret_key: str, algorithm: str = "HS256", public_key: Optional[str] = None):
         self.secret_key = secret_key
         self.algorithm = algorithm
         self.access_token_expire = timedelta(minutes=30)
         self.refresh_token_expire = timedelta(days=7)
+        
+        # Parse keys once; PyJWT would otherwise re-parse PEM keys on every call
+        algorithm_impl = get_default_algorithms()[algorithm]
+        self._signing_key = algorithm_impl.prepare_key(secret_key)
+        if public_key:
+            self._verification_key = algorithm_impl.prepare_key(public_key)
+        elif hasattr(self._signing_key, "public_key"):
+            self._verification_key = self._signing_key.public_key()
+        else:
+            self._verification_key = self._signing_key
     
     def create_access_token(self, data: Dict[str, Any]) -> str:
         """Create JWT access token"""
@@ -514,7 +525,7 @@ class TokenManager:
         expire = datetime.utcnow() + self.access_token_expire
         to_encode.update({"exp": expire, "type": "access"})
         
-        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        return jwt.encode(to_encode, self._signing_key, algorithm=self.algorithm)
     
     def create_refresh_token(self, data: Dict[str, Any]) -> str:
         """Create JWT refresh token"""
@@ -522,12 +533,12 @@ class TokenManager:
         expire = datetime.utcnow() + self.refresh_token_expire
         to_encode.update({"exp": expire, "type": "refresh"})
         
-        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        return jwt.encode(to_encode, self._signing_key, algorithm=self.algorithm)
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify and decode JWT token"""
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = jwt.decode(token, self._verification_key, algorithms=[self.algorithm])
             return payload
         except jwt.ExpiredSignatureError:
             return None
@@ -2,12 +2,18 @@ from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import and_, or_, desc, func, select
 from typing import List, Optional
 from datetime import datetime, timedelta
-from models import User, Product, Order, Category, Review, Watchlist
+from models import User, Product, Order, OrderStatus, Category, Review, Watchlist
+from counters import counters
+from database_routing import read_only
+from repository import hot_path
 from schemas import (
     UserCreate, ProductCreate, OrderCreate, ReviewCreate, 
     WatchlistCreate, SearchFilters, SalesAnalytics, ProductAnalytics
 )
 
+# Products with the most unflushed views considered for the trending list
+TRENDING_PENDING_CANDIDATES = 100
+
 class UserService:
     def create_user(self, db: Session, user: UserCreate):
         db_user = User(**user.dict())
@@ -17,10 +23,10 @@ class UserService:
         return db_user
 
     def get_user(self, db: Session, user_id: int):
-        return db.query(User).filter(User.id == user_id).first()
+        return hot_path.get(db, User, user_id)
 
     def get_user_by_wallet(self, db: Session, wallet_address: str):
-        return db.query(User).filter(User.wallet_address == wallet_address).first()
+        return hot_path.get_by(db, User, "wallet_address", wallet_address)
 
     def get_users(self, db: Session, skip: int = 0, limit: int = 100):
         return db.query(User).offset(skip).limit(limit).all()
@@ -41,6 +47,7 @@ class UserService:
             db.commit()
         return db_user
 
+    @read_only
     def get_sales_analytics(self, db: Session, user_id: int):
         # Single query for total sales and total orders using aggregates
         completed_statuses = ["confirmed", "shipped", "delivered"]
@@ -96,8 +103,17 @@ class ProductService:
         return db_product
 
     def get_product(self, db: Session, product_id: int):
-        return db.query(Product).filter(Product.id == product_id).first()
+        return hot_path.get(db, Product, product_id)
+
+    def view_product(self, db: Session, product_id: int):
+        """Product detail read: counts the view and includes views not yet flushed"""
+        product = hot_path.get(db, Product, product_id)
+        if product:
+            counters.record_view(product.id)
+            counters.apply_pending(db, [product])
+        return product
 
+    @read_only
     def get_products(self, db: Session, skip: int = 0, limit: int = 100, 
                     category_id: Optional[int] = None, search: Optional[str] = None,
                     min_price: Optional[float] = None, max_price: Optional[float] = None):
@@ -122,17 +138,34 @@ class ProductService:
         
         return query.offset(skip).limit(limit).all()
 
+    @read_only
     def get_featured_products(self, db: Session):
         return db.query(Product).filter(
             Product.is_featured == True,
             Product.is_active == True
         ).limit(10).all()
 
-    def get_trending_products(self, db: Session):
-        return db.query(Product).filter(
+    @read_only
+    def get_trending_products(self, db: Session, limit: int = 10):
+        # Views only grow, so a product outside the stored top N can only overtake it
+        # through unflushed views; those candidates are loaded and everything re-sorted
+        products = db.query(Product).filter(
             Product.is_trending == True,
             Product.is_active == True
-        ).order_by(desc(Product.views_count)).limit(10).all()
+        ).order_by(desc(Product.views_count)).limit(limit).all()
+
+        loaded = {product.id for product in products}
+        recent = [product_id for product_id in counters.top_pending("products", "views_count", TRENDING_PENDING_CANDIDATES)
+                  if product_id not in loaded]
+        if recent:
+            products += db.query(Product).filter(
+                Product.id.in_(recent),
+                Product.is_trending == True,
+                Product.is_active == True
+            ).all()
+
+        counters.apply_pending(db, products)
+        return sorted(products, key=lambda product: product.views_count or 0, reverse=True)[:limit]
 
     def update_product(self, db: Session, product_id: int, product: ProductCreate):
         db_product = db.query(Product).filter(Product.id == product_id).first()
@@ -150,11 +183,13 @@ class ProductService:
             db.commit()
         return db_product
 
+    @read_only
     def search_products(self, db: Session, query: str, category_id: Optional[int] = None,
                        min_price: Optional[float] = None, max_price: Optional[float] = None):
         return self.get_products(db, category_id=category_id, search=query,
                                 min_price=min_price, max_price=max_price)
 
+    @read_only
     def get_product_analytics(self, db: Session, user_id: int):
         # Get total products
         total_products = db.query(func.count(Product.id)).filter(Product.seller_id == user_id).scalar() or 0
@@ -195,7 +230,7 @@ class ProductService:
 class OrderService:
     def create_order(self, db: Session, order: OrderCreate):
         # Get product details
-        product = db.query(Product).filter(Product.id == order.product_id).first()
+        product = hot_path.get(db, Product, order.product_id)
         if not product:
             raise ValueError("Product not found")
         
@@ -219,6 +254,7 @@ class OrderService:
         db.add(db_order)
         db.commit()
         db.refresh(db_order)
+        counters.record_sale(db_order.seller_id, db_order.buyer_id)
         return db_order
 
     def get_order(self, db: Session, order_id: int):
@@ -243,17 +279,24 @@ class OrderService:
     def update_order_status(self, db: Session, order_id: int, status: str):
         db_order = db.query(Order).filter(Order.id == order_id).first()
         if db_order:
+            was_cancelled = db_order.status == OrderStatus.CANCELLED
             db_order.status = status
             db.commit()
             db.refresh(db_order)
+            # Cancelled orders do not count toward sales or purchases
+            is_cancelled = db_order.status == OrderStatus.CANCELLED
+            if is_cancelled != was_cancelled:
+                counters.record_sale(db_order.seller_id, db_order.buyer_id, -1 if is_cancelled else 1)
         return db_order
 
 class CategoryService:
+    @read_only
     def get_categories(self, db: Session):
         return db.query(Category).filter(Category.is_active == True).all()
 
+    @read_only
     def get_category(self, db: Session, category_id: int):
-        return db.query(Category).filter(Category.id == category_id).first()
+        return hot_path.get(db, Category, category_id)
 
 class ReviewService:
     def create_review(self, db: Session, review: ReviewCreate):
@@ -261,21 +304,23 @@ class ReviewService:
         db.add(db_review)
         db.commit()
         db.refresh(db_review)
+        counters.record_rating(db_review.reviewee_id, db_review.rating)
         return db_review
 
+    @read_only
     def get_product_reviews(self, db: Session, product_id: int):
         return db.query(Review).filter(Review.product_id == product_id).all()
 
+    @read_only
     def get_user_reviews(self, db: Session, user_id: int):
         return db.query(Review).filter(Review.reviewee_id == user_id).all()
 
 class WatchlistService:
     def add_to_watchlist(self, db: Session, watchlist: WatchlistCreate):
         # Check if already in watchlist
-        existing = db.query(Watchlist).filter(
-            Watchlist.user_id == watchlist.user_id,
-            Watchlist.product_id == watchlist.product_id
-        ).first()
+        existing = hot_path.first_by_pair(
+            db, Watchlist, "user_id", watchlist.user_id, "product_id", watchlist.product_id
+        )
         
         if existing:
             return existing
@@ -284,6 +329,7 @@ class WatchlistService:
         db.add(db_watchlist)
         db.commit()
         db.refresh(db_watchlist)
+        counters.record_like(db_watchlist.product_id)
         return db_watchlist
 
     def get_user_watchlist(self, db: Session, user_id: int):
@@ -294,4 +340,5 @@ class WatchlistService:
         if db_watchlist:
             db.delete(db_watchlist)
             db.commit()
+            counters.record_like(db_watchlist.product_id, -1)
         return db_watchlist
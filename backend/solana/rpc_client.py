@@ -5,12 +5,15 @@ Solana RPC Client with connection pooling and failover support
 import asyncio
 import aiohttp
 import json
+import time
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from solana.config import SolanaConfig
+from monitoring.instrumentation import RPC_REQUEST_DURATION
+from monitoring.tracing import tracer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -80,6 +83,9 @@ class SolanaRPCClient:
             "params": params or []
         }
         
+        start_time = time.perf_counter()
+        outcome = "ok"
+        span = tracer.begin_span(f"rpc {method}", "rpc", {"rpc.system": "jsonrpc", "rpc.method": method})
         try:
             async with self.session.post(
                 self.config.rpc_url,
@@ -89,21 +95,28 @@ class SolanaRPCClient:
                 data = await response.json()
                 
                 if response.status != 200:
+                    outcome = "http_error"
                     logger.error(f"RPC request failed with status {response.status}: {data}")
                     return RPCResponse(result=None, error={"code": response.status, "message": "HTTP Error"})
                 
                 if "error" in data:
+                    outcome = "rpc_error"
                     logger.error(f"RPC error: {data['error']}")
                     return RPCResponse(result=None, error=data["error"], id=data.get("id"))
                 
                 return RPCResponse(result=data.get("result"), id=data.get("id"))
                 
         except asyncio.TimeoutError:
+            outcome = "timeout"
             logger.error("RPC request timeout")
             return RPCResponse(result=None, error={"code": -1, "message": "Request timeout"})
         except Exception as e:
+            outcome = "error"
             logger.error(f"RPC request failed: {str(e)}")
             return RPCResponse(result=None, error={"code": -1, "message": str(e)})
+        finally:
+            RPC_REQUEST_DURATION.labels(method, outcome).observe(time.perf_counter() - start_time)
+            tracer.end_span(span, None if outcome == "ok" else RuntimeError(outcome))
     
     # Account methods
     async def get_balance(self, public_key: str) -> RPCResponse:
@@ -14,6 +14,8 @@ from dataclasses import dataclass, asdict
 from concurrent.futures import ThreadPoolExecutor
 import traceback
 
+from monitoring.tracing import TracedRedis
+
 logger = logging.getLogger(__name__)
 
 class TaskStatus(Enum):
@@ -49,7 +51,7 @@ class TaskQueue:
     """Redis-based task queue with priority support"""
     
     def __init__(self, redis_url: str = "redis://localhost:6379"):
-        self.redis_client = redis.from_url(redis_url, decode_responses=True)
+        self.redis_client = TracedRedis(redis.from_url(redis_url, decode_responses=True))
         self.task_key = "tasks:queue"
         self.task_data_key = "tasks:data"
         self.workers: List[TaskWorker] = []
@@ -376,8 +378,86 @@ async def solana_transaction_task(payload: Dict[str, Any]) -> Dict[str, Any]:
         "block_height": 12345
     }
 
+async def fraud_feature_backfill_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild the fraud feature store from FraudEvent history"""
+    # Imported lazily so task workers only load the ML stack when this task runs
+    from database import SessionLocal
+    from config import settings
+    from ai.fraud_detection import FraudDetection
+    from ai.fraud_feature_store import configure_fraud_feature_store
+    
+    # Workers don't run the API startup, so point the shared store at the same backend
+    # the API reads from; otherwise the rebuild only fills this process's memory
+    configure_fraud_feature_store(
+        settings.FRAUD_FEATURE_BACKEND if settings.REDIS_ENABLED else "memory",
+        settings.REDIS_URL
+    )
+    lookback_hours = payload.get("lookback_hours", 24)
+    db = SessionLocal()
+    try:
+        replayed = await FraudDetection(db, None).rebuild_feature_store(lookback_hours)
+    finally:
+        db.close()
+    
+    return {
+        "events_replayed": replayed,
+        "lookback_hours": lookback_hours,
+        "status": "completed"
+    }
+
+async def bi_rollup_refresh_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold new orders, registrations and views into the BI rollup tables"""
+    from database import SessionLocal
+    from config import settings
+    from analytics.bi_rollups import BIRollupService
+    
+    service = BIRollupService(batch_size=settings.BI_ROLLUP_BATCH_SIZE)
+    rebuild_days = payload.get("rebuild_days")
+    db = SessionLocal()
+    try:
+        if rebuild_days:
+            stats = service.rebuild(db, datetime.utcnow() - timedelta(days=rebuild_days))
+        else:
+            stats = await asyncio.get_running_loop().run_in_executor(None, service.refresh, db)
+    finally:
+        db.close()
+    
+    return {
+        "hours_recomputed": stats.hours_recomputed,
+        "days_recomputed": stats.days_recomputed,
+        "view_delta": stats.view_delta,
+        "status": "completed"
+    }
+
+async def metric_retention_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop raw monitoring points and rollups past their tier's retention"""
+    from database import SessionLocal
+    from monitoring.advanced_monitoring import metric_storage
+    
+    db = SessionLocal()
+    try:
+        deleted = await asyncio.get_running_loop().run_in_executor(None, metric_storage.prune, db)
+    finally:
+        db.close()
+    
+    return {"deleted": deleted, "status": "completed"}
+
+async def partition_maintenance_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Create upcoming monthly partitions and archive cold ones to Parquet"""
+    from database import engine
+    from partitioning import partition_manager_from_settings
+    
+    manager = partition_manager_from_settings()
+    result = await asyncio.get_running_loop().run_in_executor(None, manager.maintain, engine)
+    
+    return {**result.to_dict(), "status": "completed"}
+
 # Register task handlers
 task_manager.register_handler("process_image", process_image_task)
 task_manager.register_handler("send_email", send_email_task)
 task_manager.register_handler("generate_analytics", generate_analytics_task)
 task_manager.register_handler("solana_transaction", solana_transaction_task)
+task_manager.register_handler("fraud_feature_backfill", fraud_feature_backfill_task)
+task_manager.register_handler("bi_rollup_refresh", bi_rollup_refresh_task)
+task_manager.register_handler("metric_retention", metric_retention_task)
+task_manager.register_handler("partition_maintenance", partition_maintenance_task)
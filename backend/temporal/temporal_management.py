@@ -41,8 +41,13 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
 
+from analytics.timeseries_store import SeriesSlice, TimeSeriesStore
+
 logger = logging.getLogger(__name__)
 
+# In-memory points kept per data type
+MAX_TEMPORAL_POINTS = 10000
+
 class TemporalDataType(Enum):
     TIME_SERIES = "time_series"
     TEMPORAL_EVENT = "temporal_event"
@@ -133,7 +138,8 @@ class TemporalManagementService:
     
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
-        self.temporal_data: Dict[str, List[TemporalData]] = {}
+        # Numeric history per data type; full records live in Redis
+        self.temporal_series = TimeSeriesStore(capacity=MAX_TEMPORAL_POINTS, initial_capacity=256)
         self.temporal_states: Dict[str, TemporalState] = {}
         self.timelines: Dict[str, Timeline] = {}
         self.temporal_predictions: Dict[str, TemporalPrediction] = {}
@@ -261,15 +267,8 @@ class TemporalManagementService:
                 temporal_context={}
             )
             
-            # Store in memory
-            if data_type.value not in self.temporal_data:
-                self.temporal_data[data_type.value] = []
-            
-            self.temporal_data[data_type.value].append(temporal_data)
-            
-            # Keep only last 10000 data points per type
-            if len(self.temporal_data[data_type.value]) > 10000:
-                self.temporal_data[data_type.value] = self.temporal_data[data_type.value][-10000:]
+            # Store in memory; the last MAX_TEMPORAL_POINTS values per type
+            self.temporal_series.append(data_type.value, temporal_data.timestamp, self._numeric(value))
             
             # Store in Redis
             await self.redis.setex(
@@ -614,11 +613,27 @@ class TemporalManagementService:
             logger.error(f"Failed to predict future: {e}")
             raise
     
-    async def _get_historical_data(self, data_type: TemporalDataType) -> List[TemporalData]:
-        """Get historical data for analysis"""
+    @staticmethod
+    def _numeric(value: Any) -> float:
+        # Values read back from Redis are strings
         try:
-            if data_type.value in self.temporal_data:
-                return self.temporal_data[data_type.value]
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+    
+    @staticmethod
+    def _to_frame(historical_data: SeriesSlice) -> pd.DataFrame:
+        """Timestamp/value frame over a series read from the columnar store"""
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(historical_data.timestamps),
+            "value": historical_data.values
+        })
+    
+    async def _get_historical_data(self, data_type: TemporalDataType) -> SeriesSlice:
+        """Get historical data for analysis from the store, loading it from Redis on first use"""
+        try:
+            if data_type.value in self.temporal_series:
+                return self.temporal_series.range(data_type.value)
             
             # Load from Redis
             data_keys = await self.redis.keys(f"temporal_data:*")
@@ -639,16 +654,23 @@ class TemporalManagementService:
                         )
                         historical_data.append(temporal_data)
             
-            # Sort by timestamp
-            historical_data.sort(key=lambda x: x.timestamp)
+            if not historical_data:
+                return self.temporal_series.range(data_type.value)
             
-            return historical_data
+            # Sort by timestamp and keep the most recent values in the store
+            historical_data.sort(key=lambda x: x.timestamp)
+            self.temporal_series.extend(
+                data_type.value,
+                [data.timestamp for data in historical_data],
+                [self._numeric(data.value) for data in historical_data]
+            )
+            return self.temporal_series.range(data_type.value)
             
         except Exception as e:
             logger.error(f"Failed to get historical data: {e}")
-            return []
+            return self.temporal_series.range(data_type.value)
     
-    async def _extract_features(self, historical_data: List[TemporalData]) -> List[str]:
+    async def _extract_features(self, historical_data: SeriesSlice) -> List[str]:
         """Extract features from historical data"""
         try:
             features = []
@@ -671,7 +693,7 @@ class TemporalManagementService:
             logger.error(f"Failed to extract features: {e}")
             return []
     
-    async def _extract_statistical_features(self, historical_data: List[TemporalData]) -> List[str]:
+    async def _extract_statistical_features(self, historical_data: SeriesSlice) -> List[str]:
         """Extract statistical features"""
         try:
             features = []
@@ -680,13 +702,7 @@ class TemporalManagementService:
                 return features
             
             # Convert to pandas DataFrame
-            df = pd.DataFrame([
-                {
-                    "timestamp": data.timestamp,
-                    "value": float(data.value) if isinstance(data.value, (int, float)) else 0
-                }
-                for data in historical_data
-            ])
+            df = self._to_frame(historical_data)
             
             if len(df) > 0:
                 # Basic statistics
@@ -712,7 +728,7 @@ class TemporalManagementService:
             logger.error(f"Failed to extract statistical features: {e}")
             return []
     
-    async def _extract_temporal_features(self, historical_data: List[TemporalData]) -> List[str]:
+    async def _extract_temporal_features(self, historical_data: SeriesSlice) -> List[str]:
         """Extract temporal features"""
         try:
             features = []
@@ -721,24 +737,20 @@ class TemporalManagementService:
                 return features
             
             # Time-based features
-            timestamps = [data.timestamp for data in historical_data]
+            timestamps = self._to_frame(historical_data)['timestamp'].dt
             
             # Hour of day
-            hours = [ts.hour for ts in timestamps]
-            features.append(f"avg_hour_{np.mean(hours)}")
+            features.append(f"avg_hour_{np.mean(timestamps.hour)}")
             
             # Day of week
-            weekdays = [ts.weekday() for ts in timestamps]
-            features.append(f"avg_weekday_{np.mean(weekdays)}")
+            features.append(f"avg_weekday_{np.mean(timestamps.weekday)}")
             
             # Month
-            months = [ts.month for ts in timestamps]
-            features.append(f"avg_month_{np.mean(months)}")
+            features.append(f"avg_month_{np.mean(timestamps.month)}")
             
             # Time intervals
-            if len(timestamps) > 1:
-                intervals = [(timestamps[i] - timestamps[i-1]).total_seconds() 
-                           for i in range(1, len(timestamps))]
+            if len(historical_data) > 1:
+                intervals = np.diff(historical_data.timestamps) / 1e9
                 features.append(f"avg_interval_{np.mean(intervals)}")
             
             return features
@@ -747,7 +759,7 @@ class TemporalManagementService:
             logger.error(f"Failed to extract temporal features: {e}")
             return []
     
-    async def _extract_seasonal_features(self, historical_data: List[TemporalData]) -> List[str]:
+    async def _extract_seasonal_features(self, historical_data: SeriesSlice) -> List[str]:
         """Extract seasonal features"""
         try:
             features = []
@@ -756,13 +768,7 @@ class TemporalManagementService:
                 return features
             
             # Convert to pandas DataFrame
-            df = pd.DataFrame([
-                {
-                    "timestamp": data.timestamp,
-                    "value": float(data.value) if isinstance(data.value, (int, float)) else 0
-                }
-                for data in historical_data
-            ])
+            df = self._to_frame(historical_data)
             
             if len(df) >= 24:  # At least 24 hours of data
                 df.set_index('timestamp', inplace=True)
@@ -782,7 +788,7 @@ class TemporalManagementService:
             logger.error(f"Failed to extract seasonal features: {e}")
             return []
     
-    async def _prepare_training_data(self, historical_data: List[TemporalData], 
+    async def _prepare_training_data(self, historical_data: SeriesSlice, 
                                    features: List[str]) -> Tuple[np.ndarray, np.ndarray]:
         """Prepare training data for prediction models"""
         try:
@@ -790,13 +796,7 @@ class TemporalManagementService:
                 return np.array([]), np.array([])
             
             # Convert to pandas DataFrame
-            df = pd.DataFrame([
-                {
-                    "timestamp": data.timestamp,
-                    "value": float(data.value) if isinstance(data.value, (int, float)) else 0
-                }
-                for data in historical_data
-            ])
+            df = self._to_frame(historical_data)
             
             if len(df) < 2:
                 return np.array([]), np.array([])
@@ -891,7 +891,7 @@ class TemporalManagementService:
         except Exception as e:
             logger.error(f"Failed to analyze temporal patterns: {e}")
     
-    async def _detect_patterns(self, historical_data: List[TemporalData]) -> List[Dict[str, Any]]:
+    async def _detect_patterns(self, historical_data: SeriesSlice) -> List[Dict[str, Any]]:
         """Detect temporal patterns in data"""
         try:
             patterns = []
@@ -900,13 +900,7 @@ class TemporalManagementService:
                 return patterns
             
             # Convert to pandas DataFrame
-            df = pd.DataFrame([
-                {
-                    "timestamp": data.timestamp,
-                    "value": float(data.value) if isinstance(data.value, (int, float)) else 0
-                }
-                for data in historical_data
-            ])
+            df = self._to_frame(historical_data)
             
             # Detect trends
             if len(df) >= 5:
@@ -1052,7 +1046,7 @@ class TemporalManagementService:
                 return
             
             # Detect anomalies
-            anomalies = await self._detect_anomalies(recent_data)
+            anomalies = await self._detect_anomalies(data_type, recent_data)
             
             # Store anomalies
             for anomaly in anomalies:
@@ -1061,7 +1055,8 @@ class TemporalManagementService:
         except Exception as e:
             logger.error(f"Failed to detect temporal anomalies: {e}")
     
-    async def _detect_anomalies(self, historical_data: List[TemporalData]) -> List[TemporalAnomaly]:
+    async def _detect_anomalies(self, data_type: TemporalDataType,
+                                historical_data: SeriesSlice) -> List[TemporalAnomaly]:
         """Detect anomalies in historical data"""
         try:
             anomalies = []
@@ -1070,34 +1065,32 @@ class TemporalManagementService:
                 return anomalies
             
             # Convert to pandas DataFrame
-            df = pd.DataFrame([
-                {
-                    "timestamp": data.timestamp,
-                    "value": float(data.value) if isinstance(data.value, (int, float)) else 0
-                }
-                for data in historical_data
-            ])
+            df = self._to_frame(historical_data)
             
             # Statistical anomaly detection
-            mean = df['value'].mean()
-            std = df['value'].std()
+            values = df['value'].to_numpy()
+            mean = values.mean()
+            std = values.std(ddof=1)
             threshold = self.temporal_params["anomaly_detection"]["threshold"]
+            if not std > 0:
+                return anomalies
             
-            for i, row in df.iterrows():
-                z_score = abs((row['value'] - mean) / std) if std > 0 else 0
-                
-                if z_score > threshold:
-                    anomaly = TemporalAnomaly(
-                        anomaly_id=f"ta_{uuid.uuid4().hex[:16]}",
-                        timestamp=row['timestamp'],
-                        anomaly_type="statistical",
-                        severity=min(1.0, z_score / threshold),
-                        description=f"Statistical anomaly detected (z-score: {z_score:.2f})",
-                        affected_data=[historical_data[i].data_id],
-                        detected_at=datetime.now(),
-                        metadata={"z_score": z_score, "threshold": threshold}
-                    )
-                    anomalies.append(anomaly)
+            z_scores = np.abs((values - mean) / std)
+            for i in np.flatnonzero(z_scores > threshold):
+                z_score = float(z_scores[i])
+                timestamp = df['timestamp'].iloc[i].to_pydatetime()
+                anomaly = TemporalAnomaly(
+                    anomaly_id=f"ta_{uuid.uuid4().hex[:16]}",
+                    timestamp=timestamp,
+                    anomaly_type="statistical",
+                    severity=min(1.0, z_score / threshold),
+                    description=f"Statistical anomaly detected (z-score: {z_score:.2f})",
+                    # Points are identified by data type and timestamp in the store
+                    affected_data=[f"{data_type.value}@{timestamp.isoformat()}"],
+                    detected_at=datetime.now(),
+                    metadata={"z_score": z_score, "threshold": threshold}
+                )
+                anomalies.append(anomaly)
             
             return anomalies
             
@@ -1202,8 +1195,8 @@ class TemporalManagementService:
             }
             
             # Analyze data types
-            for data_type, data_list in self.temporal_data.items():
-                analytics["data_types"][data_type] = len(data_list)
+            for data_type in self.temporal_series.keys():
+                analytics["data_types"][data_type] = self.temporal_series.count(data_type)
             
             # Analyze timeline branches
             for timeline in self.timelines.values():
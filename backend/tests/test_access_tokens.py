@@ -0,0 +1,233 @@
+"""
+Test suite for signed access tokens and the revocation filter
+"""
+
+import base64
+import json
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from starlette.requests import Request
+
+from auth.access_tokens import AccessTokenCodec, RevocationFilter, fingerprint_hash, token_revocation_id
+from gateway.api_gateway import AuthenticationService
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.calls.append((name, args))
+            return self
+        return queue
+
+    async def execute(self):
+        self.client.round_trips += 1
+        return [getattr(self.client, name)(*args) for name, args in self.calls]
+
+
+class FakeBitmapRedis:
+    """Strings with Redis SETBIT semantics, reached only through pipelines"""
+
+    def __init__(self):
+        self.strings = {}
+        self.round_trips = 0
+
+    def setbit(self, key, offset, value):
+        data = bytearray(self.strings.get(key, b""))
+        if len(data) <= offset >> 3:
+            data.extend(b"\0" * ((offset >> 3) + 1 - len(data)))
+        data[offset >> 3] |= 0x80 >> (offset & 7)
+        self.strings[key] = bytes(data)
+
+    def expire(self, key, ttl):
+        pass
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def setex(self, key, ttl, value):
+        self.strings[key] = str(value).encode()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class GatewayRedis:
+    """Bitmap pipelines plus the direct GET and EXISTS the gateway uses to confirm revocations"""
+
+    def __init__(self):
+        self.bitmaps = FakeBitmapRedis()
+        self.strings = self.bitmaps.strings
+        self.lookups = 0
+        self.down = False
+
+    def pipeline(self, transaction=True):
+        if self.down:
+            raise ConnectionError("Redis unavailable")
+        return self.bitmaps.pipeline(transaction)
+
+    async def get(self, key):
+        self.lookups += 1
+        return self.strings.get(key)
+
+    async def exists(self, key):
+        self.lookups += 1
+        return int(key in self.strings)
+
+
+def bearer_request(token):
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    })
+
+
+def ed25519_pem():
+    key = Ed25519PrivateKey.generate()
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_pem, public_pem
+
+
+class TestAccessTokenCodec:
+    """Test cases for local token signing and verification"""
+
+    def test_hs256_round_trip_and_rejections(self):
+        """Valid tokens decode; tampered, expired and unsigned tokens do not"""
+        codec = AccessTokenCodec("secret")
+        claims = {"sub": "7", "sid": "abc", "fph": fingerprint_hash("device"), "exp": int(time.time()) + 60}
+        token = codec.encode(claims)
+        assert codec.decode(token) == claims
+
+        header, payload, signature = token.split(".")
+        forged = base64.urlsafe_b64encode(json.dumps({**claims, "sub": "8"}).encode()).rstrip(b"=").decode()
+        assert codec.decode(f"{header}.{forged}.{signature}") is None
+        assert AccessTokenCodec("other-secret").decode(token) is None
+        assert codec.decode(codec.encode({**claims, "exp": int(time.time()) - 60})) is None
+
+        unsigned = base64.urlsafe_b64encode(b'{"alg":"none","typ":"JWT"}').rstrip(b"=").decode()
+        assert codec.decode(f"{unsigned}.{payload}.") is None
+        assert codec.decode("not-a-token") is None
+
+    def test_accepts_tokens_from_other_jwt_libraries(self):
+        """HS256 tokens from python-jose verify with the same secret"""
+        jose_jwt = pytest.importorskip("jose.jwt")
+        token = jose_jwt.encode({"user_id": "7", "exp": int(time.time()) + 60}, "secret", algorithm="HS256")
+
+        assert AccessTokenCodec("secret").decode(token)["user_id"] == "7"
+
+    def test_eddsa_sign_and_verify_only(self):
+        """Ed25519 tokens verify with the public key alone, which cannot sign"""
+        private_pem, public_pem = ed25519_pem()
+        signer = AccessTokenCodec(algorithm="EdDSA", private_key=private_pem)
+        verifier = AccessTokenCodec(algorithm="EdDSA", public_key=public_pem)
+        token = signer.encode({"sid": "abc", "exp": int(time.time()) + 60})
+
+        assert verifier.decode(token)["sid"] == "abc"
+        assert AccessTokenCodec(algorithm="EdDSA", public_key=ed25519_pem()[1]).decode(token) is None
+        assert AccessTokenCodec("secret").decode(token) is None
+        with pytest.raises(ValueError):
+            verifier.encode({"exp": 0})
+
+
+class TestRevocationFilter:
+    """Test cases for the Redis-synced revocation bloom filter"""
+
+    @pytest.mark.asyncio
+    async def test_revocations_reach_other_workers_and_age_out(self):
+        """A revocation is visible after one sync and gone two buckets later"""
+        now = [1000.0]
+        client = FakeBitmapRedis()
+        revoking = RevocationFilter(client, bucket_seconds=300, capacity=1000, sync_interval=0, clock=lambda: now[0])
+        reading = RevocationFilter(client, bucket_seconds=300, capacity=1000, sync_interval=0, clock=lambda: now[0])
+
+        pipe = client.pipeline()
+        revoking.add_to_pipeline(pipe, ["session-1"])
+        await pipe.execute()
+        assert "session-1" in revoking
+
+        assert "session-1" not in reading
+        client.round_trips = 0
+        await reading.sync_if_stale()
+        assert "session-1" in reading and "session-2" not in reading
+        assert client.round_trips == 1
+
+        now[0] += 300
+        await reading.sync()
+        assert "session-1" in reading
+        now[0] += 300
+        await reading.sync()
+        await revoking.sync()
+        assert "session-1" not in reading and "session-1" not in revoking
+
+    @pytest.mark.asyncio
+    async def test_sync_is_throttled_and_false_positives_are_rare(self):
+        """Syncs happen once per interval; the filter stays near its error rate at capacity"""
+        client = FakeBitmapRedis()
+        revocations = RevocationFilter(client, capacity=2000, error_rate=0.01, sync_interval=60)
+        revocations.add_local(f"revoked-{i}" for i in range(2000))
+
+        await revocations.sync_if_stale()
+        await revocations.sync_if_stale()
+        assert client.round_trips == 1
+
+        assert all(f"revoked-{i}" in revocations for i in range(2000))
+        false_positives = sum(f"live-{i}" in revocations for i in range(10000))
+        assert false_positives < 300
+
+    @pytest.mark.asyncio
+    async def test_failed_sync_flags_everything_until_it_recovers(self):
+        """After a failed sync every item is a possible hit; the next good sync clears that"""
+        client = GatewayRedis()
+        revocations = RevocationFilter(client, capacity=1000, sync_interval=0)
+        client.down = True
+        await revocations.sync_if_stale()
+        assert revocations.degraded and "anything" in revocations
+
+        client.down = False
+        await revocations.sync_if_stale()
+        assert not revocations.degraded and "anything" not in revocations
+
+    def test_revocation_id_prefers_session(self):
+        """Session tokens are revoked by session, others by jti or digest"""
+        assert token_revocation_id("t", {"sid": "abc", "jti": "j"}) == "abc"
+        assert token_revocation_id("t", {"jti": "j"}) == "j"
+        assert len(token_revocation_id("t", {})) == 64
+
+
+class TestGatewayAuthentication:
+    """Test cases for JWT checks in the API gateway"""
+
+    @pytest.mark.asyncio
+    async def test_filter_misses_skip_redis_only_for_short_lived_tokens(self):
+        """Long-lived tokens, tokens without iat and a failed sync all go to Redis"""
+        client = GatewayRedis()
+        auth = AuthenticationService(client, "gateway-secret", max_token_lifetime=600, revocation_sync_interval=0)
+        now = int(time.time())
+        short = auth.tokens.encode({"sub": "7", "iat": now, "exp": now + 300})
+        long_lived = auth.tokens.encode({"sub": "7", "iat": now, "exp": now + 86400})
+        no_iat = auth.tokens.encode({"sub": "7", "exp": now + 300})
+
+        for token in (short, long_lived, no_iat):
+            assert (await auth._authenticate_jwt(bearer_request(token)))["user_id"] == "7"
+        assert client.lookups == 2
+
+        # Revoked long ago: the filter bits are gone but the blacklist entry is not
+        client.strings[f"blacklist:{long_lived}"] = b"1"
+        assert await auth._authenticate_jwt(bearer_request(long_lived)) is None
+
+        client.lookups = 0
+        client.down = True
+        assert await auth._authenticate_jwt(bearer_request(short))
+        assert client.lookups == 1
@@ -0,0 +1,245 @@
+"""
+Test suite for the monitoring alert rule engine and scheduler
+"""
+
+import asyncio
+import random
+
+from monitoring.alert_engine import AlertCooldownGuard, AlertRuleEngine, CompiledRule, SlidingWindow
+from monitoring.scheduler import PeriodicScheduler
+
+
+def _rule(rule_id="r1", metric="cpu", condition="gt", threshold=80.0, **kwargs):
+    defaults = {"name": rule_id, "evaluation_window": 60, "cooldown_period": 300}
+    defaults.update(kwargs)
+    return CompiledRule(rule_id=rule_id, metric_name=metric, condition=condition, threshold=threshold, **defaults)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestSlidingWindow:
+    """Test cases for the windowed aggregates"""
+
+    def test_matches_brute_force(self):
+        """Sum, min and max agree with a rescan of the live points"""
+        rng = random.Random(7)
+        window = SlidingWindow(10)
+        points = []
+        for step in range(2000):
+            ts = step * 0.5
+            value = rng.uniform(-100, 100)
+            window.add(ts, value)
+            points.append((ts, value))
+            live = [v for t, v in points if t > ts - 10]
+            assert window.count == len(live)
+            assert window.min == min(live)
+            assert window.max == max(live)
+            assert abs(window.sum - sum(live)) < 1e-6
+
+    def test_empty_after_eviction(self):
+        """An idle window reports no aggregates"""
+        window = SlidingWindow(5)
+        window.add(0, 3.0)
+        window.evict(100)
+        assert window.count == 0
+        assert window.avg is None
+        assert window.max is None
+
+
+class TestAlertRuleEngine:
+    """Test cases for rule indexing, evaluation and cooldowns"""
+
+    def test_only_rules_for_the_metric_are_evaluated(self):
+        """Data points touch the rules bound to their metric and nothing else"""
+        engine = AlertRuleEngine(clock=FakeClock())
+        engine.load([_rule("cpu-high"), _rule("mem-high", metric="memory")])
+
+        firings = engine.observe("cpu", 95.0, timestamp=0)
+        assert [f.rule.rule_id for f in firings] == ["cpu-high"]
+        assert engine.evaluations == 1
+        assert engine.observe("disk", 99.0, timestamp=1) == []
+        assert engine.evaluations == 1
+
+    def test_condition_uses_window_average_and_cooldown(self):
+        """A single spike is averaged out; repeat firings wait for the cooldown"""
+        engine = AlertRuleEngine(clock=FakeClock())
+        engine.load([_rule(cooldown_period=100)])
+
+        assert engine.observe("cpu", 10.0, timestamp=0) == []
+        assert engine.observe("cpu", 100.0, timestamp=1) == []  # avg 55
+        fired = engine.observe("cpu", 200.0, timestamp=2)  # avg 103.3
+        assert len(fired) == 1
+        assert fired[0].window["max"] == 200.0
+
+        assert engine.observe("cpu", 200.0, timestamp=50) == []
+        assert len(engine.observe("cpu", 200.0, timestamp=103)) == 1
+
+    def test_tenant_scoping(self):
+        """Tenant rules ignore other tenants; global rules keep a window per tenant"""
+        engine = AlertRuleEngine(clock=FakeClock())
+        engine.load([_rule("tenant", tenant_id="t1"), _rule("global", aggregation="max")])
+
+        assert [f.rule.rule_id for f in engine.observe("cpu", 90.0, "t2", timestamp=0)] == ["global"]
+        assert sorted(f.rule.rule_id for f in engine.observe("cpu", 90.0, "t1", timestamp=1)) == ["global", "tenant"]
+
+    def test_invalidation_reloads_rules(self):
+        """The loader runs once until the cache is invalidated or expires"""
+        clock = FakeClock()
+        calls = []
+        rules = [_rule(threshold=50.0)]
+
+        def loader():
+            calls.append(1)
+            return list(rules)
+
+        engine = AlertRuleEngine(loader=loader, max_age_seconds=60, clock=clock)
+        engine.observe("cpu", 10.0)
+        engine.observe("cpu", 10.0)
+        assert len(calls) == 1
+
+        rules.append(_rule("mem", metric="memory"))
+        engine.invalidate()
+        assert [r.rule_id for r in engine.rules_for("memory")] == ["mem"]
+        assert len(calls) == 2
+
+        clock.now += 61
+        engine.rules_for("cpu")
+        assert len(calls) == 3
+
+        engine.remove_rule("mem")
+        assert engine.rules_for("memory") == []
+
+
+class FakeRedis:
+    """SET with NX/EX over a dict; expiry is tracked but not enforced"""
+
+    def __init__(self, fail=False):
+        self.strings = {}
+        self.ttls = {}
+        self.fail = fail
+
+    async def set(self, key, value, nx=False, ex=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        self.ttls[key] = ex
+        return True
+
+
+class TestAlertCooldownGuard:
+    """Test cases for cooldowns shared between processes"""
+
+    def test_one_process_delivers_each_firing(self):
+        """Engines in two processes both fire; only the first claim is delivered"""
+        redis_client = FakeRedis()
+        guard = AlertCooldownGuard(redis_client)
+        engines = [AlertRuleEngine(clock=FakeClock()) for _ in range(2)]
+        for engine in engines:
+            engine.load([_rule(cooldown_period=120)])
+
+        async def deliver(timestamp, tenant_id="t1"):
+            firings = [f for engine in engines for f in engine.observe("cpu", 95.0, tenant_id, timestamp=timestamp)]
+            return [await guard.claim(firing) for firing in firings]
+
+        assert asyncio.run(deliver(0)) == [True, False]
+        assert asyncio.run(deliver(1, "t2")) == [True, False]
+        assert redis_client.ttls == {"alert:cooldown:r1:t1": 120, "alert:cooldown:r1:t2": 120}
+
+    def test_fails_open_and_skips_disabled_cooldowns(self):
+        """Unreachable Redis lets firings through; rules without a cooldown never touch it"""
+        engine = AlertRuleEngine(clock=FakeClock())
+        engine.load([_rule(cooldown_period=60), _rule("no-cooldown", cooldown_period=0)])
+        firings = engine.observe("cpu", 95.0, timestamp=0)
+
+        assert asyncio.run(AlertCooldownGuard(FakeRedis(fail=True)).claim(firings[0])) is True
+        redis_client = FakeRedis()
+        assert asyncio.run(AlertCooldownGuard(redis_client).claim(firings[1])) is True
+        assert redis_client.strings == {}
+
+
+class TestPeriodicScheduler:
+    """Test cases for the single-task scheduler"""
+
+    def test_runs_due_jobs_and_backs_off_on_error(self):
+        """Jobs run on their interval; failures reschedule with error_interval"""
+        clock = FakeClock(0.0)
+        calls = []
+
+        async def ok():
+            calls.append("ok")
+
+        async def broken():
+            calls.append("broken")
+            raise RuntimeError("boom")
+
+        async def scenario():
+            scheduler = PeriodicScheduler(clock=clock)
+            scheduler.add("ok", ok, interval=10)
+            scheduler.add("broken", broken, interval=5, error_interval=30)
+
+            assert sorted(await scheduler.run_pending()) == ["broken", "ok"]
+            assert scheduler.next_delay() == 10
+            clock.now = 10
+            assert await scheduler.run_pending() == ["ok"]
+            clock.now = 30
+            assert sorted(await scheduler.run_pending()) == ["broken", "ok"]
+            return scheduler
+
+        scheduler = asyncio.run(scenario())
+        assert calls.count("ok") == 3
+        assert scheduler.stats()["broken"]["failures"] == 2
+        assert scheduler.stats()["broken"]["last_error"] == "boom"
+
+    def test_start_and_stop(self):
+        """The run loop drives jobs from a single task"""
+        calls = []
+
+        async def tick():
+            calls.append(1)
+
+        async def scenario():
+            scheduler = PeriodicScheduler()
+            scheduler.add("tick", tick, interval=0.01)
+            scheduler.start()
+            await asyncio.sleep(0.1)
+            await scheduler.stop()
+
+        asyncio.run(scenario())
+        assert len(calls) >= 3
+
+    def test_slow_job_does_not_delay_others(self):
+        """Each job runs in its own task; a job never overlaps itself"""
+        calls = []
+        release = None
+
+        async def slow():
+            calls.append("slow")
+            await release.wait()
+
+        async def tick():
+            calls.append("tick")
+
+        async def scenario():
+            nonlocal release
+            release = asyncio.Event()
+            scheduler = PeriodicScheduler()
+            scheduler.add("slow", slow, interval=0.01)
+            scheduler.add("tick", tick, interval=0.01)
+            scheduler.start()
+            await asyncio.sleep(0.1)
+            assert scheduler.stats()["slow"]["running"]
+            await scheduler.stop()
+            return scheduler
+
+        scheduler = asyncio.run(scenario())
+        assert calls.count("slow") == 1
+        assert calls.count("tick") >= 3
+        assert not scheduler.stats()["slow"]["running"]
@@ -0,0 +1,193 @@
+"""
+Test suite for the business intelligence rollup tables
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics.bi_rollups import (
+    BIRollupService, DailyRollup, HourlyRollup, live_revenue_totals, payment_method_revenue
+)
+from models import Base as ModelsBase, User, Product, Order, Payment, Category, OrderStatus, PaymentStatus
+
+
+NOW = datetime(2026, 3, 10, 15, 30)
+
+
+def _insert(db, model, **values):
+    return db.execute(model.__table__.insert().values(**values)).inserted_primary_key[0]
+
+
+@pytest.fixture
+def seeded(db_session):
+    """Two categories, one seller, one buyer and a product in each category"""
+    ModelsBase.metadata.create_all(bind=db_session.get_bind())
+    seller = _insert(db_session, User, wallet_address="seller-wallet", created_at=NOW - timedelta(days=5))
+    buyer = _insert(db_session, User, wallet_address="buyer-wallet", created_at=NOW - timedelta(hours=2))
+    art = _insert(db_session, Category, name="Art")
+    music = _insert(db_session, Category, name="Music")
+    art_product = _insert(db_session, Product, title="Art", price=10.0, category_id=art, seller_id=seller, views_count=100)
+    music_product = _insert(db_session, Product, title="Song", price=5.0, category_id=music, seller_id=seller, views_count=40)
+    db_session.commit()
+
+    yield db_session, seller, buyer, (art_product, art), (music_product, music)
+
+    db_session.rollback()
+    ModelsBase.metadata.drop_all(bind=db_session.get_bind())
+
+
+def _order(db, seller, buyer, product, created_at, total, status=OrderStatus.DELIVERED):
+    order_id = _insert(db, Order, buyer_id=buyer, seller_id=seller, product_id=product[0], unit_price=total,
+                       total_price=total, status=status, created_at=created_at, updated_at=created_at)
+    db.commit()
+    return order_id
+
+
+def _payment(db, seller, buyer, product, created_at, amount, status=PaymentStatus.COMPLETED, order_id=None):
+    payment_id = _insert(db, Payment, payment_id=f"pay-{created_at.isoformat()}-{amount}-{status.value}",
+                         buyer_id=buyer, seller_id=seller, product_id=product[0], order_id=order_id,
+                         amount=amount, status=status, buyer_wallet_address="buyer-wallet",
+                         seller_wallet_address="seller-wallet", created_at=created_at, updated_at=created_at)
+    db.commit()
+    return payment_id
+
+
+def _paid_order(db, seller, buyer, product, created_at, total, status=PaymentStatus.COMPLETED):
+    order_id = _order(db, seller, buyer, product, created_at, total)
+    return _payment(db, seller, buyer, product, created_at, total, status, order_id)
+
+
+def _set_views(db, product, views):
+    db.execute(Product.__table__.update().where(Product.__table__.c.id == product[0]).values(views_count=views))
+    db.commit()
+
+
+class TestBIRollupService:
+    """Test cases for BIRollupService"""
+
+    def test_refresh_builds_hourly_and_daily_rollups(self, seeded):
+        """Orders, completed payments and registrations roll up per hour, day and category"""
+        db, seller, buyer, art, music = seeded
+        _paid_order(db, seller, buyer, art, NOW - timedelta(hours=1), 10.0)
+        _paid_order(db, seller, buyer, art, NOW - timedelta(hours=1, minutes=10), 20.0)
+        _paid_order(db, seller, buyer, music, NOW - timedelta(hours=1), 5.0, PaymentStatus.PENDING)
+
+        service = BIRollupService()
+        stats = service.refresh(db, now=NOW)
+
+        assert stats.hours_recomputed >= 2
+        art_hour = db.query(HourlyRollup).filter(
+            HourlyRollup.category_id == art[1],
+            HourlyRollup.bucket_start == datetime(2026, 3, 10, 14)
+        ).one()
+        assert art_hour.revenue == pytest.approx(30.0)
+        assert art_hour.order_count == 2
+        assert art_hour.conversions == 2
+        assert art_hour.active_sellers == 1
+
+        music_day = db.query(DailyRollup).filter(DailyRollup.category_id == music[1]).one()
+        assert music_day.order_count == 1
+        assert music_day.conversions == 0
+        assert music_day.revenue == 0
+
+        totals = service.get_totals(db, NOW - timedelta(days=7), NOW + timedelta(hours=1))
+        assert totals['revenue'] == pytest.approx(30.0)
+        assert totals['order_count'] == 3
+        assert totals['new_users'] == 2
+
+    def test_incremental_refresh_only_touches_changed_buckets(self, seeded):
+        """A later run picks up new orders and payments completed after the watermark"""
+        db, seller, buyer, art, _ = seeded
+        service = BIRollupService(watermark_overlap_seconds=0)
+        pending = _paid_order(db, seller, buyer, art, NOW - timedelta(hours=3), 50.0, PaymentStatus.PENDING)
+        service.refresh(db, now=NOW)
+
+        assert service.get_totals(db, NOW - timedelta(days=1), NOW)['revenue'] == 0
+
+        db.execute(Payment.__table__.update().where(Payment.__table__.c.id == pending).values(
+            status=PaymentStatus.COMPLETED, updated_at=NOW
+        ))
+        _paid_order(db, seller, buyer, art, NOW - timedelta(minutes=5), 7.0)
+        stats = service.refresh(db, now=NOW)
+
+        assert stats.hours_recomputed == 2
+        totals = service.get_totals(db, NOW - timedelta(days=1), NOW + timedelta(hours=1))
+        assert totals['revenue'] == pytest.approx(57.0)
+        assert totals['conversions'] == 2
+
+        # Nothing changed since the watermark, so nothing is recomputed
+        assert service.refresh(db, now=NOW).hours_recomputed == 0
+
+    def test_product_views_accumulate_from_snapshots(self, seeded):
+        """View count growth between runs is attributed to the current hour"""
+        db, _, _, art, music = seeded
+        service = BIRollupService()
+
+        assert service.refresh(db, now=NOW).view_delta == 0
+
+        _set_views(db, art, 125)
+        _set_views(db, music, 45)
+        stats = service.refresh(db, now=NOW + timedelta(hours=1))
+
+        assert stats.view_delta == 30
+        rows = service.get_category_breakdown(db, NOW - timedelta(days=1), NOW + timedelta(days=1))
+        breakdown = {row['category_id']: row for row in rows}
+        assert breakdown[art[1]]['product_views'] == 25
+        assert breakdown[music[1]]['product_views'] == 5
+
+    def test_totals_combine_daily_and_hourly_edges(self, seeded):
+        """Partial days at the range edges are read from hourly rows"""
+        db, seller, buyer, art, _ = seeded
+        _paid_order(db, seller, buyer, art, datetime(2026, 3, 8, 2), 1.0)
+        _paid_order(db, seller, buyer, art, datetime(2026, 3, 9, 12), 2.0)
+        _paid_order(db, seller, buyer, art, datetime(2026, 3, 10, 9), 4.0)
+        service = BIRollupService()
+        service.refresh(db, now=NOW)
+
+        totals = service.get_totals(db, datetime(2026, 3, 8, 6), datetime(2026, 3, 10, 10))
+
+        assert totals['revenue'] == pytest.approx(6.0)
+        assert service.is_ready(db)
+        series = service.get_daily_series(db, datetime(2026, 3, 8), datetime(2026, 3, 11))
+        assert [point['revenue'] for point in series if point['revenue']] == [1.0, 2.0, 4.0]
+
+    def test_rollups_match_live_revenue(self, seeded):
+        """Rollup revenue and conversions equal the live query over the same completed payments"""
+        db, seller, buyer, art, music = seeded
+        _paid_order(db, seller, buyer, art, datetime(2026, 3, 8, 23, 50), 3.0)
+        _paid_order(db, seller, buyer, music, datetime(2026, 3, 9, 0, 5), 11.0)
+        _paid_order(db, seller, buyer, art, datetime(2026, 3, 9, 14), 8.0, PaymentStatus.REFUNDED)
+        _paid_order(db, seller, buyer, music, datetime(2026, 3, 10, 9, 30), 6.0, PaymentStatus.FAILED)
+        # A delivered order paid in a later hour counts when the payment was made, like the live query
+        order_id = _order(db, seller, buyer, art, datetime(2026, 3, 10, 8), 40.0)
+        _payment(db, seller, buyer, art, datetime(2026, 3, 10, 12, 15), 40.0, order_id=order_id)
+        _order(db, seller, buyer, art, datetime(2026, 3, 10, 13), 99.0, OrderStatus.CANCELLED)
+        service = BIRollupService()
+        service.refresh(db, now=NOW)
+
+        windows = [
+            (datetime(2026, 3, 8), datetime(2026, 3, 11)),
+            (datetime(2026, 3, 8, 23), datetime(2026, 3, 9, 1)),
+            (datetime(2026, 3, 9, 6), datetime(2026, 3, 10, 12)),
+            (datetime(2026, 3, 10, 12), datetime(2026, 3, 10, 16)),
+        ]
+        for start, end in windows:
+            totals = service.get_totals(db, start, end)
+            live = live_revenue_totals(db, start, end)
+            assert totals['revenue'] == pytest.approx(live['revenue'])
+            assert totals['conversions'] == live['conversions']
+        assert live_revenue_totals(db, *windows[0]) == {'revenue': 54.0, 'conversions': 3}
+
+    def test_payment_method_revenue_from_completed_payments(self, seeded):
+        """Revenue per currency counts only completed payments in the window"""
+        db, seller, buyer, art, music = seeded
+        _payment(db, seller, buyer, art, NOW - timedelta(hours=1), 10.0)
+        _payment(db, seller, buyer, music, NOW - timedelta(hours=2), 5.0)
+        _payment(db, seller, buyer, art, NOW - timedelta(hours=3), 7.0, PaymentStatus.REFUNDED)
+        usdc = _payment(db, seller, buyer, music, NOW - timedelta(hours=1, minutes=5), 30.0)
+        db.execute(Payment.__table__.update().where(Payment.__table__.c.id == usdc).values(currency="USDC"))
+        _payment(db, seller, buyer, art, NOW - timedelta(days=3), 50.0)
+        db.commit()
+
+        assert payment_method_revenue(db, NOW - timedelta(days=1), NOW) == [("USDC", 30.0, 1), ("SOL", 15.0, 2)]
@@ -0,0 +1,218 @@
+"""
+Test suite for bulk product and order import/export
+"""
+
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.bulk_endpoints import get_bulk_session_factory
+from bulk_import import (
+    ImportFormat,
+    OrderImporter,
+    ProductImporter,
+    import_hooks,
+    iter_lines,
+    register_import_hook,
+    run_import
+)
+from config import settings
+from main import app
+from middleware.rate_limiter import limiter
+from models import Base as ModelsBase, Order, Product, ProductCondition
+
+
+def product_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["title", "description", "price", "category_id", "condition", "is_auction"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    ModelsBase.metadata.create_all(bind=engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, many: statements.append(statement))
+    factory = sessionmaker(bind=engine)
+    factory.engine = engine
+    factory.statements = statements
+    yield factory
+    engine.dispose()
+
+
+def count(factory, table):
+    with factory.engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+class TestBulkImport:
+    """Test cases for streamed parsing, chunked validation and batched writes"""
+
+    def test_products_csv_with_invalid_rows(self, session_factory):
+        """Bad rows are reported by line; the rest are written in one insert per chunk"""
+        rows = [{"title": f"Listing {i}", "price": "1.5", "category_id": "2", "condition": "like_new"} for i in range(250)]
+        rows[10]["price"] = "-3"
+        rows[42]["title"] = "<script>"
+        body = product_csv(rows)
+
+        report = run_import(session_factory, ProductImporter(seller_id=7), io.BytesIO(body),
+                            ImportFormat.CSV, chunk_size=100)
+
+        assert (report.received, report.inserted, report.failed, report.batches) == (250, 248, 2, 3)
+        assert [error.line for error in report.errors] == [12, 44]
+        assert report.errors[0].errors[0]["loc"] == ["price"]
+        inserts = [statement for statement in session_factory.statements if statement.startswith("INSERT INTO products")]
+        assert len(inserts) == 3
+
+        with session_factory.engine.connect() as conn:
+            row = conn.execute(select(Product.__table__).limit(1)).mappings().one()
+        assert row["seller_id"] == 7
+        assert row["condition"] == ProductCondition.LIKE_NEW
+        assert row["is_active"] is True and row["views_count"] == 0
+        assert row["created_at"] is not None
+
+    def test_ndjson_orders_take_prices_from_products(self, session_factory):
+        """Order rows get seller and totals from the product; unknown products and bad JSON fail alone"""
+        with session_factory.engine.begin() as conn:
+            conn.execute(Product.__table__.insert(), [
+                {"title": "Lamp", "price": 2.0, "seller_id": 5, "category_id": 1}
+            ])
+        lines = [
+            json.dumps({"product_id": 1, "buyer_id": 9, "quantity": 3, "shipping_cost": 0.5}),
+            "{not json",
+            json.dumps({"product_id": 99, "buyer_id": 9}),
+            "",
+            json.dumps([1, 2]),
+        ]
+        report = run_import(session_factory, OrderImporter(), io.BytesIO("\n".join(lines).encode()),
+                            ImportFormat.NDJSON)
+
+        assert (report.received, report.inserted, report.failed) == (4, 1, 3)
+        assert [error.line for error in report.errors] == [2, 3, 5]
+        with session_factory.engine.connect() as conn:
+            order = conn.execute(select(Order.__table__)).mappings().one()
+        assert (order["seller_id"], order["unit_price"], order["total_price"]) == (5, 2.0, 6.5)
+
+    def test_database_errors_are_isolated_per_row(self, session_factory):
+        """A constraint violation rolls back only its own row"""
+        with session_factory.engine.begin() as conn:
+            conn.execute(Product.__table__.insert(), [{"title": "Lamp", "price": 2.0, "seller_id": 5}])
+            conn.execute(Order.__table__.insert(), [{
+                "product_id": 1, "buyer_id": 1, "seller_id": 5, "unit_price": 2.0,
+                "total_price": 2.0, "transaction_hash": "dup"
+            }])
+        lines = [{"product_id": 1, "buyer_id": 2}, {"product_id": 1, "buyer_id": 3}]
+        body = "\n".join(json.dumps(line) for line in lines).encode()
+
+        importer = OrderImporter()
+        original_rows = importer.rows
+
+        def rows_with_duplicate(conn, models, report):
+            rows = original_rows(conn, models, report)
+            rows[1][1]["transaction_hash"] = "dup"
+            return rows
+
+        importer.rows = rows_with_duplicate
+        report = run_import(session_factory, importer, io.BytesIO(body), ImportFormat.NDJSON)
+
+        assert (report.inserted, report.failed) == (1, 1)
+        assert report.errors[0].line == 2
+        assert "UNIQUE" in report.errors[0].errors[0]["msg"]
+        assert count(session_factory, Order.__table__) == 2
+
+    def test_hooks_run_once_and_lines_split_across_chunks(self, session_factory):
+        """Completion hooks fire once per import; multi-byte characters survive chunk boundaries"""
+        calls = []
+        register_import_hook("products", lambda conn, report: calls.append(report.inserted))
+        try:
+            body = product_csv([{"title": f"Café {i}", "price": "3", "category_id": "1"} for i in range(5)])
+            chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+            assert "".join(iter_lines(chunks)) == body.decode("utf-8")
+
+            run_import(session_factory, ProductImporter(seller_id=1), io.BytesIO(body), ImportFormat.CSV)
+            assert calls == [5]
+        finally:
+            import_hooks["products"].pop()
+
+
+SELLER = {"X-User-ID": "3", "X-User-Roles": "user"}
+ADMIN = {"X-User-ID": "1", "X-User-Roles": "user,admin"}
+
+
+class TestBulkEndpoints:
+    """Test cases for the upload and export routes"""
+
+    @pytest.fixture
+    def client(self, session_factory):
+        app.dependency_overrides[get_bulk_session_factory] = lambda: session_factory
+        limiter.reset()
+        yield TestClient(app)
+        limiter.reset()
+        app.dependency_overrides.pop(get_bulk_session_factory, None)
+
+    def test_upload_then_export_round_trip(self, client):
+        """Uploaded listings stream back out as gzip CSV for the seller"""
+        body = product_csv([{"title": f"Listing {i}", "price": "4", "category_id": "1"} for i in range(3)])
+        response = client.post("/api/bulk/products/import?seller_id=3", headers=SELLER,
+                               files={"file": ("listings.csv", body, "text/csv")})
+        assert response.status_code == 200
+        assert response.json()["inserted"] == 3
+
+        response = client.get("/api/bulk/products/export", headers=SELLER)
+        assert response.status_code == 200
+        text_body = response.content if response.content[:2] != b"\x1f\x8b" else gzip.decompress(response.content)
+        exported = list(csv.DictReader(io.StringIO(text_body.decode("utf-8"))))
+        assert [row["title"] for row in exported] == ["Listing 0", "Listing 1", "Listing 2"]
+
+        assert client.get("/api/bulk/users/export", headers=SELLER).status_code == 404
+        assert client.get("/api/bulk/products/export?seller_id=4", headers=ADMIN).content
+
+    def test_caller_must_be_the_seller_or_admin(self, client):
+        """Anonymous calls are refused, and sellers cannot act for another seller"""
+        body = product_csv([{"title": "Listing", "price": "4", "category_id": "1"}])
+        upload = lambda seller_id, headers: client.post(
+            f"/api/bulk/products/import?seller_id={seller_id}", headers=headers,
+            files={"file": ("listings.csv", body, "text/csv")}
+        )
+
+        assert upload(3, {}).status_code == 401
+        assert upload(4, SELLER).status_code == 403
+        assert upload(4, ADMIN).status_code == 200
+        assert client.get("/api/bulk/orders/export?seller_id=4", headers=SELLER).status_code == 403
+
+    def test_orders_import_is_scoped_to_the_sellers_products(self, client, session_factory):
+        """A seller's order upload rejects rows for other sellers' products"""
+        for seller_id in (3, 4):
+            run_import(session_factory, ProductImporter(seller_id=seller_id),
+                       io.BytesIO(product_csv([{"title": "Listing", "price": "4", "category_id": "1"}])),
+                       ImportFormat.CSV)
+        body = "\n".join(json.dumps({"product_id": product_id, "buyer_id": 9, "quantity": 1}) for product_id in (1, 2))
+
+        response = client.post("/api/bulk/orders/import", headers=SELLER,
+                               files={"file": ("orders.ndjson", body.encode(), "application/x-ndjson")})
+        assert (response.json()["inserted"], response.json()["failed"]) == (1, 1)
+
+        response = client.post("/api/bulk/orders/import", headers=ADMIN,
+                               files={"file": ("orders.ndjson", body.encode(), "application/x-ndjson")})
+        assert (response.json()["inserted"], response.json()["failed"]) == (2, 0)
+
+    def test_imports_are_rate_limited(self, client):
+        """Uploads beyond the configured rate are refused with 429"""
+        limit = int(settings.RATE_LIMIT_BULK.split("/")[0])
+        statuses = [
+            client.post("/api/bulk/products/import?seller_id=3", headers=SELLER,
+                        files={"file": ("listings.csv", product_csv([]), "text/csv")}).status_code
+            for _ in range(limit + 1)
+        ]
+        assert statuses == [200] * limit + [429]
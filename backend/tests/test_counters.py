@@ -0,0 +1,243 @@
+"""
+Test suite for write-behind denormalized counters
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from counters import CounterService, InProcessCounterStore, RedisCounterStore
+from models import Base as ModelsBase, Product, User
+
+CounterBase = declarative_base()
+
+
+class CounterProduct(CounterBase):
+    __table__ = Product.__table__
+
+
+class CounterUser(CounterBase):
+    __table__ = User.__table__
+
+
+class FakePipeline:
+    """Queues calls and runs them against the fake client on execute"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self, raise_on_error=True):
+        self.client.round_trips += 1
+        results = []
+        for name, args in self.calls:
+            try:
+                results.append(getattr(self.client, name)(*args, _pipelined=True))
+            except KeyError as e:
+                results.append(e)
+        return results
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the hash commands the counter store uses"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.round_trips = 0
+
+    def _call(self, pipelined):
+        if not pipelined:
+            self.round_trips += 1
+
+    def hincrby(self, key, field, amount, _pipelined=False):
+        self._call(_pipelined)
+        values = self.hashes.setdefault(key, {})
+        values[str(field)] = str(int(values.get(str(field), 0)) + amount)
+
+    def hincrbyfloat(self, key, field, amount, _pipelined=False):
+        self._call(_pipelined)
+        values = self.hashes.setdefault(key, {})
+        values[str(field)] = str(float(values.get(str(field), 0)) + amount)
+
+    def hmget(self, key, fields, _pipelined=False):
+        self._call(_pipelined)
+        values = self.hashes.get(key, {})
+        return [values.get(str(field)) for field in fields]
+
+    def hgetall(self, key, _pipelined=False):
+        self._call(_pipelined)
+        return dict(self.hashes.get(key, {}))
+
+    def rename(self, source, target, _pipelined=False):
+        self._call(_pipelined)
+        self.hashes[target] = self.hashes.pop(source)
+
+    def delete(self, key, _pipelined=False):
+        self._call(_pipelined)
+        self.hashes.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    ModelsBase.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": 1, "wallet_address": "seller", "rating": 4.0, "rating_count": 2, "total_sales": 3},
+            {"id": 2, "wallet_address": "buyer", "rating": 0.0, "rating_count": 0, "total_sales": 0},
+        ])
+        conn.execute(Product.__table__.insert(), [
+            {"id": i, "title": f"Listing {i}", "price": 1.0, "seller_id": 1,
+             "is_trending": True, "is_active": True, "views_count": 100 - i * 10}
+            for i in range(1, 6)
+        ])
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, many: statements.append(statement))
+    engine.statements = statements
+    yield engine
+    engine.dispose()
+
+
+def row(engine, table, row_id):
+    with engine.connect() as conn:
+        return conn.execute(select(table).where(table.c.id == row_id)).mappings().one()
+
+
+class TestCounterFlush:
+    """Test cases for batching increments into CASE updates"""
+
+    def test_flush_batches_increments_per_table(self, engine):
+        """Thousands of increments become one UPDATE per table"""
+        service = CounterService(InProcessCounterStore(shards=4))
+        for _ in range(1000):
+            service.record_view(3)
+        service.record_view(4)
+        service.record_like(4, 2)
+        service.record_sale(seller_id=1, buyer_id=2)
+
+        assert service.flush(engine) == 4
+        updates = [statement for statement in engine.statements if statement.startswith("UPDATE")]
+        assert len(updates) == 2 and all("CASE" in statement for statement in updates)
+        assert row(engine, Product.__table__, 3)["views_count"] == 1070
+        assert row(engine, Product.__table__, 4)["likes_count"] == 2
+        assert row(engine, User.__table__, 1)["total_sales"] == 4
+        assert row(engine, User.__table__, 2)["total_purchases"] == 1
+        assert service.flush(engine) == 0
+
+    def test_rating_is_updated_incrementally(self, engine):
+        """New reviews fold into the stored mean without rescanning reviews"""
+        service = CounterService()
+        service.record_rating(1, 5)
+        service.record_rating(1, 1)
+        service.record_rating(2, 3)
+        service.flush(engine)
+
+        seller = row(engine, User.__table__, 1)
+        assert (seller["rating"], seller["rating_count"]) == (pytest.approx(3.5), 4)
+        buyer = row(engine, User.__table__, 2)
+        assert (buyer["rating"], buyer["rating_count"]) == (pytest.approx(3.0), 1)
+
+    def test_rating_sum_and_count_travel_together(self, engine):
+        """A rating is recorded in one step, and a sum flushed apart from its count still lands"""
+        store = InProcessCounterStore(shards=4)
+        service = CounterService(store)
+        service.record_rating(1, 5)
+        assert store.drain() == {("users", "rating_sum"): {1: 5.0}, ("users", "rating_count"): {1: 1}}
+
+        store.incr("users", "rating_count", 1)
+        service.flush(engine)
+        store.incr("users", "rating_sum", 1, 5.0)
+        service.flush(engine)
+
+        seller = row(engine, User.__table__, 1)
+        assert (seller["rating"], seller["rating_count"]) == (pytest.approx(13 / 3), 3)
+
+    def test_failed_flush_keeps_increments(self, engine):
+        """Increments survive a failed write and go out with the next flush"""
+        service = CounterService()
+        service.record_view(2)
+
+        def fail(*args):
+            raise RuntimeError("database unavailable")
+
+        event.listen(engine, "before_cursor_execute", fail)
+        with pytest.raises(Exception):
+            service.flush(engine)
+        event.remove(engine, "before_cursor_execute", fail)
+
+        assert service.pending("products", ["views_count"], [2]) == {"views_count": {2: 1}}
+        service.flush(engine)
+        assert row(engine, Product.__table__, 2)["views_count"] == 81
+
+    def test_concurrent_increments_are_not_lost(self, engine):
+        """Increments racing a flush land in either this flush or the next"""
+        service = CounterService(InProcessCounterStore(shards=2))
+
+        def hammer():
+            for _ in range(2000):
+                service.record_view(1)
+
+        threads = [threading.Thread(target=hammer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            service.flush(engine)
+        for thread in threads:
+            thread.join()
+        service.flush(engine)
+        assert row(engine, Product.__table__, 1)["views_count"] == 90 + 8000
+
+
+class TestCounterReads:
+    """Test cases for read-through of unflushed increments"""
+
+    def test_apply_pending_and_trending_order(self, engine):
+        """Unflushed views re-rank loaded rows without dirtying the session"""
+        service = CounterService()
+        for _ in range(50):
+            service.record_view(5)
+        service.record_rating(1, 1)
+
+        with sessionmaker(bind=engine)() as db:
+            products = db.query(CounterProduct).order_by(CounterProduct.views_count.desc()).limit(2).all()
+            products += db.query(CounterProduct).filter(
+                CounterProduct.id.in_(service.top_pending("products", "views_count", 10))
+            ).all()
+            service.apply_pending(db, products)
+            service.apply_pending(db, products)
+            ranked = sorted(products, key=lambda product: product.views_count, reverse=True)
+            assert [product.id for product in ranked] == [5, 1, 2]
+            assert ranked[0].views_count == 100
+
+            seller = db.get(CounterUser, 1)
+            service.apply_pending(db, [seller])
+            assert (seller.rating, seller.rating_count) == (pytest.approx(3.0), 3)
+            assert not db.dirty
+
+    def test_redis_store_round_trips(self, engine):
+        """Redis reads are one pipelined round trip; a flush drains every hash atomically"""
+        client = FakeRedis()
+        service = CounterService(RedisCounterStore(client))
+        service.record_view(2)
+        service.record_view(2)
+        service.record_rating(1, 2)
+
+        client.round_trips = 0
+        pending = service.pending("users", ["rating_count", "rating_sum", "total_sales"], [1, 2])
+        assert pending == {"rating_count": {1: 1}, "rating_sum": {1: 2.0}, "total_sales": {}}
+        assert client.round_trips == 1
+
+        service.flush(engine)
+        assert not any(client.hashes.values())
+        assert row(engine, Product.__table__, 2)["views_count"] == 82
+        assert row(engine, User.__table__, 1)["rating"] == pytest.approx(10 / 3)
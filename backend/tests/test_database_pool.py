@@ -0,0 +1,123 @@
+"""
+Test suite for the adaptive connection-pool controller
+"""
+
+import threading
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from database_pool import PoolController, TimedQueuePool, pool_controllers
+from monitoring.instrumentation import histogram_quantile
+
+
+@pytest.fixture
+def pool_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=TimedQueuePool,
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=5
+    )
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def make_controller(pool_engine):
+    controllers = []
+
+    def make(**kwargs):
+        kwargs.setdefault("interval", 3600)
+        controller = PoolController(pool_engine, name=f"test-{uuid.uuid4().hex[:8]}", **kwargs)
+        controllers.append(controller)
+        return controller
+
+    yield make
+    for controller in controllers:
+        controller.close()
+
+
+class TestPoolController:
+    """Test cases for wait measurement, resizing and draining"""
+
+    def test_checkout_wait_is_measured(self, pool_engine, make_controller):
+        """A checkout blocked on an exhausted pool shows up in the wait histogram"""
+        controller = make_controller()
+        held = [pool_engine.connect(), pool_engine.connect()]
+
+        def release():
+            time.sleep(0.2)
+            held.pop().close()
+
+        threading.Thread(target=release).start()
+        with pool_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        held.pop().close()
+
+        wait = controller.status()["checkout_wait"]
+        assert wait["count"] == 3
+        assert wait["p99_ms"] >= 150
+        assert controller.status()["connection_hold"]["count"] == 3
+
+    def test_grows_under_load_and_drains_old_pool(self, pool_engine, make_controller):
+        """A saturated pool is swapped for a larger one; in-flight connections finish on the old pool"""
+        controller = make_controller(min_size=1, max_size=6, step=2)
+        old_pool = pool_engine.pool
+        held = [pool_engine.connect(), pool_engine.connect()]
+
+        assert controller.tick() == 4
+        assert pool_engine.pool is not old_pool
+        assert pool_engine.pool.size() == 4
+        assert controller.status()["draining_checked_out"] == 2
+        assert controller.last_resize["window"]["peak_utilization"] == 1.0
+
+        with pool_engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+        for conn in held:
+            conn.close()
+
+        controller.drain()
+        assert controller.draining == []
+        assert old_pool.checkedout() == 0
+        assert old_pool.checkedin() == 0
+
+    def test_shrinks_when_idle_after_cooldown(self, pool_engine, make_controller):
+        """Low utilization shrinks the pool, but not below min_size or inside the cooldown"""
+        now = [0.0]
+        controller = make_controller(min_size=1, max_size=6, step=2, cooldown=60, clock=lambda: now[0])
+        controller.resize(5)
+
+        now[0] = 30.0
+        assert controller.tick() is None
+        now[0] = 90.0
+        assert controller.tick() == 3
+        now[0] = 200.0
+        assert controller.tick() == 1
+        now[0] = 300.0
+        assert controller.tick() is None
+        assert pool_engine.pool.size() == 1
+        assert controller.resizes == 3
+
+    def test_status_registry_and_quantiles(self, client, make_controller):
+        """Controllers are listed by /internal/db-pool; quantiles interpolate within buckets"""
+        from config import settings
+
+        controller = make_controller()
+        assert pool_controllers[controller.name] is controller
+
+        previous = settings.ADMIN_API_TOKEN
+        settings.ADMIN_API_TOKEN = "test-admin-token"
+        try:
+            response = client.get("/internal/db-pool", headers={"X-Admin-Token": "test-admin-token"})
+        finally:
+            settings.ADMIN_API_TOKEN = previous
+        names = [pool["name"] for pool in response.json()["pools"]]
+        assert controller.name in names
+
+        assert histogram_quantile((1.0, 2.0), [0, 4, 0], 0.5) == 1.5
+        assert histogram_quantile((1.0, 2.0), [0, 0, 3], 0.99) == 2.0
+        assert histogram_quantile((1.0, 2.0), [0, 0, 0], 0.5) == 0.0
@@ -0,0 +1,151 @@
+"""
+Test suite for read-replica routing
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.orm import declarative_base
+
+from database_routing import DatabaseRouter, read_only
+
+RoutingBase = declarative_base()
+
+
+class Item(RoutingBase):
+    __tablename__ = "routing_items"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+def make_database(path, names):
+    engine = create_engine(f"sqlite:///{path}")
+    RoutingBase.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Item.__table__.insert(), [{"name": name} for name in names])
+    return engine
+
+
+@read_only
+def list_names(db):
+    return [item.name for item in db.execute(select(Item).order_by(Item.id)).scalars()]
+
+
+def list_names_for_update(db):
+    return [item.name for item in db.execute(select(Item).order_by(Item.id)).scalars()]
+
+
+@pytest.fixture
+def databases(tmp_path):
+    primary = make_database(tmp_path / "primary.db", ["primary"])
+    replica_a = make_database(tmp_path / "replica_a.db", ["replica-a"])
+    replica_b = make_database(tmp_path / "replica_b.db", ["replica-b"])
+    yield primary, replica_a, replica_b
+    for engine in (primary, replica_a, replica_b):
+        engine.dispose()
+
+
+class TestDatabaseRouter:
+    """Test cases for replica selection, health and write pinning"""
+
+    def test_read_only_queries_go_to_replica(self, databases):
+        """Decorated reads hit a replica; undecorated reads stay on the primary"""
+        primary, replica_a, _ = databases
+        router = DatabaseRouter(primary, [replica_a])
+        router.check_health()
+        db = router.session_factory()()
+
+        assert list_names(db) == ["replica-a"]
+        assert list_names_for_update(db) == ["primary"]
+        db.close()
+
+    def test_session_reads_its_own_writes(self, databases):
+        """After a flush every later read in the session uses the primary"""
+        primary, replica_a, _ = databases
+        router = DatabaseRouter(primary, [replica_a])
+        router.check_health()
+        db = router.session_factory()()
+
+        db.add(Item(name="new"))
+        db.commit()
+        assert db.pinned_to_primary
+        assert list_names(db) == ["primary", "new"]
+        db.close()
+
+    def test_lagging_or_broken_replicas_fall_back_to_primary(self, databases, tmp_path):
+        """Replicas over the lag bound or failing the health check are skipped"""
+        primary, replica_a, _ = databases
+        lagging = DatabaseRouter(primary, [replica_a], max_lag_seconds=5, lag_probe=lambda conn: 30.0)
+        lagging.check_health()
+        assert lagging.reader() is lagging.primary
+        assert lagging.status()["replicas"][0]["lag_seconds"] == 30.0
+
+        broken = DatabaseRouter(primary, [f"sqlite:///{tmp_path}/missing/replica.db"])
+        broken.check_health()
+        db = broken.session_factory()()
+        assert list_names(db) == ["primary"]
+        assert broken.replicas[0].healthy is False
+        assert broken.replicas[0].last_error
+        db.close()
+
+    def test_readers_only_use_cached_health(self, databases):
+        """Choosing a reader never probes; unprobed or stale replicas are skipped"""
+        primary, replica_a, _ = databases
+        now = [0.0]
+        calls = []
+
+        def probe(conn):
+            calls.append(now[0])
+            return 0.0
+
+        router = DatabaseRouter(primary, [replica_a], health_check_interval=10, lag_probe=probe,
+                                clock=lambda: now[0])
+        assert router.reader() is router.primary
+        router.check_health()
+        router.check_health()
+        assert router.reader() is router.replicas[0]
+        now[0] = 31.0
+        assert router.reader() is router.primary
+        assert calls == [0.0]
+
+    def test_background_health_checks(self, databases):
+        """A daemon thread probes the replicas until stopped"""
+        primary, replica_a, _ = databases
+        probed = threading.Event()
+
+        def probe(conn):
+            probed.set()
+            return 0.0
+
+        router = DatabaseRouter(primary, [replica_a], health_check_interval=0.01, lag_probe=probe)
+        router.start_health_checks()
+        try:
+            assert probed.wait(5)
+            assert router.reader() is router.replicas[0]
+        finally:
+            router.stop_health_checks()
+        assert router._health_thread is None
+
+    def test_strategies_spread_sessions(self, databases):
+        """Round robin alternates; least connections avoids the busy replica"""
+        primary, replica_a, replica_b = databases
+        round_robin = DatabaseRouter(primary, [replica_a, replica_b])
+        round_robin.check_health()
+        names = []
+        for _ in range(4):
+            db = round_robin.session_factory()()
+            names.extend(list_names(db))
+            db.close()
+        assert names == ["replica-a", "replica-b", "replica-a", "replica-b"]
+
+        least = DatabaseRouter(primary, [replica_a, replica_b], strategy="least_connections")
+        least.check_health()
+        held = replica_a.connect()
+        try:
+            db = least.session_factory()()
+            assert list_names(db) == ["replica-b"]
+            db.close()
+        finally:
+            held.close()
@@ -0,0 +1,122 @@
+"""
+Test suite for the streaming fact export
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from analytics.fact_export import ExportFormat, stream_fact_export
+from api.analytics_endpoints import get_export_session_factory
+from config import settings
+from main import app
+from middleware.rate_limiter import limiter
+from models import Base as ModelsBase, Order, OrderStatus
+
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    ModelsBase.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Order.__table__.insert(), [
+            {"buyer_id": 1, "seller_id": 2, "product_id": i % 3 + 1, "unit_price": float(i),
+             "total_price": float(i), "status": OrderStatus.DELIVERED, "created_at": START + timedelta(hours=i)}
+            for i in range(250)
+        ])
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class TestFactExport:
+    """Test cases for stream_fact_export"""
+
+    def test_csv_is_gzipped_and_complete(self, session_factory):
+        """Rows stream in timestamp order through gzip in several chunks"""
+        chunks = list(stream_fact_export(session_factory, "orders", ExportFormat.CSV, batch_size=100))
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(b"".join(chunks)).decode())))
+
+        assert len(chunks) > 1
+        assert len(rows) == 250
+        assert rows[0]["status"] == "delivered"
+        assert rows[-1]["total_price"] == "249.0"
+
+    def test_ndjson_respects_date_range(self, session_factory):
+        """Only facts in [start, end) are exported"""
+        body = b"".join(stream_fact_export(
+            session_factory, "orders", ExportFormat.NDJSON,
+            start=START + timedelta(hours=10), end=START + timedelta(hours=20), compress=False
+        ))
+        rows = [json.loads(line) for line in body.splitlines()]
+
+        assert len(rows) == 10
+        assert rows[0]["created_at"] == (START + timedelta(hours=10)).isoformat()
+
+    def test_parquet_row_groups(self, session_factory):
+        """Each batch becomes a Parquet row group"""
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        body = b"".join(stream_fact_export(session_factory, "orders", ExportFormat.PARQUET, batch_size=100))
+        table = pq.read_table(io.BytesIO(body))
+
+        assert table.num_rows == 250
+        assert pq.ParquetFile(io.BytesIO(body)).num_row_groups == 3
+
+
+ADMIN = {"X-User-ID": "1", "X-User-Roles": "admin"}
+
+
+class TestExportEndpoint:
+    """Test cases for GET /api/analytics/export/{source}"""
+
+    @pytest.fixture
+    def client(self, session_factory):
+        app.dependency_overrides[get_export_session_factory] = lambda: session_factory
+        limiter.reset()
+        yield TestClient(app)
+        limiter.reset()
+        app.dependency_overrides.pop(get_export_session_factory, None)
+
+    def test_export_endpoint_streams_gzip(self, client):
+        """The endpoint returns a gzip-encoded attachment"""
+        response = client.get("/api/analytics/export/orders", params={"format": "ndjson"}, headers=ADMIN)
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.text.splitlines()) == 250
+
+    def test_unknown_source_is_404(self, client):
+        """Only registered fact tables can be exported"""
+        response = client.get("/api/analytics/export/secrets", headers=ADMIN)
+
+        assert response.status_code == 404
+
+    def test_sellers_only_export_their_own_facts(self, client):
+        """Anonymous callers are refused and sellers cannot read another seller's facts"""
+        params = {"format": "ndjson"}
+        assert client.get("/api/analytics/export/orders", params=params).status_code == 401
+        assert client.get("/api/analytics/export/orders", params={**params, "seller_id": 2},
+                          headers={"X-User-ID": "3"}).status_code == 403
+
+        own = client.get("/api/analytics/export/orders", params=params, headers={"X-User-ID": "2"})
+        other = client.get("/api/analytics/export/orders", params=params, headers={"X-User-ID": "3"})
+        assert len(own.text.splitlines()) == 250
+        assert other.text == ""
+
+    def test_exports_are_rate_limited(self, client):
+        """Exports beyond the configured rate are refused with 429"""
+        limit = int(settings.RATE_LIMIT_BULK.split("/")[0])
+        statuses = [client.get("/api/analytics/export/products", headers=ADMIN).status_code
+                    for _ in range(limit + 1)]
+        assert statuses == [200] * limit + [429]
@@ -0,0 +1,122 @@
+"""
+Test suite for batch fraud scoring
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from ai.fraud_batch_scoring import (
+    BatchModel, build_feature_matrix, chunked, iter_ndjson, parse_ndjson, risk_levels, score_batch
+)
+
+
+class CountingClassifier:
+    """predict_proba stub that records how often it is called"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        positive = np.clip(X[:, 0] / 1000.0, 0, 1)
+        return np.column_stack([1 - positive, positive])
+
+
+class ConstantAnomalyModel:
+    """decision_function stub returning a fixed raw score"""
+
+    def __init__(self, score):
+        self.score = score
+
+    def decision_function(self, X):
+        return np.full(len(X), self.score)
+
+
+def _hit(rule_id, severity, triggered=True):
+    return {"rule_id": rule_id, "rule_name": rule_id, "triggered": triggered, "severity": severity}
+
+
+class TestBatchScoring:
+    """Test cases for score_batch and its helpers"""
+
+    def test_feature_matrix_defaults_and_coercion(self):
+        """Missing and non-numeric features become 0, booleans become 0/1"""
+        rows = [{"amount": 5, "is_mobile": True}, {"amount": "n/a"}, {}]
+
+        matrix = build_feature_matrix(rows, ["amount", "is_mobile"])
+
+        assert matrix.dtype == np.float64
+        assert matrix.tolist() == [[5.0, 1.0], [0.0, 0.0], [0.0, 0.0]]
+
+    def test_one_model_call_per_batch(self):
+        """Each model is called once for the whole batch"""
+        classifier = CountingClassifier()
+        models = [BatchModel("rf", "random_forest", classifier, ["amount"])]
+        rows = [{"amount": amount} for amount in range(0, 2000, 2)]
+
+        results = score_batch(rows, [[] for _ in rows], models)
+
+        assert classifier.calls == 1
+        assert len(results) == len(rows)
+
+    def test_scores_match_single_event_formula(self):
+        """ML and rule scores combine with the single-event weights, in input order"""
+        models = [
+            BatchModel("rf", "random_forest", CountingClassifier(), ["amount"]),
+            BatchModel("if", "isolation_forest", ConstantAnomalyModel(0.2), ["amount"]),
+        ]
+        rows = [{"amount": 900}, {"amount": 100}, {"amount": 0}]
+        rules = [[_hit("r1", "critical")], [_hit("r2", "low"), _hit("r3", "high", False)], []]
+
+        results = score_batch(rows, rules, models)
+
+        ml = [(0.9 + 0.6) / 2, (0.1 + 0.6) / 2, 0.3]
+        rule = [1.0, 0.2, 0.0]
+        for i, result in enumerate(results):
+            assert result.index == i
+            assert result.fraud_score == pytest.approx(0.7 * ml[i] + 0.3 * rule[i])
+        assert results[0].triggered_rules == ["r1"]
+        assert results[1].triggered_rules == ["r2"]
+        assert results[0].is_fraud is True
+        assert results[2].confidence_score == pytest.approx(results[2].fraud_score)
+
+    def test_failing_model_is_skipped(self):
+        """A model that raises does not fail the batch"""
+        models = [
+            BatchModel("broken", "random_forest", object(), ["amount"]),
+            BatchModel("if", "one_class_svm", ConstantAnomalyModel(0.0), ["amount"]),
+        ]
+
+        results = score_batch([{"amount": 1}], [[]], models)
+
+        assert results[0].ml_score == pytest.approx(0.5)
+
+    def test_risk_levels(self):
+        """Thresholds match the single-event risk levels"""
+        levels = risk_levels(np.array([0.0, 0.4, 0.6, 0.8, 1.0]))
+
+        assert levels.tolist() == ["low", "medium", "high", "critical", "critical"]
+
+    def test_index_offset_for_chunks(self):
+        """Chunked scoring keeps global input positions"""
+        results = score_batch([{}, {}], [[], []], [], index_offset=10)
+
+        assert [r.index for r in results] == [10, 11]
+        assert [offset for offset, _ in chunked(list(range(5)), 2)] == [0, 2, 4]
+
+
+class TestNdjson:
+    """Test cases for NDJSON encoding"""
+
+    def test_round_trip(self):
+        """Results stream as one JSON object per line"""
+        results = score_batch([{}, {}, {}], [[], [], []], [])
+
+        chunks = list(iter_ndjson(results, chunk_size=2))
+        lines = parse_ndjson(b"".join(chunks))
+
+        assert len(chunks) == 2
+        assert [line["index"] for line in lines] == [0, 1, 2]
+        assert json.loads(chunks[0].splitlines()[0])["risk_level"] == "low"
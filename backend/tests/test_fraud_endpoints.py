@@ -0,0 +1,138 @@
+"""
+Test suite for batch fraud scoring through FraudDetection and the /fraud API
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, String, Table, create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+pytest.importorskip("sklearn")
+pytest.importorskip("pandas")
+pytest.importorskip("redis")
+
+from ai.fraud_detection import (
+    Base, FraudDetection, FraudDetectionRequest, FraudEvent, FraudModel, FraudRule, get_fraud_detection, get_redis
+)
+from ai.fraud_feature_store import FraudFeatureStore, InMemoryFeatureBackend
+from ai.fraud_rule_engine import FraudRuleEngine
+from api.fraud_endpoints import router
+from config import settings
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    # Stand-ins for the tables the fraud models reference, which live in other modules
+    for name, column in (("tenants", "tenant_id"), ("users", "id")):
+        if name not in Base.metadata.tables:
+            Table(name, Base.metadata, Column(column, String(36), primary_key=True))
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(FraudRule(
+        rule_id="large_amount", rule_name="Large amount", rule_type="threshold",
+        conditions=[{"field": "amount", "operator": "greater_than", "value": 1000}], actions={"flag": True}, severity="high"
+    ))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def detection(session):
+    return FraudDetection(session, None, FraudFeatureStore(InMemoryFeatureBackend()), FraudRuleEngine())
+
+
+def events(*amounts):
+    return [
+        FraudDetectionRequest(event_type="transaction", event_data={"amount": amount}, user_id=7)
+        for amount in amounts
+    ]
+
+
+class TestDetectFraudBatch:
+    """Test cases for FraudDetection.detect_fraud_batch"""
+
+    @pytest.mark.asyncio
+    async def test_results_in_order_and_rules_applied(self, detection):
+        """Each event gets its own result, in input order"""
+        results = await detection.detect_fraud_batch(events(10, 5000, 20), index_offset=100)
+
+        assert [result.index for result in results] == [100, 101, 102]
+        assert [result.triggered_rules for result in results] == [[], ["large_amount"], []]
+
+    @pytest.mark.asyncio
+    async def test_batches_persisted_in_the_same_second(self, detection, session):
+        """Back-to-back persisted batches get distinct event ids and feed the feature store"""
+        await detection.detect_fraud_batch(events(10, 20), persist=True)
+        await detection.detect_fraud_batch(events(30, 40), persist=True)
+
+        event_ids = [event_id for event_id, in session.query(FraudEvent.event_id)]
+        assert len(event_ids) == len(set(event_ids)) == 4
+        assert all(len(event_id) == 36 for event_id in event_ids)
+        assert detection.feature_store.get_behavior_features(7, None)["max_transaction_amount"] == 40
+
+
+USER = {"X-User-ID": "7", "X-User-Roles": "user"}
+
+
+class TestFraudEndpoints:
+    """Test cases for POST /fraud/score/batch"""
+
+    @pytest.fixture
+    def client(self, detection):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_fraud_detection] = lambda: detection
+        return TestClient(app, headers=USER)
+
+    def test_json_batch(self, client):
+        """A JSON body returns all results at once"""
+        response = client.post("/fraud/score/batch", json={
+            "events": [request.dict() for request in events(10, 5000)]
+        })
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 2
+        assert body["results"][1]["triggered_rules"] == ["large_amount"]
+
+    def test_ndjson_stream(self, client):
+        """NDJSON in and out, one result per line"""
+        payload = "\n".join(json.dumps(request.dict()) for request in events(10, 20, 5000))
+        response = client.post(
+            "/fraud/score/batch", content=payload,
+            headers={"content-type": "application/x-ndjson", "accept": "application/x-ndjson"}
+        )
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["index"] for line in lines] == [0, 1, 2]
+        assert lines[2]["triggered_rules"] == ["large_amount"]
+
+    def test_invalid_batch(self, client):
+        """Malformed events are rejected before scoring"""
+        response = client.post("/fraud/score/batch", json={"events": [{"event_type": "transaction"}]})
+        assert response.status_code == 422
+
+    def test_scoring_needs_a_caller_and_persisting_needs_admin(self, client, session, monkeypatch):
+        """Anonymous requests are refused; persist=true is for admins and internal callers"""
+        body = {"events": [request.dict() for request in events(10)], "persist": True}
+        anonymous = TestClient(client.app)
+        monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "internal-token")
+
+        assert anonymous.post("/fraud/score/batch", json={"events": body["events"]}).status_code == 401
+        assert client.post("/fraud/score/batch", json=body).status_code == 403
+        assert session.query(FraudEvent).count() == 0
+
+        assert client.post("/fraud/score/batch", json=body, headers={"X-User-Roles": "admin"}).status_code == 200
+        assert anonymous.post("/fraud/score/batch", json=body, headers={"X-Admin-Token": "internal-token"}).status_code == 200
+        assert session.query(FraudEvent).count() == 2
+
+    def test_redis_client_is_shared(self):
+        """Requests reuse one Redis client and its connection pool"""
+        assert get_redis() is get_redis()
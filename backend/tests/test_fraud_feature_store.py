@@ -0,0 +1,200 @@
+"""
+Test suite for the streaming fraud feature store
+"""
+
+import pytest
+
+from ai.fraud_feature_store import (
+    BEHAVIOR_HISTORY_LIMIT, FraudFeatureStore, FeatureEvent, InMemoryFeatureBackend, RedisFeatureBackend,
+    configure_fraud_feature_store, fraud_feature_store
+)
+
+
+NOW = 1_700_000_000.0
+
+
+def _event(offset, **kwargs):
+    values = {
+        "user_id": 1,
+        "tenant_id": "tenant-a",
+        "timestamp": NOW + offset,
+        "event_type": "transaction",
+        "amount": 10.0,
+        "ip_address": "1.1.1.1",
+        "device": "device-a",
+    }
+    values.update(kwargs)
+    return FeatureEvent(**values)
+
+
+class TestFraudFeatureStore:
+    """Test cases for FraudFeatureStore with the in-memory backend"""
+
+    @pytest.fixture
+    def store(self):
+        return FraudFeatureStore(InMemoryFeatureBackend())
+
+    def test_unknown_user_has_empty_features(self, store):
+        """Scoring a user with no history returns zeroed features"""
+        velocity = store.get_velocity_features(42, "tenant-a", now=NOW)
+        behavior = store.get_behavior_features(42, "tenant-a")
+
+        assert velocity["events_last_hour"] == 0
+        assert velocity["events_last_24h"] == 0
+        assert velocity["event_velocity"] == 0
+        assert behavior["avg_transaction_amount"] == 0
+        assert behavior["fraud_history_count"] == 0
+
+    def test_window_counts_and_sums(self, store):
+        """Events are counted per window and slide out as time passes"""
+        store.ingest(_event(-7200, amount=100.0))
+        store.ingest(_event(-600, amount=20.0))
+        store.ingest(_event(-10, amount=5.0))
+
+        features = store.get_velocity_features(1, "tenant-a", now=NOW)
+
+        assert features["events_last_1m"] == 1
+        assert features["events_last_1h"] == 2
+        assert features["events_last_hour"] == 2
+        assert features["events_last_24h"] == 3
+        assert features["amount_sum_1h"] == pytest.approx(25.0)
+        assert features["amount_sum_24h"] == pytest.approx(125.0)
+
+        later = store.get_velocity_features(1, "tenant-a", now=NOW + 3600)
+        assert later["events_last_1h"] == 0
+        assert later["events_last_24h"] == 3
+
+    def test_distinct_ips_and_devices(self, store):
+        """Distinct entities are tracked and forgotten when they expire"""
+        store.ingest(_event(-3000, ip_address="1.1.1.1", device="a"))
+        store.ingest(_event(-20, ip_address="2.2.2.2", device="a"))
+        store.ingest(_event(-10, ip_address="2.2.2.2", device="b"))
+
+        features = store.get_velocity_features(1, "tenant-a", now=NOW)
+        assert features["distinct_ips_1h"] == 2
+        assert features["distinct_devices_1h"] == 2
+        assert features["distinct_ips_1m"] == 1
+
+        later = store.get_velocity_features(1, "tenant-a", now=NOW + 1800)
+        assert later["distinct_ips_1h"] == 1
+
+    def test_inter_event_times(self, store):
+        """Mean inter-event gap and time since last event"""
+        store.ingest(_event(-30))
+        store.ingest(_event(-20))
+        store.ingest(_event(0))
+
+        features = store.get_velocity_features(1, "tenant-a", now=NOW + 5)
+
+        assert features["mean_inter_event_seconds_1h"] == pytest.approx(15.0)
+        assert features["seconds_since_last_event"] == pytest.approx(5.0)
+
+    def test_behavior_features(self, store):
+        """Average, max and fraud history come from the user profile"""
+        store.ingest(_event(-100, amount=10.0))
+        store.ingest(_event(-50, amount=30.0, is_fraud=True))
+        store.ingest(_event(-10, event_type="login", amount=None))
+
+        behavior = store.get_behavior_features(1, "tenant-a")
+
+        assert behavior["avg_transaction_amount"] == pytest.approx(20.0)
+        assert behavior["max_transaction_amount"] == pytest.approx(30.0)
+        assert behavior["transaction_frequency"] == pytest.approx(2 / 30)
+        assert behavior["fraud_history_count"] == 1
+
+    def test_behavior_history_is_seeded_once_and_capped(self, store):
+        """The first read loads the last transactions from history; later events slide them along"""
+        loads = []
+
+        def history():
+            loads.append(1)
+            return [50.0, None] + [10.0] * (BEHAVIOR_HISTORY_LIMIT - 2), 3
+
+        # Already in the event log, so seeding replaces it rather than adding to it
+        store.ingest(_event(-60, amount=50.0))
+        behavior = store.get_behavior_features(1, "tenant-a", history)
+        assert behavior["max_transaction_amount"] == pytest.approx(50.0)
+        assert behavior["transaction_frequency"] == pytest.approx(BEHAVIOR_HISTORY_LIMIT / 30)
+        assert behavior["fraud_history_count"] == 3
+
+        for offset in range(-50, -48):
+            store.ingest(_event(offset, amount=1.0, is_fraud=True))
+        behavior = store.get_behavior_features(1, "tenant-a", history)
+        assert behavior["avg_transaction_amount"] == pytest.approx((50 + 10 * 96 + 2) / 99)
+        assert behavior["transaction_frequency"] == pytest.approx(BEHAVIOR_HISTORY_LIMIT / 30)
+        assert behavior["fraud_history_count"] == 5
+        assert len(loads) == 1
+
+        store.backfill([])
+        store.get_behavior_features(1, "tenant-a", history)
+        assert len(loads) == 2
+
+    def test_backend_is_configured(self):
+        """The shared store uses Redis only when configured to"""
+        try:
+            configure_fraud_feature_store("redis", "redis://localhost:6379/0")
+            assert isinstance(fraud_feature_store.backend, RedisFeatureBackend)
+            configure_fraud_feature_store("redis", None)
+            assert isinstance(fraud_feature_store.backend, InMemoryFeatureBackend)
+        finally:
+            configure_fraud_feature_store()
+
+    @pytest.mark.asyncio
+    async def test_backfill_task_rebuilds_the_configured_backend(self, monkeypatch):
+        """The backfill task writes to the Redis backend the API reads, not worker memory"""
+        pytest.importorskip("sklearn")
+        import database
+        from ai.fraud_detection import FraudDetection
+        from config import settings
+        from tasks.background_tasks import fraud_feature_backfill_task
+
+        rebuilt = []
+
+        async def rebuild(detection, lookback_hours=24):
+            rebuilt.append(detection.feature_store.backend)
+            return 3
+
+        class Session:
+            def close(self):
+                pass
+
+        monkeypatch.setattr(settings, "REDIS_ENABLED", True)
+        monkeypatch.setattr(settings, "FRAUD_FEATURE_BACKEND", "redis")
+        monkeypatch.setattr(settings, "REDIS_URL", "redis://localhost:6379/0")
+        monkeypatch.setattr(database, "SessionLocal", Session)
+        monkeypatch.setattr(FraudDetection, "rebuild_feature_store", rebuild)
+        try:
+            result = await fraud_feature_backfill_task({"lookback_hours": 6})
+        finally:
+            configure_fraud_feature_store()
+
+        assert result["events_replayed"] == 3
+        assert len(rebuilt) == 1 and isinstance(rebuilt[0], RedisFeatureBackend)
+
+    def test_tenants_are_isolated(self, store):
+        """The same user id under two tenants has separate counters"""
+        store.ingest(_event(-10, tenant_id="tenant-a"))
+        store.ingest(_event(-10, tenant_id="tenant-b"))
+        store.ingest(_event(-5, tenant_id="tenant-b"))
+
+        assert store.get_velocity_features(1, "tenant-a", now=NOW)["events_last_1h"] == 1
+        assert store.get_velocity_features(1, "tenant-b", now=NOW)["events_last_1h"] == 2
+
+    def test_backfill_replays_history(self, store):
+        """Backfill resets the store and replays events in order"""
+        store.ingest(_event(-10, user_id=99))
+        replayed = store.backfill([_event(-120), _event(-60)])
+
+        assert replayed == 2
+        assert store.get_velocity_features(1, "tenant-a", now=NOW)["events_last_1h"] == 2
+        assert store.get_velocity_features(99, "tenant-a", now=NOW)["events_last_1h"] == 0
+
+    def test_lru_eviction_bounds_memory(self):
+        """The least recently active user is evicted at capacity"""
+        store = FraudFeatureStore(InMemoryFeatureBackend(max_users=2))
+        store.ingest(_event(-30, user_id=1))
+        store.ingest(_event(-20, user_id=2))
+        store.ingest(_event(-10, user_id=3))
+
+        assert store.get_velocity_features(1, "tenant-a", now=NOW)["events_last_1h"] == 0
+        assert store.get_velocity_features(3, "tenant-a", now=NOW)["events_last_1h"] == 1
@@ -0,0 +1,125 @@
+"""
+Test suite for the compiled fraud rule engine
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from ai.fraud_rule_engine import CompiledRuleSet, FraudRuleEngine, compile_rule
+
+
+def _rule(rule_id, conditions, severity="high"):
+    return SimpleNamespace(rule_id=rule_id, rule_name=rule_id, severity=severity, conditions=conditions)
+
+
+RULES = [
+    _rule("large_amount", [{"field": "amount", "operator": "greater_than", "value": 1000}]),
+    _rule("tor_exit", [{"field": "ip_address", "operator": "contains", "value": "10.66."}], "critical"),
+    _rule("burst", [
+        {"field": "events_last_hour", "operator": "greater_than", "value": 5},
+        {"field": "is_mobile", "operator": "equals", "value": True},
+    ], "medium"),
+]
+
+
+class TestCompiledRuleSet:
+    """Test cases for CompiledRuleSet"""
+
+    @pytest.fixture
+    def rule_set(self):
+        return CompiledRuleSet(compile_rule(rule) for rule in RULES)
+
+    def test_only_relevant_rules_run(self, rule_set):
+        """Rules whose fields are absent from the event are skipped"""
+        results = rule_set.evaluate({"amount": 5000}, {})
+
+        assert [r["rule_id"] for r in results] == ["large_amount"]
+        assert results[0]["triggered"] is True
+
+    def test_conditions_combine_with_and(self, rule_set):
+        """Every present condition must hold for a rule to trigger"""
+        hit = rule_set.evaluate({}, {"events_last_hour": 9, "is_mobile": True})
+        miss = rule_set.evaluate({}, {"events_last_hour": 9, "is_mobile": False})
+
+        assert hit == [{"rule_id": "burst", "rule_name": "burst", "triggered": True, "severity": "medium"}]
+        assert miss[0]["triggered"] is False
+
+    def test_event_data_takes_precedence_over_features(self, rule_set):
+        """A field in event_data shadows the same feature name"""
+        results = rule_set.evaluate({"amount": 10}, {"amount": 5000})
+
+        assert results[0]["triggered"] is False
+
+    def test_incomparable_values_do_not_trigger(self, rule_set):
+        """Type mismatches are treated as non-matches instead of raising"""
+        results = rule_set.evaluate({"amount": "lots"}, {})
+
+        assert results[0]["triggered"] is False
+
+    def test_dict_conditions_document(self):
+        """Rules stored as {"conditions": [...]} compile the same as lists"""
+        rule = compile_rule(_rule("doc", {"conditions": [{"field": "amount", "operator": "less_than", "value": 1}]}))
+
+        assert [c.field for c in rule.conditions] == ["amount"]
+
+    def test_batch_matches_single_event_evaluation(self, rule_set):
+        """Column-wise batch evaluation returns the same results in input order"""
+        events = [
+            ({"amount": 5000, "ip_address": "10.66.1.2"}, {}),
+            ({"amount": 10}, {"events_last_hour": 9, "is_mobile": True}),
+            ({"ip_address": "8.8.8.8"}, {}),
+            ({}, {}),
+            ({"amount": None}, {}),
+        ]
+
+        batch = rule_set.evaluate_batch(events)
+
+        assert batch == [rule_set.evaluate(event_data, features) for event_data, features in events]
+        assert rule_set.evaluate_batch([]) == []
+
+
+class TestFraudRuleEngine:
+    """Test cases for FraudRuleEngine caching"""
+
+    def test_rule_set_cached_until_invalidated(self):
+        """Rules are compiled once per tenant until invalidated"""
+        engine = FraudRuleEngine()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return RULES
+
+        engine.get_rule_set("tenant-a", loader)
+        engine.get_rule_set("tenant-a", loader)
+        assert len(loads) == 1
+
+        engine.invalidate("tenant-a")
+        engine.get_rule_set("tenant-a", loader)
+        assert len(loads) == 2
+
+    def test_shared_version_change_recompiles(self):
+        """A new shared version forces recompilation"""
+        engine = FraudRuleEngine()
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return RULES
+
+        engine.get_rule_set("tenant-a", loader, version=b"1")
+        engine.get_rule_set("tenant-a", loader, version=b"1")
+        engine.get_rule_set("tenant-a", loader, version=b"2")
+
+        assert len(loads) == 2
+
+    def test_tenants_cached_separately(self):
+        """Each tenant has its own compiled rule set"""
+        engine = FraudRuleEngine()
+
+        a = engine.get_rule_set("tenant-a", lambda: RULES[:1])
+        b = engine.get_rule_set("tenant-b", lambda: RULES)
+
+        assert len(a.rules) == 1
+        assert len(b.rules) == 3
@@ -0,0 +1,239 @@
+"""
+Test suite for the API gateway's pooled upstream clients
+"""
+
+import gzip
+
+import httpx
+import pytest
+import yaml
+from starlette.requests import Request
+
+from caching.http_cache import HTTPCache
+from gateway.api_gateway import APIGateway
+from gateway.upstream import (
+    UpstreamPool, backoff_delay, filter_hop_by_hop, http2_available, send_with_retries,
+    upstream_latency_summary
+)
+
+
+async def no_sleep(delay):
+    no_sleep.delays.append(delay)
+
+
+class TestHeaderFiltering:
+    """Test cases for hop-by-hop header removal"""
+
+    def test_drops_hop_by_hop_and_connection_tokens(self):
+        """Standard hop-by-hop headers and those named in Connection are not forwarded"""
+        headers = [
+            ("Host", "gateway"), ("Connection", "keep-alive, X-Trace-Hop"), ("Keep-Alive", "timeout=5"),
+            ("Transfer-Encoding", "chunked"), ("TE", "trailers"), ("Upgrade", "h2c"),
+            ("X-Trace-Hop", "1"), ("Set-Cookie", "a=1"), ("Set-Cookie", "b=2"), ("Content-Type", "text/plain")
+        ]
+        assert filter_hop_by_hop(headers) == [
+            ("Set-Cookie", "a=1"), ("Set-Cookie", "b=2"), ("Content-Type", "text/plain")
+        ]
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Delays stay within the exponential bound and never exceed the cap"""
+        assert all(0 <= backoff_delay(2, base=0.1) <= 0.4 for _ in range(100))
+        assert max(backoff_delay(20, base=0.1, cap=1.0) for _ in range(100)) <= 1.0
+
+
+class TestSendWithRetries:
+    """Test cases for retrying upstream requests"""
+
+    @pytest.mark.asyncio
+    async def test_retries_unavailable_upstream_with_replayed_body(self):
+        """A 503 is retried with the same body and the final response streams back"""
+        bodies = []
+
+        def handler(request):
+            bodies.append(request.content)
+            if len(bodies) < 3:
+                return httpx.Response(503)
+            return httpx.Response(200, content=b"stored")
+
+        no_sleep.delays = []
+        async with httpx.AsyncClient(base_url="http://orders", transport=httpx.MockTransport(handler)) as client:
+            response = await send_with_retries(
+                client, lambda: client.build_request("PUT", "/api/v1/orders/1", content=b"payload"),
+                retries=3, route="/api/v1/orders/*", sleep=no_sleep
+            )
+            assert response.status_code == 200
+            assert await response.aread() == b"stored"
+            await response.aclose()
+
+        assert bodies == [b"payload"] * 3
+        assert len(no_sleep.delays) == 2
+        latency = upstream_latency_summary()["/api/v1/orders/*"]["PUT"]
+        assert latency["count"] >= 3 and latency["errors"] >= 2
+
+    @pytest.mark.asyncio
+    async def test_exhausted_or_disabled_retries(self):
+        """Transport errors surface after the last retry; retries=0 returns the first answer"""
+        calls = []
+
+        def failing(request):
+            calls.append(request)
+            raise httpx.ConnectError("refused", request=request)
+
+        no_sleep.delays = []
+        async with httpx.AsyncClient(base_url="http://auth", transport=httpx.MockTransport(failing)) as client:
+            with pytest.raises(httpx.ConnectError):
+                await send_with_retries(client, lambda: client.build_request("GET", "/"), retries=2, sleep=no_sleep)
+        assert len(calls) == 3
+
+        async with httpx.AsyncClient(
+            base_url="http://auth", transport=httpx.MockTransport(lambda request: httpx.Response(502))
+        ) as client:
+            response = await send_with_retries(client, lambda: client.build_request("POST", "/"), sleep=no_sleep)
+            assert response.status_code == 502
+            await response.aclose()
+        assert len(no_sleep.delays) == 2
+
+
+class TestUpstreamPool:
+    """Test cases for per-upstream client pooling"""
+
+    @pytest.mark.asyncio
+    async def test_one_client_per_upstream(self):
+        """Clients are reused per base URL and replaced once closed"""
+        pool = UpstreamPool(max_keepalive_connections=5)
+        client = pool.client("http://products:8002")
+        assert pool.client("http://products:8002") is client
+        assert pool.client("http://orders:8003") is not client
+        assert pool.http2 == http2_available()
+
+        await pool.aclose()
+        assert client.is_closed
+        assert pool.client("http://products:8002") is not client
+        await pool.aclose()
+
+    def test_timeouts_are_per_request(self):
+        """Timeouts are built per route; the connect phase keeps the pool's cap"""
+        pool = UpstreamPool(connect_timeout=2.0)
+        assert pool.timeout(10) == httpx.Timeout(10, connect=2.0)
+        assert pool.timeout(1) == httpx.Timeout(1, connect=1)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.calls.append((name, args))
+            return self
+        return queue
+
+    async def execute(self):
+        return [getattr(self.client, f"_{name}")(*args) for name, args in self.calls]
+
+
+class FakeRedis:
+    """Async GET/MGET/DELETE plus pipelined SETEX for the response cache"""
+
+    def __init__(self):
+        self.strings = {}
+
+    def _setex(self, key, ttl, value):
+        self.strings[key] = value.encode() if isinstance(value, str) else value
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def mget(self, keys):
+        return [self.strings.get(key) for key in keys]
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+BODY = gzip.compress(b'{"items": []}')
+
+
+def proxy_request(path, headers=()):
+    scope = {
+        "type": "http", "method": "GET", "scheme": "http", "server": ("gateway", 80),
+        "path": path, "raw_path": path.encode(), "query_string": b"page=2", "client": ("203.0.113.7", 5000),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    return Request(scope, receive)
+
+
+class TestProxyHandler:
+    """Test cases for requests proxied through an APIGateway route"""
+
+    @pytest.fixture
+    def gateway(self, tmp_path):
+        config = tmp_path / "gateway.yaml"
+        config.write_text(yaml.safe_dump({
+            "rate_limiting": {"enabled": False},
+            "routes": [
+                {"path": "/api/v1/products/{item}", "methods": ["GET"], "target_url": "http://products",
+                 "auth_required": False, "timeout": 7},
+                {"path": "/api/v1/catalog/{item}", "methods": ["GET"], "target_url": "http://products",
+                 "auth_required": False, "timeout": 3, "caching": True},
+            ]
+        }))
+        gateway = APIGateway(str(config))
+        gateway.upstream_requests = []
+
+        def upstream(request):
+            gateway.upstream_requests.append(request)
+            # A stream rather than content=, which httpx would read up front like a buffered body
+            return httpx.Response(200, stream=httpx.ByteStream(BODY), headers=[
+                ("Content-Encoding", "gzip"), ("Content-Type", "application/json"),
+                ("Cache-Control", "max-age=60"), ("Connection", "X-Upstream-Hop"), ("X-Upstream-Hop", "1")
+            ])
+
+        gateway.upstreams = UpstreamPool(transport=httpx.MockTransport(upstream))
+        gateway.response_cache = HTTPCache(FakeRedis(), name="gateway", stale_while_revalidate=0)
+        return gateway
+
+    @staticmethod
+    def endpoint(gateway, path):
+        return next(route.endpoint for route in gateway.app.routes if getattr(route, "path", None) == path)
+
+    @pytest.mark.asyncio
+    async def test_streams_encoded_body_with_route_timeout(self, gateway):
+        """The upstream body is relayed still encoded; identity headers and hop-by-hop headers are not forwarded"""
+        handler = self.endpoint(gateway, "/api/v1/products/{item}")
+        response = await handler(proxy_request("/api/v1/products/9", [("X-User-ID", "forged"), ("TE", "trailers")]))
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        assert body == BODY
+        assert response.headers["content-encoding"] == "gzip"
+        assert "x-upstream-hop" not in response.headers
+
+        sent = gateway.upstream_requests[0]
+        assert str(sent.url) == "http://products/api/v1/products/9?page=2"
+        assert "x-user-id" not in sent.headers and "te" not in sent.headers
+        assert sent.extensions["timeout"] == httpx.Timeout(7, connect=5.0).as_dict()
+        await gateway.upstreams.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cached_route_stores_raw_bytes(self, gateway):
+        """Cached responses keep the encoded body that matches their Content-Encoding"""
+        handler = self.endpoint(gateway, "/api/v1/catalog/{item}")
+        first = await handler(proxy_request("/api/v1/catalog/9", [("Accept-Encoding", "gzip")]))
+        second = await handler(proxy_request("/api/v1/catalog/9", [("Accept-Encoding", "gzip")]))
+
+        assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+        assert first.body == second.body == BODY
+        assert second.headers["content-encoding"] == "gzip"
+        assert len(gateway.upstream_requests) == 1
+        assert gateway.upstream_requests[0].extensions["timeout"] == httpx.Timeout(3, connect=3).as_dict()
+        await gateway.response_cache.aclose()
+        await gateway.upstreams.aclose()
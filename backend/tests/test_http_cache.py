@@ -0,0 +1,322 @@
+"""
+Test suite for the shared HTTP response cache
+"""
+
+import asyncio
+import contextlib
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from starlette.requests import Request
+
+from caching.http_cache import HTTPCache, normalize_header, normalize_url, parse_cache_control
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.calls.append((name, args))
+            return self
+        return queue
+
+    async def execute(self):
+        self.client.round_trips += 1
+        return [getattr(self.client, f"_{name}")(*args) for name, args in self.calls]
+
+
+class FakeRedis:
+    """Async GET/MGET/DELETE plus pipelined SETEX over a dict of bytes"""
+
+    def __init__(self):
+        self.strings = {}
+        self.round_trips = 0
+
+    def _setex(self, key, ttl, value):
+        self.strings[key] = value.encode() if isinstance(value, str) else value
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.strings.get(key)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.strings.get(key) for key in keys]
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class Origin:
+    """Upstream that honours If-None-Match and counts its requests"""
+
+    def __init__(self, body=b"payload", headers=None, status_code=200, delay=0.0):
+        self.body = body
+        self.headers = headers if headers is not None else [("Cache-Control", "max-age=60")]
+        self.status_code = status_code
+        self.delay = delay
+        self.requests = []
+
+    async def __call__(self, conditional):
+        self.requests.append(dict(conditional))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        etag = next((value for name, value in self.headers if name.lower() == "etag"), None)
+        if etag and conditional.get("If-None-Match") == etag:
+            return 304, [("Cache-Control", "max-age=60")], b""
+        return self.status_code, list(self.headers), self.body
+
+
+URL = "https://soladia.test/api/v1/products?page=1&sort=price"
+
+
+def make_cache(now):
+    return HTTPCache(FakeRedis(), name="test", stale_while_revalidate=0, clock=lambda: now[0])
+
+
+class TestNormalization:
+    """Test cases for cache key normalization"""
+
+    def test_headers_urls_and_directives(self):
+        """Equivalent request headers and URLs normalize to one form"""
+        assert normalize_header("accept-encoding", "gzip, deflate, br") == "br,gzip,deflate"
+        assert normalize_header("accept-encoding", "br;q=1.0,  GZIP") == "br,gzip"
+        assert normalize_header("accept-encoding", "gzip;q=0, identity") == ""
+        assert normalize_header("accept-language", "en-US,  fr") == normalize_header("accept-language", "fr,en-us")
+        assert normalize_url("HTTPS://Soladia.test/a?b=2&a=1") == "https://soladia.test/a?a=1&b=2"
+        assert parse_cache_control('public, max-age=60, stale-while-revalidate="30", no-cache') == {
+            "public": None, "max-age": "60", "stale-while-revalidate": "30", "no-cache": None
+        }
+
+
+class TestHTTPCache:
+    """Test cases for storing and serving shared responses"""
+
+    @pytest.mark.asyncio
+    async def test_vary_keys_ignore_unrelated_headers(self):
+        """Cookies and user agents share an entry; a Vary header value selects the variant"""
+        now = [1000.0]
+        cache = make_cache(now)
+        body = gzip.compress(b"\x00\xff binary")
+        origin = Origin(body, [("Cache-Control", "max-age=60"), ("Vary", "Accept-Encoding, Accept-Language"),
+                               ("Content-Encoding", "gzip")])
+
+        first = await cache.serve("GET", URL, [("Accept-Encoding", "gzip, br"), ("Cookie", "a=1")], origin)
+        second = await cache.serve("GET", "https://soladia.test/api/v1/products?sort=price&page=1", [
+            ("accept-encoding", "br,gzip"), ("Cookie", "b=2"), ("User-Agent", "other")
+        ], origin)
+        other_language = await cache.serve("GET", URL, [("Accept-Encoding", "gzip, br"), ("Accept-Language", "fr")],
+                                           origin)
+
+        assert (first.cache_status, second.cache_status, other_language.cache_status) == ("MISS", "HIT", "MISS")
+        assert second.body == body and dict(second.headers)["Content-Encoding"] == "gzip"
+        assert len(origin.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_validators_and_conditional_requests(self):
+        """Stored responses get an ETag and Last-Modified; matching validators get a 304"""
+        now = [1000.0]
+        cache = make_cache(now)
+        origin = Origin()
+        stored = await cache.serve("GET", URL, [], origin)
+        headers = dict(stored.headers)
+
+        not_modified = await cache.serve("GET", URL, [("If-None-Match", f'W/{headers["ETag"]}, "other"')], origin)
+        assert (not_modified.status_code, not_modified.body) == (304, b"")
+        assert dict(not_modified.headers)["ETag"] == headers["ETag"]
+        since = await cache.serve("GET", URL, [("If-Modified-Since", headers["Last-Modified"])], origin)
+        assert since.status_code == 304
+        changed = await cache.serve("GET", URL, [("If-None-Match", '"other"')], origin)
+        assert (changed.status_code, changed.body) == (200, b"payload")
+
+        response = not_modified.to_response()
+        assert response.status_code == 304 and response.headers["x-cache"] == "HIT"
+        assert "content-length" not in response.headers
+        assert len(origin.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_uncacheable_responses_are_not_stored(self):
+        """private, no-store, Set-Cookie and Vary: * responses always go to the origin"""
+        now = [1000.0]
+        for headers in ([("Cache-Control", "private, max-age=60")], [("Cache-Control", "no-store")],
+                        [("Cache-Control", "max-age=60"), ("Set-Cookie", "session=1")],
+                        [("Cache-Control", "max-age=60"), ("Vary", "*")]):
+            cache = make_cache(now)
+            origin = Origin(headers=headers)
+            await cache.serve("GET", URL, [], origin)
+            assert (await cache.serve("GET", URL, [], origin)).cache_status == "MISS"
+            assert len(origin.requests) == 2
+
+        cache = make_cache(now)
+        origin = Origin()
+        await cache.serve("GET", URL, [("Authorization", "Bearer token")], origin)
+        await cache.serve("GET", URL, [("Authorization", "Bearer token")], origin)
+        assert len(origin.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_authenticated_requests_store_only_shareable_responses(self):
+        """Callers identified without an Authorization header are treated like those with one"""
+        now = [1000.0]
+        cache = make_cache(now)
+        origin = Origin()
+        for _ in range(2):
+            result = await cache.serve("GET", URL, [("X-API-Key", "key")], origin, authenticated=True)
+            assert result.cache_status == "MISS"
+        assert len(origin.requests) == 2
+
+        public = Origin(headers=[("Cache-Control", "public, max-age=60")])
+        await cache.serve("GET", URL + "&public=1", [], public, authenticated=True)
+        shared = await cache.serve("GET", URL + "&public=1", [], public, authenticated=True)
+        assert shared.cache_status == "HIT" and len(public.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_while_revalidate(self):
+        """Within the window the stale copy is served and refreshed in the background"""
+        now = [1000.0]
+        cache = make_cache(now)
+        origin = Origin(headers=[("Cache-Control", "max-age=10, stale-while-revalidate=30"), ("ETag", '"v1"')])
+        await cache.serve("GET", URL, [], origin)
+
+        now[0] += 20
+        stale = await cache.serve("GET", URL, [], origin)
+        assert (stale.cache_status, stale.body) == ("STALE", b"payload")
+        await asyncio.gather(*cache._background)
+        assert origin.requests[-1] == {
+            "If-None-Match": '"v1"', "If-Modified-Since": dict(stale.headers)["Last-Modified"]
+        }
+
+        fresh = await cache.serve("GET", URL, [], origin)
+        assert (fresh.cache_status, fresh.body) == ("HIT", b"payload")
+        assert dict(fresh.headers)["Cache-Control"] == "max-age=60"
+
+        now[0] += 200
+        revalidated = await cache.serve("GET", URL, [], origin)
+        assert (revalidated.cache_status, revalidated.body) == ("REVALIDATED", b"payload")
+        assert len(origin.requests) == 3
+        await cache.aclose()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_collapse(self):
+        """Concurrent misses for one URL make a single upstream request"""
+        now = [1000.0]
+        cache = make_cache(now)
+        origin = Origin(delay=0.01)
+
+        results = await asyncio.gather(*(cache.serve("GET", URL, [], origin) for _ in range(10)))
+
+        assert len(origin.requests) == 1
+        assert all(result.body == b"payload" for result in results)
+        assert sorted(result.cache_status for result in results) == ["HIT"] * 9 + ["MISS"]
+
+        private = Origin(headers=[("Cache-Control", "private")], delay=0.01)
+        await asyncio.gather(*(cache.serve("GET", URL + "&private=1", [], private) for _ in range(3)))
+        assert len(private.requests) == 3
+
+
+def edge_request(path, headers=()):
+    scope = {
+        "type": "http", "method": "GET", "scheme": "https", "server": ("soladia.test", 443),
+        "path": path, "raw_path": path.encode(), "query_string": b"", "client": ("203.0.113.7", 5000),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    return Request(scope, receive)
+
+
+@contextlib.asynccontextmanager
+async def edge_service():
+    """An EdgeComputingService whose only edge node is a local server returning a stylesheet"""
+    pytest.importorskip("boto3")
+    pytest.importorskip("cloudflare")
+    from edge.edge_computing import CacheRule, CacheStrategy, EdgeComputingService, EdgeLocation, EdgeNode
+
+    node = SimpleNamespace(status=200, requests=[])
+
+    async def handler(request):
+        node.requests.append(request.path)
+        return web.Response(status=node.status, body=b"body { color: red }", content_type="text/css")
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handler)
+    server = TestServer(app)
+    await server.start_server()
+
+    service = EdgeComputingService(FakeRedis())
+    service.edge_nodes = [EdgeNode(
+        id="local", location=EdgeLocation.US_EAST, url=str(server.make_url("")).rstrip("/"),
+        capacity=1, latency=0.0
+    )]
+    service.cache_rules = [
+        CacheRule(pattern="/offline/*", ttl=60, strategy=CacheStrategy.CACHE_ONLY,
+                  headers={"Cache-Control": "public, max-age=60"}, compression=False, minify=False),
+        CacheRule(pattern="/api/*", ttl=60, strategy=CacheStrategy.NETWORK_FIRST,
+                  headers={"Cache-Control": "public, max-age=60"}, compression=False, minify=False),
+        CacheRule(pattern="*.css", ttl=60, strategy=CacheStrategy.CACHE_FIRST,
+                  headers={"Cache-Control": "public, max-age=60"}, compression=True, minify=False),
+    ]
+    try:
+        yield service, node
+    finally:
+        await service.cache.aclose()
+        await server.close()
+
+
+class TestEdgeComputingService:
+    """Test cases for cache strategies in EdgeComputingService.process_request"""
+
+    @pytest.mark.asyncio
+    async def test_cache_only(self):
+        """Cache-only rules answer from the cache or 404 without contacting the edge node"""
+        async with edge_service() as (service, node):
+            missing = await service.process_request(edge_request("/offline/a.txt"), None)
+            assert missing.status_code == 404
+
+            await service.cache.serve("GET", "https://soladia.test/offline/a.txt", [], Origin(b"stored"))
+            hit = await service.process_request(edge_request("/offline/a.txt"), None)
+            assert (hit.status_code, hit.body, hit.headers["x-cache"]) == (200, b"stored", "HIT")
+            assert node.requests == []
+
+    @pytest.mark.asyncio
+    async def test_network_first_falls_back_to_stored_copy(self):
+        """Network-first rules go to the edge node each time and serve the stored copy on 5xx"""
+        async with edge_service() as (service, node):
+            fresh = await service.process_request(edge_request("/api/products"), None)
+            assert (fresh.status_code, fresh.body) == (200, b"body { color: red }")
+
+            node.status = 503
+            fallback = await service.process_request(edge_request("/api/products"), None)
+            assert (fallback.status_code, fallback.body) == (200, b"body { color: red }")
+            assert fallback.headers["x-cache"] == "STALE"
+            assert node.requests == ["/api/products"] * 2
+
+    @pytest.mark.asyncio
+    async def test_gzip_variants_vary_on_accept_encoding(self):
+        """Compressed and identity bodies are stored as separate Accept-Encoding variants"""
+        async with edge_service() as (service, node):
+            compressed = await service.process_request(
+                edge_request("/site.css", [("Accept-Encoding", "gzip, br")]), None
+            )
+            assert compressed.headers["content-encoding"] == "gzip"
+            assert compressed.headers["vary"] == "Accept-Encoding"
+            assert gzip.decompress(compressed.body) == b"body { color: red }"
+
+            identity = await service.process_request(edge_request("/site.css"), None)
+            assert "content-encoding" not in identity.headers
+            assert identity.body == b"body { color: red }"
+
+            again = await service.process_request(edge_request("/site.css", [("Accept-Encoding", "br,gzip")]), None)
+            assert (again.headers["x-cache"], again.body) == ("HIT", compressed.body)
+            assert node.requests == ["/site.css"] * 2
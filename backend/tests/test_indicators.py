@@ -0,0 +1,173 @@
+"""
+Test suite for the vectorized technical indicators
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from analytics import indicators
+from analytics.indicators import (
+    BollingerState,
+    EMAState,
+    MACDState,
+    ReturnStats,
+    RSIState,
+    SMAState,
+    TickIndicators
+)
+
+
+# Wilder's worked example (as used by TA-Lib and StockCharts)
+WILDER_PRICES = [
+    44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10, 45.42, 45.84, 46.08,
+    45.89, 46.03, 45.61, 46.28, 46.28, 46.00, 46.03, 46.41, 46.22, 45.64,
+]
+
+
+def _random_walk(size, seed=3):
+    rng = np.random.default_rng(seed)
+    return 100.0 + np.cumsum(rng.normal(0, 0.5, size))
+
+
+def _loop_ema(values, period):
+    alpha = 2.0 / (period + 1)
+    out = [values[0]]
+    for value in values[1:]:
+        out.append(out[-1] + alpha * (value - out[-1]))
+    return np.array(out)
+
+
+class TestVectorizedIndicators:
+    """Whole-array indicators against reference values"""
+
+    def test_sma_matches_convolution(self):
+        """SMA equals a plain moving-window mean"""
+        prices = _random_walk(500)
+        result = indicators.sma(prices, 20)
+
+        assert np.isnan(result[:19]).all()
+        np.testing.assert_allclose(result[19:], np.convolve(prices, np.ones(20) / 20, mode="valid"))
+
+    def test_ema_matches_recurrence_over_many_blocks(self):
+        """The block closed form matches the textbook recurrence on long series"""
+        prices = _random_walk(20000)
+        for period in (2, 12, 200):
+            np.testing.assert_allclose(indicators.ema(prices, period), _loop_ema(prices, period), rtol=1e-10)
+
+    def test_wilder_rsi_reference_values(self):
+        """RSI matches Wilder's published example"""
+        result = indicators.rsi(WILDER_PRICES, 14)
+
+        assert np.isnan(result[:14]).all()
+        np.testing.assert_allclose(result[14:17], [70.4641, 66.2496, 66.4809], atol=1e-3)
+
+    def test_rsi_flat_and_rising_series(self):
+        """No losses gives 100; no movement at all gives 50"""
+        assert indicators.rsi(np.arange(30.0), 14)[-1] == 100.0
+        assert indicators.rsi(np.ones(30), 14)[-1] == 50.0
+
+    def test_macd_signal_is_ema_of_macd_line(self):
+        """The signal line is a real EMA over the MACD series, not a constant"""
+        prices = _random_walk(300)
+        line, signal, histogram = indicators.macd(prices)
+
+        np.testing.assert_allclose(line, _loop_ema(prices, 12) - _loop_ema(prices, 26), atol=1e-10)
+        np.testing.assert_allclose(signal, _loop_ema(line, 9), atol=1e-10)
+        np.testing.assert_allclose(histogram, line - signal)
+        assert abs(histogram[-1]) > 0
+
+    def test_bollinger_bands_match_rolling_std(self):
+        """Band width is num_std population standard deviations"""
+        prices = _random_walk(200)
+        middle, upper, lower = indicators.bollinger_bands(prices, 20, 2.0)
+        expected_std = np.array([prices[i - 19:i + 1].std() for i in range(19, 200)])
+
+        np.testing.assert_allclose(upper[19:] - middle[19:], 2.0 * expected_std, rtol=1e-8)
+        np.testing.assert_allclose(middle[19:] - lower[19:], 2.0 * expected_std, rtol=1e-8)
+
+    def test_return_metrics(self):
+        """Drawdown, volatility and Sharpe on a hand-checked series"""
+        returns = [0.10, -0.20, 0.05, 0.10]
+
+        # Wealth 1.1 -> 0.88 -> 0.924 -> 1.0164; worst drop is 0.88 from the 1.1 peak
+        assert indicators.max_drawdown(returns) == pytest.approx(0.2)
+        assert indicators.volatility(returns) == pytest.approx(np.std(returns, ddof=1))
+        assert indicators.sharpe_ratio(returns) == pytest.approx(np.mean(returns) / np.std(returns, ddof=1))
+        assert indicators.sharpe_ratio([0.01]) == 0.0
+        assert indicators.max_drawdown([]) == 0.0
+
+
+class TestIncrementalIndicators:
+    """O(1) per-tick state agrees with the vectorized results"""
+
+    def test_states_match_vectorized_results(self):
+        """Feeding ticks one at a time reproduces the whole-array values"""
+        prices = _random_walk(400)
+        ema_state, sma_state, rsi_state = EMAState(12), SMAState(20), RSIState(14)
+        macd_state, bands_state = MACDState(), BollingerState(20, 2.0)
+
+        for price in prices:
+            ema_value = ema_state.update(price)
+            sma_value = sma_state.update(price)
+            rsi_value = rsi_state.update(price)
+            macd_value = macd_state.update(price)
+            bands = bands_state.update(price)
+
+        line, signal, _ = indicators.macd(prices)
+        _, upper, _ = indicators.bollinger_bands(prices, 20)
+        assert ema_value == pytest.approx(indicators.ema(prices, 12)[-1])
+        assert sma_value == pytest.approx(indicators.sma(prices, 20)[-1])
+        assert rsi_value == pytest.approx(indicators.rsi(prices, 14)[-1])
+        assert macd_value['signal'] == pytest.approx(signal[-1])
+        assert bands['upper'] == pytest.approx(upper[-1])
+
+    def test_resume_from_saved_state(self):
+        """A state primed from history and round-tripped through a dict keeps streaming"""
+        prices = _random_walk(300)
+        history, ticks = prices[:250], prices[250:]
+
+        rsi_state = RSIState.from_dict(RSIState.from_series(history, 14).to_dict())
+        macd_state = MACDState.from_dict(MACDState.from_series(history).to_dict())
+        for price in ticks:
+            rsi_value = rsi_state.update(price)
+            macd_value = macd_state.update(price)
+
+        assert rsi_value == pytest.approx(indicators.rsi(prices, 14)[-1])
+        assert macd_value['macd'] == pytest.approx(indicators.macd(prices)[0][-1])
+
+    def test_return_stats_and_tick_indicators(self):
+        """Running return statistics match the batch metrics"""
+        prices = _random_walk(120)
+        returns = indicators.simple_returns(prices)
+        stats = ReturnStats()
+        for value in returns:
+            stats.update(value)
+
+        assert stats.volatility == pytest.approx(indicators.volatility(returns))
+        assert stats.sharpe_ratio == pytest.approx(indicators.sharpe_ratio(returns))
+        assert stats.max_drawdown == pytest.approx(indicators.max_drawdown(returns))
+
+        tick = TickIndicators()
+        for price in prices[:60]:
+            tick.update(price)
+        resumed = TickIndicators.from_dict(tick.to_dict())
+        for price in prices[60:]:
+            snapshot = resumed.update(price)
+        assert snapshot['sma_50'] == pytest.approx(indicators.sma(prices, 50)[-1])
+        assert snapshot['max_drawdown'] == pytest.approx(stats.max_drawdown)
+
+
+class TestIndicatorBenchmark:
+    """Throughput over a 1M-point series"""
+
+    def test_million_point_benchmark(self):
+        """Every indicator handles 1M points well within a second"""
+        started = time.perf_counter()
+        timings = indicators.benchmark(1_000_000)
+        elapsed = time.perf_counter() - started
+
+        assert set(timings) >= {'sma_20', 'ema_12', 'rsi_14', 'macd', 'bollinger_20', 'max_drawdown'}
+        assert all(ms < 1000 for ms in timings.values())
+        assert elapsed < 10
@@ -0,0 +1,99 @@
+"""
+Test suite for the dynamic inference batcher
+"""
+
+import asyncio
+import pytest
+
+from ai.inference_batching import InferenceBatcher, BatchingConfig
+
+
+def _config(**overrides):
+    """Batching config that does not require torch"""
+    values = {"max_batch_size": 4, "max_wait_ms": 20.0, "inference_mode": False}
+    values.update(overrides)
+    return BatchingConfig(**values)
+
+
+class TestInferenceBatcher:
+    """Test cases for InferenceBatcher"""
+
+    @pytest.mark.asyncio
+    async def test_results_returned_in_input_order(self):
+        """Each caller gets the result for its own input"""
+        batcher = InferenceBatcher(_config())
+        batcher.register_model("double", lambda xs: [x * 2 for x in xs])
+
+        results = await batcher.submit_many("double", list(range(10)))
+
+        assert results == [x * 2 for x in range(10)]
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_flushes_at_max_batch_size(self):
+        """Concurrent requests are grouped up to the max batch size"""
+        seen_sizes = []
+
+        def batch_fn(xs):
+            seen_sizes.append(len(xs))
+            return xs
+
+        batcher = InferenceBatcher(_config(max_batch_size=4, max_wait_ms=500.0))
+        batcher.register_model("identity", batch_fn)
+
+        await batcher.submit_many("identity", list(range(8)))
+
+        assert seen_sizes == [4, 4]
+        stats = batcher.get_stats()["identity"]
+        assert stats["batches"] == 2
+        assert stats["avg_batch_size"] == 4
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_flushes_partial_batch_after_wait_budget(self):
+        """A lone request is not held longer than the wait budget"""
+        batcher = InferenceBatcher(_config(max_batch_size=64, max_wait_ms=5.0))
+        batcher.register_model("identity", lambda xs: xs)
+
+        result = await asyncio.wait_for(batcher.submit("identity", "a"), timeout=1.0)
+
+        assert result == "a"
+        assert batcher.get_stats()["identity"]["batch_size_histogram"] == {1: 1}
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_batch_failure_propagates_to_every_caller(self):
+        """An exception in the forward pass fails all requests in the batch"""
+        def failing(xs):
+            raise ValueError("model exploded")
+
+        batcher = InferenceBatcher(_config())
+        batcher.register_model("broken", failing)
+
+        results = await asyncio.gather(
+            batcher.submit("broken", 1),
+            batcher.submit("broken", 2),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert batcher.get_stats()["broken"]["errors"] >= 1
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_mismatched_result_count_is_an_error(self):
+        """Batch functions must return one result per input"""
+        batcher = InferenceBatcher(_config())
+        batcher.register_model("short", lambda xs: xs[:1])
+
+        with pytest.raises(RuntimeError):
+            await batcher.submit_many("short", [1, 2, 3])
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_model(self):
+        """Submitting to an unregistered model raises KeyError"""
+        batcher = InferenceBatcher(_config())
+
+        with pytest.raises(KeyError):
+            await batcher.submit("missing", 1)
@@ -0,0 +1,226 @@
+"""
+Test suite for the content-addressed inference result cache
+"""
+
+import fnmatch
+import pytest
+
+from ai.inference_cache import InferenceResultCache, ModelRegistry, normalize_text
+
+
+class FakeAsyncRedis:
+    """Minimal in-memory stand-in for the async Redis client"""
+
+    def __init__(self):
+        self.store = {}
+        self.hashes = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+    async def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    async def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    async def scan_iter(self, match=None, count=None):
+        for key in list(self.store):
+            if match is None or fnmatch.fnmatch(key, match):
+                yield key
+
+
+class TestInferenceResultCache:
+    """Test cases for InferenceResultCache"""
+
+    @pytest.fixture
+    def redis_client(self):
+        return FakeAsyncRedis()
+
+    @pytest.fixture
+    def cache(self, redis_client, tmp_path):
+        registry = ModelRegistry(redis_client, refresh_interval=0.0)
+        registry.register("sentiment", "1.0.0")
+        registry.register("tts", "1.0.0")
+        return InferenceResultCache(redis_client, registry, cache_dir=str(tmp_path), max_redis_bytes=256)
+
+    @pytest.mark.asyncio
+    async def test_identical_inputs_hit_cache(self, cache):
+        """The second lookup for the same input is served from cache"""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"label": "positive"}
+
+        first = await cache.get_or_compute("sentiment", normalize_text("Great  NFT"), compute)
+        second = await cache.get_or_compute("sentiment", normalize_text("Great NFT "), compute)
+
+        assert first == second == {"label": "positive"}
+        assert len(calls) == 1
+        stats = cache.get_stats()["models"]["sentiment"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_params_are_part_of_the_key(self, cache):
+        """Different parameters for the same input are cached separately"""
+        async def compute_en():
+            return {"lang": "en"}
+
+        async def compute_de():
+            return {"lang": "de"}
+
+        en = await cache.get_or_compute("sentiment", b"hello", compute_en, params={"lang": "en"})
+        de = await cache.get_or_compute("sentiment", b"hello", compute_de, params={"lang": "de"})
+
+        assert en == {"lang": "en"}
+        assert de == {"lang": "de"}
+
+    @pytest.mark.asyncio
+    async def test_uncacheable_results_are_recomputed(self, cache):
+        """Results rejected by the cacheable predicate are not stored"""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"error": "upstream down"}
+
+        for _ in range(2):
+            await cache.get_or_compute("sentiment", b"x", compute, cacheable=lambda r: "error" not in r)
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_binary_payloads_spill_to_disk(self, cache, redis_client, tmp_path):
+        """Binary results are written to disk with only a pointer in Redis"""
+        audio = b"\x00\x01" * 1024
+
+        async def compute():
+            return audio
+
+        await cache.get_or_compute("tts", b"hello", compute, binary=True)
+        cached = await cache.get_or_compute("tts", b"hello", compute, binary=True)
+
+        assert cached == audio
+        assert list(tmp_path.rglob("*.bin"))
+        assert all(len(value) < 256 for value in redis_client.store.values())
+        assert cache.get_stats()["models"]["tts"]["disk_stores"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_evicts_least_recently_used(self, redis_client, tmp_path):
+        """Past its byte budget the disk tier drops the files read or written longest ago"""
+        registry = ModelRegistry(redis_client, refresh_interval=0.0)
+        cache = InferenceResultCache(redis_client, registry, cache_dir=str(tmp_path), max_disk_bytes=2500)
+        calls = []
+
+        async def compute(name):
+            calls.append(name)
+            return name.encode() * 1000
+
+        for name in ("a", "b"):
+            await cache.get_or_compute("tts", name.encode(), lambda name=name: compute(name), binary=True)
+        # Reading "a" makes "b" the least recently used file
+        await cache.get_or_compute("tts", b"a", lambda: compute("a"), binary=True)
+        await cache.get_or_compute("tts", b"c", lambda: compute("c"), binary=True)
+
+        assert len(list(tmp_path.rglob("*.bin"))) == 2
+        assert cache.get_stats()["models"]["tts"]["disk_evictions"] == 1
+        redis_client.store.clear()
+        await cache.get_or_compute("tts", b"a", lambda: compute("a"), binary=True)
+        await cache.get_or_compute("tts", b"b", lambda: compute("b"), binary=True)
+        assert calls == ["a", "b", "c", "b"]
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_counts_files_from_earlier_runs(self, cache, redis_client, tmp_path):
+        """A new cache over an existing directory includes its files in the budget"""
+        async def compute():
+            return b"x" * 1000
+
+        await cache.get_or_compute("tts", b"old", compute, binary=True)
+        restarted = InferenceResultCache(redis_client, cache.registry, cache_dir=str(tmp_path), max_disk_bytes=1500)
+        await restarted.get_or_compute("tts", b"new", compute, binary=True)
+
+        assert len(list(tmp_path.rglob("*.bin"))) == 1
+        assert restarted.get_stats()["total"]["disk_evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_results_are_cached_unless_marked_as_errors(self, cache):
+        """A valid result with nothing in it is reused; one carrying an error is not"""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"objects": [], "confidence": 0.0, **({"error": "timeout"} if len(calls) == 1 else {})}
+
+        def cacheable(result):
+            return "error" not in result
+
+        for _ in range(3):
+            await cache.get_or_compute("vision_yolo", b"blank", compute, cacheable=cacheable)
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("version", [None, "", "   "])
+    async def test_empty_versions_are_rejected(self, cache, version):
+        """A missing version never reaches the key builder"""
+        with pytest.raises(ValueError):
+            await cache.registry.set_version("sentiment", version)
+        assert cache.registry.versions["sentiment"] == "1.0.0"
+
+    @pytest.mark.asyncio
+    async def test_version_change_invalidates_results(self, cache, tmp_path):
+        """Publishing a new model version purges and bypasses old entries"""
+        results = iter([{"v": 1}, {"v": 2}])
+
+        async def compute():
+            return next(results)
+
+        await cache.get_or_compute("sentiment", b"text", compute)
+        await cache.registry.set_version("sentiment", "2.0.0")
+        after = await cache.get_or_compute("sentiment", b"text", compute)
+
+        assert after == {"v": 2}
+
+    @pytest.mark.asyncio
+    async def test_version_bump_from_another_worker(self, cache, redis_client):
+        """A version published in the shared registry is picked up on lookup"""
+        await redis_client.hset("ai_model_registry", "sentiment", "3.0.0")
+
+        assert await cache.registry.get_version("sentiment") == "3.0.0"
+
+    @pytest.mark.asyncio
+    async def test_shared_version_is_adopted_without_purging(self, cache, redis_client, tmp_path):
+        """A worker registered with an older version reuses the results cached under the shared one"""
+        async def compute():
+            return {"v": 2}
+
+        await cache.registry.set_version("sentiment", "2.0.0")
+        await cache.get_or_compute("sentiment", b"text", compute)
+        entries = dict(redis_client.store)
+
+        registry = ModelRegistry(redis_client, refresh_interval=0.0)
+        registry.register("sentiment", "1.0.0")
+        worker = InferenceResultCache(redis_client, registry, cache_dir=str(tmp_path), max_redis_bytes=256)
+
+        async def recompute():
+            raise AssertionError("served from the shared cache")
+
+        assert await worker.get_or_compute("sentiment", b"text", recompute) == {"v": 2}
+        assert redis_client.store == entries
+
+    def test_key_depends_on_version(self):
+        """The same input under two versions maps to different keys"""
+        key_v1 = InferenceResultCache.build_key("clip", "1", b"img")
+        key_v2 = InferenceResultCache.build_key("clip", "2", b"img")
+
+        assert key_v1 != key_v2
+        assert key_v1.startswith("ai_cache:clip:")
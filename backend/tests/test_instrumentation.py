@@ -0,0 +1,106 @@
+"""
+Test suite for Prometheus instrumentation
+"""
+
+import json
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from monitoring.instrumentation import (
+    DB_QUERY_DURATION,
+    Counter,
+    Histogram,
+    MultiProcessCollector,
+    Registry,
+    instrument_engine,
+    merge_snapshots,
+    render_snapshot
+)
+
+
+class TestMetrics:
+    """Test cases for counters, histograms and exposition"""
+
+    def test_histogram_exposition(self):
+        """Buckets are cumulative and end with +Inf, _sum and _count"""
+        registry = Registry()
+        latency = Histogram("req_seconds", "Request latency", ("route",), buckets=(0.1, 1.0), registry=registry)
+        for value in (0.05, 0.5, 0.5, 3.0):
+            latency.labels("/api/products/{product_id}").observe(value)
+
+        body = registry.render()
+        assert "# TYPE req_seconds histogram" in body
+        assert 'req_seconds_bucket{route="/api/products/{product_id}",le="0.1"} 1' in body
+        assert 'req_seconds_bucket{route="/api/products/{product_id}",le="1"} 3' in body
+        assert 'req_seconds_bucket{route="/api/products/{product_id}",le="+Inf"} 4' in body
+        assert 'req_seconds_sum{route="/api/products/{product_id}"} 4.05' in body
+        assert 'req_seconds_count{route="/api/products/{product_id}"} 4' in body
+
+    def test_counter_threads_and_label_escaping(self):
+        """Concurrent increments from many threads are all counted"""
+        registry = Registry()
+        hits = Counter("hits_total", "Hits", ("cache",), registry=registry)
+        child = hits.labels('a"b')
+
+        def work():
+            for _ in range(10000):
+                child.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert child.values() == [80000.0]
+        assert 'hits_total{cache="a\\"b"} 80000' in registry.render()
+        with pytest.raises(ValueError):
+            child.inc(-1)
+        with pytest.raises(ValueError):
+            Counter("hits_total", "Again", registry=registry)
+
+    def test_multiprocess_files_are_summed(self, tmp_path):
+        """Each worker's snapshot file contributes to the scrape"""
+        worker_a, worker_b = Registry(), Registry()
+        for registry, count in ((worker_a, 2), (worker_b, 3)):
+            counter = Counter("jobs_total", "Jobs", registry=registry)
+            counter.inc(count)
+            Histogram("job_seconds", "Job time", buckets=(1.0,), registry=registry).observe(0.5)
+
+        MultiProcessCollector(worker_a, str(tmp_path)).write()
+        (tmp_path / "metrics_999999.json").write_text(json.dumps(worker_b.snapshot()))
+
+        merged = MultiProcessCollector(worker_a, str(tmp_path)).collect()
+        body = render_snapshot(merged)
+        assert "jobs_total 5" in body
+        assert 'job_seconds_bucket{le="1"} 2' in body
+        assert merge_snapshots([]) == {}
+
+
+class TestAutoInstrumentation:
+    """Test cases for engine and route instrumentation"""
+
+    def test_engine_statements_are_timed(self):
+        """Every statement lands in the DB histogram under its verb"""
+        engine = instrument_engine(create_engine("sqlite://"))
+        instrument_engine(engine)
+        selects = DB_QUERY_DURATION.labels("SELECT")
+        before = sum(selects.values()[:-1])
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("select 2"))
+
+        assert sum(selects.values()[:-1]) - before == 2
+
+    def test_metrics_endpoint_uses_route_templates(self, client):
+        """The main app serves /metrics with per-template request latency"""
+        client.get("/api/products/12345")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'route="/api/products/{product_id}"' in response.text
+        assert "/api/products/12345" not in response.text
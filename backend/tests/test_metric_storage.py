@@ -0,0 +1,191 @@
+"""
+Test suite for monitoring metric storage
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import Column, DateTime, Float, Integer, JSON, MetaData, String, Table, func, select
+
+from monitoring.metric_storage import (
+    MetricInfoCache,
+    MetricIngestBuffer,
+    MetricRollup,
+    MetricStorage,
+    PendingPoint,
+    pick_step
+)
+from tests.conftest import TestingSessionLocal
+
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+# Same shape as the monitoring metric_data_points table, without the tenant foreign keys
+raw_metadata = MetaData()
+raw_points = Table(
+    "metric_data_points", raw_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("metric_id", String(36), nullable=False),
+    Column("tenant_id", String(36)),
+    Column("value", Float, nullable=False),
+    Column("timestamp", DateTime),
+    Column("labels", JSON),
+    Column("created_at", DateTime),
+)
+
+
+@pytest.fixture
+def storage(db_session):
+    raw_metadata.create_all(bind=db_session.get_bind())
+    yield MetricStorage(raw_points)
+    db_session.rollback()
+    raw_metadata.drop_all(bind=db_session.get_bind())
+
+
+def _points(metric_id, start, values, every=timedelta(seconds=20)):
+    return [PendingPoint(metric_id, "t1", value, start + every * i, {}) for i, value in enumerate(values)]
+
+
+def _rollup(db, resolution, bucket):
+    return db.query(MetricRollup).filter(
+        MetricRollup.resolution == resolution, MetricRollup.bucket_start == bucket
+    ).one()
+
+
+class TestMetricStorage:
+    """Test cases for rollups and SQL-side aggregation"""
+
+    def test_writes_merge_into_every_tier(self, db_session, storage):
+        """Later batches merge into existing rollup buckets"""
+        storage.write(db_session, _points("cpu", NOW, [10.0, 20.0, 30.0]))
+        storage.write(db_session, _points("cpu", NOW + timedelta(minutes=1), [5.0, 50.0]))
+        db_session.commit()
+
+        assert db_session.execute(select(func.count()).select_from(raw_points)).scalar() == 5
+        minute = _rollup(db_session, 60, NOW)
+        assert (minute.count, minute.sum, minute.min, minute.max, minute.last) == (3, 60.0, 10.0, 30.0, 30.0)
+
+        five = _rollup(db_session, 300, NOW)
+        assert (five.count, five.sum, five.min, five.max, five.last) == (5, 115.0, 5.0, 50.0, 50.0)
+        assert _rollup(db_session, 3600, NOW).count == 5
+
+    def test_query_picks_resolution_and_source(self, db_session, storage):
+        """Short ranges bucket raw points in SQL; long ranges read the coarsest fitting tier"""
+        storage.write(db_session, _points("cpu", NOW - timedelta(minutes=30), [1.0] * 45 + [4.0] * 45))
+        db_session.commit()
+
+        short = storage.query(db_session, "cpu", NOW - timedelta(minutes=30), NOW, "avg", now=NOW)
+        assert short["step_seconds"] == 10
+        assert short["source"] == "raw"
+        assert sum(point["count"] for point in short["points"]) == 90
+
+        day = storage.query(db_session, "cpu", NOW - timedelta(days=1), NOW, "avg", now=NOW)
+        assert day["step_seconds"] == 300
+        assert day["source"] == "rollup_300s"
+        assert [point["value"] for point in day["points"]] == [1.0] * 3 + [4.0] * 3
+        assert sum(point["count"] for point in day["points"]) == 90
+
+        peak = storage.query(db_session, "cpu", NOW - timedelta(days=1), NOW, "max", step=3600, now=NOW)
+        assert peak["source"] == "rollup_3600s"
+        assert peak["points"][0]["value"] == 4.0
+
+        with pytest.raises(ValueError):
+            storage.query(db_session, "cpu", NOW - timedelta(hours=1), NOW, "median")
+
+    def test_prune_applies_tiered_retention(self, db_session, storage):
+        """Raw points expire first, then each rollup tier"""
+        storage.write(db_session, _points("cpu", NOW - timedelta(days=10), [1.0, 2.0]))
+        storage.write(db_session, _points("cpu", NOW - timedelta(hours=2), [3.0]))
+        db_session.commit()
+
+        deleted = storage.prune(db_session, now=NOW)
+
+        assert deleted["raw"] == 2
+        assert deleted["60s"] == 1
+        assert deleted["300s"] == 0
+        assert storage.choose_source(NOW - timedelta(days=10), 300, now=NOW) == 300
+        assert storage.choose_source(NOW - timedelta(days=10), 60, now=NOW) == 300
+        assert storage.choose_source(NOW - timedelta(days=400), 60, now=NOW) == 3600
+
+    def test_raw_reads_stay_inside_raw_retention(self, db_session, storage):
+        """Fine steps past the raw window read the finest rollup that still has data"""
+        assert storage.choose_source(NOW - timedelta(hours=1), 10, now=NOW) is None
+        assert storage.choose_source(NOW - timedelta(days=2), 10, now=NOW) == 60
+        assert storage.choose_source(NOW - timedelta(days=10), 10, now=NOW) == 300
+
+        storage.write(db_session, _points("cpu", NOW - timedelta(days=2), [1.0, 2.0, 3.0]))
+        db_session.commit()
+        storage.prune(db_session, now=NOW)
+        start = NOW - timedelta(days=2)
+        series = storage.query(db_session, "cpu", start, start + timedelta(minutes=5), "sum", step=10, now=NOW)
+        assert (series["source"], series["step_seconds"]) == ("rollup_60s", 60)
+        assert [point["value"] for point in series["points"]] == [6.0]
+
+    def test_pick_step(self):
+        """Bucket width grows with the requested range"""
+        assert pick_step(NOW - timedelta(minutes=5), NOW) == 10
+        assert pick_step(NOW - timedelta(hours=6), NOW) == 300
+        assert pick_step(NOW - timedelta(days=30), NOW) == 21600
+
+
+class TestMetricIngestBuffer:
+    """Test cases for buffered ingest"""
+
+    def test_flushes_in_bulk_when_full(self, db_session, storage):
+        """Points are held until the batch fills, then written in one transaction"""
+        buffer = MetricIngestBuffer(TestingSessionLocal, storage, max_points=3, max_latency_ms=60000)
+
+        assert buffer.add("cpu", 1.0, timestamp=NOW) is False
+        assert buffer.add("cpu", 2.0, timestamp=NOW) is False
+        assert not buffer.due()
+        assert buffer.add("cpu", 3.0, timestamp=NOW) is True
+        assert buffer.due()
+
+        assert buffer.flush() == 3
+        assert len(buffer) == 0
+        assert buffer.flush_count == 1
+        assert db_session.execute(select(func.count()).select_from(raw_points)).scalar() == 3
+
+    def test_latency_bound_and_retry_on_failure(self, db_session, storage):
+        """Partial batches become due after max_latency_ms; failed flushes keep their points"""
+        buffer = MetricIngestBuffer(TestingSessionLocal, storage, max_points=100, max_latency_ms=0)
+        buffer.add("cpu", 1.0, timestamp=NOW)
+        assert buffer.due()
+
+        broken = MetricIngestBuffer(TestingSessionLocal, MetricStorage(Table(
+            "missing_points", MetaData(), *[Column(c.name, c.type) for c in raw_points.columns]
+        )), max_points=100)
+        broken.add("cpu", 1.0, timestamp=NOW)
+        assert broken.flush() == 0
+        assert len(broken) == 1
+
+    def test_backlog_is_capped_while_flushes_fail(self, db_session, storage):
+        """Requeued batches never grow past max_pending; the oldest points are dropped and counted"""
+        broken = MetricIngestBuffer(TestingSessionLocal, MetricStorage(Table(
+            "missing_points", MetaData(), *[Column(c.name, c.type) for c in raw_points.columns]
+        )), max_points=2, max_pending=3)
+        for value in (1.0, 2.0, 3.0, 4.0):
+            broken.add("cpu", value, timestamp=NOW)
+
+        assert len(broken) == 3
+        assert broken.flush() == 0
+        broken.add("cpu", 5.0, timestamp=NOW)
+        assert len(broken) == 3
+        assert broken.dropped_points == 2
+        assert [point.value for point in broken._pending] == [3.0, 4.0, 5.0]
+
+
+class TestMetricInfoCache:
+    """Test cases for the bounded metric lookup cache"""
+
+    def test_evicts_least_recently_used(self):
+        """Reads refresh an entry; the coldest one goes once the cache is full"""
+        cache = MetricInfoCache(max_size=2)
+        cache.put("a", ("cpu", "t1"))
+        cache.put("b", ("mem", "t1"))
+        assert cache.get("a") == ("cpu", "t1")
+        cache.put("c", ("disk", None))
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == ("cpu", "t1") and cache.get("c") == ("disk", None)
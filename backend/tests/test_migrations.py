@@ -0,0 +1,156 @@
+"""
+Test suite for Alembic revisions and hot-query index verification
+"""
+
+import os
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+
+from models import Base
+from migrations.verify_indexes import (
+    main as verify_main,
+    scans_from_postgres_plan,
+    scans_from_sqlite_plan,
+    verify_indexes
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOT_INDEXES = {
+    "orders": "ix_orders_seller_status_created",
+    "products": "ix_products_active_category_price",
+    "reviews": "ix_reviews_product_created",
+}
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    return url
+
+
+@pytest.fixture
+def alembic_config(monkeypatch):
+    monkeypatch.chdir(BACKEND_DIR)
+    return Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+
+
+def index_names(url, table):
+    engine = create_engine(url)
+    try:
+        return {index["name"] for index in inspect(engine).get_indexes(table)}
+    finally:
+        engine.dispose()
+
+
+class TestMigrations:
+    """Test cases for upgrading and downgrading the index revisions"""
+
+    def test_upgrade_downgrade_round_trip(self, database_url, alembic_config):
+        """Head has every composite index; downgrading drops only them"""
+        command.upgrade(alembic_config, "head")
+        for table, index in HOT_INDEXES.items():
+            assert index in index_names(database_url, table)
+
+        command.downgrade(alembic_config, "0001")
+        for table, index in HOT_INDEXES.items():
+            assert index not in index_names(database_url, table)
+        assert "ix_orders_seller_id" in index_names(database_url, "orders")
+
+        command.upgrade(alembic_config, "head")
+        assert HOT_INDEXES["orders"] in index_names(database_url, "orders")
+
+    def test_counter_backfill_skips_cancelled_orders(self, database_url, alembic_config):
+        """Revision 0003 counts sales and purchases the way OrderService does"""
+        command.upgrade(alembic_config, "0002")
+        engine = create_engine(database_url)
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("INSERT INTO users (id, wallet_address) VALUES (1, 'seller'), (2, 'buyer')"))
+                conn.execute(text("INSERT INTO products (id, title, price, seller_id) VALUES (1, 'item', 1.0, 1)"))
+                for status in ("DELIVERED", "PENDING", "CANCELLED"):
+                    conn.execute(text(
+                        "INSERT INTO orders (buyer_id, seller_id, product_id, unit_price, total_price, status) "
+                        "VALUES (2, 1, 1, 1.0, 1.0, :status)"
+                    ), {"status": status})
+
+            command.upgrade(alembic_config, "0003")
+            with engine.connect() as conn:
+                totals = dict(conn.execute(text(
+                    "SELECT id, total_sales + total_purchases FROM users ORDER BY id"
+                )).all())
+        finally:
+            engine.dispose()
+        assert totals == {1: 2, 2: 2}
+
+    def test_verify_uses_the_new_indexes(self, database_url, alembic_config, capsys):
+        """Every hot query plans onto the index created for it"""
+        command.upgrade(alembic_config, "head")
+        engine = create_engine(database_url)
+        try:
+            with engine.connect() as conn:
+                checks = verify_indexes(conn)
+        finally:
+            engine.dispose()
+
+        assert all(check.ok and check.uses_expected_index for check in checks)
+        assert verify_main(["--database-url", database_url, "--strict"]) == 0
+
+        command.downgrade(alembic_config, "0001")
+        assert verify_main(["--database-url", database_url, "--strict"]) == 1
+        assert "other" in capsys.readouterr().out
+
+    def test_head_matches_the_models(self, database_url, alembic_config):
+        """The frozen baseline plus later revisions build every model column and index"""
+        command.upgrade(alembic_config, "head")
+        engine = create_engine(database_url)
+        try:
+            inspector = inspect(engine)
+            for table in Base.metadata.sorted_tables:
+                columns = {column["name"] for column in inspector.get_columns(table.name)}
+                assert columns == set(table.columns.keys()), table.name
+                indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+                assert {index.name for index in table.indexes} <= indexes, table.name
+        finally:
+            engine.dispose()
+
+    def test_baseline_cannot_be_downgraded(self, database_url, alembic_config):
+        """Downgrading past the baseline refuses instead of dropping every table"""
+        command.upgrade(alembic_config, "0001")
+        with pytest.raises(NotImplementedError):
+            command.downgrade(alembic_config, "base")
+        engine = create_engine(database_url)
+        try:
+            assert "users" in inspect(engine).get_table_names()
+        finally:
+            engine.dispose()
+
+
+class TestPlanParsing:
+    """Test cases for detecting sequential scans in EXPLAIN output"""
+
+    def test_postgres_plan(self):
+        """Nested Seq Scan nodes are found alongside index scans"""
+        plan = [{"Plan": {"Node Type": "Limit", "Plans": [{
+            "Node Type": "Nested Loop", "Plans": [
+                {"Node Type": "Index Scan", "Relation Name": "orders", "Index Name": "ix_orders_seller_status_created"},
+                {"Node Type": "Seq Scan", "Relation Name": "products"}
+            ]
+        }]}}]
+        assert scans_from_postgres_plan(plan) == (["products"], ["ix_orders_seller_status_created"])
+
+    def test_sqlite_plan(self):
+        """A bare SCAN is sequential; SEARCH and index or rowid scans are not"""
+        rows = [
+            (2, 0, 0, "SCAN products"),
+            (3, 0, 0, "SEARCH reviews USING INDEX ix_reviews_product_created (product_id=?)"),
+            (4, 0, 0, "SCAN orders USING COVERING INDEX ix_orders_seller_status_created"),
+            (5, 0, 0, "USE TEMP B-TREE FOR ORDER BY"),
+        ]
+        assert scans_from_sqlite_plan(rows) == (
+            ["products"], ["ix_reviews_product_created", "ix_orders_seller_status_created"]
+        )
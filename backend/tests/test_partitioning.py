@@ -0,0 +1,228 @@
+"""
+Test suite for monthly fact table partitioning and Parquet archival
+"""
+
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import MetaData, create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import sessionmaker
+
+from analytics.fact_export import ExportFormat, archive_path, archived_files, stream_fact_export
+from models import Base as ModelsBase, Order, OrderStatus
+from partitioning import (
+    KEY_SYNC_SETTING, PartitionManager, add_months, create_partition_sql, key_sync_function_sql, month_floor,
+    partition_month, partition_name, write_archive
+)
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+ARCHIVED_MONTH = datetime(2025, 1, 1)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# An empty, throwaway database: revision 0004 cannot be downgraded
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def order_rows(start, count, status=OrderStatus.DELIVERED):
+    return [
+        {"buyer_id": 1, "seller_id": 2, "product_id": 1, "unit_price": float(i), "total_price": float(i),
+         "status": status, "created_at": start + timedelta(days=i)}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    ModelsBase.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def archived(engine, tmp_path):
+    """January 2025 orders archived to Parquet, later orders still live"""
+    partition = Order.__table__.to_metadata(MetaData(), name=partition_name("orders", ARCHIVED_MONTH))
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE TABLE {partition.name} AS SELECT * FROM orders WHERE 0")
+        conn.execute(partition.insert(), order_rows(ARCHIVED_MONTH, 20) + order_rows(
+            ARCHIVED_MONTH + timedelta(days=20), 5, OrderStatus.CANCELLED))
+        rows = write_archive(conn, partition.name, archive_path(str(tmp_path), "orders", ARCHIVED_MONTH),
+                             Order.__table__, batch_size=8)
+        conn.execute(Order.__table__.insert(), order_rows(datetime(2025, 3, 1), 10))
+    assert rows == 25
+    return str(tmp_path)
+
+
+class TestPartitionLayout:
+    """Test cases for partition naming and DDL"""
+
+    def test_month_arithmetic_and_names(self):
+        """Months roll over year boundaries and names round-trip"""
+        month = month_floor(datetime(2025, 11, 17, 8, 30))
+        assert add_months(month, 2) == datetime(2026, 1, 1)
+        assert add_months(month, -11) == datetime(2024, 12, 1)
+        assert partition_name("orders", month) == "orders_y2025m11"
+        assert partition_month("orders", "orders_y2025m11") == month
+        assert partition_month("orders", "orders_default") is None
+        assert partition_month("orders", "payments_y2025m11") is None
+        assert create_partition_sql("payments", datetime(2025, 12, 1)) == (
+            'CREATE TABLE IF NOT EXISTS "payments_y2025m12" PARTITION OF "payments" '
+            "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+        )
+
+    def test_cold_partitions(self, engine, monkeypatch):
+        """Only whole months older than the archive horizon are cold"""
+        manager = PartitionManager("unused", archive_after_months=2)
+        monkeypatch.setattr(manager, "partitions", lambda conn, table: [
+            "orders_y2025m07", "orders_default", "orders_y2025m08", "orders_y2025m09", "orders_y2025m10"
+        ])
+        with engine.connect() as conn:
+            cold = manager.cold_partitions(conn, "orders", now=datetime(2025, 10, 18))
+            assert [name for name, _ in cold] == ["orders_y2025m07"]
+            manager.archive_after_months = 0
+            assert manager.cold_partitions(conn, "orders", now=datetime(2025, 10, 18)) == []
+
+    def test_maintain_skips_unpartitioned_tables(self, engine, tmp_path):
+        """Nothing is created or archived outside Postgres partitioned tables"""
+        result = PartitionManager(str(tmp_path)).maintain(engine)
+
+        assert result.skipped == ["orders", "payments", "solana_transactions"]
+        assert not result.created and not result.archived
+
+    def test_key_registry_trigger(self):
+        """The trigger mirrors id and every unique column, and can be paused"""
+        sql = key_sync_function_sql("payments", ["id"], ["payment_id", "transaction_hash"])
+
+        assert 'INSERT INTO "payments_keys" ("id", "payment_id", "transaction_hash") ' \
+               'VALUES (NEW."id", NEW."payment_id", NEW."transaction_hash")' in sql
+        assert 'DELETE FROM "payments_keys" WHERE "id" = OLD."id"' in sql
+        assert f"current_setting('{KEY_SYNC_SETTING}', true) = 'off'" in sql
+
+
+class TestPartitionMigration:
+    """Smoke tests for upgrading through revision 0004"""
+
+    @pytest.fixture
+    def alembic_config(self, monkeypatch):
+        monkeypatch.chdir(BACKEND_DIR)
+        return Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+
+    def test_upgrade_leaves_sqlite_unpartitioned(self, tmp_path, monkeypatch, alembic_config):
+        """Outside Postgres the fact tables and their foreign keys are untouched"""
+        url = f"sqlite:///{tmp_path / 'partitions.db'}"
+        monkeypatch.setenv("DATABASE_URL", url)
+        command.upgrade(alembic_config, "head")
+
+        engine = create_engine(url)
+        try:
+            inspector = inspect(engine)
+            assert "orders_keys" not in inspector.get_table_names()
+            assert {fk["referred_table"] for fk in inspector.get_foreign_keys("escrows")} >= {"payments"}
+        finally:
+            engine.dispose()
+
+    @pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+    def test_upgrade_keeps_keys_globally_unique(self, monkeypatch, alembic_config):
+        """Duplicate ids and unique keys fail across months; references still need a live key"""
+        monkeypatch.setenv("DATABASE_URL", POSTGRES_URL)
+        command.upgrade(alembic_config, "head")
+        engine = create_engine(POSTGRES_URL)
+
+        def insert_payment(conn, id, payment_id, created_at):
+            conn.execute(text(
+                "INSERT INTO payments (id, payment_id, buyer_id, seller_id, product_id, amount, "
+                "buyer_wallet_address, seller_wallet_address, created_at) "
+                "VALUES (:id, :payment_id, 1, 2, 1, 1.0, 'buyer', 'seller', :created_at)"
+            ), {"id": id, "payment_id": payment_id, "created_at": created_at})
+
+        try:
+            with engine.begin() as conn:
+                assert PartitionManager("unused").is_partitioned(conn, "payments")
+                conn.execute(text("INSERT INTO users (id, wallet_address) VALUES (1, 'buyer'), (2, 'seller')"))
+                conn.execute(text("INSERT INTO products (id, title, price, seller_id) VALUES (1, 'item', 1.0, 2)"))
+                insert_payment(conn, 1, "pay-1", datetime(2025, 1, 5))
+
+            with pytest.raises(IntegrityError), engine.begin() as conn:
+                insert_payment(conn, 2, "pay-1", datetime(2025, 2, 5))
+            with pytest.raises(IntegrityError), engine.begin() as conn:
+                insert_payment(conn, 1, "pay-2", datetime(2025, 2, 5))
+            with pytest.raises(IntegrityError), engine.begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO escrows (escrow_id, payment_id, escrow_address, buyer_address, seller_address, "
+                    "amount, release_time) VALUES ('esc-1', 99, 'escrow', 'buyer', 'seller', 1.0, now())"
+                ))
+
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM payments WHERE id = 1"))
+                insert_payment(conn, 2, "pay-1", datetime(2025, 2, 5))
+                assert conn.execute(text("SELECT id FROM payments_keys")).scalars().all() == [2]
+        finally:
+            engine.dispose()
+
+    @pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+    def test_downgrade_is_refused(self, monkeypatch, alembic_config):
+        """Downgrading past 0004 on Postgres fails loudly and leaves the partitions in place"""
+        monkeypatch.setenv("DATABASE_URL", POSTGRES_URL)
+        command.upgrade(alembic_config, "head")
+        with pytest.raises(NotImplementedError, match="irreversible"):
+            command.downgrade(alembic_config, "0003")
+
+        engine = create_engine(POSTGRES_URL)
+        try:
+            with engine.connect() as conn:
+                assert PartitionManager("unused").is_partitioned(conn, "orders")
+        finally:
+            engine.dispose()
+
+
+class TestArchivedExport:
+    """Test cases for reading archived partitions through the export path"""
+
+    def test_archive_file(self, archived):
+        """Archives are zstd Parquet with enums stored by value"""
+        files = archived_files(archived, "orders")
+        assert files == [(ARCHIVED_MONTH, os.path.join(archived, "orders", "orders_y2025m01.parquet"))]
+
+        parquet = pq.ParquetFile(files[0][1])
+        assert parquet.metadata.num_rows == 25
+        assert parquet.metadata.row_group(0).column(0).compression == "ZSTD"
+        assert set(parquet.read().column("status").to_pylist()) == {"delivered", "cancelled"}
+        assert not [name for name in os.listdir(os.path.join(archived, "orders")) if name.endswith(".tmp")]
+
+    def test_export_reads_archived_then_live_rows(self, engine, archived):
+        """A range spanning archived and live months returns both, in order"""
+        session_factory = sessionmaker(bind=engine)
+        body = b"".join(stream_fact_export(
+            session_factory, "orders", ExportFormat.NDJSON, start=datetime(2025, 1, 10),
+            end=datetime(2025, 3, 5), batch_size=4, archive_dir=archived
+        ))
+        rows = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+
+        assert len(rows) == 16 + 4
+        assert rows[0]["created_at"] == "2025-01-10T00:00:00"
+        assert rows[15]["status"] == "cancelled"
+        assert rows[-1]["created_at"] == "2025-03-04T00:00:00"
+
+    def test_export_filters_and_skips_months_out_of_range(self, engine, archived):
+        """Filters apply to archived rows; archives outside the range are not opened"""
+        session_factory = sessionmaker(bind=engine)
+        body = b"".join(stream_fact_export(
+            session_factory, "orders", ExportFormat.CSV, compress=False,
+            filters={"status": OrderStatus.CANCELLED}, archive_dir=archived
+        ))
+        assert len(body.decode().splitlines()) == 1 + 5
+
+        assert archived_files(archived, "orders", start=datetime(2025, 2, 1)) == []
+        live_only = b"".join(stream_fact_export(
+            session_factory, "orders", ExportFormat.PARQUET, start=datetime(2025, 2, 1), archive_dir=archived
+        ))
+        assert pq.read_table(io.BytesIO(live_only)).num_rows == 10
@@ -0,0 +1,139 @@
+"""
+Test suite for live-worker profiling
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from config import settings
+from monitoring.profiling import AllocationTracker, SamplingProfiler, SlowRequestCapture
+
+
+def busy_loop(stop: threading.Event):
+    total = 0
+    while not stop.is_set():
+        total += sum(range(200))
+    return total
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+@pytest.fixture
+def admin_token():
+    previous = settings.ADMIN_API_TOKEN
+    settings.ADMIN_API_TOKEN = "test-admin-token"
+    yield {"X-Admin-Token": "test-admin-token"}
+    settings.ADMIN_API_TOKEN = previous
+
+
+class TestSamplingProfiler:
+    """Test cases for on-demand sampling and export formats"""
+
+    def test_busy_function_dominates_cpu_profile(self, busy_thread):
+        """A spinning thread shows up in the leaf frames and both export formats"""
+        profile = SamplingProfiler(interval=0.002, mode="cpu").run(0.3, name="test")
+
+        assert profile.sample_count > 0
+        collapsed, media_type = profile.export("collapsed")
+        assert media_type == "text/plain"
+        busy_lines = [line for line in collapsed.splitlines() if "busy_loop" in line]
+        assert busy_lines and busy_lines[0].startswith("thread busy;")
+
+        speedscope = json.loads(profile.export("speedscope")[0])
+        names = {frame["name"] for frame in speedscope["shared"]["frames"]}
+        assert "busy_loop" in names
+        assert len(speedscope["profiles"][0]["samples"]) == len(speedscope["profiles"][0]["weights"])
+
+    def test_invalid_mode_is_rejected(self):
+        """Only wall and cpu modes exist"""
+        with pytest.raises(ValueError):
+            SamplingProfiler(mode="io")
+
+
+class TestSlowRequestCapture:
+    """Test cases for threshold-triggered capture"""
+
+    def test_only_slow_requests_are_captured_and_rate_limited(self):
+        """Fast requests leave nothing behind; a second slow one inside the window is skipped"""
+        capture = SlowRequestCapture(threshold_ms=20, interval=0.002, min_interval_seconds=60)
+
+        token = capture.begin("GET /fast")
+        assert capture.end(token) is None
+
+        token = capture.begin("GET /slow")
+        time.sleep(0.1)
+        captured = capture.end(token, "GET /slow/{id}")
+        assert captured is not None
+        assert captured["name"] == "GET /slow/{id}"
+        assert captured["profile"].sample_count > 0
+        assert any("test_only_slow_requests" in line for line in captured["profile"].to_collapsed().splitlines())
+
+        token = capture.begin("GET /slow")
+        time.sleep(0.1)
+        assert capture.end(token) is None
+        assert capture.skipped == 1
+        assert [item["id"] for item in capture.list()] == [captured["id"]]
+
+    def test_watchdog_sleeps_until_the_oldest_request_is_due(self):
+        """With nothing overdue the next check is scheduled for the first deadline"""
+        capture = SlowRequestCapture(threshold_ms=500, interval=0.01)
+        assert capture.sample_overdue() == 0.5
+
+        token = capture.begin("GET /pending")
+        assert 0.4 < capture.sample_overdue() <= 0.5
+        assert capture.end(token) is None
+
+
+class TestAllocationTracker:
+    """Test cases for tracemalloc snapshot diffs"""
+
+    def test_diff_reports_new_allocation(self):
+        """A large allocation between snapshots is at the top of the diff"""
+        tracker = AllocationTracker(max_snapshots=2)
+        try:
+            tracker.snapshot("before")
+            retained = [bytearray(1024) for _ in range(2000)]
+            tracker.snapshot("after")
+
+            top = tracker.diff("before", "after", limit=5)
+            assert top[0]["file"].endswith("test_profiling.py")
+            assert top[0]["size_diff_kb"] > 1500
+            assert len(retained) == 2000
+
+            tracker.snapshot("third")
+            assert [item["label"] for item in tracker.list()] == ["after", "third"]
+            with pytest.raises(KeyError):
+                tracker.diff("before", "third")
+        finally:
+            tracker.stop()
+        assert tracker.tracing is False
+
+
+class TestProfilingEndpoints:
+    """Test cases for the admin-only profiling API"""
+
+    def test_internal_endpoints_require_admin_token(self, client):
+        """Without a configured and matching token every internal route is forbidden"""
+        assert client.get("/internal/profiling/slow-requests").status_code == 403
+
+    def test_cpu_profile_download(self, client, admin_token):
+        """The on-demand profile comes back as a speedscope attachment"""
+        response = client.get("/internal/profiling/cpu?seconds=0.1&interval_ms=5", headers=admin_token)
+
+        assert response.status_code == 200
+        assert "attachment" in response.headers["content-disposition"]
+        assert response.json()["$schema"].startswith("https://www.speedscope.app")
+
+        assert client.get("/internal/profiling/cpu?seconds=3600", headers=admin_token).status_code == 400
+        assert client.get("/internal/db-routing", headers=admin_token).json() == {"enabled": False}
@@ -0,0 +1,154 @@
+"""
+Test suite for the concurrent BI report executor
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from analytics.report_executor import ReportExecutor
+
+
+class FakeSession:
+    """Session stand-in that records whether it was closed"""
+
+    def __init__(self, registry):
+        self.closed = False
+        self.thread = threading.get_ident()
+        registry.append(self)
+
+    def execute(self, *args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    def get_bind(self):
+        return type("Bind", (), {"dialect": type("Dialect", (), {"name": "sqlite"})()})()
+
+    def close(self):
+        self.closed = True
+
+
+class TestReportExecutor:
+    """Test cases for ReportExecutor"""
+
+    @pytest.fixture
+    def sessions(self):
+        return []
+
+    @pytest.fixture
+    def executor(self, sessions):
+        executor = ReportExecutor(lambda: FakeSession(sessions), max_workers=4, timeout_seconds=1.0)
+        yield executor
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_reports_run_concurrently(self, executor, sessions):
+        """Blocking reports overlap instead of running back to back"""
+        def slow(db):
+            time.sleep(0.2)
+            return "done"
+
+        started = time.perf_counter()
+        results, timings = await executor.run({f"r{i}": slow for i in range(4)})
+        elapsed = time.perf_counter() - started
+
+        assert results == {f"r{i}": "done" for i in range(4)}
+        assert elapsed < 0.6
+        assert all(timing.status == "ok" for timing in timings.values())
+
+    @pytest.mark.asyncio
+    async def test_each_report_gets_its_own_session(self, executor, sessions):
+        """Every report opens and closes a separate session"""
+        async def report(db):
+            return id(db)
+
+        results, _ = await executor.run({"a": report, "b": report})
+
+        assert results["a"] != results["b"]
+        assert len(sessions) == 2
+        assert all(session.closed for session in sessions)
+
+    @pytest.mark.asyncio
+    async def test_partial_results_on_failure_and_timeout(self, executor):
+        """Failed and timed-out reports are dropped while the rest still return"""
+        def broken(db):
+            raise RuntimeError("boom")
+
+        def hangs(db):
+            time.sleep(0.5)
+            return "late"
+
+        results, timings = await executor.run(
+            {"ok": lambda db: 1, "broken": broken, "hangs": hangs},
+            timeouts={"hangs": 0.05}
+        )
+
+        assert results == {"ok": 1}
+        assert timings["broken"].status == "error"
+        assert timings["broken"].error == "boom"
+        assert timings["hangs"].status == "timeout"
+        assert timings["ok"].duration_ms >= 0
+
+    @pytest.mark.asyncio
+    async def test_timed_out_coroutine_reports_are_cancelled(self, executor, sessions):
+        """A coroutine report stops at its next await once it times out"""
+        cancelled = threading.Event()
+
+        async def endless(db):
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        results, timings = await executor.run({"endless": endless}, timeouts={"endless": 0.05})
+
+        assert results == {} and timings["endless"].status == "timeout"
+        assert await asyncio.get_running_loop().run_in_executor(None, cancelled.wait, 2)
+        for _ in range(100):
+            if sessions[0].closed:
+                break
+            await asyncio.sleep(0.01)
+        assert sessions[0].closed
+
+
+class FakeCache:
+    def __init__(self):
+        self.stored = {}
+
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, ttl=None):
+        self.stored[key] = (value, ttl)
+
+
+class TestDashboardOverview:
+    """Test cases for the dashboard's partial results"""
+
+    @pytest.mark.asyncio
+    async def test_failing_report_marks_dashboard_partial(self):
+        """A report whose queries fail is listed in failed_reports and the dashboard is cached briefly"""
+        bi = pytest.importorskip("analytics.business_intelligence", exc_type=ImportError)
+        executor = ReportExecutor(lambda: FakeSession([]), max_workers=4, timeout_seconds=1.0)
+        cache = FakeCache()
+        service = bi.BusinessIntelligenceService(cache, None, report_executor=executor)
+
+        async def empty(db, start_date, end_date):
+            return {}
+
+        for name in ("_get_key_metrics", "_get_revenue_analytics", "_get_user_analytics",
+                     "_get_product_analytics", "_get_conversion_analytics", "_get_blockchain_analytics",
+                     "_get_performance_metrics"):
+            setattr(service, name, empty)
+        try:
+            dashboard = await service.get_dashboard_overview("7d")
+        finally:
+            executor.shutdown()
+
+        assert dashboard["partial"] is True
+        assert dashboard["failed_reports"] == ["geographic"]
+        assert dashboard["performance"]["report_timings"]["geographic"]["error"] == "database unavailable"
+        assert cache.stored["dashboard_overview:7d"][1] == service.cache_ttl["realtime"]
@@ -0,0 +1,100 @@
+"""
+Test suite for hot-path repository lookups
+"""
+
+import gc
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from repository import benchmark_lookups, hot_path, lookup_statement
+
+RepositoryBase = declarative_base()
+
+
+class Account(RepositoryBase):
+    __tablename__ = "hot_path_accounts"
+
+    id = Column(Integer, primary_key=True)
+    wallet_address = Column(String, unique=True)
+
+
+class Follow(RepositoryBase):
+    __tablename__ = "hot_path_follows"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer)
+    product_id = Column(Integer)
+
+
+@pytest.fixture
+def factory():
+    engine = create_engine("sqlite://")
+    RepositoryBase.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add_all([Account(wallet_address=f"wallet-{i}") for i in range(5)])
+        db.add(Follow(user_id=1, product_id=2))
+        db.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, params, context, many: statements.append(statement))
+    factory.statements = statements
+    yield factory
+    engine.dispose()
+
+
+class TestHotPathRepository:
+    """Test cases for per-session caching and statement reuse"""
+
+    def test_repeated_lookups_hit_memory(self, factory):
+        """Unique-key and primary-key repeats inside one session run one query each"""
+        with factory() as db:
+            first = hot_path.get_by(db, Account, "wallet_address", "wallet-1")
+            again = hot_path.get_by(db, Account, "wallet_address", "wallet-1")
+            by_pk = hot_path.get(db, Account, first.id)
+            assert first is again is by_pk
+            assert len(factory.statements) == 1
+
+    def test_rows_are_kept_alive_for_the_session(self, factory):
+        """A row nobody references is still answered from memory on the next get"""
+        with factory() as db:
+            account_id = hot_path.get(db, Account, 3).id
+            gc.collect()
+            assert hot_path.get(db, Account, account_id).wallet_address == "wallet-2"
+            assert len(factory.statements) == 1
+
+    def test_rekeyed_and_new_rows_are_not_stale(self, factory):
+        """A changed unique key is re-queried; misses are never cached"""
+        with factory() as db:
+            account = hot_path.get_by(db, Account, "wallet_address", "wallet-0")
+            account.wallet_address = "wallet-renamed"
+            assert hot_path.get_by(db, Account, "wallet_address", "wallet-0") is None
+            assert hot_path.get_by(db, Account, "wallet_address", "wallet-renamed") is account
+
+            assert hot_path.get_by(db, Account, "wallet_address", "wallet-new") is None
+            db.add(Account(wallet_address="wallet-new"))
+            db.commit()
+            assert hot_path.get_by(db, Account, "wallet_address", "wallet-new") is not None
+
+            hot_path.forget(db, Account)
+            assert db.info["hot_path_keys"] == {}
+
+    def test_pair_lookup_and_statement_reuse(self, factory):
+        """Two-column lookups bind both values to one shared statement"""
+        with factory() as db:
+            assert hot_path.first_by_pair(db, Follow, "user_id", 1, "product_id", 2).id == 1
+            assert hot_path.first_by_pair(db, Follow, "user_id", 1, "product_id", 3) is None
+        assert lookup_statement(Follow, "user_id", "product_id") is lookup_statement(Follow, "user_id", "product_id")
+
+    def test_benchmark_reports_every_pattern(self, factory):
+        """The benchmark compares the legacy query pattern with each faster variant"""
+        report = benchmark_lookups(factory, Account, "wallet_address", [f"wallet-{i}" for i in range(5)],
+                                   requests=5, lookups_per_request=4)
+        assert [row["pattern"] for row in report] == [
+            "query_first", "select", "lambda_stmt", "bound_statement", "hot_path"
+        ]
+        assert report[0]["speedup"] == 1.0
+        assert all(row["lookups"] == 20 and row["ops_per_second"] > 0 for row in report)
@@ -0,0 +1,408 @@
+"""
+Test suite for the Redis-backed session store in SecureSessionManager
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+from starlette.requests import Request
+
+redis = pytest.importorskip("redis")
+pytest.importorskip("user_agents")
+
+from auth.session_manager import SESSION_INVALIDATION_CHANNEL, SecureSessionManager, SessionCache
+from gateway.api_gateway import AuthenticationService
+
+
+class FakePipeline:
+    """Queues commands and runs them in one round trip
+
+    After ``watch`` commands run immediately until ``multi``; ``execute``
+    then fails with WatchError if a watched key changed in between.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+        self.watched = None
+
+    def __getattr__(self, name):
+        if self.watched is not None and not self.queuing:
+            return getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.watched = None
+
+    async def watch(self, *keys):
+        self.client.round_trips += 1
+        self.watched = {key: self.client.strings.get(key) for key in keys}
+        self.queuing = False
+
+    def multi(self):
+        self.queuing = True
+
+    async def execute(self):
+        self.client.round_trips += 1
+        if self.watched and any(self.client.strings.get(key) != value for key, value in self.watched.items()):
+            raise redis.WatchError("Watched variable changed")
+        return [getattr(self.client, name)(*args, _pipelined=True, **kwargs) for name, args, kwargs in self.calls]
+
+
+class FakePubSub:
+    def __init__(self, client):
+        self.client = client
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.client.subscribers.setdefault(channel, []).append(self.queue)
+        self.client.subscribed.set()
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def reset(self):
+        for queues in self.client.subscribers.values():
+            if self.queue in queues:
+                queues.remove(self.queue)
+
+
+class FakeAsyncRedis:
+    """In-memory stand-in for the async Redis commands the session store uses
+
+    Direct calls return awaitables and count one round trip each; pipelined
+    calls are counted once per ``execute``.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.ttls = {}
+        self.sets = {}
+        self.lists = {}
+        self.subscribers = {}
+        self.published = []
+        self.round_trips = 0
+        self.subscribed = asyncio.Event()
+
+    def __getattribute__(self, name):
+        attribute = object.__getattribute__(self, name)
+        if name.startswith("_") or name not in type(self).COMMANDS:
+            return attribute
+
+        def call(*args, _pipelined=False, **kwargs):
+            result = attribute(*args, **kwargs)
+            if _pipelined:
+                return result
+            self.round_trips += 1
+
+            async def done():
+                return result
+            return done()
+        return call
+
+    COMMANDS = {"get", "set", "setex", "mget", "delete", "sadd", "srem", "smembers", "scard", "expire",
+                "publish", "lpush", "ltrim", "setbit", "exists"}
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value, xx=False, keepttl=False):
+        if xx and key not in self.strings:
+            return None
+        self.strings[key] = value.encode()
+        if not keepttl:
+            self.ttls.pop(key, None)
+        return True
+
+    def setex(self, key, ttl, value):
+        self.strings[key] = value.encode()
+        self.ttls[key] = ttl
+
+    def setbit(self, key, offset, value):
+        data = bytearray(self.strings.get(key, b""))
+        if len(data) <= offset >> 3:
+            data.extend(b"\0" * ((offset >> 3) + 1 - len(data)))
+        data[offset >> 3] |= 0x80 >> (offset & 7)
+        self.strings[key] = bytes(data)
+
+    def exists(self, key):
+        return int(key in self.strings)
+
+    def mget(self, keys):
+        return [self.strings.get(key) for key in keys]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+            self.ttls.pop(key, None)
+            self.sets.pop(key, None)
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(member.encode() for member in members)
+
+    def srem(self, key, *members):
+        remaining = self.sets.get(key, set())
+        remaining.difference_update(member.encode() for member in members)
+        if not remaining:
+            self.sets.pop(key, None)
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def scard(self, key):
+        return len(self.sets.get(key, set()))
+
+    def expire(self, key, ttl):
+        pass
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "channel": channel, "data": message.encode()})
+
+    def lpush(self, key, *values):
+        self.lists[key] = list(reversed(values)) + self.lists.get(key, [])
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:end + 1]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+def make_request(host="10.0.0.1", user_agent="pytest-browser"):
+    return Request({
+        "type": "http", "method": "GET", "scheme": "https", "path": "/", "query_string": b"",
+        "server": ("soladia.test", 443), "client": (host, 50000),
+        "headers": [(b"user-agent", user_agent.encode()), (b"accept-language", b"en")],
+    })
+
+
+async def make_managers(client, count=1, **kwargs):
+    """Managers sharing one Redis, as separate workers would, with their listeners subscribed"""
+    managers = [
+        SecureSessionManager("secret", redis_client=client, enable_security_monitoring=False, **kwargs)
+        for _ in range(count)
+    ]
+    while len(client.subscribers.get(SESSION_INVALIDATION_CHANNEL, [])) < count:
+        await asyncio.sleep(0)
+    return managers
+
+
+class TestSessionCache:
+    """Test cases for the per-worker session LRU"""
+
+    def test_lru_and_ttl(self):
+        """Entries are evicted least recently used first and expire after the TTL"""
+        now = [0.0]
+        cache = SessionCache(max_size=2, ttl=5.0, clock=lambda: now[0])
+
+        class Entry:
+            def __init__(self, session_id):
+                self.session_id = session_id
+
+        for session_id in ("a", "b"):
+            cache.put(Entry(session_id))
+        cache.get("a")
+        cache.put(Entry("c"))
+        assert cache.get("b") is None and cache.get("a") and cache.get("c")
+
+        now[0] = 6.0
+        assert cache.get("a") is None
+        assert (cache.hits, cache.misses) == (3, 2)
+
+
+class TestRedisSessionStore:
+    """Test cases for SecureSessionManager backed by Redis"""
+
+    @pytest.mark.asyncio
+    async def test_validate_needs_one_round_trip_on_a_miss(self):
+        """A worker that never saw the session reads it with one GET, then serves it from cache"""
+        client = FakeAsyncRedis()
+        creator, reader = await make_managers(client, 2)
+        session = await creator.create_session("7", make_request())
+
+        client.round_trips = 0
+        validated = await reader.validate_session(session.session_id, make_request())
+        assert validated.user_id == "7" and validated.expires_at == session.expires_at
+        assert client.round_trips == 1
+
+        await reader.validate_session(session.session_id, make_request())
+        assert client.round_trips == 1
+        assert client.sets["user_sessions:7"] == {session.session_id.encode()}
+        await creator.close()
+        await reader.close()
+
+    @pytest.mark.asyncio
+    async def test_bulk_revocation_invalidates_other_workers(self):
+        """Revoking a user's sessions takes fixed round trips and clears every worker's cache"""
+        client = FakeAsyncRedis()
+        worker_a, worker_b = await make_managers(client, 2)
+        sessions = [await worker_a.create_session("7", make_request()) for _ in range(3)]
+        other = await worker_a.create_session("8", make_request())
+        for session in sessions:
+            assert await worker_b.validate_session(session.session_id, make_request())
+        assert len(worker_b.cache) == 3
+
+        client.round_trips = 0
+        await worker_a.revoke_user_sessions("7")
+        # Index read, pipelined delete + publish, pipelined security event log
+        assert client.round_trips == 3
+        await asyncio.sleep(0)
+
+        revoked_ids = json.loads(client.published[-1][1])
+        assert sorted(revoked_ids) == sorted(session.session_id for session in sessions)
+        assert "user_sessions:7" not in client.sets
+        assert len(worker_b.cache) == 0
+        for session in sessions:
+            assert await worker_b.validate_session(session.session_id, make_request()) is None
+        assert await worker_b.validate_session(other.session_id, make_request())
+        assert [event.event_type for event in worker_a.security_events].count("session_revoked") == 3
+        await worker_a.close()
+        await worker_b.close()
+
+    @pytest.mark.asyncio
+    async def test_session_limit_revokes_oldest_and_prunes_index(self):
+        """The oldest active session is revoked; index entries for expired keys are dropped"""
+        client = FakeAsyncRedis()
+        manager, = await make_managers(client, max_sessions_per_user=2)
+        first = await manager.create_session("7", make_request())
+        second = await manager.create_session("7", make_request())
+        client.sets["user_sessions:7"].add(b"expired-session")
+
+        third = await manager.create_session("7", make_request())
+
+        remaining = {session.session_id for session in await manager.get_user_sessions("7")}
+        assert remaining == {second.session_id, third.session_id}
+        assert client.sets["user_sessions:7"] == {second.session_id.encode(), third.session_id.encode()}
+        assert await manager.validate_session(first.session_id, make_request()) is None
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_fingerprint_change_revokes_session(self):
+        """A request from a different device revokes the session"""
+        client = FakeAsyncRedis()
+        manager, = await make_managers(client)
+        session = await manager.create_session("7", make_request())
+
+        assert await manager.validate_session(session.session_id, make_request()) is not None
+        assert await manager.validate_session(session.session_id, make_request(user_agent="other")) is None
+        assert f"session:{session.session_id}" not in client.strings
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_activity_write_back_only_touches_last_activity(self):
+        """The write-back keeps the TTL and never revives or re-indexes a revoked session"""
+        client = FakeAsyncRedis()
+        manager, = await make_managers(client, activity_write_interval=0)
+        session = await manager.create_session("7", make_request(), remember_me=True)
+        key = f"session:{session.session_id}"
+        ttl = client.ttls[key]
+
+        await manager.validate_session(session.session_id, make_request())
+        await asyncio.gather(*manager._background_tasks)
+        stored = json.loads(client.strings[key])
+        assert stored["last_activity"] > session.created_at.isoformat()
+        assert stored["status"] == "active" and client.ttls[key] == ttl
+
+        # Revoked elsewhere while this worker still had it cached
+        client.delete(key)
+        client.srem("user_sessions:7", session.session_id)
+        await manager.validate_session(session.session_id, make_request())
+        await asyncio.gather(*manager._background_tasks)
+        assert key not in client.strings and "user_sessions:7" not in client.sets
+
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_refresh_keeps_remember_me_lifetime(self):
+        """Refreshing a remember-me session does not cut it to the session timeout"""
+        client = FakeAsyncRedis()
+        manager, = await make_managers(client, session_timeout=60)
+        remembered = await manager.create_session("7", make_request(), remember_me=True)
+        short = await manager.create_session("7", make_request())
+
+        refreshed = await manager.refresh_session(remembered.session_id)
+        assert refreshed.expires_at >= remembered.expires_at
+        assert client.ttls[f"session:{remembered.session_id}"] > 29 * 24 * 3600
+
+        refreshed = await manager.refresh_session(short.session_id)
+        assert refreshed.expires_at - refreshed.last_activity == timedelta(seconds=60)
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_access_token_fast_path(self):
+        """Access tokens validate without Redis until their session is revoked"""
+        client = FakeAsyncRedis()
+        issuer, verifier, lagging = await make_managers(client, 3)
+        session = await issuer.create_session("7", make_request())
+        token = issuer.issue_access_token(session)
+
+        client.round_trips = 0
+        claims = await verifier.validate_access_token(token, make_request())
+        assert (claims["sub"], claims["sid"]) == ("7", session.session_id)
+        assert client.round_trips == 1  # first revocation filter sync
+        for _ in range(10):
+            assert await verifier.validate_access_token(token, make_request())
+        assert client.round_trips == 1
+
+        # A worker that missed the pub/sub message still learns of it from the filter
+        client.subscribers[SESSION_INVALIDATION_CHANNEL].remove(
+            client.subscribers[SESSION_INVALIDATION_CHANNEL][2]
+        )
+        await issuer.revoke_session(session.session_id)
+        await asyncio.sleep(0)
+        assert await verifier.validate_access_token(token, make_request()) is None
+        lagging.revocations._synced_at = None
+        assert await lagging.validate_access_token(token, make_request()) is None
+        assert await issuer.refresh_access_token(session.session_id, make_request()) is None
+        for manager in (issuer, verifier, lagging):
+            await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_gateway_rejects_tokens_of_revoked_sessions(self):
+        """A revocation written by the session manager is seen by the gateway's filter"""
+        client = FakeAsyncRedis()
+        manager, = await make_managers(client)
+        gateway = AuthenticationService(client, "secret", revocation_sync_interval=0)
+        assert gateway.revocations.bucket_seconds == manager.revocations.bucket_seconds
+        session = await manager.create_session("7", make_request())
+        token = manager.issue_access_token(session)
+        authorization = Request({
+            "type": "http", "method": "GET", "path": "/", "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        })
+
+        assert (await gateway._authenticate_jwt(authorization))["session_id"] == session.session_id
+        await manager.revoke_session(session.session_id)
+        assert await gateway._authenticate_jwt(authorization) is None
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_access_token_from_another_device_goes_to_the_store(self):
+        """A fingerprint mismatch is checked against the session store, which revokes the session"""
+        client = FakeAsyncRedis()
+        manager, = await make_managers(client)
+        session = await manager.create_session("7", make_request())
+        token = manager.issue_access_token(session)
+
+        assert await manager.validate_access_token(token, make_request(user_agent="other")) is None
+        assert f"session:{session.session_id}" not in client.strings
+        assert await manager.validate_access_token(token, make_request()) is None
+
+        refreshed = await manager.refresh_access_token(session.session_id, make_request())
+        assert refreshed is None
+        await manager.close()
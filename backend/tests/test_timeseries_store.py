@@ -0,0 +1,137 @@
+"""
+Test suite for the columnar time-series store
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from analytics.timeseries_store import (
+    Aggregation,
+    RingSeries,
+    TimeSeriesStore,
+    downsample,
+    from_ns,
+    parse_period,
+    to_ns
+)
+
+
+START = datetime(2026, 3, 1)
+SECOND = 1_000_000_000
+
+
+def _seconds(values):
+    return [int(ts // SECOND) - to_ns(START) // SECOND for ts in values]
+
+
+class TestRingSeries:
+    """Test cases for the ring buffer"""
+
+    def test_wraps_and_keeps_latest_points(self):
+        """Only the newest capacity points are kept, in order"""
+        series = RingSeries(capacity=5)
+        for i in range(12):
+            series.append(START + timedelta(seconds=i), float(i))
+
+        data = series.range()
+        assert len(series) == 5
+        assert list(data.values) == [7.0, 8.0, 9.0, 10.0, 11.0]
+        assert _seconds(data.timestamps) == [7, 8, 9, 10, 11]
+        assert list(series.last(2).values) == [10.0, 11.0]
+
+    def test_range_query_across_the_wrap_point(self):
+        """start is inclusive and end exclusive, even when the range spans both segments"""
+        series = RingSeries(capacity=8)
+        series.extend([START + timedelta(seconds=i) for i in range(11)], np.arange(11.0))
+
+        data = series.range(START + timedelta(seconds=4), START + timedelta(seconds=9))
+        assert list(data.values) == [4.0, 5.0, 6.0, 7.0, 8.0]
+        assert data.datetimes()[0] == START + timedelta(seconds=4)
+
+    def test_out_of_order_points_are_sorted_on_read(self):
+        """Late points are accepted and returned in time order"""
+        series = RingSeries(capacity=10)
+        for offset in (0, 2, 1, 3):
+            series.append(START + timedelta(seconds=offset), float(offset))
+
+        assert list(series.range().values) == [0.0, 1.0, 2.0, 3.0]
+        assert list(series.range(START + timedelta(seconds=1), START + timedelta(seconds=3)).values) == [1.0, 2.0]
+
+    def test_grows_on_demand_up_to_capacity(self):
+        """Buffers start small, double as points arrive, then wrap at capacity"""
+        series = RingSeries(capacity=10, initial_capacity=2)
+        assert series.nbytes == 2 * 16
+        for i in range(3):
+            series.append(START + timedelta(seconds=i), float(i))
+        assert series.nbytes == 4 * 16
+
+        series.extend([START + timedelta(seconds=i) for i in range(3, 12)], np.arange(3.0, 12.0))
+        assert series.nbytes == 10 * 16
+        assert len(series) == 10
+        assert list(series.range().values) == list(np.arange(2.0, 12.0))
+        assert list(series.last(3).values) == [9.0, 10.0, 11.0]
+
+
+class TestDownsampling:
+    """Test cases for bucketed aggregation"""
+
+    def test_ohlc_mean_and_last(self):
+        """Buckets aggregate the points that fall inside them"""
+        series = RingSeries(capacity=100)
+        prices = [10.0, 12.0, 9.0, 11.0, 20.0, 18.0]
+        series.extend([START + timedelta(seconds=10 * i) for i in range(6)], prices)
+
+        ohlc = series.downsample(timedelta(seconds=40), Aggregation.OHLC)
+        assert [int(c) for c in ohlc.count] == [4, 2]
+        assert list(ohlc.open) == [10.0, 20.0]
+        assert list(ohlc.high) == [12.0, 20.0]
+        assert list(ohlc.low) == [9.0, 18.0]
+        assert list(ohlc.close) == [11.0, 18.0]
+
+        mean = series.downsample(timedelta(seconds=40), Aggregation.MEAN)
+        assert list(mean.value) == pytest.approx([10.5, 19.0])
+        last = series.downsample(timedelta(seconds=40), "last")
+        assert last.to_records()[1]["value"] == 18.0
+        assert from_ns(mean.bucket_start[0]) <= START
+
+    def test_empty_series(self):
+        """Downsampling nothing returns empty columns"""
+        result = downsample(RingSeries(capacity=4).range(), timedelta(minutes=1), Aggregation.OHLC)
+        assert len(result) == 0
+        assert len(result.close) == 0
+
+
+class TestTimeSeriesStore:
+    """Test cases for the keyed store and the memory-mapped tier"""
+
+    def test_evicted_points_spill_to_disk_and_survive_reopen(self, tmp_path):
+        """Range queries cover the disk tier, which persists across instances"""
+        store = TimeSeriesStore(capacity=4, disk_dir=str(tmp_path), disk_capacity=100)
+        for i in range(10):
+            store.append("SOL:price", START + timedelta(seconds=i), float(i))
+        store.extend("SOL:price", [START + timedelta(seconds=i) for i in range(10, 15)], np.arange(10.0, 15.0))
+
+        assert store.count("SOL:price") == 4
+        assert list(store.range("SOL:price").values) == list(np.arange(15.0))
+        store.flush()
+
+        reopened = TimeSeriesStore(capacity=4, disk_dir=str(tmp_path), disk_capacity=100)
+        assert list(reopened.range("SOL:price").values) == list(np.arange(11.0))
+
+    def test_unknown_series_and_memory_footprint(self):
+        """Missing keys read as empty; memory is the preallocated columns"""
+        store = TimeSeriesStore(capacity=1000)
+        assert len(store.range("missing")) == 0
+        assert len(store.last("missing", 5)) == 0
+
+        store.append("a", START, 1.0)
+        assert store.memory_bytes() == 1000 * 16
+
+        growing = TimeSeriesStore(capacity=1000, initial_capacity=16)
+        growing.extend("a", [START + timedelta(seconds=i) for i in range(20)], np.arange(20.0))
+        assert growing.memory_bytes() == 32 * 16
+        assert parse_period("24h") == timedelta(hours=24)
+        with pytest.raises(ValueError):
+            parse_period("soon")
@@ -0,0 +1,138 @@
+"""
+Test suite for request-scoped tracing
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from middleware.tracing_middleware import TracedJSONResponse, tracing_middleware
+from monitoring.tracing import (
+    InMemoryExporter,
+    TracedRedis,
+    parse_traceparent,
+    to_otlp,
+    trace_engine,
+    tracer
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+
+class FakeAsyncRedis:
+    async def get(self, key):
+        await asyncio.sleep(0)
+        return b"1"
+
+
+@pytest.fixture
+def traced_app():
+    previous = (tracer.sample_rate, tracer.exporter)
+    tracer.exporter = InMemoryExporter()
+    engine = trace_engine(create_engine("sqlite://"))
+    cache = TracedRedis(FakeRedis())
+
+    app = FastAPI(default_response_class=TracedJSONResponse)
+    app.middleware("http")(tracing_middleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        cache.set("last", item_id)
+        with engine.connect() as conn:
+            value = conn.execute(text("SELECT :v"), {"v": item_id}).scalar()
+        with tracer.span("price lookup"):
+            cache.get("last")
+        return {"item_id": value}
+
+    yield TestClient(app)
+    tracer.sample_rate, tracer.exporter = previous
+
+
+class TestTracing:
+    """Test cases for sampling, span capture and export"""
+
+    def test_sampled_request_records_span_breakdown(self, traced_app):
+        """DB, redis and serialization spans hang off the request span"""
+        tracer.sample_rate = 1.0
+        response = traced_app.get("/items/7")
+
+        assert response.json() == {"item_id": 7}
+        timing = response.headers["Server-Timing"]
+        for category in ("db;dur=", "redis;dur=", "serialize;dur=", "total;dur="):
+            assert category in timing
+        assert [entry for entry in timing.split(", ") if entry.startswith("redis")][0].endswith('desc="2 calls"')
+
+        spans = tracer.exporter.get(response.headers["X-Trace-Id"])
+        by_name = {span["name"]: span for span in spans}
+        root = by_name["GET /items/{item_id}"]
+        assert root["attributes"]["http.status_code"] == 200
+        assert by_name["db SELECT"]["parent_id"] == root["span_id"]
+        assert by_name["db SELECT"]["attributes"]["db.statement"] == "SELECT ?"
+        assert by_name["redis GET"]["parent_id"] == by_name["price lookup"]["span_id"]
+        assert tracer.exporter.recent(1)[0]["breakdown_ms"].keys() >= {"db", "redis", "serialize"}
+
+    def test_unsampled_request_keeps_only_timings(self, traced_app):
+        """Head sampling skips span objects but Server-Timing is still reported"""
+        tracer.sample_rate = 0.0
+        response = traced_app.get("/items/3")
+
+        assert "db;dur=" in response.headers["Server-Timing"]
+        assert "X-Trace-Id" not in response.headers
+        assert tracer.exporter.recent() == []
+
+    def test_upstream_sampling_decision_is_honoured(self, traced_app):
+        """A sampled traceparent forces tracing and keeps the caller's trace id"""
+        tracer.sample_rate = 0.0
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        response = traced_app.get("/items/1", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+
+        assert response.headers["X-Trace-Id"] == trace_id
+        assert tracer.exporter.get(trace_id)[0]["parent_id"] == "00f067aa0ba902b7"
+
+    def test_parse_traceparent_and_otlp_payload(self):
+        """Malformed headers are ignored; OTLP spans carry kind and attributes"""
+        assert parse_traceparent("garbage") is None
+        assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+        assert parse_traceparent("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00")[2] is False
+
+        trace, token = tracer.start_trace("job", "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+        handle = tracer.begin_span("rpc getBalance", "rpc", {"rpc.method": "getBalance", "retries": 2})
+        tracer.end_span(handle, RuntimeError("timeout"))
+        tracer.end_trace(trace, token)
+
+        payload = to_otlp([trace.root] + trace.spans, "soladia-backend")
+        spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [span["kind"] for span in spans] == [2, 3]
+        assert spans[1]["status"] == {"code": 2, "message": "timeout"}
+        assert {"key": "retries", "value": {"intValue": "2"}} in spans[1]["attributes"]
+
+    def test_async_redis_and_no_active_trace(self):
+        """Awaitable commands are timed when awaited; outside a request nothing is recorded"""
+        client = TracedRedis(FakeAsyncRedis())
+
+        async def scenario():
+            assert await client.get("k") == b"1"
+            trace, token = tracer.start_trace("job")
+            await client.get("k")
+            tracer.end_trace(trace, token)
+            return trace
+
+        trace = asyncio.run(scenario())
+        assert trace.timings["redis"][1] == 1
+
+    def test_main_app_sets_server_timing(self, client):
+        """Every response from the main app carries a Server-Timing header"""
+        response = client.get("/")
+        assert "total;dur=" in response.headers["Server-Timing"]
@@ -12,6 +12,8 @@ import uuid
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
 
+from monitoring.instrumentation import WEBSOCKET_FANOUT_DURATION, WEBSOCKET_FANOUT_RECIPIENTS
+
 logger = logging.getLogger(__name__)
 
 class MessageType(Enum):
@@ -209,13 +211,18 @@ class ConnectionManager:
     async def send_to_room(self, room: str, message: WebSocketMessage):
         """Send message to all connections in a room"""
         if room in self.room_connections:
-            for connection_id in self.room_connections[room]:
-                await self.send_to_connection(connection_id, message)
+            WEBSOCKET_FANOUT_RECIPIENTS.labels("room").observe(len(self.room_connections[room]))
+            with WEBSOCKET_FANOUT_DURATION.labels("room").time():
+                for connection_id in self.room_connections[room]:
+                    await self.send_to_connection(connection_id, message)
     
     async def broadcast_message(self, message: WebSocketMessage):
         """Broadcast message to all connections"""
-        for connection_id in list(self.active_connections.keys()):
-            await self.send_to_connection(connection_id, message)
+        connection_ids = list(self.active_connections.keys())
+        WEBSOCKET_FANOUT_RECIPIENTS.labels("broadcast").observe(len(connection_ids))
+        with WEBSOCKET_FANOUT_DURATION.labels("broadcast").time():
+            for connection_id in connection_ids:
+                await self.send_to_connection(connection_id, message)
     
     async def send_notification(
         self,
@@ -10,6 +10,8 @@ from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime, timezone
 import uuid
 
+from monitoring.instrumentation import WEBSOCKET_FANOUT_DURATION, WEBSOCKET_FANOUT_RECIPIENTS
+
 logger = logging.getLogger(__name__)
 
 class ConnectionManager:
@@ -95,8 +97,10 @@ class ConnectionManager:
         """Broadcast a message to all connections subscribed to a topic"""
         if topic in self.subscriptions:
             connections = self.subscriptions[topic].copy()
-            for connection in connections:
-                await self.send_personal_message(message, connection)
+            WEBSOCKET_FANOUT_RECIPIENTS.labels("topic").observe(len(connections))
+            with WEBSOCKET_FANOUT_DURATION.labels("topic").time():
+                for connection in connections:
+                    await self.send_personal_message(message, connection)
     
     async def subscribe_to_topic(self, websocket: WebSocket, topic: str):
         """Subscribe a connection to a topic"""